@@ -0,0 +1,44 @@
+"""add_list_keyset_expression_indexes
+
+Revision ID: 0c4e9a7d2f61
+Revises: e5b7a3c19d40
+Create Date: 2026-10-19 20:41:07.532918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4e9a7d2f61'
+down_revision: Union[str, Sequence[str], None] = 'e5b7a3c19d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 목록 키셋 페이지네이션 정렬 키 (app.api.utils.listing.keyset_date_key 와 같은 식)
+INDEXES = [
+    ('ix_sales_orders_order_date_keyset', 'sales_orders', 'order_date'),
+    ('ix_sales_orders_delivery_date_keyset', 'sales_orders', 'delivery_date'),
+    ('ix_sales_orders_actual_delivery_date_keyset', 'sales_orders', 'actual_delivery_date'),
+    ('ix_purchase_orders_order_date_keyset', 'purchase_orders', 'order_date'),
+    ('ix_outsourcing_orders_order_date_keyset', 'outsourcing_orders', 'order_date'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 서버 기동 시 동일 인덱스를 먼저 만들었을 수 있으므로 IF NOT EXISTS
+    for name, table, date_column in INDEXES:
+        op.create_index(
+            name, table, [sa.text(f"coalesce({date_column}, '1900-01-01')"), 'id'],
+            unique=False, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,58 @@
+"""add_settlement_and_list_query_indexes
+
+Revision ID: b7e3c91d4a28
+Revises: fa8ed189c675
+Create Date: 2026-10-19 10:12:41.308215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c91d4a28'
+down_revision: Union[str, Sequence[str], None] = 'fa8ed189c675'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 정산/목록 조회의 (상태, 일자) 범위 조건과 FK 조인용 인덱스
+INDEXES = [
+    ('ix_sales_orders_status_order_date', 'sales_orders', ['status', 'order_date']),
+    ('ix_sales_order_items_order_id', 'sales_order_items', ['order_id']),
+    ('ix_sales_order_items_product_id', 'sales_order_items', ['product_id']),
+    ('ix_delivery_histories_delivery_date', 'delivery_histories', ['delivery_date']),
+    ('ix_delivery_histories_order_id', 'delivery_histories', ['order_id']),
+    ('ix_delivery_history_items_delivery_id', 'delivery_history_items', ['delivery_id']),
+    ('ix_delivery_history_items_order_item_id', 'delivery_history_items', ['order_item_id']),
+    ('ix_purchase_orders_status_actual_delivery_date', 'purchase_orders', ['status', 'actual_delivery_date']),
+    ('ix_purchase_orders_order_date_id', 'purchase_orders', ['order_date', 'id']),
+    ('ix_purchase_order_items_purchase_order_id', 'purchase_order_items', ['purchase_order_id']),
+    ('ix_purchase_order_items_product_id', 'purchase_order_items', ['product_id']),
+    ('ix_outsourcing_orders_status_actual_delivery_date', 'outsourcing_orders', ['status', 'actual_delivery_date']),
+    ('ix_outsourcing_orders_order_date_id', 'outsourcing_orders', ['order_date', 'id']),
+    ('ix_outsourcing_order_items_outsourcing_order_id', 'outsourcing_order_items', ['outsourcing_order_id']),
+    ('ix_material_requirements_status_product_id', 'material_requirements', ['status', 'product_id']),
+    ('ix_production_plans_status_actual_completion_date', 'production_plans', ['status', 'actual_completion_date']),
+    ('ix_production_plan_items_plan_id', 'production_plan_items', ['plan_id']),
+    ('ix_quality_defects_defect_date', 'quality_defects', ['defect_date']),
+    ('ix_customer_complaints_receipt_date', 'customer_complaints', ['receipt_date']),
+    ('ix_approval_documents_type_status_created', 'approval_documents', ['doc_type', 'status', 'created_at']),
+    ('ix_approval_documents_author_created', 'approval_documents', ['author_id', 'created_at']),
+    ('ix_employee_time_records_staff_date', 'employee_time_records', ['staff_id', 'record_date']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 서버 기동 시 동일 인덱스를 먼저 만들었을 수 있으므로 IF NOT EXISTS
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
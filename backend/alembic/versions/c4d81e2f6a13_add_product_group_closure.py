@@ -0,0 +1,45 @@
+"""add_product_group_closure
+
+Revision ID: c4d81e2f6a13
+Revises: b7e3c91d4a28
+Create Date: 2026-10-19 15:02:17.514903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d81e2f6a13'
+down_revision: Union[str, Sequence[str], None] = 'b7e3c91d4a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 행 채우기(closure / major_group_id)는 서버 기동 시 refresh_group_hierarchy() 가 수행
+    op.create_table(
+        'product_group_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_product_group_closure_descendant', 'product_group_closure', ['descendant_id'],
+                    unique=False, if_not_exists=True)
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('major_group_id', sa.Integer(), nullable=True))
+    op.create_index('ix_products_major_group_id', 'products', ['major_group_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_major_group_id', table_name='products', if_exists=True)
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('major_group_id')
+    op.drop_index('ix_product_group_closure_descendant', table_name='product_group_closure', if_exists=True)
+    op.drop_table('product_group_closure')
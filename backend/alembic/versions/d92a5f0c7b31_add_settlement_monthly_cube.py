@@ -0,0 +1,48 @@
+"""add_settlement_monthly_cube
+
+Revision ID: d92a5f0c7b31
+Revises: c4d81e2f6a13
+Create Date: 2026-10-19 16:41:08.227461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd92a5f0c7b31'
+down_revision: Union[str, Sequence[str], None] = 'c4d81e2f6a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 행 채우기는 서버 기동 시 rebuild_monthly_cube() 가 수행
+    op.create_table(
+        'settlement_monthly_cube',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('major_group_id', sa.Integer(), nullable=True),
+        sa.Column('partner_id', sa.Integer(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('amount_krw', sa.Float(), nullable=True),
+        sa.Column('row_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_settlement_monthly_cube_id'), 'settlement_monthly_cube', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_settlement_monthly_cube_kind_period', 'settlement_monthly_cube', ['kind', 'year', 'month'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_settlement_monthly_cube_kind_period', table_name='settlement_monthly_cube', if_exists=True)
+    op.drop_index(op.f('ix_settlement_monthly_cube_id'), table_name='settlement_monthly_cube', if_exists=True)
+    op.drop_table('settlement_monthly_cube')
@@ -0,0 +1,98 @@
+"""add_quality_rollup_tables
+
+Revision ID: e5b7a3c19d40
+Revises: d92a5f0c7b31
+Create Date: 2026-10-19 18:03:52.119374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7a3c19d40'
+down_revision: Union[str, Sequence[str], None] = 'd92a5f0c7b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 행 채우기는 서버 기동 시 rebuild_quality_rollups() 가 수행
+    op.create_table(
+        'quality_defect_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('defect_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('process_name', sa.String(), nullable=True),
+        sa.Column('worker_id', sa.Integer(), nullable=True),
+        sa.Column('defect_reason', sa.String(), nullable=True),
+        sa.Column('defect_count', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_quality_defect_daily_id'), 'quality_defect_daily', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_quality_defect_daily_date', 'quality_defect_daily', ['defect_date'], unique=False, if_not_exists=True)
+
+    op.create_table(
+        'quality_process_output_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('process_name', sa.String(), nullable=True),
+        sa.Column('worker_id', sa.Integer(), nullable=True),
+        sa.Column('good_quantity', sa.Integer(), nullable=True),
+        sa.Column('bad_quantity', sa.Integer(), nullable=True),
+        sa.Column('item_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_quality_process_output_daily_id'), 'quality_process_output_daily', ['id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_quality_process_output_daily_date', 'quality_process_output_daily', ['work_date'],
+                    unique=False, if_not_exists=True)
+
+    op.create_table(
+        'quality_complaint_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('receipt_date', sa.Date(), nullable=False),
+        sa.Column('partner_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('complaint_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_quality_complaint_daily_id'), 'quality_complaint_daily', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_quality_complaint_daily_date', 'quality_complaint_daily', ['receipt_date'],
+                    unique=False, if_not_exists=True)
+
+    op.create_table(
+        'quality_rollup_dirty',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rollup', sa.String(), nullable=False),
+        sa.Column('key_date', sa.Date(), nullable=True),
+        sa.Column('ref_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_quality_rollup_dirty_id'), 'quality_rollup_dirty', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_quality_rollup_dirty_id'), table_name='quality_rollup_dirty', if_exists=True)
+    op.drop_table('quality_rollup_dirty')
+    op.drop_index('ix_quality_complaint_daily_date', table_name='quality_complaint_daily', if_exists=True)
+    op.drop_index(op.f('ix_quality_complaint_daily_id'), table_name='quality_complaint_daily', if_exists=True)
+    op.drop_table('quality_complaint_daily')
+    op.drop_index('ix_quality_process_output_daily_date', table_name='quality_process_output_daily', if_exists=True)
+    op.drop_index(op.f('ix_quality_process_output_daily_id'), table_name='quality_process_output_daily', if_exists=True)
+    op.drop_table('quality_process_output_daily')
+    op.drop_index('ix_quality_defect_daily_date', table_name='quality_defect_daily', if_exists=True)
+    op.drop_index(op.f('ix_quality_defect_daily_id'), table_name='quality_defect_daily', if_exists=True)
+    op.drop_table('quality_defect_daily')
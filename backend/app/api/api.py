@@ -23,3 +23,9 @@ api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
 api_router.include_router(db_manager.router, prefix="/db-manager", tags=["db-manager"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(settlement.router, prefix="/settlement", tags=["settlement"])
+
+from app.api.endpoints import search
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+
+from app.api.endpoints import analytics_export
+api_router.include_router(analytics_export.router, prefix="/analytics-export", tags=["analytics-export"])
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.background import BackgroundTask
+from typing import Any, List, Optional
+import asyncio
+import os
+import re
+
+from app.api import deps
+from app.api.deps import get_db
+from app.models.analytics import AnalyticsExportPartition
+from app.models.basics import Staff
+from app.schemas.analytics import AnalyticsExportRunRequest, AnalyticsExportPartitionResponse
+from app.api.utils.analytics_export import (
+    DATASETS, PARTITION_FILE, pyarrow_available, partition_dir, submit_export_job, get_export_job, build_dataset_zip,
+)
+
+router = APIRouter()
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def _check_dataset(dataset: str) -> None:
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 데이터셋입니다: {dataset}")
+
+
+@router.get("/datasets")
+async def list_analytics_datasets(
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """내보내기 대상 데이터셋과 컬럼 목록"""
+    return [
+        {"dataset": ds.name, "columns": [{"name": n, "type": t} for n, t in ds.columns]}
+        for ds in DATASETS.values()
+    ]
+
+
+@router.get("/partitions", response_model=List[AnalyticsExportPartitionResponse])
+async def list_analytics_partitions(
+    dataset: Optional[str] = Query(None),
+    year: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """내보낸 월별 파티션 목록 (워터마크)"""
+    query = select(AnalyticsExportPartition).order_by(AnalyticsExportPartition.dataset, AnalyticsExportPartition.period)
+    if dataset:
+        query = query.where(AnalyticsExportPartition.dataset == dataset)
+    if year:
+        query = query.where(AnalyticsExportPartition.period.like(f"{year:04d}-%"))
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+@router.post("/run")
+async def run_analytics_export_job(
+    body: AnalyticsExportRunRequest,
+    current_user: Staff = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Parquet 내보내기 작업 시작 (기본: 워터마크 이후 변경된 월만, full=true 면 전체).
+    진행 중인 작업이 있으면 그 작업 상태를 반환합니다.
+    """
+    if current_user.user_type != "ADMIN":
+        raise HTTPException(status_code=403, detail="시스템 관리자만 실행할 수 있습니다.")
+    if not pyarrow_available():
+        raise HTTPException(status_code=503, detail="서버에 pyarrow 가 설치되어 있지 않습니다.")
+    for name in body.datasets or []:
+        _check_dataset(name)
+    return submit_export_job(full=body.full, datasets=body.datasets)
+
+
+@router.get("/jobs/{job_id}")
+async def read_analytics_export_job(
+    job_id: str,
+    current_user: Staff = Depends(deps.get_current_user)
+) -> Any:
+    """내보내기 작업 상태 조회 (PENDING, RUNNING, COMPLETED, FAILED)"""
+    job = get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.get("/{dataset}/{period}")
+async def download_analytics_partition(
+    dataset: str,
+    period: str,
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """월 파티션 Parquet 파일 다운로드 (period: YYYY-MM)"""
+    _check_dataset(dataset)
+    if not re.fullmatch(r"\d{4}-\d{2}", period):
+        raise HTTPException(status_code=400, detail="period 는 YYYY-MM 형식이어야 합니다.")
+    path = os.path.join(partition_dir(dataset, period), PARTITION_FILE)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="내보낸 파일이 없습니다.")
+    return FileResponse(path, media_type=PARQUET_MEDIA_TYPE, filename=f"{dataset}_{period}.parquet")
+
+
+@router.get("/{dataset}")
+async def download_analytics_dataset(
+    dataset: str,
+    year: Optional[int] = Query(None, description="지정 시 해당 연도 파티션만"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """데이터셋 파티션 묶음(zip) 다운로드 — 압축 해제 후 pandas.read_parquet(\"<dataset>\") 로 바로 읽을 수 있습니다."""
+    _check_dataset(dataset)
+    query = select(AnalyticsExportPartition.period).where(AnalyticsExportPartition.dataset == dataset)
+    if year:
+        query = query.where(AnalyticsExportPartition.period.like(f"{year:04d}-%"))
+    periods = list((await db.execute(query.order_by(AnalyticsExportPartition.period))).scalars().all())
+    if not periods:
+        raise HTTPException(status_code=404, detail="내보낸 파일이 없습니다.")
+
+    path = await asyncio.to_thread(build_dataset_zip, dataset, periods)
+    suffix = f"_{year}" if year else ""
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{dataset}{suffix}.zip",
+        background=BackgroundTask(os.remove, path),
+    )
@@ -19,6 +19,7 @@ except ImportError:
     sse_broadcaster = None
 
 from app.api import deps
+from app.api.utils.date_ranges import on_or_after_day, on_or_before_day
 from app.core.timezone import now_kst
 from app.models.approval import ApprovalDocument, ApprovalLine, ApprovalStep, ApprovalStatus, ApprovalAttachment
 from app.models.basics import Staff, EmployeeTimeRecord, Company
@@ -233,8 +234,8 @@ async def set_approval_lines(
 async def list_documents(
     view_mode: str = "ALL", # ALL, MY_DRAFTS, MY_WAITING, MY_COMPLETED, MY_REJECTED, WAITING_FOR_ME, ALL_PENDING, ALL_COMPLETED, ALL_REJECTED
     doc_type: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     author_id: Optional[int] = None,
     db: AsyncSession = Depends(deps.get_db),
     current_user: Staff = Depends(deps.get_current_user)
@@ -248,9 +249,9 @@ async def list_documents(
     if doc_type:
         query = query.where(ApprovalDocument.doc_type == doc_type)
     if start_date:
-        query = query.where(func.date(ApprovalDocument.created_at) >= start_date)
+        query = query.where(on_or_after_day(ApprovalDocument.created_at, start_date))
     if end_date:
-        query = query.where(func.date(ApprovalDocument.created_at) <= end_date)
+        query = query.where(on_or_before_day(ApprovalDocument.created_at, end_date))
     if author_id:
         query = query.where(ApprovalDocument.author_id == author_id)
 
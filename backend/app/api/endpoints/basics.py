@@ -16,7 +16,8 @@ from fastapi import UploadFile, File
 from app.api import deps
 get_db = deps.get_db
 from app.api.utils.email import send_sysadmin_email
-from app.models.basics import Partner, Staff, Contact, Company, Equipment, EquipmentHistory, FormTemplate, MeasuringInstrument, MeasurementHistory, EmployeeTimeRecord, IgnoredPartnerDuplicate, Department
+from app.api.utils.fx import restamp_for_rate
+from app.models.basics import Partner, Staff, Contact, Company, Equipment, EquipmentHistory, FormTemplate, MeasuringInstrument, MeasurementHistory, EmployeeTimeRecord, IgnoredPartnerDuplicate, Department, ExchangeRate
 from app.schemas.basics import (
     PartnerCreate, PartnerResponse, PartnerUpdate,
     StaffCreate, StaffResponse, StaffUpdate,
@@ -27,7 +28,8 @@ from app.schemas.basics import (
     MeasuringInstrumentCreate, MeasuringInstrumentResponse, MeasuringInstrumentUpdate,
     MeasurementHistoryCreate, MeasurementHistoryResponse,
     IgnoredDuplicateCreate, IgnoredDuplicateResponse,
-    DepartmentCreate, DepartmentUpdate, DepartmentResponse
+    DepartmentCreate, DepartmentUpdate, DepartmentResponse,
+    ExchangeRateCreate, ExchangeRateResponse
 )
 from dateutil.relativedelta import relativedelta
 
@@ -1277,3 +1279,73 @@ async def delete_department(
     await db.delete(dept)
     await db.commit()
     return {"message": "부서가 삭제되었습니다."}
+
+
+# --- Exchange Rates ---
+
+@router.get("/exchange-rates/", response_model=List[ExchangeRateResponse])
+async def list_exchange_rates(
+    currency: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """일자별 환율 목록 (최신순)"""
+    query = select(ExchangeRate)
+    if currency:
+        query = query.where(ExchangeRate.currency == currency.upper())
+    if start_date:
+        query = query.where(ExchangeRate.rate_date >= start_date)
+    if end_date:
+        query = query.where(ExchangeRate.rate_date <= end_date)
+    result = await db.execute(query.order_by(ExchangeRate.rate_date.desc(), ExchangeRate.currency))
+    return result.scalars().all()
+
+@router.put("/exchange-rates/", response_model=ExchangeRateResponse)
+async def upsert_exchange_rate(
+    rate_in: ExchangeRateCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    환율 등록/수정 (같은 일자·통화는 덮어씀).
+    해당 환율이 적용되는 기간의 수주/납품/발주 품목 원화 금액을 다시 환산합니다.
+    """
+    currency = rate_in.currency.upper()
+    if currency == "KRW":
+        raise HTTPException(status_code=400, detail="KRW 환율은 등록할 수 없습니다.")
+    if rate_in.rate <= 0:
+        raise HTTPException(status_code=400, detail="환율은 0보다 커야 합니다.")
+
+    result = await db.execute(
+        select(ExchangeRate).where(ExchangeRate.rate_date == rate_in.rate_date, ExchangeRate.currency == currency)
+    )
+    rate = result.scalars().first()
+    if rate:
+        rate.rate = rate_in.rate
+        rate.note = rate_in.note
+    else:
+        rate = ExchangeRate(rate_date=rate_in.rate_date, currency=currency, rate=rate_in.rate, note=rate_in.note)
+        db.add(rate)
+    await db.flush()
+
+    restamped = await restamp_for_rate(db, currency, rate_in.rate_date)
+    await db.commit()
+    await db.refresh(rate)
+    print(f"[exchange-rate] {currency} {rate_in.rate_date} = {rate_in.rate} ({restamped} rows restamped)")
+    return rate
+
+@router.delete("/exchange-rates/{rate_id}")
+async def delete_exchange_rate(
+    rate_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """환율 삭제 (해당 기간은 직전 환율로 재환산)"""
+    rate = await db.get(ExchangeRate, rate_id)
+    if not rate:
+        raise HTTPException(status_code=404, detail="환율을 찾을 수 없습니다.")
+    currency, rate_date = rate.currency, rate.rate_date
+    await db.delete(rate)
+    await db.flush()
+    restamped = await restamp_for_rate(db, currency, rate_date)
+    await db.commit()
+    return {"message": "환율이 삭제되었습니다.", "restamped": restamped}
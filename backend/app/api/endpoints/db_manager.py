@@ -16,6 +16,7 @@ from app.core.timezone import now_kst
 from app.models.basics import Partner, Staff, Equipment
 from app.models.product import Product
 from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus
+from app.api.utils.fx import stamp_sales_orders_krw
 
 router = APIRouter()
 
@@ -330,6 +331,7 @@ async def confirm_orders(
         so_count = result_count.scalar() or 0
         
         # 3. Insert Orders (1 Order per row for Simplicity)
+        created_order_ids = []
         for idx, item in enumerate(items):
             p_id = item.partner_id if item.partner_mapping_type == "EXISTING" else new_partner_map.get(item.new_partner_name)
             prod_id = item.product_id
@@ -350,6 +352,7 @@ async def confirm_orders(
             )
             db.add(db_order)
             await db.flush()
+            created_order_ids.append(db_order.id)
             
             db_item = SalesOrderItem(
                 order_id=db_order.id,
@@ -360,6 +363,9 @@ async def confirm_orders(
             )
             db.add(db_item)
 
+        # 4. 원화 환산 금액 기록 (수주 등록/수정과 같은 트랜잭션)
+        await stamp_sales_orders_krw(db, created_order_ids)
+
         await db.commit()
         return {"message": f"총 {len(items)}건의 수주가 성공적으로 등록되었습니다."}
     except Exception as e:
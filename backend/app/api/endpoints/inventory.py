@@ -20,8 +20,9 @@ try:
 except ImportError:
     sse_broadcaster = None
 
-from app.utils.push import notify_production_manager
-import asyncio
+from app.api.utils.outbox import enqueue_production_manager_notice, wake_outbox_consumer
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.search import product_search_ids, product_name_search_ids
 
 router = APIRouter()
 
@@ -132,16 +133,9 @@ async def read_stocks(
     if partner_id:
         query = query.where(Product.partner_id == partner_id)
     if product_name:
-        query = query.where(
-            or_(
-                Product.name.ilike(f"%{product_name}%"),
-                Product.specification.ilike(f"%{product_name}%")
-            )
-        )
+        query = query.where(Product.id.in_(product_search_ids(product_name)))
     if major_group_id:
-        from app.models.product import ProductGroup
-        subquery = select(Product.id).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        subquery = select(Product.id).where(product_group_filter(major_group_id))
         query = query.where(Product.id.in_(subquery))
 
     # Bug 2 Fix: Exclude CONSUMABLE items but handle NULL item_type safely
@@ -484,12 +478,10 @@ async def read_stock_productions(
     if partner_id:
         query = query.where(StockProduction.partner_id == partner_id)
     if product_name:
-        query = query.where(Product.name.ilike(f"%{product_name}%"))
+        query = query.where(Product.id.in_(product_name_search_ids(product_name)))
         
     if major_group_id:
-        from app.models.product import ProductGroup
-        subquery = select(StockProduction.id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        subquery = select(StockProduction.id).join(Product).where(product_group_filter(major_group_id))
         query = query.where(StockProduction.id.in_(subquery))
 
     
@@ -543,6 +535,14 @@ async def create_stock_production(
                 db.add(stock)
             else:
                 stock.in_production_quantity += prod_in.quantity
+
+            # 생산부 부장 알림 (아웃박스 이벤트로 기록 → 커밋 후 백그라운드 발송/재시도)
+            await enqueue_production_manager_notice(
+                db,
+                title="[생산] 신규 재고생산 요청",
+                body=f"신규 재고생산 요청({prod_in.production_no})이 등록되어 생산 대기 리스트에 추가되었습니다.",
+                url="/production/waiting"
+            )
                 
             await db.commit()
             await db.refresh(new_prod)
@@ -556,12 +556,7 @@ async def create_stock_production(
                 continue
             raise  # 다른 에러이거나 재시도 횟수 초과 시 그대로 예외 발생
 
-    # 생산부 부장 알림 발송 (비동기)
-    asyncio.create_task(notify_production_manager(
-        title="[생산] 신규 재고생산 요청",
-        body=f"신규 재고생산 요청({new_prod.production_no})이 등록되어 생산 대기 리스트에 추가되었습니다.",
-        url="/production/waiting"
-    ))
+    wake_outbox_consumer()
     
     # Reload with product and its relations to avoid MissingGreenlet
     query = select(StockProduction).where(StockProduction.id == new_prod.id).options(
@@ -610,15 +605,17 @@ async def update_stock_production(
             stock.in_production_quantity -= db_prod.quantity
             stock.current_quantity += db_prod.quantity
 
-    await db.commit()
-    await db.refresh(db_prod)
-
-    # 생산부 부장 알림 발송 (수정 시 알림 추가)
-    asyncio.create_task(notify_production_manager(
+    # 생산부 부장 알림 (수정 시 알림 추가)
+    await enqueue_production_manager_notice(
+        db,
         title="[생산] 재고생산 요청 수정",
         body=f"재고생산 요청({db_prod.production_no})이 수정되었습니다. 생산 대기 리스트를 확인해 주세요.",
         url="/production/waiting"
-    ))
+    )
+
+    await db.commit()
+    await db.refresh(db_prod)
+    wake_outbox_consumer()
     
     query = select(StockProduction).where(StockProduction.id == prod_id).options(
         selectinload(StockProduction.product),
@@ -918,16 +915,14 @@ async def read_production_orders(
 
     if product_name:
         name_subq = select(StockProduction.order_id).join(Product)\
-            .where(Product.name.ilike(f"%{product_name}%"), StockProduction.order_id.is_not(None))
+            .where(Product.id.in_(product_name_search_ids(product_name)), StockProduction.order_id.is_not(None))
         query = query.where(StockProductionOrder.id.in_(name_subq))
 
     if major_group_id:
-        from app.models.product import ProductGroup
         grp_subq = select(StockProduction.order_id)\
             .join(Product)\
-            .join(ProductGroup, Product.group_id == ProductGroup.id)\
             .where(
-                or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id),
+                product_group_filter(major_group_id),
                 StockProduction.order_id.is_not(None)
             )
         query = query.where(StockProductionOrder.id.in_(grp_subq))
@@ -984,14 +979,16 @@ async def create_production_order(
                 else:
                     stock.in_production_quantity = (stock.in_production_quantity or 0) + item_in.quantity
 
-            await db.commit()
-
-            # 알림 전송
-            asyncio.create_task(notify_production_manager(
+            # 알림 전송 (아웃박스)
+            await enqueue_production_manager_notice(
+                db,
                 title="[생산] 신규 재고생산 요청",
                 body=f"신규 재고생산 요청({order_no}, {len(order_in.items)}건)이 등록되었습니다.",
                 url="/production/waiting"
-            ))
+            )
+
+            await db.commit()
+            wake_outbox_consumer()
 
             # 완전한 관계 포함해서 재조회
             result = await db.execute(
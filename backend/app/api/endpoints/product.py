@@ -10,6 +10,8 @@ from app.models.product import Product, Process, ProductProcess, ProductGroup, B
 from app.models.sales import Estimate, EstimateItem, SalesOrder, SalesOrderItem
 from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem
 from app.models.basics import Partner
+from app.api.utils.pricing import refresh_latest_prices, get_latest_prices_for_products, SOURCE_MANUAL
+from app.api.utils.product_groups import product_group_filter, refresh_group_hierarchy, validate_group_parent
 from app.schemas.product import (
     ProductCreate, ProductResponse, ProcessCreate, ProcessResponse, 
     ProductUpdate, ProcessUpdate, ProductGroupCreate, ProductGroupResponse, 
@@ -25,8 +27,11 @@ async def create_group(
     group: ProductGroupCreate,
     db: AsyncSession = Depends(get_db)
 ):
+    await validate_group_parent(db, 0, group.parent_id)
     new_group = ProductGroup(**group.model_dump())
     db.add(new_group)
+    await db.flush()
+    await refresh_group_hierarchy(db)
     await db.commit()
     await db.refresh(new_group)
     return new_group
@@ -50,9 +55,15 @@ async def update_group(
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    for key, value in group_update.model_dump(exclude_unset=True).items():
+    update_data = group_update.model_dump(exclude_unset=True)
+    if "parent_id" in update_data:
+        await validate_group_parent(db, group_id, update_data["parent_id"])
+    for key, value in update_data.items():
         setattr(group, key, value)
     
+    if "parent_id" in update_data:
+        await db.flush()
+        await refresh_group_hierarchy(db)
     await db.commit()
     await db.refresh(group)
     return group
@@ -69,6 +80,8 @@ async def delete_group(
     
     try:
         await db.delete(group)
+        await db.flush()
+        await refresh_group_hierarchy(db)
         await db.commit()
     except Exception as e:
         await db.rollback()
@@ -102,11 +115,10 @@ async def read_processes(
     """
     query = select(Process)
     if major_group_id:
-        query = query.outerjoin(ProductGroup, Process.group_id == ProductGroup.id).where(
+        query = query.where(
             or_(
                 Process.group_id == None,
-                ProductGroup.id == major_group_id,
-                ProductGroup.parent_id == major_group_id
+                product_group_filter(major_group_id, Process.group_id)
             )
         )
     query = query.offset(skip).limit(limit)
@@ -155,6 +167,7 @@ async def create_product(
             note="초기 등록"
         )
         db.add(price_rec)
+        await refresh_latest_prices(db, [new_product.id], [SOURCE_MANUAL])
 
     # Auto-initialize Stock with 0 quantity
     from app.models.inventory import Stock
@@ -212,8 +225,7 @@ async def read_products(
     )
     
     if major_group_id:
-        query = query.join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        query = query.where(product_group_filter(major_group_id))
     elif group_id:
         query = query.where(Product.group_id == group_id)
     
@@ -235,17 +247,11 @@ async def read_products(
     result = await db.execute(query.offset(skip).limit(limit))
     products = result.unique().scalars().all()
     
-    # Enrich with latest_price
+    # Enrich with latest_price (최근 단가 테이블 1회 조회, 품목 유형별 출처 규칙은 pricing 모듈 참고)
+    latest_prices = await get_latest_prices_for_products(db, products)
     enriched_products = []
     for p in products:
-        # [Fix] 품목 유형에 따라 적절한 단가 이력 함수 호출
-        if p.item_type in ["PART", "CONSUMABLE", "RAW_MATERIAL"]:
-            p_history = await get_product_purchase_history(p.id, db)
-        else:
-            p_history = await get_product_price_history(p.id, db)
-            
-        latest_price = p_history[0].unit_price if p_history else 0.0
-        p.latest_price = latest_price
+        p.latest_price = latest_prices.get(p.id, 0.0)
         p.partner_name = p.partner.name if p.partner else None
         enriched_products.append(p)
         
@@ -273,13 +279,8 @@ async def read_product(
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Enrich with latest_price and partner_name
-    # [Fix] 품목 유형에 따라 적절한 단가 이력 함수 호출
-    if product.item_type in ["PART", "CONSUMABLE", "RAW_MATERIAL"]:
-        p_history = await get_product_purchase_history(product.id, db)
-    else:
-        p_history = await get_product_price_history(product.id, db)
-        
-    product.latest_price = p_history[0].unit_price if p_history else 0.0
+    latest_prices = await get_latest_prices_for_products(db, [product])
+    product.latest_price = latest_prices.get(product.id, 0.0)
     product.partner_name = product.partner.name if product.partner else None
     
     return product
@@ -345,6 +346,7 @@ async def update_product(
             note="수동 수정"
         )
         db.add(price_rec)
+        await refresh_latest_prices(db, [product.id], [SOURCE_MANUAL])
 
     await db.commit()
     await db.refresh(product)
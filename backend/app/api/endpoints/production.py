@@ -8,9 +8,12 @@ from sqlalchemy.exc import MultipleResultsFound
 
 from app.api import deps
 from app.core.timezone import now_kst
-from app.models.production import ProductionPlan, ProductionPlanItem, ProductionStatus, WorkLog, WorkLogItem
+from app.models.production import (
+    ProductionPlan, ProductionPlanItem, ProductionStatus, WorkLog, WorkLogItem,
+    ProcessCycleTimeStat, WorkerDailyPerformance
+)
 from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus
-from app.models.product import Product, ProductProcess, Process, BOM, ProductGroup
+from app.models.product import Product, ProductProcess, Process, BOM
 from app.models.purchasing import (
     PurchaseOrderItem, OutsourcingOrderItem, PurchaseOrder, OutsourcingOrder, 
     PurchaseStatus, OutsourcingStatus, MaterialRequirement
@@ -19,16 +22,18 @@ from app.models.basics import Partner, Staff, Equipment
 from app.models.inventory import StockProduction, StockProductionOrder, Stock, StockProductionStatus, TransactionType
 
 from app.api.utils.inventory import handle_stock_movement, handle_backflush
+from app.api.utils.product_groups import product_group_filter
 from app.api.utils.status_cascade import on_production_item_completed
+from app.api.utils.cycle_time import recompute_cycle_time_stats, prefill_plan_item_estimates
+from app.api.utils.performance import get_performance_keys, refresh_worker_daily_performance, group_filter_ids
+from app.api.utils.production_sheet import load_plan_for_sheet, generate_sheet, submit_sheet_job, get_sheet_job
+from app.api.utils.outbox import enqueue_event, outbox_handler, wake_outbox_consumer
+from app.api.utils.search import product_name_search_ids
+from app.models.outbox import OutboxEvent
 from app.schemas import production as schemas
 from datetime import datetime, date
 import uuid
 import json
-import os
-import urllib.parse
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 
 # SSE 브로드캐스터 임포트 (실시간 업데이트용)
 try:
@@ -71,14 +76,17 @@ async def sync_plan_item_status(db: AsyncSession, plan_item_id: int):
     db.add(plan_item)
     
     # [NEW] 상태 전이(State Transition) 기반 재고 동기화
-    from app.api.utils.status_cascade import revert_production_item_completed, on_production_item_completed
-    
+    # 재고/발주 부수효과는 아웃박스 이벤트로 기록하고 백그라운드에서 처리 (같은 트랜잭션에 커밋됨)
     if old_status == ProductionStatus.COMPLETED and new_status != ProductionStatus.COMPLETED:
         # 생산 완료 -> 진행/대기: 재고 및 상태 롤백
-        await revert_production_item_completed(db, plan_item, reference=f"Status Sync (PI#{plan_item_id})")
+        await enqueue_event(db, "production.item_reverted", "production_plan", plan_item.plan_id,
+                            {"item_id": plan_item_id, "reference": f"Status Sync (PI#{plan_item_id})"})
     elif old_status != ProductionStatus.COMPLETED and new_status == ProductionStatus.COMPLETED:
-        # 진행/대기 -> 생산 완료: 재고 입고 및 소진
-        await on_production_item_completed(db, plan_item, reference=f"WorkLog (PI#{plan_item_id})")
+        # 진행/대기 -> 생산 완료: 재고 입고 및 소진 (헤더 완료 판정도 이벤트 처리 시 수행)
+        await enqueue_event(db, "production.item_completed", "production_plan", plan_item.plan_id,
+                            {"item_id": plan_item_id, "reference": f"WorkLog (PI#{plan_item_id})"})
+        await db.flush()
+        return
 
     await db.flush()
     
@@ -111,15 +119,10 @@ async def check_and_complete_production_plan(db: AsyncSession, plan_id: int):
         plan.status = ProductionStatus.COMPLETED
         plan.actual_completion_date = now_kst().date()
         db.add(plan)
-        await db.flush()
-        await db.commit()  # 완료 상태 먼저 확정
-        try:
-            await _handle_production_completion_effects(db, plan)
-            await db.commit()
-        except Exception as e:
-            print(f'[check_and_complete_production_plan] completion effects failed (non-fatal): {e}')
-            try: await db.rollback()
-            except: pass
+        # 완료 부수효과는 상태와 같은 트랜잭션에 이벤트로 기록 → 실패 시 재시도
+        await enqueue_event(db, "production.plan_completed", "production_plan", plan.id, {"plan_id": plan.id})
+        await db.commit()
+        wake_outbox_consumer()
 
 async def process_stock_deduction(db: AsyncSession, plan_id: int):
     """
@@ -237,6 +240,156 @@ async def _handle_production_completion_effects(db: AsyncSession, plan: Producti
     
     await db.flush()
 
+async def _load_plan_for_effects(db: AsyncSession, plan_id: int) -> Optional[ProductionPlan]:
+    res = await db.execute(
+        select(ProductionPlan).options(
+            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.purchase_items).selectinload(PurchaseOrderItem.purchase_order).selectinload(PurchaseOrder.items),
+            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.outsourcing_items).selectinload(OutsourcingOrderItem.outsourcing_order).selectinload(OutsourcingOrder.items),
+            selectinload(ProductionPlan.order).selectinload(SalesOrder.partner),
+            selectinload(ProductionPlan.order).selectinload(SalesOrder.items).selectinload(SalesOrderItem.product),
+            selectinload(ProductionPlan.stock_production).selectinload(StockProduction.product),
+            selectinload(ProductionPlan.stock_production).selectinload(StockProduction.partner),
+        ).where(ProductionPlan.id == plan_id)
+    )
+    return res.scalars().first()
+
+async def _handle_production_reopen_effects(db: AsyncSession, plan: ProductionPlan, status: ProductionStatus):
+    """
+    생산 완료 취소(COMPLETED -> 기타) 시 재고 입고/백플러시 원복 및 연관 주문 상태 롤백.
+    """
+    # 1. Rollback Stocks
+    if plan.stock_production:
+        sp = plan.stock_production
+        # 1-1. 완제품 입고 취소 (차감)
+        await handle_stock_movement(
+            db=db,
+            product_id=sp.product_id,
+            quantity=-sp.quantity,
+            transaction_type=TransactionType.OUT,
+            reference=f"Rollback ({sp.production_no})"
+        )
+        # 1-2. 하위 부품 Backflush 취소 (원복)
+        await handle_backflush(
+            db=db,
+            parent_product_id=sp.product_id,
+            produced_quantity=-sp.quantity,
+            reference=f"Rollback ({sp.production_no})"
+        )
+        # 1-3. 생산 중 수량 복원 (진행 중인 상태로 가는 경우에만 다시 생산 중으로 잡음)
+        if status in [ProductionStatus.IN_PROGRESS, ProductionStatus.CONFIRMED]:
+            stock_query = select(Stock).where(Stock.product_id == sp.product_id)
+            s_res = await db.execute(stock_query)
+            stock = s_res.scalars().first()
+            if stock:
+                stock.in_production_quantity += sp.quantity
+        
+        # Sync StockProduction status
+        if status == ProductionStatus.IN_PROGRESS:
+            sp.status = StockProductionStatus.IN_PROGRESS
+        elif status == ProductionStatus.CANCELED:
+            sp.status = StockProductionStatus.CANCELLED
+        db.add(sp)
+        
+    elif plan.order:
+        for item in plan.order.items:
+            # 1-1. 완제품 입고 취소 (차감)
+            await handle_stock_movement(
+                db=db,
+                product_id=item.product_id,
+                quantity=-item.quantity,
+                transaction_type=TransactionType.OUT,
+                reference=f"Rollback ({plan.order.order_no})"
+            )
+            # 1-2. 하위 부품 Backflush 취소 (원복)
+            await handle_backflush(
+                db=db,
+                parent_product_id=item.product_id,
+                produced_quantity=-item.quantity,
+                reference=f"Rollback ({plan.order.order_no})"
+            )
+            # 1-3. 생산 중 수량 복원
+            if status in [ProductionStatus.IN_PROGRESS, ProductionStatus.CONFIRMED]:
+                stock_query = select(Stock).where(Stock.product_id == item.product_id)
+                s_res = await db.execute(stock_query)
+                stock = s_res.scalars().first()
+                if stock:
+                    stock.in_production_quantity += item.quantity
+        
+        # Sync Sales Order status
+        # 보호: 이미 납품완료된 수주는 되돌리지 않음
+        if plan.order.status not in [
+            OrderStatus.DELIVERY_COMPLETED,
+            OrderStatus.PARTIALLY_DELIVERED,
+        ]:
+            plan.order.status = OrderStatus.CONFIRMED
+            db.add(plan.order)
+
+    # 2. Rollback Linked Orders (Back to PENDING)
+    affected_po_ids = set()
+    affected_oo_ids = set()
+    for item in plan.items:
+        for po_item in item.purchase_items:
+            # (User said "대기 상태로 변경", which usually means received_quantity = 0 or status = PENDING)
+            po_item.received_quantity = 0
+            db.add(po_item)
+            affected_po_ids.add(po_item.purchase_order_id)
+        
+        for oo_item in item.outsourcing_items:
+            oo_item.status = OutsourcingStatus.PENDING
+            db.add(oo_item)
+            affected_oo_ids.add(oo_item.outsourcing_order_id)
+    
+    await db.flush()
+
+    # Update PurchaseOrder statuses
+    for po_id in affected_po_ids:
+        po = await db.get(PurchaseOrder, po_id)
+        if po:
+            po.status = PurchaseStatus.PENDING
+            db.add(po)
+    
+    # Update OutsourcingOrder statuses
+    for oo_id in affected_oo_ids:
+        oo = await db.get(OutsourcingOrder, oo_id)
+        if oo:
+            oo.status = OutsourcingStatus.PENDING
+            db.add(oo)
+
+    await db.flush()
+
+# --- Outbox Event Handlers (생산 상태 부수효과) ---
+
+@outbox_handler("production.plan_confirmed")
+async def _on_plan_confirmed_event(db: AsyncSession, payload: dict):
+    from app.api.utils.mrp import calculate_and_record_mrp
+    # 소비자가 DONE 표시와 함께 커밋
+    await calculate_and_record_mrp(db, plan_id=payload["plan_id"], commit=False)
+
+@outbox_handler("production.plan_completed")
+async def _on_plan_completed_event(db: AsyncSession, payload: dict):
+    plan = await _load_plan_for_effects(db, payload["plan_id"])
+    if plan:
+        await _handle_production_completion_effects(db, plan)
+
+@outbox_handler("production.plan_reopened")
+async def _on_plan_reopened_event(db: AsyncSession, payload: dict):
+    plan = await _load_plan_for_effects(db, payload["plan_id"])
+    if plan:
+        await _handle_production_reopen_effects(db, plan, ProductionStatus(payload["status"]))
+
+@outbox_handler("production.item_completed")
+async def _on_plan_item_completed_event(db: AsyncSession, payload: dict):
+    item = await db.get(ProductionPlanItem, payload["item_id"])
+    if item:
+        await on_production_item_completed(db, item, reference=payload.get("reference"))
+
+@outbox_handler("production.item_reverted")
+async def _on_plan_item_reverted_event(db: AsyncSession, payload: dict):
+    from app.api.utils.status_cascade import revert_production_item_completed
+    item = await db.get(ProductionPlanItem, payload["item_id"])
+    if item:
+        await revert_production_item_completed(db, item, reference=payload.get("reference"))
+
 async def sync_plan_item_cost(db: AsyncSession, plan_item: ProductionPlanItem):
     """
     If INTERNAL, fetch standard cost from ProductProcess and sync plan_item.cost.
@@ -369,11 +522,10 @@ async def read_production_plans(
     if customer_id:
         stmt = stmt.where(SalesOrder.partner_id == customer_id)
     if product_name:
-        subquery = select(ProductionPlanItem.plan_id).join(Product).where(Product.name.ilike(f"%{product_name}%"))
+        subquery = select(ProductionPlanItem.plan_id).where(ProductionPlanItem.product_id.in_(product_name_search_ids(product_name)))
         stmt = stmt.where(ProductionPlan.id.in_(subquery))
     if major_group_id:
-        subquery = select(ProductionPlanItem.plan_id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                   .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        subquery = select(ProductionPlanItem.plan_id).join(Product).where(product_group_filter(major_group_id))
         stmt = stmt.where(ProductionPlan.id.in_(subquery))
     if order_id:
         stmt = stmt.where(ProductionPlan.order_id == order_id)
@@ -434,11 +586,13 @@ async def read_production_plans(
 @router.post("/plans", response_model=schemas.ProductionPlan)
 async def create_production_plan(
     plan_in: schemas.ProductionPlanCreate,
+    prefill_estimates: bool = True,
     db: AsyncSession = Depends(deps.get_db),
 ) -> Any:
     """
     Create a production plan from a Sales Order or Stock Production.
     Auto-generates plan items based on Product Processes.
+    prefill_estimates: 예상 시간이 비어 있는 공정은 실적 사이클타임 중앙값으로 채움
     """
     try:
         # 1. Check if Order or StockProduction exists
@@ -603,38 +757,20 @@ async def create_production_plan(
 
             await db.commit()
 
-            # 5. Trigger side effects based on status
+            # 5. Trigger side effects based on status (아웃박스 이벤트 → 백그라운드 처리/재시도)
             if plan.status == ProductionStatus.COMPLETED:
                 await process_stock_deduction(db, plan_id=plan.id)
-                # Re-fetch with needed relationships for effects
-                res = await db.execute(select(ProductionPlan).options(
-                    selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.purchase_items).selectinload(PurchaseOrderItem.purchase_order).selectinload(PurchaseOrder.items),
-                    selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.outsourcing_items).selectinload(OutsourcingOrderItem.outsourcing_order).selectinload(OutsourcingOrder.items),
-                    selectinload(ProductionPlan.order).selectinload(SalesOrder.partner),
-                    selectinload(ProductionPlan.order).selectinload(SalesOrder.items).selectinload(SalesOrderItem.product),
-                    selectinload(ProductionPlan.stock_production).selectinload(StockProduction.product),
-                    selectinload(ProductionPlan.stock_production).selectinload(StockProduction.partner),
-                ).where(ProductionPlan.id == plan.id))
-                refetched_plan = res.scalars().first()
-                try:
-                    await _handle_production_completion_effects(db, refetched_plan)
-                    await db.commit()
-                except Exception as e:
-                    print(f'[create_production_plan] completion effects failed (non-fatal): {e}')
-                    try: await db.rollback()
-                    except: pass
+                await enqueue_event(db, "production.plan_completed", "production_plan", plan.id, {"plan_id": plan.id})
+                await db.commit()
+                wake_outbox_consumer()
             elif plan.status == ProductionStatus.CONFIRMED:
                 await process_stock_deduction(db, plan_id=plan.id)
-                try:
-                    from app.api.utils.mrp import calculate_and_record_mrp
-                    await calculate_and_record_mrp(db, plan_id=plan.id)
-                except Exception as e:
-                    print(f'[create_production_plan] MRP calculation failed (non-fatal): {e}')
-                    try: await db.rollback()
-                    except: pass
+                await enqueue_event(db, "production.plan_confirmed", "production_plan", plan.id, {"plan_id": plan.id})
+                await db.commit()
+                wake_outbox_consumer()
         else:
-            # Default logic for Sales Order (already exists) or Stock Production
-            # If stock production, it's usually just one product.
+            # 표준 공정(라우팅) 전개 — 일괄 생성과 같은 규칙 (_routing_plan_items)
+            rows = []
             if plan_in.stock_production_order_id:
                 # Fetch StockProductionOrder with all items
                 res = await db.execute(
@@ -644,276 +780,33 @@ async def create_production_plan(
                 )
                 spo = res.scalars().first()
                 if spo:
-                    import json
-                    seq_counter = 1
+                    routings, item_types = await _load_routings(db, {sp.product_id for sp in spo.items})
                     for sp in spo.items:
-                        stmt = (
-                            select(ProductProcess, Process.name, Process.course_type, Product.drawing_file, Product.item_type)
-                            .join(Process, ProductProcess.process_id == Process.id)
-                            .join(Product, ProductProcess.product_id == Product.id)
-                            .where(ProductProcess.product_id == sp.product_id)
-                            .order_by(ProductProcess.sequence)
-                        )
-                        result = await db.execute(stmt)
-                        processes = result.all()
-
-                        if not processes:
-                            # 표준 공정이 없는 경우 기본 공정 생성 (자재/외주 자동 판별)
-                            prod_obj = await db.get(Product, sp.product_id)
-                            c_type = "PURCHASE" if (prod_obj and prod_obj.item_type in ["RAW_MATERIAL", "PART"]) else "INTERNAL"
-                            plan_item = ProductionPlanItem(
-                                plan_id=plan.id,
-                                product_id=sp.product_id,
-                                process_name="기본 생산 공정",
-                                sequence=seq_counter,
-                                course_type=c_type,
-                                quantity=sp.quantity,
-                                status=ProductionStatus.PLANNED,
-                                cost=0
-                            )
-                            db.add(plan_item)
-                            seq_counter += 1
-                            continue
-
-                        for proc, proc_name, proc_course_type, prod_drawing, prod_item_type in processes:
-                            final_attachments = []
-                            if prod_drawing:
-                                try:
-                                    parsed = json.loads(prod_drawing) if isinstance(prod_drawing, str) else prod_drawing
-                                    if isinstance(parsed, list): final_attachments.extend(parsed)
-                                    else: final_attachments.append(parsed)
-                                except: final_attachments.append(prod_drawing)
-                            
-                            if proc.attachment_file:
-                                try:
-                                    parsed = json.loads(proc.attachment_file) if isinstance(proc.attachment_file, str) else proc.attachment_file
-                                    if isinstance(parsed, list): final_attachments.extend(parsed)
-                                    else: final_attachments.append(parsed)
-                                except: final_attachments.append(proc.attachment_file)
-                            
-                            unique_attachments = []
-                            seen_urls = set()
-                            for att in final_attachments:
-                                if isinstance(att, dict) and att.get('url'):
-                                    if att['url'] not in seen_urls:
-                                        unique_attachments.append(att)
-                                        seen_urls.add(att['url'])
-                                elif isinstance(att, str):
-                                    if att not in seen_urls:
-                                        unique_attachments.append(att)
-                                        seen_urls.add(att)
-
-                            final_attachment_json = json.dumps(unique_attachments, ensure_ascii=False) if unique_attachments else None
-                            final_course_type = proc.course_type or proc_course_type or ("PURCHASE" if prod_item_type in ["RAW_MATERIAL", "PART"] else "INTERNAL")
-
-                            plan_item = ProductionPlanItem(
-                                plan_id=plan.id,
-                                product_id=sp.product_id,
-                                process_name=proc_name,
-                                sequence=seq_counter,
-                                course_type=final_course_type,
-                                partner_name=proc.partner_name,
-                                work_center=proc.equipment_name,
-                                estimated_time=proc.estimated_time,
-                                attachment_file=final_attachment_json,
-                                quantity=sp.quantity,
-                                status=ProductionStatus.PLANNED,
-                                cost=(getattr(proc, 'cost', 0) or 0) * sp.quantity
-                            )
-                            db.add(plan_item)
-                            seq_counter += 1
+                        rows.extend(_routing_plan_items(
+                            sp.product_id, sp.quantity, routings.get(sp.product_id, []), item_types.get(sp.product_id),
+                            stock=True, sequence_start=len(rows) + 1,
+                        ))
 
             elif plan_in.stock_production_id:
                 # Fetch StockProduction to get product_id and quantity
                 res = await db.execute(select(StockProduction).where(StockProduction.id == plan_in.stock_production_id))
                 sp = res.scalars().first()
-                
-                # Fetch processes and Product
-                stmt = (
-                    select(ProductProcess, Process.name, Process.course_type, Product.drawing_file, Product.item_type)
-                    .join(Process, ProductProcess.process_id == Process.id)
-                    .join(Product, ProductProcess.product_id == Product.id)
-                    .where(ProductProcess.product_id == sp.product_id)
-                    .order_by(ProductProcess.sequence)
-                )
-                result = await db.execute(stmt)
-                processes = result.all()
-                
-                import json
-                if not processes:
-                    prod_obj = await db.get(Product, sp.product_id)
-                    c_type = "PURCHASE" if (prod_obj and prod_obj.item_type in ["RAW_MATERIAL", "PART"]) else "INTERNAL"
-                    plan_item = ProductionPlanItem(
-                        plan_id=plan.id,
-                        product_id=sp.product_id,
-                        process_name="기본 생산 공정",
-                        sequence=1,
-                        course_type=c_type,
-                        quantity=sp.quantity,
-                        status=ProductionStatus.PLANNED,
-                        cost=0
-                    )
-                    db.add(plan_item)
-                else:
-                    for proc, proc_name, proc_course_type, prod_drawing, prod_item_type in processes:
-                        # Merge attachments: process attachment + product drawing
-                        final_attachments = []
-                        
-                        # Add product drawing files
-                        if prod_drawing:
-                            try:
-                                parsed = json.loads(prod_drawing) if isinstance(prod_drawing, str) else prod_drawing
-                                if isinstance(parsed, list): final_attachments.extend(parsed)
-                                else: final_attachments.append(parsed)
-                            except: final_attachments.append(prod_drawing)
-                        
-                        # Add process attachment files
-                        if proc.attachment_file:
-                            try:
-                                parsed = json.loads(proc.attachment_file) if isinstance(proc.attachment_file, str) else proc.attachment_file
-                                if isinstance(parsed, list): final_attachments.extend(parsed)
-                                else: final_attachments.append(parsed)
-                            except: final_attachments.append(proc.attachment_file)
-                        
-                        # Deduplicate and format
-                        unique_attachments = []
-                        seen_urls = set()
-                        for att in final_attachments:
-                            if isinstance(att, dict) and att.get('url'):
-                                if att['url'] not in seen_urls:
-                                    unique_attachments.append(att)
-                                    seen_urls.add(att['url'])
-                            elif isinstance(att, str):
-                                if att not in seen_urls:
-                                    unique_attachments.append(att)
-                                    seen_urls.add(att)
-
-                        final_attachment_json = json.dumps(unique_attachments, ensure_ascii=False) if unique_attachments else None
-
-                        final_course_type = proc.course_type or proc_course_type or ("PURCHASE" if prod_item_type in ["RAW_MATERIAL", "PART"] else "INTERNAL")
-                        plan_item = ProductionPlanItem(
-                            plan_id=plan.id,
-                            product_id=sp.product_id,
-                            process_name=proc_name,
-                            sequence=proc.sequence,
-                            course_type=final_course_type,
-                            partner_name=proc.partner_name,
-                            work_center=proc.equipment_name,
-                            estimated_time=proc.estimated_time,
-                            attachment_file=final_attachment_json,
-                            quantity=sp.quantity,
-                            status=ProductionStatus.PLANNED,
-                            cost=(getattr(proc, 'cost', 0) or 0) * sp.quantity,
-                            unit_price=getattr(proc, 'cost', 0) or 0
-                        )
-                        db.add(plan_item)
+                routings, item_types = await _load_routings(db, {sp.product_id})
+                rows = _routing_plan_items(sp.product_id, sp.quantity, routings.get(sp.product_id, []), item_types.get(sp.product_id), stock=True)
 
             else:
-                # Sales Order logic
-                if plan_in.items:
-                    # User provided custom items from frontend modal, USE THEM
-                    for item_in in plan_in.items:
-                        plan_item = ProductionPlanItem(
-                            plan_id=plan.id,
-                            product_id=item_in.product_id,
-                            process_name=item_in.process_name,
-                            sequence=item_in.sequence,
-                            course_type=item_in.course_type,
-                            partner_name=item_in.partner_name,
-                            worker_id=item_in.worker_id,
-                            equipment_id=item_in.equipment_id,
-                            estimated_time=item_in.estimated_time,
-                            start_date=item_in.start_date,
-                            end_date=item_in.end_date,
-                            cost=item_in.cost,
-                            unit_price=item_in.unit_price or 0,
-                            quantity=item_in.quantity,
-                            gross_quantity=item_in.gross_quantity,
-                            stock_use_quantity=item_in.stock_use_quantity,
-                            note=item_in.note,
-                            status=ProductionStatus.PLANNED
-                        )
-                        db.add(plan_item)
-                else:
-                    # Fallback to standard processes if no items provided
-                    result = await db.execute(select(SalesOrderItem).where(SalesOrderItem.order_id == plan_in.order_id))
-                    order_items = result.scalars().all()
-                    for item in order_items:
-                        stmt = (
-                            select(ProductProcess, Process.name, Process.course_type, Product.drawing_file)
-                            .join(Process, ProductProcess.process_id == Process.id)
-                            .join(Product, ProductProcess.product_id == Product.id)
-                            .where(ProductProcess.product_id == item.product_id)
-                            .order_by(ProductProcess.sequence)
-                        )
-                        result = await db.execute(stmt)
-                        processes = result.all()
-                        
-                        if not processes:
-                            # Handle items with no standard processes
-                            plan_item = ProductionPlanItem(
-                                plan_id=plan.id,
-                                product_id=item.product_id,
-                                process_name="기본 공정",
-                                sequence=1,
-                                course_type="INTERNAL",
-                                quantity=item.quantity,
-                                status=ProductionStatus.PLANNED,
-                                cost=0
-                            )
-                            db.add(plan_item)
-                            continue
-
-                        import json
-                        for proc, proc_name, proc_course_type, prod_drawing in processes:
-                            # Merge attachments
-                            final_attachments = []
-                            if prod_drawing:
-                                try:
-                                    parsed = json.loads(prod_drawing) if isinstance(prod_drawing, str) else prod_drawing
-                                    if isinstance(parsed, list): final_attachments.extend(parsed)
-                                    else: final_attachments.append(parsed)
-                                except: final_attachments.append(prod_drawing)
-                            
-                            if proc.attachment_file:
-                                try:
-                                    parsed = json.loads(proc.attachment_file) if isinstance(proc.attachment_file, str) else proc.attachment_file
-                                    if isinstance(parsed, list): final_attachments.extend(parsed)
-                                    else: final_attachments.append(parsed)
-                                except: final_attachments.append(proc.attachment_file)
-                            
-                            unique_attachments = []
-                            seen_urls = set()
-                            for att in final_attachments:
-                                if isinstance(att, dict) and att.get('url'):
-                                    if att['url'] not in seen_urls:
-                                        unique_attachments.append(att)
-                                        seen_urls.add(att['url'])
-                                elif isinstance(att, str):
-                                    if att not in seen_urls:
-                                        unique_attachments.append(att)
-                                        seen_urls.add(att)
-
-                            final_attachment_json = json.dumps(unique_attachments, ensure_ascii=False) if unique_attachments else None
-
-                            final_course_type = proc.course_type or proc_course_type or "INTERNAL"
-                            plan_item = ProductionPlanItem(
-                                plan_id=plan.id,
-                                product_id=item.product_id,
-                                process_name=proc_name,
-                                sequence=proc.sequence,
-                                course_type=final_course_type,
-                                partner_name=proc.partner_name,
-                                work_center=proc.equipment_name,
-                                estimated_time=proc.estimated_time,
-                                attachment_file=final_attachment_json,
-                                quantity=item.quantity,
-                                status=ProductionStatus.PLANNED,
-                                cost=(getattr(proc, 'cost', 0) or 0) * item.quantity,
-                                unit_price=getattr(proc, 'cost', 0) or 0
-                            )
-                            db.add(plan_item)
+                # Sales Order: standard processes per order item
+                result = await db.execute(select(SalesOrderItem).where(SalesOrderItem.order_id == plan_in.order_id))
+                order_items = result.scalars().all()
+                routings, item_types = await _load_routings(db, {oi.product_id for oi in order_items})
+                for item in order_items:
+                    rows.extend(_routing_plan_items(item.product_id, item.quantity, routings.get(item.product_id, []), item_types.get(item.product_id), stock=False))
 
+            for data in rows:
+                db.add(ProductionPlanItem(plan_id=plan.id, status=ProductionStatus.PLANNED, **data))
+
+        if prefill_estimates:
+            await prefill_plan_item_estimates(db, plan.id)
 
         await db.commit()
         await db.refresh(plan)
@@ -959,6 +852,263 @@ async def create_production_plan(
     except MultipleResultsFound:
         raise HTTPException(status_code=400, detail="데이터 중복 오류: 동일 품목에 대해 여러 개의 수주 또는 마스터 데이터가 발견되었습니다. 관리자에게 문의하세요.")
 
+def _merge_process_attachments(prod_drawing, proc_attachment) -> Optional[str]:
+    """
+    품목 도면 + 공정 첨부를 URL 기준 중복 제거하여 JSON 문자열로 병합
+    """
+    final_attachments = []
+    for raw in (prod_drawing, proc_attachment):
+        if not raw:
+            continue
+        try:
+            parsed = json.loads(raw) if isinstance(raw, str) else raw
+            if isinstance(parsed, list): final_attachments.extend(parsed)
+            else: final_attachments.append(parsed)
+        except: final_attachments.append(raw)
+
+    unique_attachments = []
+    seen_urls = set()
+    for att in final_attachments:
+        if isinstance(att, dict) and att.get('url'):
+            if att['url'] not in seen_urls:
+                unique_attachments.append(att)
+                seen_urls.add(att['url'])
+        elif isinstance(att, str):
+            if att not in seen_urls:
+                unique_attachments.append(att)
+                seen_urls.add(att)
+    return json.dumps(unique_attachments, ensure_ascii=False) if unique_attachments else None
+
+async def _load_routings(db: AsyncSession, product_ids) -> tuple:
+    """
+    품목별 표준 공정(라우팅) 행과 품목 유형 일괄 조회
+    반환: ({product_id: [(ProductProcess, 공정명, 공정 구분, 품목 도면, 품목 유형), ...]}, {product_id: item_type})
+    """
+    routings, item_types = {}, {}
+    product_ids = {pid for pid in product_ids if pid}
+    if not product_ids:
+        return routings, item_types
+    res = await db.execute(
+        select(ProductProcess, Process.name, Process.course_type, Product.drawing_file, Product.item_type)
+        .join(Process, ProductProcess.process_id == Process.id)
+        .join(Product, ProductProcess.product_id == Product.id)
+        .where(ProductProcess.product_id.in_(product_ids))
+        .order_by(ProductProcess.product_id, ProductProcess.sequence)
+    )
+    for row in res.all():
+        routings.setdefault(row[0].product_id, []).append(row)
+    res = await db.execute(select(Product.id, Product.item_type).where(Product.id.in_(product_ids)))
+    item_types = {pid: item_type for pid, item_type in res.all()}
+    return routings, item_types
+
+def _routing_plan_items(product_id, quantity, processes, item_type, stock: bool, sequence_start: Optional[int] = None) -> List[dict]:
+    """
+    표준 공정(라우팅) → 생산계획 공정 행 데이터 (단건/일괄 생성 공용)
+    - stock: 재고생산이면 원자재/부품은 PURCHASE 가 기본 구분, 표준 공정이 없을 때 '기본 생산 공정'
+    - sequence_start: 주어지면 이 값부터 연속 순번 (재고생산 주문 다품목), 없으면 표준 공정 순번
+    """
+    default_course = "PURCHASE" if stock and item_type in ["RAW_MATERIAL", "PART"] else "INTERNAL"
+    if not processes:
+        return [dict(
+            product_id=product_id,
+            process_name="기본 생산 공정" if stock else "기본 공정",
+            sequence=sequence_start or 1,
+            course_type=default_course,
+            quantity=quantity,
+            cost=0
+        )]
+
+    items = []
+    for idx, (proc, proc_name, proc_course_type, prod_drawing, _) in enumerate(processes):
+        unit_cost = getattr(proc, 'cost', 0) or 0
+        items.append(dict(
+            product_id=product_id,
+            process_name=proc_name,
+            sequence=proc.sequence if sequence_start is None else sequence_start + idx,
+            course_type=proc.course_type or proc_course_type or default_course,
+            partner_name=proc.partner_name,
+            work_center=proc.equipment_name,
+            estimated_time=proc.estimated_time,
+            attachment_file=_merge_process_attachments(prod_drawing, proc.attachment_file),
+            quantity=quantity,
+            cost=unit_cost * quantity,
+            unit_price=unit_cost
+        ))
+    return items
+
+@router.post("/plans/batch", response_model=schemas.ProductionPlanBatchResult)
+async def create_production_plans_batch(
+    batch_in: schemas.ProductionPlanBatchCreate,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    여러 수주/재고생산 건에 대한 생산계획 일괄 생성.
+    - 원천 데이터, 기존 활성 계획, 표준 공정(라우팅)을 소수의 쿼리로 선적재
+    - 모든 계획/공정을 단일 트랜잭션으로 생성 (단건 생성과 동일한 공정 전개 규칙)
+    - 마지막에 생성된 계획 전체에 대해 통합 MRP 1회 실행
+    이미 활성 계획이 있거나 원천 데이터가 없는 건은 skipped 로 보고됩니다.
+    """
+    order_ids = list(dict.fromkeys(batch_in.order_ids))
+    sp_ids = list(dict.fromkeys(batch_in.stock_production_ids))
+    spo_ids = list(dict.fromkeys(batch_in.stock_production_order_ids))
+    if not (order_ids or sp_ids or spo_ids):
+        raise HTTPException(status_code=400, detail="order_ids, stock_production_ids 또는 stock_production_order_ids 가 필요합니다.")
+
+    created: List[dict] = []
+    skipped: List[dict] = []
+    not_canceled = cast(ProductionPlan.status, String) != ProductionStatus.CANCELED.value
+
+    # 1. 원천 데이터 선적재
+    orders = {}
+    order_items = {}
+    if order_ids:
+        res = await db.execute(select(SalesOrder).where(SalesOrder.id.in_(order_ids)))
+        orders = {o.id: o for o in res.scalars().all()}
+        res = await db.execute(select(SalesOrderItem).where(SalesOrderItem.order_id.in_(order_ids)).order_by(SalesOrderItem.id))
+        for oi in res.scalars().all():
+            order_items.setdefault(oi.order_id, []).append(oi)
+
+    stock_prods = {}
+    if sp_ids:
+        res = await db.execute(select(StockProduction).where(StockProduction.id.in_(sp_ids)))
+        stock_prods = {sp.id: sp for sp in res.scalars().all()}
+
+    stock_prod_orders = {}
+    if spo_ids:
+        res = await db.execute(
+            select(StockProductionOrder)
+            .options(selectinload(StockProductionOrder.items))
+            .where(StockProductionOrder.id.in_(spo_ids))
+        )
+        stock_prod_orders = {spo.id: spo for spo in res.scalars().all()}
+
+    # 2. 기존 활성 계획 (멱등성)
+    active_by_order, active_by_sp, active_by_spo = {}, {}, {}
+    source_filters = []
+    if order_ids: source_filters.append(ProductionPlan.order_id.in_(order_ids))
+    if sp_ids: source_filters.append(ProductionPlan.stock_production_id.in_(sp_ids))
+    if spo_ids: source_filters.append(ProductionPlan.stock_production_order_id.in_(spo_ids))
+    res = await db.execute(
+        select(ProductionPlan.id, ProductionPlan.order_id, ProductionPlan.stock_production_id, ProductionPlan.stock_production_order_id)
+        .where(or_(*source_filters), not_canceled)
+    )
+    for pid, oid, spid, spoid in res.all():
+        if oid: active_by_order.setdefault(oid, pid)
+        if spid: active_by_sp.setdefault(spid, pid)
+        if spoid: active_by_spo.setdefault(spoid, pid)
+
+    # 3. 표준 공정 + 품목 정보 선적재
+    product_ids = set()
+    for items in order_items.values():
+        product_ids.update(oi.product_id for oi in items if oi.product_id)
+    product_ids.update(sp.product_id for sp in stock_prods.values())
+    for spo in stock_prod_orders.values():
+        product_ids.update(sp.product_id for sp in spo.items)
+    routings, item_types = await _load_routings(db, product_ids)
+
+    new_plans = []  # (plan, items, entry)
+
+    def new_plan(**kwargs):
+        plan = ProductionPlan(plan_date=batch_in.plan_date, status=ProductionStatus.IN_PROGRESS, **kwargs)
+        db.add(plan)
+        return plan
+
+    # 4-1. 수주 기반
+    for oid in order_ids:
+        if oid not in orders:
+            skipped.append({"source": "ORDER", "source_id": oid, "reason": "Sales Order not found"})
+            continue
+        if oid in active_by_order:
+            skipped.append({"source": "ORDER", "source_id": oid, "plan_id": active_by_order[oid], "reason": "Active plan already exists"})
+            continue
+        plan = new_plan(order_id=oid)
+        items = []
+        for oi in order_items.get(oid, []):
+            items.extend(_routing_plan_items(oi.product_id, oi.quantity, routings.get(oi.product_id, []), item_types.get(oi.product_id), stock=False))
+        new_plans.append((plan, items, {"source": "ORDER", "source_id": oid}))
+
+    # 4-2. 재고생산 (단건)
+    for spid in sp_ids:
+        sp = stock_prods.get(spid)
+        if not sp:
+            skipped.append({"source": "STOCK_PRODUCTION", "source_id": spid, "reason": "Stock Production request not found"})
+            continue
+        if spid in active_by_sp:
+            skipped.append({"source": "STOCK_PRODUCTION", "source_id": spid, "plan_id": active_by_sp[spid], "reason": "Active plan already exists"})
+            continue
+        plan = new_plan(stock_production_id=spid)
+        items = _routing_plan_items(sp.product_id, sp.quantity, routings.get(sp.product_id, []), item_types.get(sp.product_id), stock=True)
+        new_plans.append((plan, items, {"source": "STOCK_PRODUCTION", "source_id": spid}))
+
+    # 4-3. 재고생산 주문 (다품목)
+    for spoid in spo_ids:
+        spo = stock_prod_orders.get(spoid)
+        if not spo:
+            skipped.append({"source": "STOCK_PRODUCTION_ORDER", "source_id": spoid, "reason": "Stock Production Order not found"})
+            continue
+        if spoid in active_by_spo:
+            skipped.append({"source": "STOCK_PRODUCTION_ORDER", "source_id": spoid, "plan_id": active_by_spo[spoid], "reason": "Active plan already exists"})
+            continue
+        plan = new_plan(
+            stock_production_id=spo.items[0].id if spo.items else None,
+            stock_production_order_id=spoid
+        )
+        items = []
+        for sp in spo.items:
+            items.extend(_routing_plan_items(
+                sp.product_id, sp.quantity, routings.get(sp.product_id, []), item_types.get(sp.product_id),
+                stock=True, sequence_start=len(items) + 1,
+            ))
+        new_plans.append((plan, items, {"source": "STOCK_PRODUCTION_ORDER", "source_id": spoid}))
+
+    if not new_plans:
+        return {"created": [], "skipped": skipped, "mrp_plan_count": 0}
+
+    # 5. 단일 트랜잭션으로 계획/공정 생성
+    try:
+        await db.flush()
+
+        estimates = {}
+        if batch_in.prefill_estimates:
+            from app.api.utils.cycle_time import get_cycle_time_estimates
+            keys = {(i["product_id"], i["process_name"]) for _, items, _ in new_plans for i in items if not i.get("estimated_time")}
+            estimates = await get_cycle_time_estimates(db, list(keys))
+
+        for plan, items, entry in new_plans:
+            for data in items:
+                if not data.get("estimated_time"):
+                    est = estimates.get((data["product_id"], data["process_name"]))
+                    if est:
+                        data["estimated_time"] = est
+                db.add(ProductionPlanItem(plan_id=plan.id, status=ProductionStatus.PLANNED, **data))
+            created.append({**entry, "plan_id": plan.id, "item_count": len(items)})
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"[create_production_plans_batch] failed, rolled back: {e}")
+        raise HTTPException(status_code=500, detail=f"생산계획 일괄 생성 실패: {e}")
+
+    # 6. 통합 MRP 1회
+    mrp_plan_ids = [c["plan_id"] for c in created] if batch_in.run_mrp else []
+    if mrp_plan_ids:
+        try:
+            from app.api.utils.mrp import calculate_and_record_mrp_batch
+            await calculate_and_record_mrp_batch(db, mrp_plan_ids)
+        except Exception as e:
+            print(f'[create_production_plans_batch] MRP calculation failed (non-fatal): {e}')
+            try: await db.rollback()
+            except: pass
+            mrp_plan_ids = []
+
+    if sse_broadcaster:
+        await sse_broadcaster.broadcast(
+            "production_updated",
+            json.dumps({"type": "plans_batch_created", "plan_ids": [c["plan_id"] for c in created]})
+        )
+
+    return {"created": created, "skipped": skipped, "mrp_plan_count": len(mrp_plan_ids)}
+
 def calculate_completed_quantity(item: ProductionPlanItem) -> int:
     """
     Calculate completed quantity based on course type and status.
@@ -1136,222 +1286,13 @@ async def export_production_plan_excel(
 ) -> Any:
     """
     Generate an Excel file for the Production Plan and attach it.
+    워크북 작성은 프로세스 풀에서 수행되며, 내용 변경이 없으면 기존 파일을 재사용합니다.
     """
-    # 1. Fetch Plan with all relations
-    result = await db.execute(
-        select(ProductionPlan)
-        .options(
-            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.product),
-            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.purchase_items).selectinload(PurchaseOrderItem.purchase_order),
-            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.outsourcing_items).selectinload(OutsourcingOrderItem.outsourcing_order),
-            selectinload(ProductionPlan.order).selectinload(SalesOrder.partner)
-        )
-        .where(ProductionPlan.id == plan_id)
-    )
-    plan = result.scalars().first()
-    
+    plan = await load_plan_for_sheet(db, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Production Plan not found")
 
-    # 2. Parse Metadata
-    metadata = {}
-    if plan.sheet_metadata:
-        try:
-            metadata = json.loads(plan.sheet_metadata) if isinstance(plan.sheet_metadata, str) else plan.sheet_metadata
-        except:
-            pass
-            
-    order = plan.order
-
-    # 3. Create Workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "생산관리시트"
-
-    # Define Styles
-    header_font = Font(name='Malgun Gothic', size=14, bold=True)
-    bold_font = Font(name='Malgun Gothic', size=10, bold=True)
-    normal_font = Font(name='Malgun Gothic', size=10)
-    
-    center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    left_align = Alignment(horizontal='left', vertical='center', wrap_text=True)
-    
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    gray_fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-
-    def style_range(ws, cell_range, border=thin_border, font=normal_font, alignment=center_align, fill=None):
-        for row in ws[cell_range]:
-            for cell in row:
-                cell.border = border
-                cell.font = font
-                cell.alignment = alignment
-                if fill:
-                    cell.fill = fill
-
-    col_widths = {'A': 10, 'B': 10, 'C': 15, 'D': 25, 'E': 15, 'F': 12, 'G': 12, 'H': 10, 'I': 10, 'J': 10}
-    for col, width in col_widths.items():
-        ws.column_dimensions[col].width = width
-
-    ws.merge_cells('A1:J2')
-    title_cell = ws['A1']
-    title_cell.value = "생산관리시트"
-    title_cell.font = header_font
-    title_cell.alignment = center_align
-
-    ws.merge_cells('B4:E4')
-    ws.merge_cells('G4:J4')
-    ws['A4'] = "고객"
-    ws['B4'] = order.partner.name if order and order.partner else "-"
-    ws['F4'] = "수주일"
-    ws['G4'] = str(order.order_date) if order and order.order_date else "-"
-    
-    ws.merge_cells('B5:E5')
-    ws.merge_cells('G5:J5')
-    ws['A5'] = "품명"
-    unique_products = []
-    seen = set()
-    for item in plan.items:
-        if item.product and item.product.id not in seen:
-            seen.add(item.product.id)
-            unique_products.append({"product": item.product, "quantity": item.quantity, "note": item.note})
-            
-    summary_prod_name = "-"
-    if unique_products:
-        summary_prod_name = unique_products[0]["product"].name
-        if len(unique_products) > 1:
-            summary_prod_name += f" 외 {len(unique_products) - 1}건"
-            
-    ws['B5'] = summary_prod_name
-    ws['F5'] = "요구납기일"
-    ws['G5'] = str(order.delivery_date) if order and order.delivery_date else "-"
-
-    ws.merge_cells('B6:E6')
-    ws.merge_cells('G6:J6')
-    ws['A6'] = "수주금액"
-    ws['B6'] = metadata.get('order_amount', str(order.total_amount) if order else "-")
-    ws['F6'] = "수주담당자"
-    ws['G6'] = metadata.get('manager', "-")
-
-    style_range(ws, 'A4:A6', font=bold_font, fill=gray_fill)
-    style_range(ws, 'F4:F6', font=bold_font, fill=gray_fill)
-    style_range(ws, 'A4:J6')
-
-    start_row = 8
-    ws.merge_cells(f'A{start_row}:C{start_row}')
-    ws.merge_cells(f'D{start_row}:F{start_row}')
-    ws.merge_cells(f'G{start_row}:H{start_row}')
-    ws.merge_cells(f'I{start_row}:J{start_row}')
-    
-    ws[f'A{start_row}'] = "품명"
-    ws[f'D{start_row}'] = "규격"
-    ws[f'G{start_row}'] = "재질"
-    ws[f'I{start_row}'] = "수량"
-    style_range(ws, f'A{start_row}:J{start_row}', font=bold_font, fill=gray_fill)
-
-    curr_row = start_row + 1
-    for prod_info in unique_products:
-        ws.merge_cells(f'A{curr_row}:C{curr_row}')
-        ws.merge_cells(f'D{curr_row}:F{curr_row}')
-        ws.merge_cells(f'G{curr_row}:H{curr_row}')
-        ws.merge_cells(f'I{curr_row}:J{curr_row}')
-        
-        ws[f'A{curr_row}'] = prod_info["product"].name
-        ws[f'D{curr_row}'] = prod_info["product"].specification or "-"
-        ws[f'G{curr_row}'] = prod_info["product"].material or "-"
-        ws[f'I{curr_row}'] = prod_info["quantity"]
-        
-        style_range(ws, f'A{curr_row}:J{curr_row}', alignment=center_align)
-        ws[f'A{curr_row}'].alignment = left_align
-        curr_row += 1
-
-    while curr_row < start_row + 4:
-        ws.merge_cells(f'A{curr_row}:C{curr_row}')
-        ws.merge_cells(f'D{curr_row}:F{curr_row}')
-        ws.merge_cells(f'G{curr_row}:H{curr_row}')
-        ws.merge_cells(f'I{curr_row}:J{curr_row}')
-        style_range(ws, f'A{curr_row}:J{curr_row}')
-        curr_row += 1
-
-    memo_row = curr_row + 1
-    ws.merge_cells(f'A{memo_row}:A{memo_row+1}')
-    ws.merge_cells(f'B{memo_row}:J{memo_row+1}')
-    ws[f'A{memo_row}'] = "Memo"
-    ws[f'B{memo_row}'] = metadata.get('memo', "")
-    style_range(ws, f'A{memo_row}:A{memo_row+1}', font=bold_font, fill=gray_fill)
-    style_range(ws, f'B{memo_row}:J{memo_row+1}', alignment=left_align)
-
-    proc_start_row = memo_row + 3
-    headers = ["구분", "순번", "공정", "공정내용", "업체", "품명", "규격", "수량", "시작", "종료"]
-    for i, h in enumerate(headers):
-        cell = ws.cell(row=proc_start_row, column=i+1, value=h)
-        cell.font = bold_font
-        cell.fill = gray_fill
-        cell.border = thin_border
-        cell.alignment = center_align
-
-    proc_row = proc_start_row + 1
-    def get_type_label(ctype):
-        if not ctype: return "-"
-        if "INTERNAL" in ctype or "자가" in ctype: return "자가"
-        if "OUTSOURCING" in ctype or "외주" in ctype: return "외주"
-        if "PURCHASE" in ctype or "구매" in ctype: return "구매"
-        return ctype
-        
-    for idx, item in enumerate(plan.items):
-        ws.cell(row=proc_row, column=1, value=get_type_label(item.course_type))
-        ws.cell(row=proc_row, column=2, value=item.sequence or (idx + 1))
-        ws.cell(row=proc_row, column=3, value=item.process_name or "-")
-        
-        note_cell = ws.cell(row=proc_row, column=4, value=item.note or "-")
-        note_cell.alignment = left_align
-        
-        partner_cell = ws.cell(row=proc_row, column=5, value=item.partner_name or "-")
-        partner_cell.alignment = left_align
-        
-        ws.cell(row=proc_row, column=6, value="-")
-        ws.cell(row=proc_row, column=7, value="-")
-        ws.cell(row=proc_row, column=8, value=item.quantity)
-        ws.cell(row=proc_row, column=9, value=str(item.start_date) if item.start_date else "-")
-        ws.cell(row=proc_row, column=10, value=str(item.end_date) if item.end_date else "-")
-        
-        style_range(ws, f'A{proc_row}:J{proc_row}')
-        proc_row += 1
-
-    upload_dir = "uploads/production"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    filename = f"ProductionSheet_{plan.id}_{now_kst().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    file_path = os.path.join(upload_dir, filename)
-    wb.save(file_path)
-
-    file_url = f"/uploads/production/{urllib.parse.quote(filename)}"
-    new_attachment = {
-        "url": file_url,
-        "name": filename
-    }
-
-    current_attachments = []
-    if plan.attachment_file:
-        try:
-           current_attachments = json.loads(plan.attachment_file) if isinstance(plan.attachment_file, str) else plan.attachment_file
-           if not isinstance(current_attachments, list):
-               current_attachments = [current_attachments]
-        except:
-            pass
-
-    current_attachments.append(new_attachment)
-    plan.attachment_file = current_attachments
-
-    from sqlalchemy.orm.attributes import flag_modified
-    flag_modified(plan, "attachment_file")
-
-    db.add(plan)
-    await db.commit()
+    await generate_sheet(db, plan)
     
     result = await db.execute(
         select(ProductionPlan)
@@ -1370,9 +1311,34 @@ async def export_production_plan_excel(
             selectinload(ProductionPlan.order).selectinload(SalesOrder.partner)
         )
         .where(ProductionPlan.id == plan.id)
+        .execution_options(populate_existing=True)
     )
     return result.scalars().first()
 
+@router.post("/plans/{plan_id}/export_excel/jobs")
+async def submit_production_plan_excel_job(
+    plan_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    생산관리시트 엑셀 생성을 백그라운드 작업으로 등록합니다.
+    반환된 job_id 로 GET /production/export-jobs/{job_id} 를 폴링하세요.
+    """
+    plan = await load_plan_for_sheet(db, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Production Plan not found")
+    return await submit_sheet_job(db, plan)
+
+@router.get("/export-jobs/{job_id}")
+async def read_production_sheet_job(job_id: str) -> Any:
+    """
+    생산관리시트 생성 작업 상태 조회 (PENDING, RUNNING, COMPLETED, FAILED)
+    """
+    job = get_sheet_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
 
 @router.delete("/plans/{plan_id}", status_code=200)
 async def delete_production_plan(
@@ -1461,6 +1427,7 @@ async def delete_production_plan(
     pi_res = await db.execute(pi_stmt)
     plan_items = pi_res.scalars().all()
     plan_item_ids = [pi.id for pi in plan_items]
+    perf_keys = await get_performance_keys(db, plan_item_ids=plan_item_ids)
 
     all_po_items = []
     all_oo_items = []
@@ -1566,6 +1533,8 @@ async def delete_production_plan(
 
     # Finally, delete the plan itself
     await db.delete(plan)
+    # 계획 삭제로 함께 지워지는 작업실적을 일별 실적 집계에서도 제외
+    await refresh_worker_daily_performance(db, perf_keys)
     await db.commit()
     
     return {"message": "Production Plan and all related data (MRP, unreceived orders) deleted successfully"}
@@ -1607,187 +1576,30 @@ async def update_production_plan_status(
         old_status = plan.status
         plan.status = status
         
-        # 0. CONFIRMED Trigger: Calculate MRP directly inline
+        # 0. CONFIRMED Trigger: MRP 는 아웃박스 이벤트로 기록 (커밋 후 백그라운드 처리)
         if status == ProductionStatus.CONFIRMED and old_status != ProductionStatus.CONFIRMED:
-            print(f"MRP Generation Started for Plan {plan_id}")
             # [FIX] Deduct stock use quantity from inventory
             await process_stock_deduction(db, plan_id=plan_id)
-            
-            from app.api.utils.mrp import calculate_and_record_mrp
-            await calculate_and_record_mrp(db, plan_id=plan_id)
-            print(f"MRP Generation Completed for Plan {plan_id}")
+            await enqueue_event(db, "production.plan_confirmed", "production_plan", plan_id, {"plan_id": plan_id})
         
         # Auto-Complete Logic
         if status == ProductionStatus.COMPLETED:
-            affected_po_ids = set()
-            affected_oo_ids = set()
-            
             for item in plan.items:
                 # 0. Update Child Item status to COMPLETED if not already
                 if item.status != ProductionStatus.COMPLETED:
                     item.status = ProductionStatus.COMPLETED
                     db.add(item)
 
-                # 1. Update Purchase Items
-                for po_item in item.purchase_items:
-                    # Set received quantity to full
-                    if po_item.quantity > po_item.received_quantity:
-                        po_item.received_quantity = po_item.quantity
-                        db.add(po_item)
-                    affected_po_ids.add(po_item.purchase_order_id)
-                    
-                # 2. Update Outsourcing Items
-                for oo_item in item.outsourcing_items:
-                    if oo_item.status != OutsourcingStatus.COMPLETED:
-                        oo_item.status = OutsourcingStatus.COMPLETED
-                        db.add(oo_item)
-                    affected_oo_ids.add(oo_item.outsourcing_order_id)
-            
-            await db.flush()
-            
-            # 3. Check and Complete Purchase Orders
-            for po_id in affected_po_ids:
-                po_query = select(PurchaseOrder).options(selectinload(PurchaseOrder.items)).where(PurchaseOrder.id == po_id)
-                po_result = await db.execute(po_query)
-                po = po_result.scalars().first()
-                
-                if po:
-                    # Check if all items are fully received
-                    all_received = all(i.received_quantity >= i.quantity for i in po.items)
-                    if all_received:
-                        po.status = PurchaseStatus.COMPLETED
-                        po.delivery_date = now_kst().date() # Set actual delivery date?
-                        db.add(po)
-
-            # 4. Check and Complete Outsourcing Orders
-            for oo_id in affected_oo_ids:
-                oo_query = select(OutsourcingOrder).options(selectinload(OutsourcingOrder.items)).where(OutsourcingOrder.id == oo_id)
-                oo_result = await db.execute(oo_query)
-                oo = oo_result.scalars().first()
-                
-                if oo:
-                    # Check if all items are completed
-                    all_completed = all(i.status == OutsourcingStatus.COMPLETED for i in oo.items)
-                    if all_completed:
-                        oo.status = OutsourcingStatus.COMPLETED
-                        oo.delivery_date = now_kst().date()
-                        db.add(oo)
-
             await process_stock_deduction(db, plan_id=plan_id)
-            # Re-fetch plan with all relationships needed for completion effects
-            _refetch_res = await db.execute(
-                select(ProductionPlan).options(
-                    selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.purchase_items).selectinload(PurchaseOrderItem.purchase_order).selectinload(PurchaseOrder.items),
-                    selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.outsourcing_items).selectinload(OutsourcingOrderItem.outsourcing_order).selectinload(OutsourcingOrder.items),
-                    selectinload(ProductionPlan.order).selectinload(SalesOrder.partner),
-                    selectinload(ProductionPlan.order).selectinload(SalesOrder.items).selectinload(SalesOrderItem.product),
-                    selectinload(ProductionPlan.stock_production).selectinload(StockProduction.product),
-                    selectinload(ProductionPlan.stock_production).selectinload(StockProduction.partner),
-                ).where(ProductionPlan.id == plan_id)
-            )
-            _plan_for_effects = _refetch_res.scalars().first()
-            await _handle_production_completion_effects(db, _plan_for_effects)
+            # 재고 입고/백플러시, 발주·외주 완료 처리, 수주 상태 동기화는 이벤트 핸들러에서 수행
+            # (이미 완료된 계획을 다시 완료 처리할 때 중복 입고되지 않도록 상태 전이 시에만 기록)
+            if old_status != ProductionStatus.COMPLETED:
+                await enqueue_event(db, "production.plan_completed", "production_plan", plan_id, {"plan_id": plan_id})
                 
         # Rollback Logic (COMPLETED -> NOT COMPLETED)
         elif old_status == ProductionStatus.COMPLETED and status != ProductionStatus.COMPLETED:
-            # 1. Rollback Stocks
-            if plan.stock_production:
-                sp = plan.stock_production
-                # 1-1. 완제품 입고 취소 (차감)
-                await handle_stock_movement(
-                    db=db,
-                    product_id=sp.product_id,
-                    quantity=-sp.quantity,
-                    transaction_type=TransactionType.OUT,
-                    reference=f"Rollback ({sp.production_no})"
-                )
-                # 1-2. 하위 부품 Backflush 취소 (원복)
-                await handle_backflush(
-                    db=db,
-                    parent_product_id=sp.product_id,
-                    produced_quantity=-sp.quantity,
-                    reference=f"Rollback ({sp.production_no})"
-                )
-                # 1-3. 생산 중 수량 복원 (진행 중인 상태로 가는 경우에만 다시 생산 중으로 잡음)
-                if status in [ProductionStatus.IN_PROGRESS, ProductionStatus.CONFIRMED]:
-                    stock_query = select(Stock).where(Stock.product_id == sp.product_id)
-                    s_res = await db.execute(stock_query)
-                    stock = s_res.scalars().first()
-                    if stock:
-                        stock.in_production_quantity += sp.quantity
-                
-                # Sync StockProduction status
-                if status == ProductionStatus.IN_PROGRESS:
-                    sp.status = StockProductionStatus.IN_PROGRESS
-                elif status == ProductionStatus.CANCELLED:
-                    sp.status = StockProductionStatus.CANCELLED
-                db.add(sp)
-                
-            elif plan.order:
-                for item in plan.order.items:
-                    # 1-1. 완제품 입고 취소 (차감)
-                    await handle_stock_movement(
-                        db=db,
-                        product_id=item.product_id,
-                        quantity=-item.quantity,
-                        transaction_type=TransactionType.OUT,
-                        reference=f"Rollback ({plan.order.order_no})"
-                    )
-                    # 1-2. 하위 부품 Backflush 취소 (원복)
-                    await handle_backflush(
-                        db=db,
-                        parent_product_id=item.product_id,
-                        produced_quantity=-item.quantity,
-                        reference=f"Rollback ({plan.order.order_no})"
-                    )
-                    # 1-3. 생산 중 수량 복원
-                    if status in [ProductionStatus.IN_PROGRESS, ProductionStatus.CONFIRMED]:
-                        stock_query = select(Stock).where(Stock.product_id == item.product_id)
-                        s_res = await db.execute(stock_query)
-                        stock = s_res.scalars().first()
-                        if stock:
-                            stock.in_production_quantity += item.quantity
-                
-                # Sync Sales Order status
-                # 보호: 이미 납품완료된 수주는 되돌리지 않음
-                if plan.order.status not in [
-                    OrderStatus.DELIVERY_COMPLETED,
-                    OrderStatus.PARTIALLY_DELIVERED,
-                ]:
-                    plan.order.status = OrderStatus.CONFIRMED
-                    db.add(plan.order)
-
-            # 2. Rollback Linked Orders (Back to PENDING)
-            affected_po_ids = set()
-            affected_oo_ids = set()
-            for item in plan.items:
-                for po_item in item.purchase_items:
-                    # Revert received quantity? 
-                    # (User said "대기 상태로 변경", which usually means received_quantity = 0 or status = PENDING)
-                    po_item.received_quantity = 0
-                    db.add(po_item)
-                    affected_po_ids.add(po_item.purchase_order_id)
-                
-                for oo_item in item.outsourcing_items:
-                    oo_item.status = OutsourcingStatus.PENDING
-                    db.add(oo_item)
-                    affected_oo_ids.add(oo_item.outsourcing_order_id)
-            
-            await db.flush()
-
-            # Update PurchaseOrder statuses
-            for po_id in affected_po_ids:
-                po = await db.get(PurchaseOrder, po_id)
-                if po:
-                    po.status = PurchaseStatus.PENDING
-                    db.add(po)
-            
-            # Update OutsourcingOrder statuses
-            for oo_id in affected_oo_ids:
-                oo = await db.get(OutsourcingOrder, oo_id)
-                if oo:
-                    oo.status = OutsourcingStatus.PENDING
-                    db.add(oo)
+            await enqueue_event(db, "production.plan_reopened", "production_plan", plan_id,
+                                {"plan_id": plan_id, "status": status.value})
 
         elif status == ProductionStatus.IN_PROGRESS:
             if plan.order:
@@ -1803,6 +1615,7 @@ async def update_production_plan_status(
                 db.add(plan.stock_production)
             
         await db.commit()
+        wake_outbox_consumer()
         
         # Re-fetch with full options for response
         result = await db.execute(
@@ -1880,6 +1693,11 @@ async def update_production_plan_item(
         if total_linked_cost > 0:
             item.cost = total_linked_cost
 
+    # 공정비용/수량 변경 시 단가 미입력 실적의 환산 금액이 바뀌므로 일별 실적 집계 갱신
+    if "cost" in update_data or "quantity" in update_data:
+        perf_keys = await get_performance_keys(db, plan_item_ids=[item.id])
+        await refresh_worker_daily_performance(db, perf_keys)
+
     await db.commit()
     await db.refresh(item)
     
@@ -1957,8 +1775,7 @@ async def read_work_logs(
         stmt = stmt.where(WorkLog.worker_id == current_user.id)
         
     if major_group_id:
-        subquery = select(WorkLogItem.work_log_id).join(ProductionPlanItem).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        subquery = select(WorkLogItem.work_log_id).join(ProductionPlanItem).join(Product).where(product_group_filter(major_group_id))
         stmt = stmt.where(WorkLog.id.in_(subquery))
 
     result = await db.execute(
@@ -2016,7 +1833,9 @@ async def create_work_log(
     if existing_log and log_in.mode == "CREATE":
         raise HTTPException(status_code=409, detail="해당 날짜에 이미 등록된 작업일지가 있습니다.")
 
+    perf_keys = set()
     if existing_log and log_in.mode == "REPLACE":
+        perf_keys |= await get_performance_keys(db, work_log_ids=[existing_log.id])
         await db.delete(existing_log)
         await db.flush()
         existing_log = None
@@ -2080,6 +1899,10 @@ async def create_work_log(
         # when the last process reaches completion. Do NOT add per-item stock movement here
         # as it would multiply by process count.
 
+    # 작업자 일별 실적 집계 증분 갱신
+    perf_keys |= await get_performance_keys(db, work_log_ids=[log.id])
+    await refresh_worker_daily_performance(db, perf_keys)
+
     await db.commit()
     await db.refresh(log)
 
@@ -2141,6 +1964,8 @@ async def update_work_log(
     if not log:
         raise HTTPException(status_code=404, detail="Work Log not found")
 
+    perf_keys = await get_performance_keys(db, work_log_ids=[log.id])
+
     if log_in.work_date is not None:
         log.work_date = log_in.work_date
     if log_in.worker_id is not None:
@@ -2191,6 +2016,10 @@ async def update_work_log(
         for p_id in affected_plan_item_ids:
             if p_id:
                 await sync_plan_item_status(db, p_id)
+
+    # 작업자 일별 실적 집계 증분 갱신 (변경 전/후 작업자·작업일 모두)
+    perf_keys |= await get_performance_keys(db, work_log_ids=[log.id])
+    await refresh_worker_daily_performance(db, perf_keys)
     await db.commit()
 
     result = await db.execute(
@@ -2240,12 +2069,14 @@ async def delete_work_log(
 
     # Store item IDs to sync status after deletion
     plan_item_ids = [item.plan_item_id for item in log.items if item.plan_item_id]
+    perf_keys = await get_performance_keys(db, work_log_ids=[log.id])
 
     # --- Stock Reversal Hook Removed ---
     # 재고는 개별 실적 수량이 아닌 sync_plan_item_status에서의 상태 변경(COMPLETED -> IN_PROGRESS)에 의해
     # revert_production_item_completed() 가 일괄 처리하도록 변경됨. (데이터 정합성 보장)
 
     await db.delete(log)
+    await refresh_worker_daily_performance(db, perf_keys)
     await db.commit()
     
     # Sync status for all affected items
@@ -2255,6 +2086,99 @@ async def delete_work_log(
 
     return {"message": "Work Log deleted successfully"}
 
+# --- Cycle Time Statistics ---
+
+@router.get("/cycle-time-stats", response_model=List[schemas.ProcessCycleTimeStat])
+async def read_cycle_time_stats(
+    product_id: Optional[int] = None,
+    process_name: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    품목/공정별 실적 사이클타임 통계 (개당 소요 분: 중앙값, P90, 30일 추세)
+    """
+    query = select(ProcessCycleTimeStat)
+    if product_id:
+        query = query.where(ProcessCycleTimeStat.product_id == product_id)
+    if process_name:
+        query = query.where(ProcessCycleTimeStat.process_name == process_name)
+    query = query.order_by(ProcessCycleTimeStat.product_id, ProcessCycleTimeStat.process_name)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+@router.post("/cycle-time-stats/recompute")
+async def recompute_cycle_time_statistics(
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    작업일지 전체 이력으로 사이클타임 통계를 즉시 재계산 (야간 배치와 동일)
+    """
+    count = await recompute_cycle_time_stats(db)
+    return {"message": "Cycle-time statistics recomputed", "count": count}
+
+# --- Outbox Admin Endpoints ---
+
+@router.get("/outbox", response_model=List[schemas.OutboxEvent])
+async def read_outbox_events(
+    status: Optional[str] = None,
+    aggregate_id: Optional[int] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    생산 부수효과 아웃박스 이벤트 조회 (기본: 최근 순, FAILED 필터로 실패 건 확인)
+    """
+    query = select(OutboxEvent)
+    if status:
+        query = query.where(OutboxEvent.status == status.upper())
+    if aggregate_id:
+        query = query.where(OutboxEvent.aggregate_id == aggregate_id)
+    query = query.order_by(OutboxEvent.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+@router.post("/outbox/{event_id}/retry", response_model=schemas.OutboxEvent)
+async def retry_outbox_event(
+    event_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    실패(FAILED)/대기 이벤트를 즉시 재시도 대상으로 되돌립니다.
+    """
+    event = await db.get(OutboxEvent, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Outbox event not found")
+    if event.status in ["DONE", "PROCESSING"]:
+        raise HTTPException(status_code=400, detail=f"{event.status} 상태의 이벤트는 재시도할 수 없습니다.")
+    event.status = "PENDING"
+    event.attempts = 0
+    event.next_attempt_at = now_kst()
+    event.locked_at = None
+    await db.commit()
+    await db.refresh(event)
+    wake_outbox_consumer()
+    return event
+
+@router.post("/outbox/{event_id}/discard", response_model=schemas.OutboxEvent)
+async def discard_outbox_event(
+    event_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    처리할 수 없는 이벤트를 폐기하여 같은 생산계획의 후속 이벤트 처리를 재개합니다.
+    """
+    event = await db.get(OutboxEvent, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Outbox event not found")
+    if event.status in ["DONE", "PROCESSING"]:
+        raise HTTPException(status_code=400, detail=f"{event.status} 상태의 이벤트는 폐기할 수 없습니다.")
+    event.status = "DISCARDED"
+    event.locked_at = None
+    await db.commit()
+    await db.refresh(event)
+    wake_outbox_consumer()
+    return event
+
 # --- Performance Management Endpoints ---
 
 @router.get("/performance/workers")
@@ -2268,43 +2192,29 @@ async def get_worker_performance(
 ) -> Any:
     """
     Get aggregated performance by worker with optional date and worker filtering.
+    작업일지 원본 대신 일별 실적 집계(worker_daily_performance)를 합산합니다.
     """
-    from sqlalchemy import func, distinct, case
-    
-    # Cost with fallback: if WorkLogItem.unit_price is 0 or null, try (PlanItem.cost / PlanItem.quantity)
-    # Using CASE to handle potential division by zero
-    calc_unit_price = case(
-        (WorkLogItem.unit_price > 0, WorkLogItem.unit_price),
-        (ProductionPlanItem.quantity > 0, ProductionPlanItem.cost / ProductionPlanItem.quantity),
-        else_=0
-    )
-    
+    from sqlalchemy import distinct
+
     stmt = (
         select(
             Staff.id.label("worker_id"),
             Staff.name.label("worker_name"),
-            func.sum(WorkLogItem.good_quantity * calc_unit_price).label("total_cost"),
-            func.count(distinct(WorkLog.work_date)).label("log_days")
+            func.sum(WorkerDailyPerformance.total_cost).label("total_cost"),
+            func.count(distinct(WorkerDailyPerformance.work_date)).label("log_days")
         )
-        .join(WorkLogItem, Staff.id == WorkLogItem.worker_id)
-        .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)
-        .join(ProductionPlanItem, WorkLogItem.plan_item_id == ProductionPlanItem.id)
+        .join(WorkerDailyPerformance, Staff.id == WorkerDailyPerformance.worker_id)
         .group_by(Staff.id, Staff.name)
     )
     
     if start_date:
-        stmt = stmt.where(WorkLog.work_date >= start_date)
+        stmt = stmt.where(WorkerDailyPerformance.work_date >= start_date)
     if end_date:
-        stmt = stmt.where(WorkLog.work_date <= end_date)
+        stmt = stmt.where(WorkerDailyPerformance.work_date <= end_date)
     if worker_id:
         stmt = stmt.where(Staff.id == worker_id)
-        
     if major_group_id:
-        from app.models.product import ProductGroup
-        from sqlalchemy import or_
-        # Note: ProductionPlanItem and Product are already joined for calc_unit_price/total_cost
-        stmt = stmt.join(ProductGroup, Product.group_id == ProductGroup.id)\
-                   .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        stmt = stmt.where(WorkerDailyPerformance.product_group_id.in_(group_filter_ids(major_group_id)))
         
     # 일반 사용자의 경우 본인 데이터만 조회
     if current_user.user_type != "ADMIN":
@@ -2313,6 +2223,64 @@ async def get_worker_performance(
     result = await db.execute(stmt)
     return [dict(row._mapping) for row in result.all()]
 
+@router.get("/performance/daily")
+async def get_worker_daily_performance(
+    start_date: Union[date, None] = None,
+    end_date: Union[date, None] = None,
+    worker_id: Optional[int] = None,
+    major_group_id: Optional[int] = None,
+    period: str = "day",  # day, month
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: Staff = Depends(deps.get_current_user)
+) -> Any:
+    """
+    작업자별 일/월 단위 실적 추이 (일별 실적 집계 기반)
+    """
+    if period == "month":
+        year_col = func.extract("year", WorkerDailyPerformance.work_date)
+        month_col = func.extract("month", WorkerDailyPerformance.work_date)
+        period_cols = [year_col.label("year"), month_col.label("month")]
+        group_cols = [year_col, month_col]
+    else:
+        period_cols = [WorkerDailyPerformance.work_date.label("work_date")]
+        group_cols = [WorkerDailyPerformance.work_date]
+
+    stmt = (
+        select(
+            WorkerDailyPerformance.worker_id,
+            *period_cols,
+            func.sum(WorkerDailyPerformance.good_quantity).label("good_quantity"),
+            func.sum(WorkerDailyPerformance.bad_quantity).label("bad_quantity"),
+            func.sum(WorkerDailyPerformance.total_cost).label("total_cost"),
+            func.sum(WorkerDailyPerformance.item_count).label("item_count"),
+        )
+        .group_by(WorkerDailyPerformance.worker_id, *group_cols)
+        .order_by(WorkerDailyPerformance.worker_id, *group_cols)
+    )
+
+    if start_date:
+        stmt = stmt.where(WorkerDailyPerformance.work_date >= start_date)
+    if end_date:
+        stmt = stmt.where(WorkerDailyPerformance.work_date <= end_date)
+    if worker_id:
+        stmt = stmt.where(WorkerDailyPerformance.worker_id == worker_id)
+    if major_group_id:
+        stmt = stmt.where(WorkerDailyPerformance.product_group_id.in_(group_filter_ids(major_group_id)))
+
+    # 일반 사용자의 경우 본인 데이터만 조회
+    if current_user.user_type != "ADMIN":
+        stmt = stmt.where(WorkerDailyPerformance.worker_id == current_user.id)
+
+    result = await db.execute(stmt)
+    rows = []
+    for row in result.all():
+        data = dict(row._mapping)
+        if period == "month":
+            data["year"] = int(data["year"])
+            data["month"] = int(data["month"])
+        rows.append(data)
+    return rows
+
 @router.get("/performance/details", response_model=List[schemas.WorkLogItem])
 async def get_performance_details(
     worker_id: Optional[int] = None,
@@ -2435,10 +2403,14 @@ async def update_work_log_item(
     qty_changed = "good_quantity" in update_data and update_data["good_quantity"] != item.good_quantity
     
     old_good_qty = item.good_quantity
+    perf_keys = await get_performance_keys(db, item_ids=[item.id])
     
     for field, value in update_data.items():
         setattr(item, field, value)
 
+    # 작업자 일별 실적 집계 증분 갱신
+    perf_keys |= await get_performance_keys(db, item_ids=[item.id])
+    await refresh_worker_daily_performance(db, perf_keys)
     await db.commit()
     await db.refresh(item)
     
@@ -1,7 +1,7 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, desc, func, or_, cast, String
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import select, desc, func, or_, cast, String, case, literal, union_all
+from sqlalchemy.orm import selectinload, joinedload, aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
 
@@ -10,6 +10,7 @@ from app.core.timezone import now_kst
 from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, PurchaseStatus, OutsourcingOrder, OutsourcingOrderItem, OutsourcingStatus, MaterialRequirement
 from app.models.production import ProductionPlanItem, ProductionPlan, ProductionStatus
 from app.models.inventory import StockProduction
+from app.models.basics import Partner
 from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus
 from app.models.product import Product, ProductProcess, Process, BOM
 from app.models.inventory import Stock, TransactionType
@@ -17,6 +18,11 @@ from app.models.purchasing import ConsumablePurchaseWait
 from app.schemas import purchasing as schemas
 from app.schemas import production as prod_schemas
 from app.api.utils.inventory import handle_stock_movement
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.pricing import refresh_latest_prices, SOURCE_PURCHASE, SOURCE_OUTSOURCING
+from app.api.utils.fx import stamp_purchase_orders_krw
+from app.api.utils.listing import apply_keyset_cursor, keyset_order_by, make_keyset_cursor, distinct_string_agg
+from app.api.utils.mrp_orders import build_po_proposals, create_pos_from_proposals
 
 router = APIRouter()
 
@@ -26,10 +32,15 @@ router = APIRouter()
 async def get_unordered_requirements(
     major_group_id: Optional[str] = Query(None),
     db: AsyncSession = Depends(deps.get_db),
-    status: str = "PENDING"
+    status: str = "PENDING",
+    skip: int = 0,
+    limit: Optional[int] = None,
+    sort: Optional[str] = None,
 ):
     """
     기록된 미발주 소요량(MRP) 리스트 조회 API (품목별 합산 및 실시간 재고 반영)
+    - sort: shortage(부족분 큰 순) / shortage_asc, 생략 시 품목 ID 순
+    - skip/limit: 페이지네이션 (limit 생략 시 전체)
     """
     # 1. 실시간 발주 잔량(Open PO Qty) 서브쿼리
     po_subq = select(
@@ -45,25 +56,35 @@ async def get_unordered_requirements(
         func.sum(Stock.current_quantity).label("live_stock")
     ).group_by(Stock.product_id).subquery()
 
-    # 3. 메인 쿼리: 품목별 집계 및 실시간 정보 조인
+    # 3. 연관 수주 번호 (품목별 중복 제거 후 string_agg / group_concat)
+    so_src = select(MaterialRequirement.product_id.label("product_id"), SalesOrder.order_no.label("order_no"))\
+        .join(SalesOrder, MaterialRequirement.order_id == SalesOrder.id)\
+        .where(MaterialRequirement.status == status)\
+        .subquery()
+    so_subq = distinct_string_agg(so_src.c.product_id, so_src.c.order_no).subquery()
+
+    # 4. 메인 쿼리: 품목별 집계 및 실시간 정보 조인
+    total_required_expr = func.sum(MaterialRequirement.required_quantity)
+    shortage_raw = total_required_expr - func.coalesce(stock_subq.c.live_stock, 0) - func.coalesce(po_subq.c.open_qty, 0)
+    shortage_expr = case((shortage_raw > 0, shortage_raw), else_=0)
     query = select(
         Product,
-        func.sum(MaterialRequirement.required_quantity).label("total_required"),
+        total_required_expr.label("total_required"),
         func.min(MaterialRequirement.id).label("min_mr_id"),
         func.max(MaterialRequirement.created_at).label("latest_created"),
         po_subq.c.open_qty,
-        stock_subq.c.live_stock
+        stock_subq.c.live_stock,
+        so_subq.c.joined.label("so_numbers"),
     ).join(MaterialRequirement, MaterialRequirement.product_id == Product.id)\
      .outerjoin(po_subq, Product.id == po_subq.c.product_id)\
      .outerjoin(stock_subq, Product.id == stock_subq.c.product_id)\
+     .outerjoin(so_subq, Product.id == so_subq.c.key)\
      .where(MaterialRequirement.status == status)\
-     .group_by(Product.id, po_subq.c.open_qty, stock_subq.c.live_stock)
+     .group_by(Product.id, po_subq.c.open_qty, stock_subq.c.live_stock, so_subq.c.joined)
 
     if major_group_id and str(major_group_id).isdigit():
         major_group_id_int = int(major_group_id)
-        from app.models.product import ProductGroup
-        subquery = select(Product.id).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
+        subquery = select(Product.id).where(product_group_filter(major_group_id_int))
         query = query.where(Product.id.in_(subquery))
 
     # 생산완료(COMPLETED)된 생산계획에 연결된 소요량 제외
@@ -77,18 +98,22 @@ async def get_unordered_requirements(
         )
     )
 
+    if sort == "shortage":
+        query = query.order_by(desc(shortage_expr), Product.id)
+    elif sort == "shortage_asc":
+        query = query.order_by(shortage_expr, Product.id)
+    else:
+        query = query.order_by(Product.id)
+    if skip:
+        query = query.offset(skip)
+    if limit:
+        query = query.limit(limit)
 
     result = await db.execute(query)
     rows = result.all()
 
     final_results = []
-    for product, total_required, min_mr_id, latest_created, open_qty, live_stock in rows:
-        # 연관된 수주 번호 수집 (병합)
-        so_stmt = select(SalesOrder.order_no).join(MaterialRequirement, MaterialRequirement.order_id == SalesOrder.id)\
-                    .where(MaterialRequirement.product_id == product.id, MaterialRequirement.status == status).distinct()
-        so_res = await db.execute(so_stmt)
-        so_numbers = [r for r in so_res.scalars().all() if r]
-        
+    for product, total_required, min_mr_id, latest_created, open_qty, live_stock, so_numbers in rows:
         # 합산된 데이터 구성
         res = schemas.MaterialRequirementResponse(
             id=min_mr_id, # 대표 ID 하나 사용
@@ -101,12 +126,60 @@ async def get_unordered_requirements(
             product_name=product.name,
             specification=product.specification,
             item_type=product.item_type,
-            sales_order_number=", ".join(so_numbers) if so_numbers else "-"
+            sales_order_number=so_numbers or "-"
         )
         final_results.append(res)
             
     return final_results
 
+@router.post("/mrp/po-proposals", response_model=schemas.MrpPoProposalResult)
+async def propose_purchase_orders_from_mrp(
+    request: schemas.MrpPoProposalRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    미발주 소요량 → 공급사별 초안 발주 제안 (저장하지 않음)
+    requirement_ids 지정 또는 all_pending=true 로 전체 미발주 소요량 대상
+    """
+    if request.requirement_ids is None and not request.all_pending:
+        raise HTTPException(status_code=400, detail="requirement_ids 또는 all_pending 을 지정해 주세요.")
+    requirement_ids = None if request.all_pending else request.requirement_ids
+    return await build_po_proposals(db, requirement_ids, request.major_group_id)
+
+@router.post("/mrp/po-proposals/create", response_model=schemas.MrpPoCreateResult)
+async def create_purchase_orders_from_mrp(
+    request: schemas.MrpPoCreateRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    선택된 초안 발주 일괄 생성 (발주/품목/소요량 연결을 한 트랜잭션으로 처리)
+    """
+    try:
+        created, ordered_ids = await create_pos_from_proposals(db, request.orders, request.order_date)
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        import logging
+        logging.getLogger(__name__).error(f"Failed to create purchase orders from MRP: {e}")
+        raise HTTPException(status_code=500, detail=f"일괄 발주 생성 중 오류 발생: {str(e)}")
+
+    return schemas.MrpPoCreateResult(
+        created=[
+            schemas.MrpPoCreated(
+                id=po.id,
+                order_no=po.order_no,
+                partner_id=po.partner_id,
+                item_count=len(o.lines),
+                total_amount=po.total_amount or 0.0,
+            )
+            for po, o in zip(created, [o for o in request.orders if o.lines])
+        ],
+        ordered_requirement_ids=ordered_ids,
+    )
+
 @router.get("/purchase/consumable-waits", response_model=List[schemas.ConsumablePurchaseWaitResponse])
 async def get_consumable_waits(
     major_group_id: Optional[str] = Query(None),
@@ -131,9 +204,7 @@ async def get_consumable_waits(
     
     if major_group_id and str(major_group_id).isdigit():
         major_group_id_int = int(major_group_id)
-        from app.models.product import ProductGroup
-        subquery = select(ConsumablePurchaseWait.id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
+        subquery = select(ConsumablePurchaseWait.id).join(Product).where(product_group_filter(major_group_id_int))
         query = query.where(ConsumablePurchaseWait.id.in_(subquery))
     
     result = await db.execute(query)
@@ -240,6 +311,8 @@ async def register_consumable_order(
     )
     db.add(po_item)
 
+    await refresh_latest_prices(db, [product_id], [SOURCE_PURCHASE])
+    await stamp_purchase_orders_krw(db, [new_po.id])
     await db.commit()
     return {"message": "발주가 성공적으로 등록되었습니다.", "id": new_po.id, "order_no": order_no}
 
@@ -461,9 +534,7 @@ async def read_pending_purchase_items(
         
     if major_group_id and str(major_group_id).isdigit():
         major_group_id_int = int(major_group_id)
-        from app.models.product import ProductGroup
-        subquery = select(ProductionPlanItem.id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
+        subquery = select(ProductionPlanItem.id).join(Product).where(product_group_filter(major_group_id_int))
         query = query.where(ProductionPlanItem.id.in_(subquery))
         
     result = await db.execute(query)
@@ -535,9 +606,7 @@ async def read_pending_outsourcing_items(
         
     if major_group_id and str(major_group_id).isdigit():
         major_group_id_int = int(major_group_id)
-        from app.models.product import ProductGroup
-        subquery = select(ProductionPlanItem.id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
+        subquery = select(ProductionPlanItem.id).join(Product).where(product_group_filter(major_group_id_int))
         query = query.where(ProductionPlanItem.id.in_(subquery))
         
     result = await db.execute(query)
@@ -658,6 +727,8 @@ async def create_purchase_order(
                     plan_item.cost = item.unit_price * item.quantity
                     db.add(plan_item)
 
+        await refresh_latest_prices(db, [i.product_id for i in order_in.items], [SOURCE_PURCHASE])
+        await stamp_purchase_orders_krw(db, [db_order.id])
         await db.commit()
         await db.refresh(db_order)
 
@@ -863,6 +934,191 @@ async def trigger_fix_consumable_types(
         return {"status": "error", "message": str(e), "trace": traceback.format_exc()}
 
 
+def _apply_purchase_order_filters(
+    query,
+    status: Optional[str] = None,
+    purchase_type: Optional[str] = None,
+    partner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    major_group_id: Optional[str] = None,
+):
+    """구매발주 목록 공통 필터 (전체 그래프 조회 / 슬림 목록 조회 공용)"""
+    if status:
+        query = query.where(PurchaseOrder.status == status)
+    if purchase_type:
+        query = query.where(PurchaseOrder.purchase_type == purchase_type)
+    if partner_id:
+        query = query.where(PurchaseOrder.partner_id == partner_id)
+    if start_date:
+        if status == PurchaseStatus.COMPLETED or status == "COMPLETED":
+            query = query.where(PurchaseOrder.actual_delivery_date >= start_date)
+        else:
+            query = query.where(PurchaseOrder.order_date >= start_date)
+    if end_date:
+        if status == PurchaseStatus.COMPLETED or status == "COMPLETED":
+            query = query.where(PurchaseOrder.actual_delivery_date <= end_date)
+        else:
+            query = query.where(PurchaseOrder.order_date <= end_date)
+    if customer_id:
+        query = query.where(PurchaseOrder.order_id.in_(select(SalesOrder.id).where(SalesOrder.partner_id == customer_id)))
+
+    if major_group_id and str(major_group_id).isdigit():
+        major_group_id_int = int(major_group_id)
+        subquery = select(PurchaseOrderItem.purchase_order_id).join(Product).where(product_group_filter(major_group_id_int))
+        query = query.where(PurchaseOrder.id.in_(subquery))
+    return query
+
+def _apply_outsourcing_order_filters(
+    query,
+    status: Optional[str] = None,
+    partner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    major_group_id: Optional[str] = None,
+):
+    """외주발주 목록 공통 필터 (전체 그래프 조회 / 슬림 목록 조회 공용)"""
+    if status:
+        if status == "COMPLETED" or status == OutsourcingStatus.COMPLETED:
+            query = query.where(OutsourcingOrder.status.in_(["COMPLETED", "QUOTATION_COMPLETE"]))
+        else:
+            query = query.where(OutsourcingOrder.status == status)
+    if partner_id:
+        query = query.where(OutsourcingOrder.partner_id == partner_id)
+    if start_date:
+        if status == OutsourcingStatus.COMPLETED or status == "COMPLETED":
+            query = query.where(OutsourcingOrder.actual_delivery_date >= start_date)
+        else:
+            query = query.where(OutsourcingOrder.order_date >= start_date)
+    if end_date:
+        if status == OutsourcingStatus.COMPLETED or status == "COMPLETED":
+            query = query.where(OutsourcingOrder.actual_delivery_date <= end_date)
+        else:
+            query = query.where(OutsourcingOrder.order_date <= end_date)
+    if customer_id:
+        query = query.where(OutsourcingOrder.order_id.in_(select(SalesOrder.id).where(SalesOrder.partner_id == customer_id)))
+
+    if major_group_id and str(major_group_id).isdigit():
+        major_group_id_int = int(major_group_id)
+        subquery = select(OutsourcingOrderItem.outsourcing_order_id).join(Product).where(product_group_filter(major_group_id_int))
+        query = query.where(OutsourcingOrder.id.in_(subquery))
+    return query
+
+def _plan_source_columns(plan_alias, so_alias, partner_alias, sp_alias):
+    """생산계획 → (수주번호 | 재고생산번호, 고객사명 | '사내 재고용') 컬럼 (엔티티 프로퍼티와 동일 규칙)"""
+    code = case(
+        (so_alias.id.isnot(None), so_alias.order_no),
+        (sp_alias.id.isnot(None), sp_alias.production_no),
+    )
+    customer = case(
+        (so_alias.id.isnot(None), partner_alias.name),
+        (sp_alias.id.isnot(None), literal("사내 재고용")),
+    )
+    return code, customer
+
+async def _related_sources_for_items(db: AsyncSession, item_model, order_fk, order_ids: List[int], with_requirements: bool):
+    """
+    발주 품목 → 생산계획(공정) / MRP 소요량 경로로 연결된 수주·재고생산 번호와 고객사명을
+    발주별 문자열 집계로 한 번에 계산합니다.
+    """
+    if not order_ids:
+        return {}, {}
+    Plan = aliased(ProductionPlan)
+    SO = aliased(SalesOrder)
+    Cust = aliased(Partner)
+    SP = aliased(StockProduction)
+    code, customer = _plan_source_columns(Plan, SO, Cust, SP)
+    via_plan = (
+        select(order_fk.label("order_id"), code.label("code"), customer.label("customer"))
+        .select_from(item_model)
+        .join(ProductionPlanItem, item_model.production_plan_item_id == ProductionPlanItem.id)
+        .join(Plan, ProductionPlanItem.plan_id == Plan.id)
+        .outerjoin(SO, Plan.order_id == SO.id)
+        .outerjoin(Cust, SO.partner_id == Cust.id)
+        .outerjoin(SP, Plan.stock_production_id == SP.id)
+        .where(order_fk.in_(order_ids))
+    )
+    sources = [via_plan]
+
+    if with_requirements:
+        ReqSO = aliased(SalesOrder)
+        ReqCust = aliased(Partner)
+        ReqPlan = aliased(ProductionPlan)
+        PlanSO = aliased(SalesOrder)
+        PlanCust = aliased(Partner)
+        ReqSP = aliased(StockProduction)
+        req_code = case(
+            (ReqSO.id.isnot(None), ReqSO.order_no),
+            (PlanSO.id.isnot(None), PlanSO.order_no),
+            (ReqSP.id.isnot(None), ReqSP.production_no),
+        )
+        req_customer = case(
+            (ReqSO.id.isnot(None), ReqCust.name),
+            (PlanSO.id.isnot(None), PlanCust.name),
+            (ReqSP.id.isnot(None), literal("사내 재고용")),
+        )
+        sources.append(
+            select(order_fk.label("order_id"), req_code.label("code"), req_customer.label("customer"))
+            .select_from(item_model)
+            .join(MaterialRequirement, item_model.material_requirement_id == MaterialRequirement.id)
+            .outerjoin(ReqSO, MaterialRequirement.order_id == ReqSO.id)
+            .outerjoin(ReqCust, ReqSO.partner_id == ReqCust.id)
+            .outerjoin(ReqPlan, MaterialRequirement.plan_id == ReqPlan.id)
+            .outerjoin(PlanSO, ReqPlan.order_id == PlanSO.id)
+            .outerjoin(PlanCust, PlanSO.partner_id == PlanCust.id)
+            .outerjoin(ReqSP, ReqPlan.stock_production_id == ReqSP.id)
+            .where(order_fk.in_(order_ids))
+        )
+
+    rel = union_all(*sources).subquery() if len(sources) > 1 else sources[0].subquery()
+    codes_res = await db.execute(distinct_string_agg(rel.c.order_id, rel.c.code))
+    cust_res = await db.execute(distinct_string_agg(rel.c.order_id, rel.c.customer))
+    return dict(codes_res.all()), dict(cust_res.all())
+
+async def _process_names_for_items(db: AsyncSession, item_model, order_fk, order_ids: List[int]):
+    if not order_ids:
+        return {}
+    rel = (
+        select(order_fk.label("order_id"), ProductionPlanItem.process_name.label("process_name"))
+        .select_from(item_model)
+        .join(ProductionPlanItem, item_model.production_plan_item_id == ProductionPlanItem.id)
+        .where(order_fk.in_(order_ids))
+        .subquery()
+    )
+    res = await db.execute(distinct_string_agg(rel.c.order_id, rel.c.process_name))
+    return dict(res.all())
+
+
+async def _item_summaries_for_items(db: AsyncSession, item_model, order_fk, order_ids: List[int], with_receipts: bool):
+    """
+    발주별 품목 건수/수량 합계/대표 품목명 (with_receipts: 입고수량 합계와 대표 품목 통화 포함)을
+    페이지 발주 id 로 한정한 GROUP BY 1회로 계산합니다.
+    """
+    if not order_ids:
+        return {}
+    columns = [
+        order_fk.label("order_id"),
+        func.count(item_model.id).label("item_count"),
+        func.min(item_model.id).label("first_item_id"),
+        func.coalesce(func.sum(item_model.quantity), 0).label("total_quantity"),
+    ]
+    if with_receipts:
+        columns.append(func.coalesce(func.sum(item_model.received_quantity), 0).label("received_quantity"))
+    item_agg = select(*columns).where(order_fk.in_(order_ids)).group_by(order_fk).subquery()
+    FirstItem = aliased(item_model)
+    FirstProduct = aliased(Product)
+    query = (
+        select(item_agg, FirstProduct.name.label("first_item_name"))
+        .outerjoin(FirstItem, FirstItem.id == item_agg.c.first_item_id)
+        .outerjoin(FirstProduct, FirstItem.product_id == FirstProduct.id)
+    )
+    if with_receipts:
+        query = query.add_columns(FirstItem.currency.label("currency"))
+    res = await db.execute(query)
+    return {r.order_id: r for r in res.all()}
+
 @router.get("/purchase/orders", response_model=List[schemas.PurchaseOrder])
 async def read_purchase_orders(
     skip: int = 0,
@@ -878,6 +1134,7 @@ async def read_purchase_orders(
 ) -> Any:
     """
     Retrieve purchase orders with advanced filtering.
+    목록 그리드는 GET /purchase/orders/list (슬림 + 키셋 페이지네이션) 사용
     """
     # Local import for deep loading
     from app.models.production import ProductionPlanItem, ProductionPlan
@@ -902,32 +1159,10 @@ async def read_purchase_orders(
             )
         )
     )
-    if status:
-        query = query.where(PurchaseOrder.status == status)
-    if purchase_type:
-        query = query.where(PurchaseOrder.purchase_type == purchase_type)
-    if partner_id:
-        query = query.where(PurchaseOrder.partner_id == partner_id)
-    if start_date:
-        if status == PurchaseStatus.COMPLETED or status == "COMPLETED":
-            query = query.where(PurchaseOrder.actual_delivery_date >= start_date)
-        else:
-            query = query.where(PurchaseOrder.order_date >= start_date)
-    if end_date:
-        if status == PurchaseStatus.COMPLETED or status == "COMPLETED":
-            query = query.where(PurchaseOrder.actual_delivery_date <= end_date)
-        else:
-            query = query.where(PurchaseOrder.order_date <= end_date)
-    if customer_id:
-        query = query.where(SalesOrder.partner_id == customer_id)
-        
-    if major_group_id and str(major_group_id).isdigit():
-        major_group_id_int = int(major_group_id)
-        from app.models.product import ProductGroup
-        from sqlalchemy import or_
-        subquery = select(PurchaseOrderItem.purchase_order_id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
-        query = query.where(PurchaseOrder.id.in_(subquery))
+    query = _apply_purchase_order_filters(
+        query, status=status, purchase_type=purchase_type, partner_id=partner_id,
+        start_date=start_date, end_date=end_date, customer_id=customer_id, major_group_id=major_group_id,
+    )
 
     query = query.order_by(desc(PurchaseOrder.order_date)).offset(skip).limit(limit or 2000)
 
@@ -947,6 +1182,94 @@ async def read_purchase_orders(
     
     return pos
 
+@router.get("/purchase/orders/list", response_model=schemas.PurchaseOrderListPage)
+async def read_purchase_orders_list(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[str] = None,
+    purchase_type: Optional[str] = None,
+    partner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    major_group_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    구매발주 목록 그리드 전용 슬림 조회.
+    - 품목 집계(건수/수량/입고수량/대표 품목)는 페이지 발주 id 로 한정한 GROUP BY
+    - 관련 수주·재고생산 번호와 고객사명, 공정명은 SQL 문자열 집계로 계산
+    - (order_date, id) 역순 키셋 페이지네이션 (cursor = 응답의 next_cursor)
+    - 품목 라우팅/BOM/생산계획 그래프는 상세 GET /purchase/orders/{order_id} 에서만 로딩
+    """
+    limit = max(1, min(limit, 500))
+    filters = dict(
+        status=status, purchase_type=purchase_type, partner_id=partner_id,
+        start_date=start_date, end_date=end_date, customer_id=customer_id, major_group_id=major_group_id,
+    )
+
+    total = None
+    if include_total:
+        base = _apply_purchase_order_filters(select(PurchaseOrder.id), **filters)
+        total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
+
+    query = (
+        select(
+            PurchaseOrder.id, PurchaseOrder.order_no, PurchaseOrder.partner_id, Partner.name.label("partner_name"),
+            PurchaseOrder.order_id, PurchaseOrder.order_date, PurchaseOrder.delivery_date,
+            PurchaseOrder.actual_delivery_date, PurchaseOrder.status, PurchaseOrder.purchase_type,
+            PurchaseOrder.is_import, PurchaseOrder.total_amount, PurchaseOrder.note,
+            PurchaseOrder.attachment_file,
+        )
+        .outerjoin(Partner, PurchaseOrder.partner_id == Partner.id)
+    )
+    query = _apply_purchase_order_filters(query, **filters)
+    query = apply_keyset_cursor(query, PurchaseOrder.order_date, PurchaseOrder.id, cursor)
+    query = keyset_order_by(query, PurchaseOrder.order_date, PurchaseOrder.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    order_ids = [r.id for r in rows]
+    so_numbers, customer_names = await _related_sources_for_items(
+        db, PurchaseOrderItem, PurchaseOrderItem.purchase_order_id, order_ids, with_requirements=True
+    )
+    summaries = await _item_summaries_for_items(
+        db, PurchaseOrderItem, PurchaseOrderItem.purchase_order_id, order_ids, with_receipts=True
+    )
+    process_names = await _process_names_for_items(db, PurchaseOrderItem, PurchaseOrderItem.purchase_order_id, order_ids)
+
+    items = []
+    for r in rows:
+        a = summaries.get(r.id)
+        items.append(schemas.PurchaseOrderListRow(
+            id=r.id,
+            order_no=r.order_no,
+            partner_id=r.partner_id,
+            partner_name=r.partner_name,
+            order_id=r.order_id,
+            order_date=r.order_date,
+            delivery_date=r.delivery_date,
+            actual_delivery_date=r.actual_delivery_date,
+            status=r.status.value if hasattr(r.status, "value") else r.status,
+            purchase_type=r.purchase_type,
+            is_import=r.is_import or False,
+            total_amount=r.total_amount or 0.0,
+            note=r.note,
+            attachment_file=r.attachment_file,
+            item_count=a.item_count if a else 0,
+            total_quantity=a.total_quantity if a else 0,
+            received_quantity=a.received_quantity if a else 0,
+            first_item_name=a.first_item_name if a else None,
+            currency=(a.currency if a else None) or "KRW",
+            sales_order_number=so_numbers.get(r.id),
+            related_customer_names=customer_names.get(r.id),
+            process_names=process_names.get(r.id),
+        ))
+    next_cursor = make_keyset_cursor(rows[-1].order_date, rows[-1].id) if has_more and rows else None
+    return schemas.PurchaseOrderListPage(items=items, next_cursor=next_cursor, total=total)
+
 @router.get("/purchase/orders/{order_id}", response_model=schemas.PurchaseOrder)
 async def read_purchase_order(
     order_id: int,
@@ -1010,6 +1333,7 @@ async def update_purchase_order(
     
     if not db_order:
         raise HTTPException(status_code=404, detail="Purchase Order not found")
+    price_product_ids = {i.product_id for i in db_order.items}
 
     old_status = db_order.status
 
@@ -1123,6 +1447,9 @@ async def update_purchase_order(
                     product.recent_price = item.unit_price
                     db.add(product)
 
+    price_product_ids |= {i.get("product_id") for i in (items_data or [])}
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_PURCHASE])
+    await stamp_purchase_orders_krw(db, [db_order.id])
     await db.commit()
     await db.refresh(db_order)
     
@@ -1184,7 +1511,9 @@ async def delete_purchase_order(
                     wait_req.status = "PENDING"
                     db.add(wait_req)
         
+    price_product_ids = {i.product_id for i in db_order.items}
     await db.delete(db_order)
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_PURCHASE])
     await db.commit()
     return None
 
@@ -1251,6 +1580,7 @@ async def create_outsourcing_order(
                 plan_item.cost = item.unit_price * item.quantity
                 db.add(plan_item)
     
+    await refresh_latest_prices(db, [i.product_id for i in order_in.items], [SOURCE_OUTSOURCING])
     await db.commit()
     await db.refresh(db_order)
 
@@ -1285,6 +1615,7 @@ async def read_outsourcing_orders(
 ) -> Any:
     """
     Retrieve outsourcing orders with advanced filtering.
+    목록 그리드는 GET /outsourcing/orders/list (슬림 + 키셋 페이지네이션) 사용
     """
     # Local import
     from app.models.production import ProductionPlanItem, ProductionPlan
@@ -1303,33 +1634,10 @@ async def read_outsourcing_orders(
                 selectinload(ProductionPlan.stock_production).selectinload(StockProduction.product)
             )
         )
-        if status:
-            if status == "COMPLETED" or status == OutsourcingStatus.COMPLETED:
-                query = query.where(OutsourcingOrder.status.in_(["COMPLETED", "QUOTATION_COMPLETE"]))
-            else:
-                query = query.where(OutsourcingOrder.status == status)
-        if partner_id:
-            query = query.where(OutsourcingOrder.partner_id == partner_id)
-        if start_date:
-            if status == OutsourcingStatus.COMPLETED or status == "COMPLETED":
-                query = query.where(OutsourcingOrder.actual_delivery_date >= start_date)
-            else:
-                query = query.where(OutsourcingOrder.order_date >= start_date)
-        if end_date:
-            if status == OutsourcingStatus.COMPLETED or status == "COMPLETED":
-                query = query.where(OutsourcingOrder.actual_delivery_date <= end_date)
-            else:
-                query = query.where(OutsourcingOrder.order_date <= end_date)
-        if customer_id:
-            query = query.where(SalesOrder.partner_id == customer_id)
-            
-        if major_group_id and str(major_group_id).isdigit():
-            major_group_id_int = int(major_group_id)
-            from app.models.product import ProductGroup
-            from sqlalchemy import or_
-            subquery = select(OutsourcingOrderItem.outsourcing_order_id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                         .where(or_(ProductGroup.id == major_group_id_int, ProductGroup.parent_id == major_group_id_int))
-            query = query.where(OutsourcingOrder.id.in_(subquery))
+        query = _apply_outsourcing_order_filters(
+            query, status=status, partner_id=partner_id, start_date=start_date, end_date=end_date,
+            customer_id=customer_id, major_group_id=major_group_id,
+        )
 
         query = query.order_by(desc(OutsourcingOrder.order_date)).offset(skip).limit(limit or 2000)
 
@@ -1354,6 +1662,118 @@ async def read_outsourcing_orders(
         logger.error(f"Failed to read outsourcing orders: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"외주발주 조회 중 오류 발생: {str(e)}")
 
+@router.get("/outsourcing/orders/list", response_model=schemas.OutsourcingOrderListPage)
+async def read_outsourcing_orders_list(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[str] = None,
+    partner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    major_group_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    외주발주 목록 그리드 전용 슬림 조회 (구매발주 슬림 목록과 동일 구성).
+    상세 그래프는 GET /outsourcing/orders/{order_id}
+    """
+    limit = max(1, min(limit, 500))
+    filters = dict(
+        status=status, partner_id=partner_id, start_date=start_date, end_date=end_date,
+        customer_id=customer_id, major_group_id=major_group_id,
+    )
+
+    total = None
+    if include_total:
+        base = _apply_outsourcing_order_filters(select(OutsourcingOrder.id), **filters)
+        total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
+
+    query = (
+        select(
+            OutsourcingOrder.id, OutsourcingOrder.order_no, OutsourcingOrder.partner_id, Partner.name.label("partner_name"),
+            OutsourcingOrder.order_id, OutsourcingOrder.order_date, OutsourcingOrder.delivery_date,
+            OutsourcingOrder.actual_delivery_date, OutsourcingOrder.status, OutsourcingOrder.total_amount,
+            OutsourcingOrder.note, OutsourcingOrder.attachment_file,
+        )
+        .outerjoin(Partner, OutsourcingOrder.partner_id == Partner.id)
+    )
+    query = _apply_outsourcing_order_filters(query, **filters)
+    query = apply_keyset_cursor(query, OutsourcingOrder.order_date, OutsourcingOrder.id, cursor)
+    query = keyset_order_by(query, OutsourcingOrder.order_date, OutsourcingOrder.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    order_ids = [r.id for r in rows]
+    so_numbers, customer_names = await _related_sources_for_items(
+        db, OutsourcingOrderItem, OutsourcingOrderItem.outsourcing_order_id, order_ids, with_requirements=False
+    )
+    summaries = await _item_summaries_for_items(
+        db, OutsourcingOrderItem, OutsourcingOrderItem.outsourcing_order_id, order_ids, with_receipts=False
+    )
+    process_names = await _process_names_for_items(db, OutsourcingOrderItem, OutsourcingOrderItem.outsourcing_order_id, order_ids)
+
+    items = []
+    for r in rows:
+        a = summaries.get(r.id)
+        items.append(schemas.OutsourcingOrderListRow(
+            id=r.id,
+            order_no=r.order_no,
+            partner_id=r.partner_id,
+            partner_name=r.partner_name,
+            order_id=r.order_id,
+            order_date=r.order_date,
+            delivery_date=r.delivery_date,
+            actual_delivery_date=r.actual_delivery_date,
+            status=r.status.value if hasattr(r.status, "value") else r.status,
+            total_amount=r.total_amount or 0.0,
+            note=r.note,
+            attachment_file=r.attachment_file,
+            item_count=a.item_count if a else 0,
+            total_quantity=a.total_quantity if a else 0,
+            first_item_name=a.first_item_name if a else None,
+            related_sales_order_info=so_numbers.get(r.id),
+            related_customer_names=customer_names.get(r.id),
+            process_names=process_names.get(r.id),
+        ))
+    next_cursor = make_keyset_cursor(rows[-1].order_date, rows[-1].id) if has_more and rows else None
+    return schemas.OutsourcingOrderListPage(items=items, next_cursor=next_cursor, total=total)
+
+@router.get("/outsourcing/orders/{order_id}", response_model=schemas.OutsourcingOrder)
+async def read_outsourcing_order(
+    order_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Get a single Outsourcing Order by ID (상세 화면용 전체 그래프).
+    """
+    query = select(OutsourcingOrder).options(
+        selectinload(OutsourcingOrder.items).selectinload(OutsourcingOrderItem.product).options(
+            selectinload(Product.standard_processes).selectinload(ProductProcess.process),
+            selectinload(Product.bom_items)
+        ),
+        selectinload(OutsourcingOrder.partner),
+        selectinload(OutsourcingOrder.order).selectinload(SalesOrder.partner),
+        selectinload(OutsourcingOrder.items).selectinload(OutsourcingOrderItem.production_plan_item).selectinload(ProductionPlanItem.plan).options(
+            selectinload(ProductionPlan.order).selectinload(SalesOrder.partner),
+            selectinload(ProductionPlan.stock_production).selectinload(StockProduction.product)
+        )
+    ).where(OutsourcingOrder.id == order_id)
+
+    result = await db.execute(query)
+    oo = result.unique().scalar_one_or_none()
+    if not oo:
+        raise HTTPException(status_code=404, detail="Outsourcing Order not found")
+
+    oo.related_sales_order_info = str(oo.related_so_info_attr) if oo.related_so_info_attr else None
+    oo.related_customer_names = str(oo.related_cust_names_attr) if oo.related_cust_names_attr else None
+    for item in oo.items:
+        if item.production_plan_item:
+            item.process_name = item.production_plan_item.process_name
+    return oo
+
 @router.put("/outsourcing/orders/{order_id}", response_model=schemas.OutsourcingOrder)
 async def update_outsourcing_order(
     order_id: int,
@@ -1369,6 +1789,7 @@ async def update_outsourcing_order(
     
     if not db_order:
         raise HTTPException(status_code=404, detail="Outsourcing Order not found")
+    price_product_ids = {i.product_id for i in db_order.items}
 
     old_status = db_order.status
 
@@ -1456,6 +1877,8 @@ async def update_outsourcing_order(
                     reference=db_order.order_no
                 )
 
+    price_product_ids |= {i.get("product_id") for i in (items_data or [])}
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_OUTSOURCING])
     await db.commit()
     await db.refresh(db_order)
     
@@ -1498,7 +1921,9 @@ async def delete_outsourcing_order(
                     plan_item.status = ProductionStatus.PLANNED
                     db.add(plan_item)
 
+    price_product_ids = {i.product_id for i in db_order.items}
     await db.delete(db_order)
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_OUTSOURCING])
     await db.commit()
     return None
 @router.delete("/mrp/requirements/{requirement_id}")
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
@@ -13,6 +13,11 @@ from app.models.quality import CustomerComplaint, ComplaintStatus, QualityDefect
 from app.schemas import quality as schemas
 from datetime import datetime
 from app.core.timezone import now_kst
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.date_ranges import period_bounds, quarter_bounds
+from app.api.utils.quality_rollups import (
+    sync_quality_rollups, defect_pareto, process_defect_rates, complaint_trends, PARETO_DIMENSIONS, PARETO_METRICS,
+)
 
 router = APIRouter()
 
@@ -38,13 +43,11 @@ async def read_defects(
     )
     
     if major_group_id:
-        from app.models.product import Product, ProductGroup
+        from app.models.product import Product
         from app.models.production import ProductionPlanItem
-        from sqlalchemy import or_
         subquery = select(QualityDefect.id).join(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)\
                      .join(Product, ProductionPlanItem.product_id == Product.id)\
-                     .join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+                     .where(product_group_filter(major_group_id))
         query = query.where(QualityDefect.id.in_(subquery))
 
     query = query.order_by(desc(QualityDefect.defect_date)).offset(skip).limit(limit)
@@ -140,6 +143,61 @@ async def upload_quality_file(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- Quality Analytics Endpoints (집계 테이블 기반) ---
+
+def _analytics_bounds(year: int, quarter: Optional[int], month: Optional[int]):
+    if month:
+        return period_bounds(year, month)
+    if quarter:
+        return quarter_bounds(year, quarter)
+    return period_bounds(year)
+
+@router.get("/analytics/defect-pareto")
+async def read_defect_pareto(
+    year: int = Query(...),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    by: str = Query("reason", description="reason / product / process / worker"),
+    metric: str = Query("quantity", description="quantity / amount / count"),
+    major_group_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """불량 파레토: 불량 사유/품목/공정/작업자별 합계, 비율, 누적비율 (누적 80% 까지 vital)"""
+    if by not in PARETO_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"by 는 {', '.join(PARETO_DIMENSIONS)} 중 하나여야 합니다.")
+    if metric not in PARETO_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric 은 {', '.join(PARETO_METRICS)} 중 하나여야 합니다.")
+    await sync_quality_rollups(db)
+    start, end = _analytics_bounds(year, quarter, month)
+    return await defect_pareto(db, start, end, by, metric, major_group_id, limit)
+
+@router.get("/analytics/defect-rates")
+async def read_process_defect_rates(
+    year: int = Query(...),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    major_group_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """공정별 불량률: 불량 수량 ÷ 작업일지 (양품 + 불량) 수량"""
+    await sync_quality_rollups(db)
+    start, end = _analytics_bounds(year, quarter, month)
+    return await process_defect_rates(db, start, end, major_group_id)
+
+@router.get("/analytics/complaint-trends")
+async def read_complaint_trends(
+    year: int = Query(...),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    partner_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """고객불만 추이: 월별 상태별 접수 건수 + 거래처별 상위 건수"""
+    await sync_quality_rollups(db)
+    start, end = _analytics_bounds(year, quarter, month)
+    return await complaint_trends(db, start, end, partner_id)
+
 # --- Customer Complaint Endpoints ---
 
 @router.post("/", response_model=schemas.CustomerComplaintResponse)
@@ -179,14 +237,12 @@ async def read_complaints(
         query = query.where(CustomerComplaint.partner_id == partner_id)
         
     if major_group_id:
-        from app.models.product import Product, ProductGroup
+        from app.models.product import Product
         from app.models.sales import SalesOrderItem
-        from sqlalchemy import or_
         # Join via SalesOrder -> SalesOrderItem -> Product
         subquery = select(CustomerComplaint.id).join(SalesOrderItem, CustomerComplaint.order_id == SalesOrderItem.order_id)\
                      .join(Product, SalesOrderItem.product_id == Product.id)\
-                     .join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+                     .where(product_group_filter(major_group_id))
         query = query.where(CustomerComplaint.id.in_(subquery))
         
     query = query.order_by(desc(CustomerComplaint.receipt_date)).offset(skip).limit(limit)
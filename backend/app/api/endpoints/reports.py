@@ -1,106 +1,108 @@
-from fastapi import APIRouter, Depends, Response
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Query
 from sqlalchemy.future import select
-import pandas as pd
-import io
-from datetime import datetime
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func, extract
 
-from app.api.deps import get_db
-from app.models.sales import SalesOrder, SalesOrderItem
+from app.models.sales import SalesOrder
 from app.models.production import ProductionPlan, ProductionPlanItem
 from app.models.product import Product
-from app.models.basics import Partner
 from app.core.timezone import now_kst
+from app.api.utils.streaming_export import ExportColumn, ExportSource, stream_export
 
 router = APIRouter()
 
 # ... (keep export_orders_excel as is)
 
+PRODUCTION_COLUMNS = [
+    ExportColumn("order_no", "수주번호"),
+    ExportColumn("process_label", "공정/제품명"),
+    ExportColumn("status", "상태"),
+    ExportColumn("start_date", "시작일"),
+    ExportColumn("end_date", "종료일"),
+]
+
+
+def _production_row(r) -> dict:
+    # 공정이 없는 계획도 한 줄로 표시 (시작일은 계획일)
+    if r.item_id is None:
+        return {
+            "order_no": r.order_no or "",
+            "process_label": "계획 공정 없음",
+            "status": r.plan_status,
+            "start_date": r.plan_date,
+            "end_date": None,
+        }
+    return {
+        "order_no": r.order_no or "",
+        "process_label": f"{r.process_name} ({r.product_name or 'Unknown'})",
+        "status": r.item_status,
+        "start_date": r.start_date,
+        "end_date": r.end_date,
+    }
+
+
 @router.get("/production/excel")
 async def export_production_excel(
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("xlsx", description="xlsx / csv"),
 ):
-    # ProductionPlan -> Items -> Product
-    # ProductionPlan -> Order
-    query = select(ProductionPlan).options(
-        selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.product),
-        selectinload(ProductionPlan.order)
-    )
-    result = await db.execute(query)
-    plans = result.scalars().all()
-    
-    data = []
-    for plan in plans:
-        # If no items, still show plan? 
-        if not plan.items:
-            data.append({
-                "수주번호": plan.order.order_no if plan.order else "",
-                "공정/제품명": "계획 공정 없음",
-                "상태": plan.status,
-                "시작일": plan.plan_date, # Plan date as fallback
-                "종료일": None
-            })
-            continue
-
-        for item in plan.items:
-            data.append({
-                "수주번호": plan.order.order_no if plan.order else "",
-                "공정/제품명": f"{item.process_name} ({item.product.name if item.product else 'Unknown'})",
-                "상태": item.status,
-                "시작일": item.start_date,
-                "종료일": item.end_date
-            })
-        
-    df = pd.DataFrame(data)
-    
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Production')
-    
-    output.seek(0)
-    filename = f"production_{now_kst().strftime('%Y%m%d')}.xlsx"
-    return Response(
-        content=output.getvalue(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    # ProductionPlan -> Items -> Product, ProductionPlan -> Order (행 단위 스트리밍)
+    query = select(
+        ProductionPlan.id.label("plan_id"),
+        ProductionPlan.status.label("plan_status"),
+        ProductionPlan.plan_date,
+        SalesOrder.order_no,
+        ProductionPlanItem.id.label("item_id"),
+        ProductionPlanItem.process_name,
+        ProductionPlanItem.status.label("item_status"),
+        ProductionPlanItem.start_date,
+        ProductionPlanItem.end_date,
+        Product.name.label("product_name"),
+    ).select_from(ProductionPlan)\
+     .outerjoin(SalesOrder, ProductionPlan.order_id == SalesOrder.id)\
+     .outerjoin(ProductionPlanItem, ProductionPlanItem.plan_id == ProductionPlan.id)\
+     .outerjoin(Product, ProductionPlanItem.product_id == Product.id)\
+     .order_by(ProductionPlan.id, ProductionPlanItem.sequence, ProductionPlanItem.id)
+
+    return stream_export(
+        [ExportSource(query, _production_row)],
+        PRODUCTION_COLUMNS,
+        filename=f"production_{now_kst().strftime('%Y%m%d')}",
+        fmt=format,
+        sheet_name="Production",
     )
 
+
 # Statistics (Simplified example)
+STATS_COLUMNS = [
+    ExportColumn("month", "월"),
+    ExportColumn("status", "상태"),
+    ExportColumn("total_amount", "총액"),
+]
+
+
+def _stats_row(r) -> dict:
+    month = f"{int(r.year):04d}-{int(r.month):02d}" if r.year else ""
+    return {"month": month, "status": r.status, "total_amount": r.total_amount or 0}
+
+
 @router.get("/stats/excel")
 async def export_stats_excel(
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("xlsx", description="xlsx / csv"),
 ):
-    # This assumes we want raw data to pivot in Excel, 
-    # or we could pre-calculate monthly totals here.
-    # For now, let's just dump orders with month column.
-    query = select(SalesOrder)
-    result = await db.execute(query)
-    orders = result.scalars().all()
-    
-    data = []
-    for order in orders:
-        data.append({
-            "수주일": order.order_date,
-            "월": order.order_date.strftime("%Y-%m") if order.order_date else "",
-            "총액": order.total_amount,
-            "상태": order.status.value
-        })
-        
-    df = pd.DataFrame(data)
-    if not df.empty:
-        summary = df.groupby(['월', '상태'])['총액'].sum().reset_index()
-    else:
-        summary = pd.DataFrame(columns=['월', '상태', '총액'])
-        
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        summary.to_excel(writer, index=False, sheet_name='MonthlyStats')
-    
-    output.seek(0)
-    filename = f"stats_{now_kst().strftime('%Y%m%d')}.xlsx"
-    return Response(
-        content=output.getvalue(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    # 월 × 상태별 수주 총액 (DB 에서 집계)
+    year_col = extract("year", SalesOrder.order_date)
+    month_col = extract("month", SalesOrder.order_date)
+    query = select(
+        year_col.label("year"),
+        month_col.label("month"),
+        SalesOrder.status,
+        func.sum(SalesOrder.total_amount).label("total_amount"),
+    ).group_by(year_col, month_col, SalesOrder.status)\
+     .order_by(year_col, month_col, SalesOrder.status)
+
+    return stream_export(
+        [ExportSource(query, _stats_row)],
+        STATS_COLUMNS,
+        filename=f"stats_{now_kst().strftime('%Y%m%d')}",
+        fmt=format,
+        sheet_name="MonthlyStats",
     )
@@ -1,9 +1,9 @@
 from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import desc, or_
+from sqlalchemy import desc, func
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, aliased
 from sqlalchemy import delete, update
 from app.api import deps
 from app.core.timezone import now_kst
@@ -18,8 +18,13 @@ from app.models.production import ProductionPlan, ProductionPlanItem, WorkOrder,
 from app.models.quality import InspectionResult, QualityDefect
 from app.models.purchasing import PurchaseOrder, PurchaseStatus, PurchaseOrderItem, OutsourcingOrder, OutsourcingStatus, OutsourcingOrderItem, MaterialRequirement
 from app.api.utils.status_cascade import complete_production_for_order
-from app.utils.push import notify_production_manager
-import asyncio
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.outbox import enqueue_production_manager_notice, wake_outbox_consumer
+from app.api.utils.search import product_search_ids, partner_search_ids
+from app.api.utils.pricing import refresh_latest_prices, get_recent_prices, SOURCE_SALES, SOURCE_ESTIMATE
+from app.api.utils.atp import check_atp, get_timelines
+from app.api.utils.fx import stamp_sales_orders_krw, stamp_deliveries_krw
+from app.api.utils.listing import apply_keyset_cursor, keyset_order_by, make_keyset_cursor
 
 import uuid
 from datetime import datetime, date
@@ -90,6 +95,7 @@ async def create_estimate(
                 note=item.note
             )
             db.add(db_item)
+        await refresh_latest_prices(db, [i.product_id for i in estimate_in.items], [SOURCE_ESTIMATE])
         await db.commit()
     except Exception as e:
         if await deps.ensure_staff_columns(db, e): # Reusing the helper (it now checks SALES_ITEM_COLUMNS too)
@@ -139,13 +145,9 @@ async def read_estimates(
     if major_group_id or product_name:
         subquery = select(EstimateItem.estimate_id).join(Product)
         if major_group_id:
-            from app.models.product import ProductGroup
-            subquery = subquery.join(ProductGroup, Product.group_id == ProductGroup.id)\
-                               .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+            subquery = subquery.where(product_group_filter(major_group_id))
         if product_name:
-            subquery = subquery.where(
-                or_(Product.name.ilike(f"%{product_name}%"), Product.specification.ilike(f"%{product_name}%"))
-            )
+            subquery = subquery.where(Product.id.in_(product_search_ids(product_name)))
         query = query.where(Estimate.id.in_(subquery))
 
     if start_date:
@@ -385,6 +387,7 @@ async def update_estimate(
     
     if not db_estimate:
         raise HTTPException(status_code=404, detail="Estimate not found")
+    price_product_ids = {i.product_id for i in db_estimate.items}
 
     # 2. Update Header Fields
     update_data = estimate_in.model_dump(exclude_unset=True)
@@ -426,7 +429,9 @@ async def update_estimate(
                 note=item_in.note
             )
             db.add(db_item)
+            price_product_ids.add(item_in.product_id)
 
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_ESTIMATE])
     await db.commit()
     await db.refresh(db_estimate)
     
@@ -457,10 +462,12 @@ async def delete_estimate(
     # if cascade="all, delete-orphan" is set. Assuming it might not be, let's rely on DB FK cascade or manual.
     # Checking models... items = relationship("EstimateItem", back_populates="estimate", cascade="all, delete-orphan") is best practice.
     # Use manual delete just in case to be safe without checking model definition deep dive right now.
+    price_product_ids = {i.product_id for i in db_estimate.items}
     for item in db_estimate.items:
         await db.delete(item)
         
     await db.delete(db_estimate)
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_ESTIMATE])
     await db.commit()
     return None
 
@@ -519,18 +526,22 @@ async def create_order(
         )
         db.add(db_item)
     
-    # MRP 계산 및 부족분 기록
-    await calculate_and_record_mrp(db, db_order.id)
-    
-    await db.commit()
-    await db.refresh(db_order)
-
-    # 생산부 부장 알림 발송 (비동기)
-    asyncio.create_task(notify_production_manager(
+    # MRP 계산 및 부족분 기록 (단가·환산·알림과 함께 아래에서 1회 커밋)
+    await calculate_and_record_mrp(db, db_order.id, commit=False)
+    await refresh_latest_prices(db, [i.product_id for i in order_in.items], [SOURCE_SALES])
+    await stamp_sales_orders_krw(db, [db_order.id])
+
+    # 생산부 부장 알림 (아웃박스 이벤트로 기록 → 커밋 후 백그라운드 발송/재시도)
+    await enqueue_production_manager_notice(
+        db,
         title="[생산] 신규 수주 등록",
         body=f"신규 수주({db_order.order_no})가 등록되어 생산 대기 리스트에 추가되었습니다.",
         url="/production/waiting"
-    ))
+    )
+    
+    await db.commit()
+    await db.refresh(db_order)
+    wake_outbox_consumer()
     
     # Re-fetch with full eager loading for response
     query = select(SalesOrder).options(
@@ -545,10 +556,8 @@ async def create_order(
     
     return result.scalars().first()
 
-@router.get("/orders/", response_model=List[schemas.SalesOrder])
-async def read_orders(
-    skip: int = 0,
-    limit: int = 100,
+def _apply_order_filters(
+    query,
     partner_id: Optional[int] = None,
     major_group_id: Optional[int] = None,
     status: Optional[str] = None,
@@ -556,31 +565,19 @@ async def read_orders(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     product_name: Optional[str] = None,
-    db: AsyncSession = Depends(deps.get_db)
 ):
     """
-    Retrieve sales orders with advanced filtering.
+    수주 목록 공통 필터 (전체 그래프 조회 / 슬림 목록 조회 공용)
     """
-    query = select(SalesOrder).options(
-        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.standard_processes).selectinload(ProductProcess.process),
-        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.bom_items).selectinload(BOM.child_product),
-        selectinload(SalesOrder.partner),
-        selectinload(SalesOrder.delivery_histories).selectinload(DeliveryHistory.items)
-    )
-
     if partner_id:
         query = query.where(SalesOrder.partner_id == partner_id)
     
     if major_group_id or product_name:
         subquery = select(SalesOrderItem.order_id).join(Product)
         if major_group_id:
-            from app.models.product import ProductGroup
-            subquery = subquery.join(ProductGroup, Product.group_id == ProductGroup.id)\
-                               .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+            subquery = subquery.where(product_group_filter(major_group_id))
         if product_name:
-            subquery = subquery.where(
-                or_(Product.name.ilike(f"%{product_name}%"), Product.specification.ilike(f"%{product_name}%"))
-            )
+            subquery = subquery.where(Product.id.in_(product_search_ids(product_name)))
         query = query.where(SalesOrder.id.in_(subquery))
 
     if status:
@@ -599,6 +596,35 @@ async def read_orders(
             query = query.where(SalesOrder.delivery_date <= end_date)
         else:
             query = query.where(SalesOrder.order_date <= end_date)
+    return query
+
+@router.get("/orders/", response_model=List[schemas.SalesOrder])
+async def read_orders(
+    skip: int = 0,
+    limit: int = 100,
+    partner_id: Optional[int] = None,
+    major_group_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_type: Optional[str] = "order",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_name: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    Retrieve sales orders with advanced filtering.
+    """
+    query = select(SalesOrder).options(
+        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.standard_processes).selectinload(ProductProcess.process),
+        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.bom_items).selectinload(BOM.child_product),
+        selectinload(SalesOrder.partner),
+        selectinload(SalesOrder.delivery_histories).selectinload(DeliveryHistory.items)
+    )
+
+    query = _apply_order_filters(
+        query, partner_id=partner_id, major_group_id=major_group_id, status=status,
+        date_type=date_type, start_date=start_date, end_date=end_date, product_name=product_name,
+    )
 
     if date_type == "delivery":
         query = query.order_by(desc(SalesOrder.delivery_date)).offset(skip).limit(limit or 2000)
@@ -613,6 +639,149 @@ async def read_orders(
                 item.specification = item.product.specification
     return orders
 
+@router.get("/orders/list", response_model=schemas.SalesOrderListPage)
+async def read_orders_list(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    partner_id: Optional[int] = None,
+    major_group_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_type: Optional[str] = "order",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_name: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    수주 목록 그리드 전용 슬림 조회.
+    - 품목 집계는 페이지 주문 id 로 한정한 GROUP BY 1회로 계산 (공정/BOM/납품이력 그래프 미로딩)
+    - (조회 기준일, id) 역순 키셋 페이지네이션: 응답의 next_cursor 를 cursor 로 다시 전달
+      (date_type=delivery 이면 납기일, 그 외 수주일 / 일자 없는 주문은 맨 뒤)
+    - include_total=true 일 때만 전체 건수 COUNT 수행
+    - 전체 그래프는 GET /orders/{order_id} 사용
+    """
+    limit = max(1, min(limit, 500))
+
+    base = select(SalesOrder.id)
+    base = _apply_order_filters(
+        base, partner_id=partner_id, major_group_id=major_group_id, status=status,
+        date_type=date_type, start_date=start_date, end_date=end_date, product_name=product_name,
+    )
+
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
+
+    query = (
+        select(
+            SalesOrder.id, SalesOrder.order_no, SalesOrder.partner_id, Partner.name.label("partner_name"),
+            SalesOrder.order_date, SalesOrder.delivery_date, SalesOrder.actual_delivery_date,
+            SalesOrder.delivery_method, SalesOrder.transaction_date, SalesOrder.total_amount,
+            SalesOrder.status, SalesOrder.note, SalesOrder.created_at, SalesOrder.attachment_file,
+        )
+        .outerjoin(Partner, SalesOrder.partner_id == Partner.id)
+    )
+    query = _apply_order_filters(
+        query, partner_id=partner_id, major_group_id=major_group_id, status=status,
+        date_type=date_type, start_date=start_date, end_date=end_date, product_name=product_name,
+    )
+
+    # 정렬/커서 일자는 조회 기준(date_type)을 따름: 납기일 기준이면 delivery_date
+    sort_date = SalesOrder.delivery_date if date_type == "delivery" else SalesOrder.order_date
+    query = apply_keyset_cursor(query, sort_date, SalesOrder.id, cursor)
+    query = keyset_order_by(query, sort_date, SalesOrder.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # 페이지 내 주문의 품목 집계 (1회 조회)
+    agg_by_order = {}
+    order_ids = [r.id for r in rows]
+    if order_ids:
+        item_agg = (
+            select(
+                SalesOrderItem.order_id.label("order_id"),
+                func.count(SalesOrderItem.id).label("item_count"),
+                func.min(SalesOrderItem.id).label("first_item_id"),
+                func.coalesce(func.sum(SalesOrderItem.quantity), 0).label("total_quantity"),
+                func.coalesce(func.sum(SalesOrderItem.delivered_quantity), 0).label("delivered_quantity"),
+                func.coalesce(func.sum(SalesOrderItem.delivered_quantity * SalesOrderItem.unit_price), 0).label("delivered_amount"),
+            )
+            .where(SalesOrderItem.order_id.in_(order_ids))
+            .group_by(SalesOrderItem.order_id)
+            .subquery()
+        )
+        FirstItem = aliased(SalesOrderItem)
+        FirstProduct = aliased(Product)
+        agg_rows = (await db.execute(
+            select(
+                item_agg,
+                func.coalesce(FirstProduct.name, FirstItem.product_name).label("first_item_name"),
+                FirstItem.currency.label("currency"),
+            )
+            .outerjoin(FirstItem, FirstItem.id == item_agg.c.first_item_id)
+            .outerjoin(FirstProduct, FirstItem.product_id == FirstProduct.id)
+        )).all()
+        agg_by_order = {a.order_id: a for a in agg_rows}
+
+    items = []
+    for r in rows:
+        a = agg_by_order.get(r.id)
+        items.append(schemas.SalesOrderListRow(
+            id=r.id,
+            order_no=r.order_no,
+            partner_id=r.partner_id,
+            partner_name=r.partner_name,
+            order_date=r.order_date,
+            delivery_date=r.delivery_date,
+            actual_delivery_date=r.actual_delivery_date,
+            delivery_method=r.delivery_method,
+            transaction_date=r.transaction_date,
+            total_amount=r.total_amount or 0.0,
+            status=r.status.value if hasattr(r.status, "value") else r.status,
+            note=r.note,
+            created_at=r.created_at,
+            item_count=a.item_count if a else 0,
+            first_item_name=a.first_item_name if a else None,
+            currency=(a.currency if a else None) or "KRW",
+            attachment_file=r.attachment_file,
+            total_quantity=a.total_quantity if a else 0,
+            delivered_quantity=a.delivered_quantity if a else 0,
+            total_delivered_amount=float(a.delivered_amount) if a else 0.0,
+        ))
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = make_keyset_cursor(last.delivery_date if date_type == "delivery" else last.order_date, last.id)
+
+    return schemas.SalesOrderListPage(items=items, next_cursor=next_cursor, total=total)
+
+@router.get("/orders/{order_id}", response_model=schemas.SalesOrder)
+async def read_order(
+    order_id: int,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    수주 상세 (품목의 공정/BOM, 납품 이력 포함 전체 그래프)
+    """
+    query = select(SalesOrder).options(
+        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.standard_processes).selectinload(ProductProcess.process),
+        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product).selectinload(Product.bom_items).selectinload(BOM.child_product),
+        selectinload(SalesOrder.partner),
+        selectinload(SalesOrder.delivery_histories).selectinload(DeliveryHistory.items)
+    ).where(SalesOrder.id == order_id)
+    result = await db.execute(query)
+    order = result.scalars().first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    for item in order.items:
+        if item.product:
+            item.specification = item.product.specification
+    return order
+
 @router.put("/orders/{order_id}", response_model=schemas.SalesOrder)
 async def update_order(
     order_id: int,
@@ -627,6 +796,7 @@ async def update_order(
     
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
+    price_product_ids = {i.product_id for i in db_order.items}
     
     # Update Header
     if order_in.partner_id is not None: db_order.partner_id = order_in.partner_id
@@ -722,16 +892,22 @@ async def update_order(
                     )
                 
                 await db.delete(item)
-        
-    await db.commit()
-    await db.refresh(db_order)
 
-    # 생산부 부장 알림 발송 (수정 시 알림 추가)
-    asyncio.create_task(notify_production_manager(
+    price_product_ids |= {i.product_id for i in (order_in.items or [])}
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_SALES])
+    await stamp_sales_orders_krw(db, [db_order.id])
+
+    # 생산부 부장 알림 (수정 시 알림 추가)
+    await enqueue_production_manager_notice(
+        db,
         title="[생산] 수주 정보 수정",
         body=f"수주 정보({db_order.order_no})가 수정되었습니다. 생산 대기 리스트를 확인해 주세요.",
         url="/production/waiting"
-    ))
+    )
+        
+    await db.commit()
+    await db.refresh(db_order)
+    wake_outbox_consumer()
     
     # Re-fetch with full eager loading (including delivery_histories)
     query = select(SalesOrder).options(
@@ -870,6 +1046,7 @@ async def delete_order(
     await db.execute(delete(QualityDefect).where(QualityDefect.order_id == order_id))
     
     # 10. 수주 품목 삭제
+    price_product_ids = {i.product_id for i in db_order.items}
     await db.execute(delete(SalesOrderItem).where(SalesOrderItem.order_id == order_id))
     
     # Bug 4 Fix: Explicitly delete MaterialRequirement for this Order
@@ -877,6 +1054,7 @@ async def delete_order(
         
     # 11. 수주 헤더 삭제
     await db.delete(db_order)
+    await refresh_latest_prices(db, price_product_ids, [SOURCE_SALES])
     await db.commit()
     return None
 
@@ -891,44 +1069,45 @@ async def get_recent_price(
     """
     Get the most recent unit price for a product and partner.
     Priority: 1) Last SalesOrder → 2) Last Estimate → 3) Product.recent_price (등록 단가)
+    최근 단가 테이블(product_latest_prices) 한 번 조회로 처리합니다.
     """
-    # Check last order
-    # Joined eager load or just join? We just need unit_price and date.
-    # Joining gives us filtered rows.
-    query = select(SalesOrderItem).join(SalesOrder)\
-        .options(selectinload(SalesOrderItem.order))\
-        .where(SalesOrderItem.product_id == product_id)\
-        .where(SalesOrder.partner_id == partner_id)\
-        .order_by(desc(SalesOrder.order_date))\
-        .limit(1)
-        
-    result = await db.execute(query)
-    last_order_item = result.scalars().first()
-    
-    if last_order_item:
-        return {"price": last_order_item.unit_price, "source": "order", "date": last_order_item.order.order_date}
-    
-    # Check last estimate
-    query = select(EstimateItem).join(Estimate)\
-        .options(selectinload(EstimateItem.estimate))\
-        .where(EstimateItem.product_id == product_id)\
-        .where(Estimate.partner_id == partner_id)\
-        .order_by(desc(Estimate.estimate_date))\
-        .limit(1)
-        
-    result = await db.execute(query)
-    last_estimate_item = result.scalars().first()
-        
-    if last_estimate_item:
-        return {"price": last_estimate_item.unit_price, "source": "estimate", "date": last_estimate_item.estimate.estimate_date}
+    prices = await get_recent_prices(db, partner_id, [product_id])
+    return prices.get(product_id, {"price": 0, "source": None})
 
-    # 거래 이력 없음 → 제품에 등록된 표준단가(recent_price) 폴백
-    prod_result = await db.execute(select(Product).where(Product.id == product_id))
-    product = prod_result.scalars().first()
-    if product and product.recent_price and product.recent_price > 0:
-        return {"price": product.recent_price, "source": "product_default", "date": None}
+@router.post("/history/prices")
+async def get_recent_prices_batch(
+    body: schemas.RecentPriceBatchRequest,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    견적/수주 작성 시 전체 품목 라인의 최근 단가를 한 번에 조회.
+    응답: {product_id: {price, source, date}}
+    """
+    return await get_recent_prices(db, body.partner_id, body.product_ids)
+
+@router.post("/atp", response_model=List[schemas.AtpLineResult])
+async def check_available_to_promise(
+    body: schemas.AtpCheckRequest,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    수주 입력 중 라인별 납기 회답 (ATP/CTP).
+    현재고 + 입고 예정(발주/생산계획) - 기약속 수주 잔량과 공정 부하를 반영한 최초 가능일을 반환합니다.
+    """
+    return await check_atp(
+        db,
+        [line.model_dump() for line in body.lines],
+        exclude_order_id=body.exclude_order_id,
+    )
 
-    return {"price": 0, "source": None}
+@router.get("/atp/{product_id}/projection", response_model=List[schemas.AtpProjectionPoint])
+async def read_atp_projection(
+    product_id: int,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """품목의 예상 재고 곡선 (일자별 잔량 / 약속 가능 수량)"""
+    timelines = await get_timelines(db, [product_id])
+    return timelines[product_id].projection()
 
 @router.get("/history/product/{product_id}")
 async def get_product_sales_history(
@@ -1024,14 +1203,8 @@ async def create_delivery(
 
     # Generate Delivery No
     date_str = now_kst().strftime("%Y%m%d")
-    dh_query = select(DeliveryHistory.delivery_no).where(DeliveryHistory.delivery_no.like(f"DH-{date_str}-%")).order_by(desc(DeliveryHistory.delivery_no)).limit(1)
-    dh_res = await db.execute(dh_query)
-    last_dh_no = dh_res.scalar()
-    new_seq = 1
-    if last_dh_no:
-        try: new_seq = int(last_dh_no.split("-")[-1]) + 1
-        except: pass
-    delivery_no = f"DH-{date_str}-{new_seq:03d}"
+    dh_seq = await _next_number_seq(db, DeliveryHistory.delivery_no, f"DH-{date_str}-")
+    delivery_no = f"DH-{date_str}-{dh_seq:03d}"
 
     # ─────────────────────────────────────────────────────────────
     # [no_plan_source == "PRODUCE"] 생산계획 자동 생성 및 완료 처리
@@ -1045,11 +1218,7 @@ async def create_delivery(
 
         # 생산 계획 번호 생성
         pp_prefix = f"PP-AUTO-{date_str}-"
-        pp_last = (await db.execute(
-            select(ProductionPlan.plan_no).where(ProductionPlan.plan_no.like(f"{pp_prefix}%"))
-            .order_by(desc(ProductionPlan.plan_no)).limit(1)
-        )).scalar()
-        pp_seq = (int(pp_last.split("-")[-1]) + 1) if pp_last else 1
+        pp_seq = await _next_number_seq(db, ProductionPlan.plan_no, pp_prefix)
         auto_plan_no = f"{pp_prefix}{pp_seq:03d}"
 
         # 생산 계획 헤더 생성 (COMPLETED 상태로 직접 확정)
@@ -1166,6 +1335,8 @@ async def create_delivery(
         db_order.status = OrderStatus.PARTIALLY_DELIVERED
     # else: 납품 수량이 0이면 상태 유지 (비정상 케이스)
 
+    await stamp_deliveries_krw(db, [db_delivery.id])
+
     # 납품 + 상태 먼저 확정 commit (부수효과와 분리)
     await db.commit()
 
@@ -1197,6 +1368,226 @@ async def create_delivery(
     res = await db.execute(query)
     return res.scalars().first()
 
+async def _next_number_seq(db: AsyncSession, column, prefix: str) -> int:
+    """prefix 로 시작하는 번호 중 마지막 순번 + 1 (일괄 채번 시작 값)"""
+    last_no = (await db.execute(
+        select(column).where(column.like(f"{prefix}%")).order_by(desc(column)).limit(1)
+    )).scalar()
+    if last_no:
+        try:
+            return int(last_no.split("-")[-1]) + 1
+        except (ValueError, IndexError):
+            pass
+    return 1
+
+@router.post("/deliveries/bulk", response_model=schemas.BulkDeliveryResult)
+async def create_deliveries_bulk(
+    bulk_in: schemas.BulkDeliveryCreate,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    여러 수주의 납품을 한 번에 등록 (출하일 일괄 처리용).
+    - 수주/품목 일괄 조회 후 줄 단위 검증 → 오류는 errors 로 반환
+      (atomic=True 이면 오류가 하나라도 있을 때 아무것도 저장하지 않음)
+    - 납품번호/자동 생산계획 번호는 1회 조회 후 순차 채번
+    - 재고 출고(OUT)는 handle_stock_movements_bulk 로 한 번에 기록
+    - 수주 상태 집계는 GROUP BY 1회, 납품완료 연쇄 처리는 수주당 1회
+    - 전체가 하나의 트랜잭션으로 커밋됨
+    개별 납품 건의 의미(no_plan_source 포함)는 POST /orders/{order_id}/delivery 와 동일합니다.
+    """
+    from app.api.utils.inventory import handle_stock_movements_bulk, handle_backflush
+    from app.models.inventory import TransactionType
+
+    result = schemas.BulkDeliveryResult(success=True)
+    if not bulk_in.deliveries:
+        return result
+
+    # 1. 수주/품목 일괄 조회
+    order_ids = {e.order_id for e in bulk_in.deliveries}
+    order_res = await db.execute(
+        select(SalesOrder).options(selectinload(SalesOrder.items)).where(SalesOrder.id.in_(order_ids))
+    )
+    orders = {o.id: o for o in order_res.scalars().all()}
+
+    # 2. 줄 단위 검증 (같은 배치 내 동일 품목 누적 수량까지 고려)
+    allocated = {}
+    valid_entries = []
+    for idx, entry in enumerate(bulk_in.deliveries):
+        entry_errors = []
+        order = orders.get(entry.order_id)
+        if not order:
+            entry_errors.append(schemas.BulkDeliveryLineError(entry_index=idx, order_id=entry.order_id, error="수주를 찾을 수 없습니다."))
+        elif order.status == OrderStatus.CANCELLED:
+            entry_errors.append(schemas.BulkDeliveryLineError(entry_index=idx, order_id=entry.order_id, error="취소된 수주입니다."))
+        elif not entry.items:
+            entry_errors.append(schemas.BulkDeliveryLineError(entry_index=idx, order_id=entry.order_id, error="납품 품목이 없습니다."))
+        else:
+            items_by_id = {oi.id: oi for oi in order.items}
+            entry_alloc = {}
+            for line in entry.items:
+                order_item = items_by_id.get(line.order_item_id)
+                if not order_item:
+                    entry_errors.append(schemas.BulkDeliveryLineError(
+                        entry_index=idx, order_id=entry.order_id, order_item_id=line.order_item_id,
+                        error="해당 수주의 품목이 아닙니다."))
+                    continue
+                if line.quantity <= 0:
+                    entry_errors.append(schemas.BulkDeliveryLineError(
+                        entry_index=idx, order_id=entry.order_id, order_item_id=line.order_item_id,
+                        error="납품 수량은 0보다 커야 합니다."))
+                    continue
+                already = (order_item.delivered_quantity or 0) + allocated.get(order_item.id, 0) + entry_alloc.get(order_item.id, 0)
+                if already + line.quantity > order_item.quantity:
+                    entry_errors.append(schemas.BulkDeliveryLineError(
+                        entry_index=idx, order_id=entry.order_id, order_item_id=line.order_item_id,
+                        error=f"잔량 초과: 수주 {order_item.quantity}, 기납품 {already}, 요청 {line.quantity}"))
+                    continue
+                entry_alloc[order_item.id] = entry_alloc.get(order_item.id, 0) + line.quantity
+            if not entry_errors:
+                for oi_id, qty in entry_alloc.items():
+                    allocated[oi_id] = allocated.get(oi_id, 0) + qty
+        if entry_errors:
+            result.errors.extend(entry_errors)
+        else:
+            valid_entries.append((idx, entry))
+
+    if result.errors and (bulk_in.atomic or not valid_entries):
+        result.success = False
+        return result
+
+    # 3. 번호 일괄 채번
+    date_str = now_kst().strftime("%Y%m%d")
+    dh_seq = await _next_number_seq(db, DeliveryHistory.delivery_no, f"DH-{date_str}-")
+    pp_prefix = f"PP-AUTO-{date_str}-"
+    pp_seq = None
+    if any(e.no_plan_source == "PRODUCE" for _, e in valid_entries):
+        pp_seq = await _next_number_seq(db, ProductionPlan.plan_no, pp_prefix)
+
+    movements = []
+    backflushes = []
+    created = []
+    for idx, entry in valid_entries:
+        order = orders[entry.order_id]
+        items_by_id = {oi.id: oi for oi in order.items}
+        delivery_no = f"DH-{date_str}-{dh_seq:03d}"
+        dh_seq += 1
+        delivery_date = entry.delivery_date or bulk_in.delivery_date or now_kst().date()
+
+        # [no_plan_source == "PRODUCE"] 생산계획 자동 생성·완료 + 재고 IN (납품 OUT 과 상쇄)
+        if entry.no_plan_source == "PRODUCE":
+            auto_plan_no = f"{pp_prefix}{pp_seq:03d}"
+            pp_seq += 1
+            auto_plan = ProductionPlan(
+                plan_no=auto_plan_no,
+                order_id=order.id,
+                status=ProductionStatus.COMPLETED,
+                actual_completion_date=delivery_date,
+                note=f"생산계획 없음 납품 처리에 의한 자동 생성 ({delivery_no})"
+            )
+            db.add(auto_plan)
+            await db.flush()
+
+            product_qty_map = {}
+            for line in entry.items:
+                pid = items_by_id[line.order_item_id].product_id
+                product_qty_map[pid] = product_qty_map.get(pid, 0) + line.quantity
+            for seq_idx, (pid, qty) in enumerate(product_qty_map.items(), start=1):
+                db.add(ProductionPlanItem(
+                    plan_id=auto_plan.id,
+                    product_id=pid,
+                    quantity=qty,
+                    sequence=seq_idx,
+                    course_type="INTERNAL",
+                    status=ProductionStatus.COMPLETED,
+                ))
+                movements.append((pid, qty, TransactionType.IN, f"Auto-Produce ({auto_plan_no})"))
+                backflushes.append((pid, qty, auto_plan_no))
+
+        db_delivery = DeliveryHistory(
+            order_id=order.id,
+            delivery_date=delivery_date,
+            delivery_no=delivery_no,
+            note=entry.note,
+            attachment_files=entry.attachment_files,
+            statement_json=entry.statement_json,
+            supplier_info=entry.supplier_info,
+            is_export=entry.is_export or False,
+            invoice_no=entry.invoice_no,
+        )
+        for line in entry.items:
+            order_item = items_by_id[line.order_item_id]
+            db_delivery.items.append(DeliveryHistoryItem(order_item_id=line.order_item_id, quantity=line.quantity))
+            order_item.delivered_quantity = (order_item.delivered_quantity or 0) + line.quantity
+            movements.append((order_item.product_id, -line.quantity, TransactionType.OUT, delivery_no))
+        db.add(db_delivery)
+        created.append((idx, order.id, db_delivery, delivery_date))
+
+    # 4. 재고 일괄 반영 (생산 IN + 납품 OUT) 후 BOM 백플러시
+    await db.flush()
+    await handle_stock_movements_bulk(db, movements)
+    for pid, qty, plan_no in backflushes:
+        await handle_backflush(db=db, parent_product_id=pid, produced_quantity=qty, reference=plan_no)
+    await db.flush()
+    await stamp_deliveries_krw(db, [db_delivery.id for _, _, db_delivery, _ in created])
+
+    # 5. 수주 상태 일괄 집계
+    affected_order_ids = {order_id for _, order_id, _, _ in created}
+    qty_res = await db.execute(
+        select(
+            SalesOrderItem.order_id,
+            func.sum(SalesOrderItem.quantity),
+            func.sum(SalesOrderItem.delivered_quantity),
+        ).where(SalesOrderItem.order_id.in_(affected_order_ids)).group_by(SalesOrderItem.order_id)
+    )
+    last_delivery_date = {}
+    last_delivery_no = {}
+    for _, order_id, db_delivery, d_date in created:
+        last_delivery_date[order_id] = max(last_delivery_date.get(order_id, d_date), d_date)
+        last_delivery_no[order_id] = db_delivery.delivery_no
+
+    completed_order_ids = []
+    for order_id, total, delivered in qty_res.all():
+        order = orders[order_id]
+        total_qty, delivered_qty = int(total or 0), int(delivered or 0)
+        if total_qty > 0 and delivered_qty >= total_qty:
+            order.status = OrderStatus.DELIVERY_COMPLETED
+            order.actual_delivery_date = last_delivery_date[order_id]
+            completed_order_ids.append(order_id)
+        elif delivered_qty > 0:
+            order.status = OrderStatus.PARTIALLY_DELIVERED
+
+    # 6. 납품 완료 연쇄 처리 (수주당 1회) - 실패 시 전체 롤백
+    try:
+        await db.flush()
+        for order_id in completed_order_ids:
+            await complete_production_for_order(db, order_id=order_id, reference=last_delivery_no[order_id])
+        if completed_order_ids:
+            await db.execute(
+                update(MaterialRequirement)
+                .where(MaterialRequirement.order_id.in_(completed_order_ids))
+                .where(MaterialRequirement.status != "COMPLETED")
+                .values(status="COMPLETED")
+            )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"[create_deliveries_bulk] failed, rolled back: {e}")
+        result.success = False
+        result.errors.append(schemas.BulkDeliveryLineError(entry_index=-1, error=f"일괄 납품 처리 실패(전체 취소): {e}"))
+        return result
+
+    for idx, order_id, db_delivery, _ in created:
+        order_status = orders[order_id].status
+        result.created.append(schemas.BulkDeliveryCreated(
+            entry_index=idx,
+            order_id=order_id,
+            delivery_id=db_delivery.id,
+            delivery_no=db_delivery.delivery_no,
+            order_status=order_status.value if hasattr(order_status, "value") else order_status,
+        ))
+    result.success = not result.errors
+    return result
+
 @router.get("/orders/{order_id}/delivery", response_model=List[schemas.DeliveryHistory])
 async def get_delivery_histories(
     order_id: int,
@@ -1362,33 +1753,18 @@ async def batch_complete_order(
     await db.commit()
     return {"message": "Success", "plan_count": len(plans)}
 
-@router.get("/delivery-status", response_model=List[schemas.DeliveryStatusResponse])
-@router.get("/delivery-status/", response_model=List[schemas.DeliveryStatusResponse], include_in_schema=False)
-async def read_delivery_status(
+def _apply_delivery_status_filters(
+    query,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     partner_name: Optional[str] = None,
     major_group_id: Optional[int] = None,
     status: Optional[str] = None,
-    date_type: Optional[str] = "order", # order or delivery
-    db: AsyncSession = Depends(deps.get_db)
+    date_type: Optional[str] = "order",
 ):
     """
-    납품 현황 조회를 위한 수주 목록 (배송 이력 포함)
+    납품 현황 공통 필터 (전체 그래프 조회 / 집계 목록 조회 공용)
     """
-    query = select(SalesOrder).options(
-        # partner (required by SalesOrder schema)
-        selectinload(SalesOrder.partner),
-        # items -> product (required by SalesOrderItem schema)
-        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product),
-        # delivery_histories -> items -> order_item -> product
-        selectinload(SalesOrder.delivery_histories).selectinload(
-            DeliveryHistory.items
-        ).selectinload(
-            DeliveryHistoryItem.order_item
-        ).selectinload(SalesOrderItem.product),
-    )
-
     # 1. Date Type Filtering
     if date_type == "delivery":
         # 실제납품일 기준: delivery_histories.delivery_date 필터 (서브쿼리)
@@ -1399,29 +1775,58 @@ async def read_delivery_status(
             if end_date:
                 dh_subq = dh_subq.where(DeliveryHistory.delivery_date <= end_date)
             query = query.where(SalesOrder.id.in_(dh_subq))
-        # 납품일 기준 정렬: 최근 납품 이력 기준이 복잡하므로 수주일 내림차순 유지
-        query = query.order_by(desc(SalesOrder.order_date))
     else:
         # 수주일 기준
         if start_date:
             query = query.where(SalesOrder.order_date >= start_date)
         if end_date:
             query = query.where(SalesOrder.order_date <= end_date)
-        # 2. Ordering
-        query = query.order_by(desc(SalesOrder.order_date))
 
     if partner_name:
-        query = query.join(Partner).where(Partner.name.ilike(f"%{partner_name}%"))
+        query = query.where(SalesOrder.partner_id.in_(partner_search_ids(partner_name)))
     if major_group_id:
-        from app.models.product import ProductGroup
-        subquery = select(SalesOrderItem.order_id).join(Product).join(ProductGroup, Product.group_id == ProductGroup.id)\
-                     .where(or_(ProductGroup.id == major_group_id, ProductGroup.parent_id == major_group_id))
+        subquery = select(SalesOrderItem.order_id).join(Product).where(product_group_filter(major_group_id))
         query = query.where(SalesOrder.id.in_(subquery))
     if status and status != 'ALL':
         if status == OrderStatus.DELIVERED or status == "DELIVERED":
             query = query.where(SalesOrder.status.in_([OrderStatus.DELIVERED, OrderStatus.DELIVERY_COMPLETED]))
         else:
             query = query.where(SalesOrder.status == status)
+    return query
+
+@router.get("/delivery-status", response_model=List[schemas.DeliveryStatusResponse])
+@router.get("/delivery-status/", response_model=List[schemas.DeliveryStatusResponse], include_in_schema=False)
+async def read_delivery_status(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    partner_name: Optional[str] = None,
+    major_group_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_type: Optional[str] = "order", # order or delivery
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    납품 현황 조회를 위한 수주 목록 (배송 이력 포함)
+    대량 조회 시에는 GET /delivery-status/list (집계 + 페이지네이션) 사용
+    """
+    query = select(SalesOrder).options(
+        # partner (required by SalesOrder schema)
+        selectinload(SalesOrder.partner),
+        # items -> product (required by SalesOrderItem schema)
+        selectinload(SalesOrder.items).selectinload(SalesOrderItem.product),
+        # delivery_histories -> items -> order_item -> product
+        selectinload(SalesOrder.delivery_histories).selectinload(
+            DeliveryHistory.items
+        ).selectinload(
+            DeliveryHistoryItem.order_item
+        ).selectinload(SalesOrderItem.product),
+    )
+    query = _apply_delivery_status_filters(
+        query, start_date=start_date, end_date=end_date, partner_name=partner_name,
+        major_group_id=major_group_id, status=status, date_type=date_type,
+    )
+    # 납품일 기준 정렬: 최근 납품 이력 기준이 복잡하므로 수주일 내림차순 유지
+    query = query.order_by(desc(SalesOrder.order_date))
 
     result = await db.execute(query)
     orders = result.scalars().unique().all()
@@ -1431,6 +1836,154 @@ async def read_delivery_status(
                 item.specification = item.product.specification
     return orders
 
+@router.get("/delivery-status/list", response_model=schemas.DeliveryStatusPage)
+async def read_delivery_status_list(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    partner_name: Optional[str] = None,
+    major_group_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_type: Optional[str] = "order", # order or delivery
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    납품 현황 집계 목록.
+    - 라인별 납품 수량/최근 납품일은 페이지 주문의 납품 이력(DeliveryHistoryItem)만 GROUP BY 로 집계
+    - 주문별 수주/납품/잔량 합계와 납품 횟수 포함
+    - (조회 기준일, id) 역순 키셋 페이지네이션 (cursor = 응답의 next_cursor)
+      date_type=delivery 이면 납품 완료일(actual_delivery_date), 그 외 수주일 / 일자 없는 주문은 맨 뒤
+    - 상세 납품 이력은 펼칠 때 GET /orders/{order_id}/delivery 로 조회
+    """
+    limit = max(1, min(limit, 500))
+
+    base = _apply_delivery_status_filters(
+        select(SalesOrder.id), start_date=start_date, end_date=end_date, partner_name=partner_name,
+        major_group_id=major_group_id, status=status, date_type=date_type,
+    )
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
+
+    query = (
+        select(
+            SalesOrder.id, SalesOrder.order_no, SalesOrder.partner_id, Partner.name.label("partner_name"),
+            SalesOrder.order_date, SalesOrder.delivery_date, SalesOrder.actual_delivery_date,
+            SalesOrder.delivery_method, SalesOrder.total_amount, SalesOrder.status, SalesOrder.note,
+        )
+        .outerjoin(Partner, SalesOrder.partner_id == Partner.id)
+    )
+    query = _apply_delivery_status_filters(
+        query, start_date=start_date, end_date=end_date, partner_name=partner_name,
+        major_group_id=major_group_id, status=status, date_type=date_type,
+    )
+
+    # 정렬/커서 일자는 조회 기준(date_type)을 따름: 실제납품일 기준이면 납품 완료일(actual_delivery_date)
+    sort_date = SalesOrder.actual_delivery_date if date_type == "delivery" else SalesOrder.order_date
+    query = apply_keyset_cursor(query, sort_date, SalesOrder.id, cursor)
+    query = keyset_order_by(query, sort_date, SalesOrder.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # 페이지 내 주문의 납품 횟수/최근 납품일 (1회 조회)
+    order_ids = [r.id for r in rows]
+    delivery_agg = {}
+    if order_ids:
+        delivery_agg = {
+            d.order_id: d for d in (await db.execute(
+                select(
+                    DeliveryHistory.order_id,
+                    func.count(DeliveryHistory.id).label("delivery_count"),
+                    func.max(DeliveryHistory.delivery_date).label("last_delivery_date"),
+                )
+                .where(DeliveryHistory.order_id.in_(order_ids))
+                .group_by(DeliveryHistory.order_id)
+            )).all()
+        }
+
+    # 페이지 내 주문의 라인 + 라인별 납품 집계 (1회 조회)
+    lines_by_order = {}
+    if order_ids:
+        line_agg = (
+            select(
+                DeliveryHistoryItem.order_item_id.label("order_item_id"),
+                func.coalesce(func.sum(DeliveryHistoryItem.quantity), 0).label("delivered_quantity"),
+                func.max(DeliveryHistory.delivery_date).label("last_delivery_date"),
+            )
+            .join(DeliveryHistory, DeliveryHistoryItem.delivery_id == DeliveryHistory.id)
+            .where(DeliveryHistory.order_id.in_(order_ids))
+            .group_by(DeliveryHistoryItem.order_item_id)
+            .subquery()
+        )
+        line_rows = (await db.execute(
+            select(
+                SalesOrderItem.id, SalesOrderItem.order_id, SalesOrderItem.product_id,
+                func.coalesce(Product.name, SalesOrderItem.product_name).label("product_name"),
+                Product.specification, SalesOrderItem.unit_price, SalesOrderItem.currency,
+                SalesOrderItem.quantity, SalesOrderItem.status,
+                func.coalesce(line_agg.c.delivered_quantity, 0).label("delivered_quantity"),
+                line_agg.c.last_delivery_date,
+            )
+            .outerjoin(Product, SalesOrderItem.product_id == Product.id)
+            .outerjoin(line_agg, line_agg.c.order_item_id == SalesOrderItem.id)
+            .where(SalesOrderItem.order_id.in_(order_ids))
+            .order_by(SalesOrderItem.order_id, SalesOrderItem.id)
+        )).all()
+        for lr in line_rows:
+            quantity = lr.quantity or 0
+            delivered = lr.delivered_quantity or 0
+            lines_by_order.setdefault(lr.order_id, []).append(schemas.DeliveryStatusLine(
+                id=lr.id,
+                product_id=lr.product_id,
+                product_name=lr.product_name,
+                specification=lr.specification,
+                unit_price=lr.unit_price or 0.0,
+                currency=lr.currency or "KRW",
+                quantity=quantity,
+                delivered_quantity=delivered,
+                remaining_quantity=max(0, quantity - delivered),
+                delivered_amount=delivered * (lr.unit_price or 0.0),
+                last_delivery_date=lr.last_delivery_date,
+                status=lr.status.value if hasattr(lr.status, "value") else lr.status,
+            ))
+
+    items = []
+    for r in rows:
+        lines = lines_by_order.get(r.id, [])
+        d = delivery_agg.get(r.id)
+        ordered = sum(l.quantity for l in lines)
+        delivered = sum(l.delivered_quantity for l in lines)
+        items.append(schemas.DeliveryStatusRow(
+            id=r.id,
+            order_no=r.order_no,
+            partner_id=r.partner_id,
+            partner_name=r.partner_name,
+            order_date=r.order_date,
+            delivery_date=r.delivery_date,
+            actual_delivery_date=r.actual_delivery_date,
+            delivery_method=r.delivery_method,
+            total_amount=r.total_amount or 0.0,
+            total_delivered_amount=sum(l.delivered_amount for l in lines),
+            status=r.status.value if hasattr(r.status, "value") else r.status,
+            note=r.note,
+            ordered_quantity=ordered,
+            delivered_quantity=delivered,
+            remaining_quantity=sum(l.remaining_quantity for l in lines),
+            delivery_count=d.delivery_count if d else 0,
+            last_delivery_date=d.last_delivery_date if d else None,
+            lines=lines,
+        ))
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = make_keyset_cursor(last.actual_delivery_date if date_type == "delivery" else last.order_date, last.id)
+
+    return schemas.DeliveryStatusPage(items=items, next_cursor=next_cursor, total=total)
+
 
 # ─────────────────────────────────────────────────────────────
 # 거래명세서 PDF 첨부 (납품 이력 → statement_json 업데이트)
@@ -1583,6 +2136,9 @@ async def update_delivery_history(
                 order.status = OrderStatus.PARTIALLY_DELIVERED
             # delivered_qty == 0: 상태 변경 안 함 (CONFIRMED 강제 복귀 방지)
 
+    # 납품일/수량 변경 시 원화 환산 금액 갱신
+    await stamp_deliveries_krw(db, [history.id])
+
     await db.commit()
     await db.refresh(history)
     
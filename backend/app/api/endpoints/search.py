@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Any
+
+from app.api.deps import get_db
+from app.api.utils.search import typeahead, rebuild_search_index
+from app.schemas.search import SearchHit
+
+router = APIRouter()
+
+@router.get("/typeahead", response_model=List[SearchHit])
+async def search_typeahead(
+    q: str,
+    types: Optional[str] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    통합 자동완성 검색 (품목명/규격, 거래처명, 수주/발주/외주/납품 번호)
+    types: 콤마 구분 엔티티 목록 (예: product,partner). 생략 시 전체.
+    """
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    return await typeahead(db, q, types=type_list, limit=max(1, min(limit, 50)))
+
+@router.post("/rebuild")
+async def rebuild_index(db: AsyncSession = Depends(get_db)) -> Any:
+    """
+    검색 섀도 테이블 재적재 (SQLite 전용, Postgres 는 인덱스가 자동 유지됨)
+    """
+    count = await rebuild_search_index(db)
+    return {"message": "Search index rebuilt", "count": count}
@@ -1,307 +1,126 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, extract, and_, String, case
+from sqlalchemy import func, extract, or_
 from typing import List, Optional, Dict, Any
-from datetime import date
+from datetime import date, timedelta
 
+from app.api import deps
 from app.api.deps import get_db
-from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus, DeliveryHistory, DeliveryHistoryItem
-from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem, PurchaseStatus, OutsourcingStatus
-from app.models.production import ProductionPlan, ProductionPlanItem, ProductionStatus
+from app.models.sales import SalesOrder, SalesOrderItem
+from app.models.production import ProductionPlan, ProductionPlanItem
 from app.models.quality import QualityDefect, CustomerComplaint, DefectStatus
 from app.models.product import Product, ProductGroup
-from app.models.basics import Partner
-from app.models.inventory import StockProduction
-from app.models.approval import ApprovalDocument, ApprovalStatus, DocumentType
+from app.models.basics import Partner, Staff
+from app.models.settlement import SettlementClosing, SettlementClosingAudit
+from app.api.utils.settlement_facts import (
+    sync_settlement_facts,
+    KIND_ORDER, KIND_DELIVERY, KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT,
+    KIND_PRODUCTION, KIND_DEFECT, KIND_COMPLAINT,
+)
+from app.api.utils.date_ranges import period_bounds, in_period, in_any_month
+from app.api.utils.report_cache import lookup_report, kind_periods, ALL_PERIODS
+from app.api.utils.concurrent_queries import fetch_all_concurrently
+from app.api.utils.streaming_export import ExportColumn, ExportSource, stream_export
+from app.api.utils.settlement_closing import snapshot_rows, daily_fact_source, close_month, reopen_month
+from app.api.utils.settlement_cube import annual_pivot_query
+from app.api.utils.settlement_queries import (
+    row_dict, orders_query, sales_query, purchase_sources, production_query, defects_query, complaints_query,
+)
+from app.schemas.settlement import (
+    SettlementCloseRequest, SettlementReopenRequest, SettlementClosingResponse, SettlementClosingAuditResponse,
+)
 
 router = APIRouter()
 
 
-def get_month_filter(model_attr, year: int, month: int):
-    return and_(
-        extract('year', model_attr) == year,
-        extract('month', model_attr) == month
-    )
+def _as_year(value) -> int:
+    # SQLite 의 min()/max() 는 Date 컬럼도 문자열로 돌려줍니다
+    return value.year if hasattr(value, "year") else int(str(value)[:4])
+
 
 @router.get("/orders")
 async def get_settlement_orders(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
     """1. 수주내역: 수주목록(확정상태) 기준"""
-    query = select(
-        Partner.name.label("partner_name"),
-        SalesOrder.order_date,
-        Product.name.label("product_name"),
-        Product.specification,
-        SalesOrderItem.quantity,
-        SalesOrderItem.unit_price,
-        SalesOrderItem.currency,
-        (SalesOrderItem.quantity * SalesOrderItem.unit_price).label("total_price")
-    ).select_from(SalesOrder)\
-     .join(SalesOrderItem, SalesOrder.id == SalesOrderItem.order_id)\
-     .join(Partner, SalesOrder.partner_id == Partner.id)\
-     .join(Product, SalesOrderItem.product_id == Product.id)\
-     .where(
-         SalesOrder.status != OrderStatus.CANCELLED,
-         get_month_filter(SalesOrder.order_date, year, month)
-     )
-    
-    if major_group_id:
-        # Filter by major group (Product -> Group -> Parent Group)
-        subq = select(ProductGroup.id).where(and_(ProductGroup.parent_id == major_group_id))
-        query = query.where(and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id)))
+    cache = await lookup_report(request, db, "settlement/orders", kind_periods([KIND_ORDER], year, month),
+                                year=year, month=month, major_group_id=major_group_id)
+    if cache.response:
+        return cache.response
 
-    result = await db.execute(query)
-    return [dict(r._mapping) for r in result]
+    snapshot = await snapshot_rows(db, "orders", year, month, major_group_id)
+    if snapshot is not None:
+        return cache.respond(snapshot)
+
+    start, end = period_bounds(year, month)
+    result = await db.execute(orders_query(start, end, major_group_id))
+    return cache.respond([dict(r._mapping) for r in result])
 
 @router.get("/sales")
 async def get_settlement_sales(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """2. 매출내역: 납품완료 + 거래명세서가 발행된 부분납품 포함"""
-
-    # ── Query 1 [수정]: DELIVERY_COMPLETED / DELIVERED 수주
-    # 반드시 DeliveryHistory 기준으로 집계해야 분할납품 시 각 납품일이 정확히 반영됨
-    # (SalesOrder.actual_delivery_date 사용 시 최종납품일로 모든 분할분이 집계되는 버그 발생)
-    q1 = select(
-        Partner.name.label("partner_name"),
-        SalesOrder.order_date,
-        DeliveryHistory.delivery_date.label("delivery_date"),
-        Product.name.label("product_name"),
-        Product.specification,
-        DeliveryHistoryItem.quantity,
-        SalesOrderItem.unit_price,
-        SalesOrderItem.currency,
-        (DeliveryHistoryItem.quantity * SalesOrderItem.unit_price).label("total_price")
-    ).select_from(DeliveryHistory)\
-     .join(DeliveryHistoryItem, DeliveryHistory.id == DeliveryHistoryItem.delivery_id)\
-     .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)\
-     .join(SalesOrder, DeliveryHistory.order_id == SalesOrder.id)\
-     .join(Partner, SalesOrder.partner_id == Partner.id)\
-     .join(Product, SalesOrderItem.product_id == Product.id)\
-     .where(
-         SalesOrder.status.in_([OrderStatus.DELIVERY_COMPLETED, OrderStatus.DELIVERED]),
-         get_month_filter(DeliveryHistory.delivery_date, year, month)
-     )
-
-    # ── Query 2: 거래명세서(statement_json)가 발행된 부분납품 수주 ─────────────────
-    # PARTIALLY_DELIVERED 상태여도 해당월에 statement_json이 있으면 매출 집계 포함
-    # 수량: DeliveryHistoryItem.quantity (실제 납품 수량)
-    # 단가: SalesOrderItem.unit_price (수주 단가)
-    q2 = select(
-        Partner.name.label("partner_name"),
-        SalesOrder.order_date,
-        DeliveryHistory.delivery_date.label("delivery_date"),
-        Product.name.label("product_name"),
-        Product.specification,
-        DeliveryHistoryItem.quantity,
-        SalesOrderItem.unit_price,
-        SalesOrderItem.currency,
-        (DeliveryHistoryItem.quantity * SalesOrderItem.unit_price).label("total_price")
-    ).select_from(DeliveryHistory)\
-     .join(DeliveryHistoryItem, DeliveryHistory.id == DeliveryHistoryItem.delivery_id)\
-     .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)\
-     .join(SalesOrder, DeliveryHistory.order_id == SalesOrder.id)\
-     .join(Partner, SalesOrder.partner_id == Partner.id)\
-     .join(Product, SalesOrderItem.product_id == Product.id)\
-     .where(
-         SalesOrder.status == OrderStatus.PARTIALLY_DELIVERED,
-         DeliveryHistory.statement_json.isnot(None),
-         get_month_filter(DeliveryHistory.delivery_date, year, month)
-     )
-
-    if major_group_id:
-        subq = select(ProductGroup.id).where(ProductGroup.parent_id == major_group_id)
-        group_filter = and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id))
-        q1 = q1.where(group_filter)
-        q2 = q2.where(group_filter)
-
-    res1 = await db.execute(q1)
-    res2 = await db.execute(q2)
-
-    return [dict(r._mapping) for r in res1] + [dict(r._mapping) for r in res2]
+    """2. 매출내역: 납품완료 + 거래명세서가 발행된 부분납품 포함 (정산 사실 SALES, 납품일 기준)"""
+    cache = await lookup_report(request, db, "settlement/sales", kind_periods([KIND_SALES], year, month),
+                                year=year, month=month, major_group_id=major_group_id)
+    if cache.response:
+        return cache.response
+
+    snapshot = await snapshot_rows(db, "sales", year, month, major_group_id)
+    if snapshot is not None:
+        return cache.respond(snapshot)
+
+    start, end = period_bounds(year, month)
+    result = await db.execute(sales_query(start, end, major_group_id))
+    return cache.respond([dict(r._mapping) for r in result])
 
 
 @router.get("/purchases")
 async def get_settlement_purchases(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
     dept: Optional[str] = Query(None),  # 특수 필터: "소모품" 전달 시 소모품만 조회
     db: AsyncSession = Depends(get_db)
 ):
-    """3. 매입내역: 구매발주서 + 외주발주서 기준 (실제 입고일 기준)"""
-    data = []
-    
-    # Material/Consumable Purchases - 실제 입고일(actual_delivery_date) 기준
-    p_query = select(
-        PurchaseOrder.purchase_type.label("category"),
-        Partner.name.label("partner_name"),
-        PurchaseOrder.order_date,
-        PurchaseOrder.actual_delivery_date.label("delivery_date"),
-        Product.name.label("product_name"),
-        Product.specification,
-        PurchaseOrderItem.quantity,
-        PurchaseOrderItem.unit_price,
-        (PurchaseOrderItem.quantity * PurchaseOrderItem.unit_price).label("total_price"),
-        PurchaseOrderItem.currency
-    ).select_from(PurchaseOrder)\
-     .join(PurchaseOrderItem, PurchaseOrder.id == PurchaseOrderItem.purchase_order_id)\
-     .join(Partner, PurchaseOrder.partner_id == Partner.id)\
-     .join(Product, PurchaseOrderItem.product_id == Product.id)\
-     .where(
-         PurchaseOrder.status == PurchaseStatus.COMPLETED,
-         PurchaseOrder.actual_delivery_date != None,
-         get_month_filter(PurchaseOrder.actual_delivery_date, year, month)
-     )
-    
-    # Outsourcing Purchases - 실제 납품일(actual_delivery_date) 기준
-    o_query = select(
-        func.cast("OUTSOURCING", String).label("category"),
-        Partner.name.label("partner_name"),
-        OutsourcingOrder.order_date,
-        OutsourcingOrder.actual_delivery_date.label("delivery_date"),
-        Product.name.label("product_name"),
-        Product.specification,
-        OutsourcingOrderItem.quantity,
-        OutsourcingOrderItem.unit_price,
-        (OutsourcingOrderItem.quantity * OutsourcingOrderItem.unit_price).label("total_price"),
-        func.cast("KRW", String).label("currency")
-    ).select_from(OutsourcingOrder)\
-     .join(OutsourcingOrderItem, OutsourcingOrder.id == OutsourcingOrderItem.outsourcing_order_id)\
-     .join(Partner, OutsourcingOrder.partner_id == Partner.id)\
-     .outerjoin(Product, OutsourcingOrderItem.product_id == Product.id)\
-     .where(
-         OutsourcingOrder.status == OutsourcingStatus.COMPLETED,
-         OutsourcingOrder.actual_delivery_date != None,
-         get_month_filter(OutsourcingOrder.actual_delivery_date, year, month)
-     )
-
-    # 소모품 필터: dept='소모품' 이거나 major_group_id 없이 소모품 전용 조회인 경우
-    is_consumable_filter = (dept == '소모품')
-
-    if is_consumable_filter:
-        # 소모품만 조회: p_query는 purchase_type=CONSUMABLE만, o_query는 제외
-        p_query = p_query.where(PurchaseOrder.purchase_type == 'CONSUMABLE')
-        res_p = await db.execute(p_query)
-        data.extend([dict(r._mapping) for r in res_p])
-    else:
-        if major_group_id:
-            subq = select(ProductGroup.id).where(ProductGroup.parent_id == major_group_id)
-            # 소모품(CONSUMABLE) 발주는 product group 대신 별도 분류이므로 제품그룹 필터에서 제외
-            p_query = p_query.where(
-                PurchaseOrder.purchase_type != 'CONSUMABLE',
-                and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id))
-            )
-            o_query = o_query.where(and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id)))
-        else:
-            # 전체 조회: 소모품 PurchaseOrder는 product group 무관하게 포함
-            pass
-
-        res_p = await db.execute(p_query)
-        res_o = await db.execute(o_query)
-        data.extend([dict(r._mapping) for r in res_p])
-        data.extend([dict(r._mapping) for r in res_o])
-
-    # --- 내부기안 대금지급 건 추가 집계 ---
-    import re as _re
-    from datetime import date as _date
-
-    # major_group_id가 선택된 경우 해당 그룹의 이름을 조회하여 기안부서 필터로 사용
-    dept_filter_name: Optional[str] = None
-    if dept and dept != '소모품':
-        dept_filter_name = dept
-    elif major_group_id:
-        grp_res = await db.execute(
-            select(ProductGroup.name).where(ProductGroup.id == major_group_id)
-        )
-        grp_row = grp_res.first()
-        if grp_row:
-            dept_filter_name = grp_row[0]
-
-    # 소모품 필터가 아닐 때만 대금지급기안 집계
-    if not is_consumable_filter:
-        payment_query = select(ApprovalDocument).where(
-            ApprovalDocument.doc_type == DocumentType.INTERNAL_DRAFT,
-            ApprovalDocument.status == ApprovalStatus.COMPLETED,
-            ApprovalDocument.deleted_at == None
-        )
-        payment_res = await db.execute(payment_query)
-        payment_docs = payment_res.scalars().all()
+    """3. 매입내역: 구매발주서 + 외주발주서 (실제 입고일 기준) + 내부기안 대금지급 (정산 사실)"""
+    cache = await lookup_report(request, db, "settlement/purchases",
+                                kind_periods([KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT], year, month),
+                                year=year, month=month, major_group_id=major_group_id, dept=dept)
+    if cache.response:
+        return cache.response
+
+    snapshot = await snapshot_rows(db, "purchases", year, month, major_group_id, dept)
+    if snapshot is not None:
+        return cache.respond(snapshot)
+
+    start, end = period_bounds(year, month)
+    sources = await purchase_sources(db, start, end, major_group_id, dept)
+    if len(sources) == 1:
+        results = [(await db.execute(sources[0].statement)).all()]
     else:
-        payment_docs = []
-
-    for doc in payment_docs:
-        content = doc.content or {}
-        if content.get('draft_type') != 'PAYMENT':
-            continue
-
-        # [FIX] 사업부 필터: 기안부서(dept)가 선택된 그룹명과 일치하는 건만 포함
-        if dept_filter_name:
-            doc_dept = (content.get('dept') or '').strip()
-            if doc_dept != dept_filter_name:
-                continue
-
-        # 기안일자 파싱 (항목별 거래명세서 날짜 없으면 폴백)
-        request_date_str = content.get('request_date')
-        try:
-            fallback_date = _date.fromisoformat(request_date_str) if request_date_str else None
-        except Exception:
-            fallback_date = None
-        if not fallback_date and doc.created_at:
-            fallback_date = doc.created_at.date()
-
-        # 거래처명: content.partner_for_title 우선 사용, 없으면 title에서 파싱
-        partner_name = content.get('partner_for_title', '').strip()
-        if not partner_name:
-            import re as _re
-            title = doc.title or ''
-            m = _re.match(r'^\[(.+?)\]-', title)
-            partner_name = m.group(1).strip() if m else title.strip()
-
-        currency = content.get('currency', 'KRW')
-        items = content.get('items', [])
-        for item in items:
-            amount = float(item.get('amount', 0) or 0)
-            quantity = float(item.get('quantity', 0) or 0)
-            if amount == 0 and quantity == 0:
-                continue
-            # 항목별 거래명세서 날짜 우선, 없으면 기안일자 폴백
-            trade_date_str = item.get('trade_date', '')
-            try:
-                item_date = _date.fromisoformat(trade_date_str) if trade_date_str else None
-            except Exception:
-                item_date = None
-            effective_date = item_date or fallback_date
-            if not effective_date:
-                continue
-            if effective_date.year != year or effective_date.month != month:
-                continue
-            data.append({
-                'category': 'PAYMENT',
-                'partner_name': partner_name,
-                'order_date': effective_date,
-                'delivery_date': effective_date,
-                'product_name': item.get('name', ''),
-                'specification': item.get('spec', ''),
-                'quantity': quantity,
-                'unit_price': float(item.get('unit_price', 0) or 0),
-                'total_price': amount,
-                'currency': currency,
-                'dept': (content.get('dept') or '').strip(),
-            })
-
-    return data
+        # 구매/외주/대금지급 조회는 서로 독립 → 별도 연결로 동시 실행
+        results = await fetch_all_concurrently(*(s.statement for s in sources))
+
+    data = []
+    for source, rows in zip(sources, results):
+        mapper = source.row_mapper or row_dict
+        data.extend(mapper(r) for r in rows)
+    return cache.respond(data)
 
 @router.get("/production")
 async def get_settlement_production(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
@@ -312,62 +131,20 @@ async def get_settlement_production(
        - 수주생산: SalesOrder → Partner(고객사), SalesOrder.order_date(수주일)
        - 재고생산: StockProduction → Partner(고객사), StockProduction.request_date(요청일)
     """
-    # StockProduction 전용 Partner alias
-    StockPartner = Partner.__table__.alias("stock_partner")
-
-    # 생산완료일 폴백: actual_completion_date 없으면 updated_at의 날짜 부분 사용
-    effective_end_col = func.coalesce(
-        ProductionPlan.actual_completion_date,
-        func.date(ProductionPlan.updated_at)
-    )
+    # 수주일/수주금액은 완료월과 무관하게 바뀔 수 있으므로 수주 구분 전체에 의존
+    cache = await lookup_report(request, db, "settlement/production",
+                                kind_periods([KIND_PRODUCTION], year, month) + [(KIND_ORDER, ALL_PERIODS)],
+                                year=year, month=month, major_group_id=major_group_id)
+    if cache.response:
+        return cache.response
 
-    query = select(
-        ProductionPlan.id.label("plan_id"),
-        Product.id.label("product_id"),
-        func.coalesce(Partner.name, StockPartner.c.name).label("partner_name"),
-        func.coalesce(SalesOrder.order_date, StockProduction.request_date).label("order_date"),
-        effective_end_col.label("end_date"),
-        Product.name.label("product_name"),
-        Product.specification,
-        func.max(ProductionPlanItem.quantity).label("quantity"),
-        # 수주합계금액: 수주품목의 수량 × 단가 (재고생산은 NULL)
-        func.max(SalesOrderItem.quantity * SalesOrderItem.unit_price).label("order_amount"),
-        func.sum(ProductionPlanItem.cost).label("process_cost")
-    ).select_from(ProductionPlan)\
-     .join(ProductionPlanItem, ProductionPlanItem.plan_id == ProductionPlan.id)\
-     .outerjoin(SalesOrder, ProductionPlan.order_id == SalesOrder.id)\
-     .outerjoin(Partner, SalesOrder.partner_id == Partner.id)\
-     .outerjoin(SalesOrderItem, and_(
-         SalesOrderItem.order_id == SalesOrder.id,
-         SalesOrderItem.product_id == ProductionPlanItem.product_id
-     ))\
-     .outerjoin(StockProduction, ProductionPlan.stock_production_id == StockProduction.id)\
-     .outerjoin(StockPartner, StockProduction.partner_id == StockPartner.c.id)\
-     .join(Product, ProductionPlanItem.product_id == Product.id)\
-     .where(
-         ProductionPlan.status == ProductionStatus.COMPLETED,
-         get_month_filter(effective_end_col, year, month)
-     )\
-     .group_by(
-         ProductionPlan.id,
-         Product.id,
-         Partner.name,
-         StockPartner.c.name,
-         SalesOrder.order_date,
-         StockProduction.request_date,
-         ProductionPlan.actual_completion_date,
-         ProductionPlan.updated_at,
-         Product.name,
-         Product.specification
-     )
-
-    if major_group_id:
-        subq = select(ProductGroup.id).where(ProductGroup.parent_id == major_group_id)
-        query = query.where(and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id)))
-
-    result = await db.execute(query)
-    return [dict(r._mapping) for r in result]
+    snapshot = await snapshot_rows(db, "production", year, month, major_group_id)
+    if snapshot is not None:
+        return cache.respond(snapshot)
 
+    start, end = period_bounds(year, month)
+    result = await db.execute(production_query(start, end, major_group_id))
+    return cache.respond([dict(r._mapping) for r in result])
 
 @router.get("/production/{plan_id}/processes")
 async def get_production_plan_processes(
@@ -422,405 +199,177 @@ async def get_production_plan_processes(
 
 @router.get("/defects")
 async def get_settlement_defects(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
     """5. 불량발생내역: 품질관리 기준"""
-    query = select(
-        QualityDefect.defect_date,
-        ProductionPlanItem.process_name,
-        Partner.name.label("partner_name"),
-        Product.name.label("product_name"),
-        Product.specification,
-        QualityDefect.quantity,
-        QualityDefect.amount,
-        QualityDefect.resolution_date
-    ).select_from(QualityDefect)\
-     .join(SalesOrder, QualityDefect.order_id == SalesOrder.id)\
-     .join(Partner, SalesOrder.partner_id == Partner.id)\
-     .join(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)\
-     .join(Product, ProductionPlanItem.product_id == Product.id)\
-     .where(
-         get_month_filter(QualityDefect.defect_date, year, month)
-     )
-
-    if major_group_id:
-        subq = select(ProductGroup.id).where(ProductGroup.parent_id == major_group_id)
-        query = query.where(and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id)))
+    # 공정명은 생산계획 품목에서 오므로 생산 구분 전체에 의존
+    cache = await lookup_report(request, db, "settlement/defects",
+                                kind_periods([KIND_DEFECT], year, month) + [(KIND_PRODUCTION, ALL_PERIODS)],
+                                year=year, month=month, major_group_id=major_group_id)
+    if cache.response:
+        return cache.response
 
-    result = await db.execute(query)
-    return [dict(r._mapping) for r in result]
+    snapshot = await snapshot_rows(db, "defects", year, month, major_group_id)
+    if snapshot is not None:
+        return cache.respond(snapshot)
+
+    start, end = period_bounds(year, month)
+    result = await db.execute(defects_query(start, end, major_group_id))
+    return cache.respond([dict(r._mapping) for r in result])
 
 @router.get("/complaints")
 async def get_settlement_complaints(
+    request: Request,
     year: int = Query(...),
     month: int = Query(...),
     major_group_id: Optional[int] = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
     """6. 고객불만접수내역"""
-    query = select(
-        CustomerComplaint.receipt_date,
-        Partner.name.label("partner_name"),
-        CustomerComplaint.content,
-        CustomerComplaint.status,
-        CustomerComplaint.action_note
-    ).select_from(CustomerComplaint)\
-     .join(Partner, CustomerComplaint.partner_id == Partner.id)\
-     .where(
-         get_month_filter(CustomerComplaint.receipt_date, year, month)
-     )
-
-    # Note: Complaints link to Partner, but not necessarily to a Product Group directly 
-    # unless we join via SalesOrder linked to the complaint.
-    # For now, we'll keep it simple or follow the major_group_id IF present in linked order.
-    
-    if major_group_id:
-        # If complaint has an order, filter by order's items' product group
-        pass # Optional: Implementation depends on how strict the filter should be for complaints
+    cache = await lookup_report(request, db, "settlement/complaints", kind_periods([KIND_COMPLAINT], year, month),
+                                year=year, month=month, major_group_id=major_group_id)
+    if cache.response:
+        return cache.response
 
-    result = await db.execute(query)
-    return [dict(r._mapping) for r in result]
+    snapshot = await snapshot_rows(db, "complaints", year, month, major_group_id)
+    if snapshot is not None:
+        return cache.respond(snapshot)
 
+    start, end = period_bounds(year, month)
+    result = await db.execute(complaints_query(start, end, major_group_id))
+    return cache.respond([dict(r._mapping) for r in result])
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 차트 요약: 사업부별 집계 + 거래처 순위
 # ─────────────────────────────────────────────────────────────────────────────
 @router.get("/chart-summary")
 async def get_chart_summary(
+    request: Request,
     year: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
-    exchange_rate: float = Query(default=1350.0, description="USD→KRW 환율"),
     db: AsyncSession = Depends(get_db)
 ):
-    """사업부별 수주/매출/매입/생산/불량/고객불만 집계 + 매출처·매입처 Top10 (USD→KRW 환산 포함)"""
-
-    MinorGrp = ProductGroup.__table__.alias("minor_grp")
-    MajorGrp = ProductGroup.__table__.alias("major_grp")
-    group_expr = func.coalesce(MajorGrp.c.name, MinorGrp.c.name, "미분류")
-
-    def pd(q, col):
-        if year:  q = q.where(extract('year',  col) == year)
-        if month: q = q.where(extract('month', col) == month)
+    """
+    사업부별 수주/매출/매입/생산/불량/고객불만 집계 + 매출처·매입처 Top10
+    정산 일별 집계(settlement_daily_facts) 기준, 금액은 일자별 환율로 환산된 원화 금액
+    """
+    chart_kinds = [KIND_ORDER, KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT,
+                   KIND_PRODUCTION, KIND_DEFECT, KIND_COMPLAINT]
+    # 연도 없이 월만 지정된 경우는 모든 연도의 같은 월이므로 구분 전체에 의존
+    cache = await lookup_report(request, db, "settlement/chart-summary", kind_periods(chart_kinds, year, month if year else None),
+                                year=year, month=month)
+    if cache.response:
+        return cache.response
+
+    # 마감 월은 마감 스냅샷, 나머지 월은 실시간 일별 집계
+    src = await daily_fact_source(db)
+    D = src.c
+    group_name = func.coalesce(ProductGroup.name, "미분류")
+
+    # 연도 없이 월만 지정된 경우: 데이터가 있는 연도들의 해당 월 범위를 OR 로 비교
+    month_years = []
+    if month and not year:
+        first, last = (await db.execute(select(func.min(D.fact_date), func.max(D.fact_date)))).one()
+        if first and last:
+            month_years = range(_as_year(first), _as_year(last) + 1)
+
+    def pd(q):
+        if year:
+            return q.where(in_period(D.fact_date, year, month))
+        if month:
+            return q.where(in_any_month(D.fact_date, month, month_years))
         return q
 
-    def with_grp(q):
-        return (q
-            .outerjoin(MinorGrp, Product.group_id == MinorGrp.c.id)
-            .outerjoin(MajorGrp, MinorGrp.c.parent_id == MajorGrp.c.id)
-        )
-
-    def row2(res):
-        return [{"name": r[0] or "미분류", "value": float(r[1] or 0)}
-                for r in res.fetchall()]
+    def ranked(values: dict, limit: Optional[int] = None):
+        items = sorted(values.items(), key=lambda x: -x[1])
+        return [{"name": k, "value": v} for k, v in (items[:limit] if limit else items)]
+
+    # 1. 사업부(대그룹)별 집계 — 구분/매입구분/기안부서 단위로 한 번에 조회
+    q_groups = pd(
+        select(D.kind, D.category, group_name.label("g"), D.dept,
+               func.sum(D.amount_krw).label("v"), func.sum(D.row_count).label("cnt"))
+        .select_from(src)
+        .outerjoin(ProductGroup, D.major_group_id == ProductGroup.id)
+        .where(D.kind.in_([KIND_ORDER, KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT, KIND_PRODUCTION, KIND_DEFECT]))
+        .group_by(D.kind, D.category, group_name, D.dept)
+    )
 
-    # USD→KRW 환산 CASE 표현식 생성 헬퍼
-    def krw_expr(amount_expr, currency_col):
-        return case(
-            (currency_col == 'USD', amount_expr * exchange_rate),
-            else_=amount_expr
+    # 2. 거래처별 집계 (고객불만 건수, 매출처/매입처 순위)
+    partner_name = func.coalesce(Partner.name, func.nullif(D.partner_label, ""), "미분류")
+    q_partners = pd(
+        select(D.kind, partner_name.label("p"),
+               func.sum(D.amount_krw).label("v"), func.sum(D.row_count).label("cnt"))
+        .select_from(src)
+        .outerjoin(Partner, D.partner_id == Partner.id)
+        .where(
+            D.kind.in_([KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT, KIND_COMPLAINT]),
+            or_(D.partner_id.is_(None), Partner.id.isnot(None)),
+            or_(D.kind == KIND_PAYMENT, D.partner_id.isnot(None)),
         )
+        .group_by(D.kind, partner_name)
+    )
+
+    # 두 집계는 서로 독립 → 별도 연결로 동시 실행
+    rows_groups, rows_partners = await fetch_all_concurrently(q_groups, q_partners)
 
-    # 수주 (USD 환산)
-    so_amount = SalesOrderItem.quantity * SalesOrderItem.unit_price
-    r_orders = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(krw_expr(so_amount, SalesOrderItem.currency)).label("v"))
-            .select_from(SalesOrderItem)
-            .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
-            .join(Product,    SalesOrderItem.product_id == Product.id)
-            .where(SalesOrder.status != OrderStatus.CANCELLED)
-            .group_by(group_expr)
-        ), SalesOrder.order_date
-    ))
-
-    # 매출 (USD 환산) — 납품완료/완납 수주 [수정]
-    # 분할납품 시 각 납품 건별 납품일 및 수량을 정확히 반영하기 위해 DeliveryHistory 기준 집계
-    dhi_amount_full = DeliveryHistoryItem.quantity * SalesOrderItem.unit_price
-    r_sales = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(krw_expr(dhi_amount_full, SalesOrderItem.currency)).label("v"))
-            .select_from(DeliveryHistory)
-            .join(DeliveryHistoryItem, DeliveryHistory.id == DeliveryHistoryItem.delivery_id)
-            .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)
-            .join(SalesOrder, DeliveryHistory.order_id == SalesOrder.id)
-            .join(Product, SalesOrderItem.product_id == Product.id)
-            .where(SalesOrder.status.in_([OrderStatus.DELIVERY_COMPLETED, OrderStatus.DELIVERED]))
-            .group_by(group_expr)
-        ), DeliveryHistory.delivery_date
-    ))
-
-    # 매출 추가 집계 — 부분납품 중 거래명세서 발행건 (매출내역 탭과 동일 기준)
-    dhi_amount = DeliveryHistoryItem.quantity * SalesOrderItem.unit_price
-    r_sales_partial = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(krw_expr(dhi_amount, SalesOrderItem.currency)).label("v"))
-            .select_from(DeliveryHistory)
-            .join(DeliveryHistoryItem, DeliveryHistory.id == DeliveryHistoryItem.delivery_id)
-            .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)
-            .join(SalesOrder, DeliveryHistory.order_id == SalesOrder.id)
-            .join(Product, SalesOrderItem.product_id == Product.id)
-            .where(
-                SalesOrder.status == OrderStatus.PARTIALLY_DELIVERED,
-                DeliveryHistory.statement_json.isnot(None)
-            )
-            .group_by(group_expr)
-        ), DeliveryHistory.delivery_date
-    ))
-
-    # 두 매출 소스 합산
+    orders_map: dict = {}
     sales_map: dict = {}
-    for r in r_sales.fetchall():
-        key = r[0] or "미분류"
-        sales_map[key] = sales_map.get(key, 0.0) + float(r[1] or 0)
-    for r in r_sales_partial.fetchall():
-        key = r[0] or "미분류"
-        sales_map[key] = sales_map.get(key, 0.0) + float(r[1] or 0)
-    sales_data = [{"name": k, "value": v} for k, v in sorted(sales_map.items(), key=lambda x: -x[1])]
-
-    # 매입 = 구매발주(자재/MRP, 소모품 제외) + 외주발주 (USD 환산)
-    po_amount = PurchaseOrderItem.quantity * PurchaseOrderItem.unit_price
-    r_pur_buy = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(krw_expr(po_amount, PurchaseOrderItem.currency)).label("v"))
-            .select_from(PurchaseOrderItem)
-            .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
-            .join(Product,       PurchaseOrderItem.product_id == Product.id)
-            .where(
-                PurchaseOrder.status == PurchaseStatus.COMPLETED,
-                PurchaseOrder.purchase_type != 'CONSUMABLE'  # 소모품은 별도 버킷으로 분리
-            )
-            .group_by(group_expr)
-        ), PurchaseOrder.actual_delivery_date
-    ))
-    # 소모품 PurchaseOrder 별도 집계 → "소모품" 버킷
-    r_pur_cons = await db.execute(pd(
-        select(func.sum(krw_expr(po_amount, PurchaseOrderItem.currency)).label("v"))
-        .select_from(PurchaseOrderItem)
-        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
-        .where(
-            PurchaseOrder.status == PurchaseStatus.COMPLETED,
-            PurchaseOrder.purchase_type == 'CONSUMABLE'
-        ),
-        PurchaseOrder.actual_delivery_date
-    ))
-    cons_po_total = float((r_pur_cons.scalar() or 0))
-
-    oo_amount = OutsourcingOrderItem.unit_price * OutsourcingOrderItem.quantity
-    r_pur_out = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(oo_amount).label("v"))   # 외주는 currency 컬럼 없음 → KRW 그대로
-            .select_from(OutsourcingOrderItem)
-            .join(OutsourcingOrder, OutsourcingOrderItem.outsourcing_order_id == OutsourcingOrder.id)
-            .outerjoin(Product, OutsourcingOrderItem.product_id == Product.id)
-            .where(OutsourcingOrder.status == OutsourcingStatus.COMPLETED)
-            .group_by(group_expr)
-        ), OutsourcingOrder.actual_delivery_date
-    ))
-    # 두 소스 합산 (비소모품)
     pur_map: dict = {}
-    for r in r_pur_buy.fetchall():
-        grp_key = r[0] or "미분류"
-        pur_map[grp_key] = pur_map.get(grp_key, 0.0) + float(r[1] or 0)
-    for r in r_pur_out.fetchall():
-        grp_key = r[0] or "미분류"
-        pur_map[grp_key] = pur_map.get(grp_key, 0.0) + float(r[1] or 0)
-    # 소모품 발주 합계를 "소모품" 버킷에 추가
-    if cons_po_total > 0:
-        pur_map["소모품"] = pur_map.get("소모품", 0.0) + cons_po_total
-
-    # 내부기안 대금지급 건 수집 (chart-summary용)
-    import re as _re_chart
-    from datetime import date as _date_chart
-    _pay_q = select(ApprovalDocument).where(
-        ApprovalDocument.doc_type == DocumentType.INTERNAL_DRAFT,
-        ApprovalDocument.status == ApprovalStatus.COMPLETED,
-        ApprovalDocument.deleted_at == None
-    )
-    _pay_docs = (await db.execute(_pay_q)).scalars().all()
-    _payment_rows = []  # (partner_name, amount_krw)
-    for _doc in _pay_docs:
-        _cnt = _doc.content or {}
-        if _cnt.get('draft_type') != 'PAYMENT':
-            continue
-        _date_str = _cnt.get('request_date')
-        try:
-            _fallback_date = _date_chart.fromisoformat(_date_str) if _date_str else None
-        except Exception:
-            _fallback_date = None
-        if not _fallback_date and _doc.created_at:
-            _fallback_date = _doc.created_at.date()
-        _pname = (_cnt.get('partner_for_title') or '').strip()
-        if not _pname:
-            _m = _re_chart.match(r'^\[(.+?)\]-', _doc.title or '')
-            _pname = _m.group(1).strip() if _m else (_doc.title or '미분류')
-        _cur = _cnt.get('currency', 'KRW')
-        for _item in (_cnt.get('items') or []):
-            _amt = float(_item.get('amount', 0) or 0)
-            if _amt == 0:
-                continue
-            # 항목별 거래명세서 날짜 우선, 없으면 기안일자 폴백
-            _td_str = _item.get('trade_date', '')
-            try:
-                _item_date = _date_chart.fromisoformat(_td_str) if _td_str else None
-            except Exception:
-                _item_date = None
-            _eff_date = _item_date or _fallback_date
-            if not _eff_date:
-                continue
-            if year and _eff_date.year != year:
-                continue
-            if month and _eff_date.month != month:
-                continue
-            _amt_krw = _amt * exchange_rate if _cur == 'USD' else _amt
-            _dept = (_cnt.get('dept') or '').strip() or '기타(대금지급)'
-            _payment_rows.append((_dept, _pname or '미분류', _amt_krw))
-
-    # 대금지급 합계를 기안부서(미입력시 "기타") 그룹으로 추가
-    for _dept, _pname, _amt_krw in _payment_rows:
-        pur_map[_dept] = pur_map.get(_dept, 0.0) + _amt_krw
-
-    # 소모품 구매신청서(CONSUMABLES_PURCHASE) 완료 결재 문서 → "소모품" 버킷
-    from datetime import date as _date_cons
-    _cons_q = select(ApprovalDocument).where(
-        ApprovalDocument.doc_type == DocumentType.CONSUMABLES_PURCHASE,
-        ApprovalDocument.status == ApprovalStatus.COMPLETED,
-        ApprovalDocument.deleted_at == None
-    )
-    _cons_docs = (await db.execute(_cons_q)).scalars().all()
-    for _cdoc in _cons_docs:
-        _ccnt = _cdoc.content or {}
-        _c_date_str = _ccnt.get('request_date')
-        try:
-            _c_fallback = _date_cons.fromisoformat(_c_date_str) if _c_date_str else None
-        except Exception:
-            _c_fallback = None
-        if not _c_fallback and _cdoc.created_at:
-            _c_fallback = _cdoc.created_at.date()
-        if not _c_fallback:
-            continue
-        if year and _c_fallback.year != year:
-            continue
-        if month and _c_fallback.month != month:
-            continue
-        # ConsumablesPurchaseForm에는 unit_price가 없으므로 금액 집계는 0 (건수 파악용)
-        # pur_map의 소모품 버킷에 항목 수만 표시 (금액 없음 → 건수 * 1원 임시 처리 않고 그냥 누적)
-        # 실제 발주가 생성되면 cons_po_total에 포함되므로 중복 방지를 위해 여기서는 포함 안 함
-        pass  # 소모품 구매신청서는 금액 데이터가 없어 chart 집계에서는 PO 기준으로만 반영
-
-    purchases_data = [{"name": k, "value": v} for k, v in sorted(pur_map.items(), key=lambda x: -x[1])]
-
-
-    # 생산 (완료일 폴백)
-    eff = func.coalesce(
-        ProductionPlan.actual_completion_date,
-        func.date(ProductionPlan.updated_at)
-    )
-    prod_q = with_grp(
-        select(group_expr.label("g"),
-               func.sum(ProductionPlanItem.cost).label("v"))
-        .select_from(ProductionPlanItem)
-        .join(ProductionPlan, ProductionPlanItem.plan_id == ProductionPlan.id)
-        .join(Product,        ProductionPlanItem.product_id == Product.id)
-        .where(ProductionPlan.status == ProductionStatus.COMPLETED)
-        .group_by(group_expr)
-    )
-    if year:  prod_q = prod_q.where(extract('year',  eff) == year)
-    if month: prod_q = prod_q.where(extract('month', eff) == month)
-    r_prod = await db.execute(prod_q)
-
-    # 불량
-    r_defects = await db.execute(pd(
-        with_grp(
-            select(group_expr.label("g"),
-                   func.sum(QualityDefect.amount).label("v"),
-                   func.count(QualityDefect.id).label("cnt"))
-            .select_from(QualityDefect)
-            .join(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)
-            .join(Product, ProductionPlanItem.product_id == Product.id)
-            .group_by(group_expr)
-        ), QualityDefect.defect_date
-    ))
-
-    # 고객불만
-    r_complaints = await db.execute(pd(
-        select(Partner.name.label("g"),
-               func.count(CustomerComplaint.id).label("v"))
-        .select_from(CustomerComplaint)
-        .join(Partner, CustomerComplaint.partner_id == Partner.id)
-        .group_by(Partner.name),
-        CustomerComplaint.receipt_date
-    ))
-
-    # 매출처 순위 Top10 (USD 환산)
-    so_amount_rank = SalesOrderItem.quantity * SalesOrderItem.unit_price
-    sal_sum = func.sum(krw_expr(so_amount_rank, SalesOrderItem.currency))
-    r_sales_rank = await db.execute(pd(
-        select(Partner.name.label("g"), sal_sum.label("v"))
-        .select_from(SalesOrderItem)
-        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
-        .join(Partner,    SalesOrder.partner_id == Partner.id)
-        .where(SalesOrder.status.in_([OrderStatus.DELIVERY_COMPLETED, OrderStatus.DELIVERED]))
-        .group_by(Partner.name)
-        .order_by(sal_sum.desc())
-        .limit(10),
-        SalesOrder.actual_delivery_date
-    ))
-
-    # 매입처 순위 Top10 = 구매발주 + 외주발주 합산 (USD 환산)
-    po_amount_rank = PurchaseOrderItem.quantity * PurchaseOrderItem.unit_price
-    pur_sum_b = func.sum(krw_expr(po_amount_rank, PurchaseOrderItem.currency))
-    r_pur_rank_buy = await db.execute(pd(
-        select(Partner.name.label("g"), pur_sum_b.label("v"))
-        .select_from(PurchaseOrderItem)
-        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
-        .join(Partner,       PurchaseOrder.partner_id == Partner.id)
-        .where(PurchaseOrder.status == PurchaseStatus.COMPLETED)
-        .group_by(Partner.name)
-        .order_by(pur_sum_b.desc()),
-        PurchaseOrder.actual_delivery_date
-    ))
-    pur_sum_o = func.sum(OutsourcingOrderItem.unit_price * OutsourcingOrderItem.quantity)
-    r_pur_rank_out = await db.execute(pd(
-        select(Partner.name.label("g"), pur_sum_o.label("v"))
-        .select_from(OutsourcingOrderItem)
-        .join(OutsourcingOrder, OutsourcingOrderItem.outsourcing_order_id == OutsourcingOrder.id)
-        .join(Partner,          OutsourcingOrder.partner_id == Partner.id)
-        .where(OutsourcingOrder.status == OutsourcingStatus.COMPLETED)
-        .group_by(Partner.name)
-        .order_by(pur_sum_o.desc()),
-        OutsourcingOrder.actual_delivery_date
-    ))
+    prod_map: dict = {}
+    defect_map: dict = {}
+    defect_cnt: dict = {}
+    for kind, category, g, dept, v, cnt in rows_groups:
+        v = float(v or 0)
+        if kind == KIND_ORDER:
+            orders_map[g] = orders_map.get(g, 0.0) + v
+        elif kind == KIND_SALES:
+            sales_map[g] = sales_map.get(g, 0.0) + v
+        elif kind == KIND_PURCHASE:
+            if category == 'CONSUMABLE':
+                # 소모품 발주는 "소모품" 버킷으로 분리
+                pur_map["소모품"] = pur_map.get("소모품", 0.0) + v
+            elif category is not None:
+                pur_map[g] = pur_map.get(g, 0.0) + v
+        elif kind == KIND_OUTSOURCING:
+            pur_map[g] = pur_map.get(g, 0.0) + v
+        elif kind == KIND_PAYMENT:
+            # 대금지급 합계는 기안부서(미입력시 "기타") 그룹으로 추가
+            key = dept or '기타(대금지급)'
+            pur_map[key] = pur_map.get(key, 0.0) + v
+        elif kind == KIND_PRODUCTION:
+            prod_map[g] = prod_map.get(g, 0.0) + v
+        elif kind == KIND_DEFECT:
+            defect_map[g] = defect_map.get(g, 0.0) + v
+            defect_cnt[g] = defect_cnt.get(g, 0) + int(cnt or 0)
+    if pur_map.get("소모품") == 0:
+        pur_map.pop("소모품")
+
+    complaint_map: dict = {}
+    sales_rank_map: dict = {}
     pur_rank_map: dict = {}
-    for r in r_pur_rank_buy.fetchall():
-        pur_rank_map[r[0] or "미분류"] = pur_rank_map.get(r[0] or "미분류", 0.0) + float(r[1] or 0)
-    for r in r_pur_rank_out.fetchall():
-        pur_rank_map[r[0] or "미분류"] = pur_rank_map.get(r[0] or "미분류", 0.0) + float(r[1] or 0)
-    # 대금지급 건 거래처별 순위 합산 (pur_rank_map은 거래처명 기준)
-    for _dept, _pname, _amt_krw in _payment_rows:
-        pur_rank_map[_pname] = pur_rank_map.get(_pname, 0.0) + _amt_krw
-    purchase_ranking = [{"name": k, "value": v}
-                        for k, v in sorted(pur_rank_map.items(), key=lambda x: -x[1])[:10]]
-
-
-    return {
-        "orders":           row2(r_orders),
-        "sales":            sales_data,
-        "purchases":        purchases_data,
-        "production":       row2(r_prod),
-        "defects":          [{"name": r[0] or "미분류", "value": float(r[1] or 0), "count": int(r[2] or 0)}
-                             for r in r_defects.fetchall()],
-        "complaints":       row2(r_complaints),
-        "sales_ranking":    row2(r_sales_rank),
-        "purchase_ranking": purchase_ranking,
-    }
+    for kind, p, v, cnt in rows_partners:
+        if kind == KIND_COMPLAINT:
+            complaint_map[p] = complaint_map.get(p, 0.0) + float(cnt or 0)
+        elif kind == KIND_SALES:
+            sales_rank_map[p] = sales_rank_map.get(p, 0.0) + float(v or 0)
+        else:
+            pur_rank_map[p] = pur_rank_map.get(p, 0.0) + float(v or 0)
+
+    return cache.respond({
+        "orders":           ranked(orders_map),
+        "sales":            ranked(sales_map),
+        "purchases":        ranked(pur_map),
+        "production":       ranked(prod_map),
+        "defects":          [{"name": k, "value": v, "count": defect_cnt.get(k, 0)}
+                             for k, v in sorted(defect_map.items(), key=lambda x: -x[1])],
+        "complaints":       ranked(complaint_map),
+        "sales_ranking":    ranked(sales_rank_map, 10),
+        "purchase_ranking": ranked(pur_rank_map, 10),
+    })
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -837,117 +386,276 @@ async def get_available_years(db: AsyncSession = Depends(get_db)):
     result = await db.execute(query)
     return [int(r[0]) for r in result if r[0] is not None]
 
+def _as_qty(value):
+    value = value or 0
+    return int(value) if float(value).is_integer() else value
+
+
+def _growth_rate(current, previous) -> Optional[float]:
+    """전년 대비 증감률(%) — 전년 실적이 없으면 None"""
+    if not previous:
+        return None
+    return round((current - previous) / abs(previous) * 100, 1)
+
+
 @router.get("/annual-performance")
 async def get_annual_performance(
+    request: Request,
     year: int = Query(...),
     major_group_id: Optional[int] = Query(None),
-    exchange_rate: float = Query(default=1350.0),
+    compare_previous: bool = Query(False, description="전년 동월 실적(prev_*)과 증감률(yoy_*) 포함"),
     db: AsyncSession = Depends(get_db)
 ):
-    """품목별 연간 실적: 고객사별 -> 제품별 -> 월별(1~12) 집계"""
-    from app.models.sales import DeliveryHistory, DeliveryHistoryItem, SalesOrderItem, SalesOrder
-    
-    # CASE expression for currency conversion
-    amount_expr = SalesOrderItem.quantity * SalesOrderItem.unit_price # Base item unit price
-    # But we need to use the quantity FROM delivery_history_item
-    item_amount = DeliveryHistoryItem.quantity * SalesOrderItem.unit_price
-    
-    krw_amount = case(
-        (SalesOrderItem.currency == 'USD', item_amount * exchange_rate),
-        else_=item_amount
+    """
+    품목별 연간 실적: 고객사별 -> 제품별 -> 월별(1~12) 집계 (정산 월별 큐브 DELIVERY, 납품일 환율 기준 원화 금액).
+    월별 피벗과 연간 합계는 SQL 에서 계산하고, 여기서는 고객사 단위로 묶기만 합니다.
+    """
+    compare_year = year - 1 if compare_previous else None
+    deps_periods = kind_periods([KIND_DELIVERY], year)
+    if compare_year:
+        deps_periods += kind_periods([KIND_DELIVERY], compare_year)
+    cache = await lookup_report(request, db, "settlement/annual-performance", deps_periods,
+                                year=year, major_group_id=major_group_id, compare_previous=compare_previous)
+    if cache.response:
+        return cache.response
+
+    result = await db.execute(annual_pivot_query(year, major_group_id, compare_year))
+
+    # 행은 거래처명, 품목 id 순으로 정렬되어 있음 → 연속 구간을 고객사 하나로 묶음
+    final_list = []
+    overall = {"qty": 0, "amount": 0, "prev_qty": 0, "prev_amount": 0}
+    customer = None
+    for r in result:
+        m = r._mapping
+        if customer is None or customer["partner_name"] != m["partner_name"]:
+            customer = {
+                "partner_name": m["partner_name"],
+                "products": [],
+                "customer_total_qty": 0,
+                "customer_total_amount": 0,
+            }
+            if compare_year:
+                customer["customer_prev_total_qty"] = 0
+                customer["customer_prev_total_amount"] = 0
+            final_list.append(customer)
+
+        prod = {
+            "product_id": m["product_id"],
+            "product_name": m["product_name"],
+            "specification": m["specification"],
+            "monthly_qty": [_as_qty(m[f"qty_{i}"]) for i in range(1, 13)],
+            "monthly_amount": [m[f"amount_{i}"] or 0 for i in range(1, 13)],
+            "annual_qty": _as_qty(m["annual_qty"]),
+            "annual_amount": m["annual_amount"] or 0,
+        }
+        customer["customer_total_qty"] += prod["annual_qty"]
+        customer["customer_total_amount"] += prod["annual_amount"]
+        overall["qty"] += prod["annual_qty"]
+        overall["amount"] += prod["annual_amount"]
+
+        if compare_year:
+            prod["prev_monthly_qty"] = [_as_qty(m[f"prev_qty_{i}"]) for i in range(1, 13)]
+            prod["prev_monthly_amount"] = [m[f"prev_amount_{i}"] or 0 for i in range(1, 13)]
+            prod["prev_annual_qty"] = _as_qty(m["prev_annual_qty"])
+            prod["prev_annual_amount"] = m["prev_annual_amount"] or 0
+            prod["yoy_qty_rate"] = _growth_rate(prod["annual_qty"], prod["prev_annual_qty"])
+            prod["yoy_amount_rate"] = _growth_rate(prod["annual_amount"], prod["prev_annual_amount"])
+            customer["customer_prev_total_qty"] += prod["prev_annual_qty"]
+            customer["customer_prev_total_amount"] += prod["prev_annual_amount"]
+            overall["prev_qty"] += prod["prev_annual_qty"]
+            overall["prev_amount"] += prod["prev_annual_amount"]
+        customer["products"].append(prod)
+
+    response = {
+        "overall_total_qty": overall["qty"],
+        "overall_total_amount": overall["amount"],
+        "data": final_list,
+    }
+    if compare_year:
+        for cust in final_list:
+            cust["customer_yoy_amount_rate"] = _growth_rate(cust["customer_total_amount"], cust["customer_prev_total_amount"])
+        response.update({
+            "compare_year": compare_year,
+            "overall_prev_total_qty": overall["prev_qty"],
+            "overall_prev_total_amount": overall["prev_amount"],
+            "overall_yoy_qty_rate": _growth_rate(overall["qty"], overall["prev_qty"]),
+            "overall_yoy_amount_rate": _growth_rate(overall["amount"], overall["prev_amount"]),
+        })
+    return cache.respond(response)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 정산 탭 내역 내보내기 (기간 지정, 엑셀/CSV 스트리밍)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_AMOUNT_COLUMNS = [
+    ExportColumn("quantity", "수량"),
+    ExportColumn("unit_price", "단가"),
+    ExportColumn("currency", "통화"),
+    ExportColumn("total_price", "금액"),
+    ExportColumn("total_price_krw", "원화금액"),
+]
+
+EXPORT_TABS = {
+    "orders": ("수주내역", [
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("order_date", "수주일"),
+        ExportColumn("product_name", "품명"),
+        ExportColumn("specification", "규격"),
+        *_AMOUNT_COLUMNS,
+    ]),
+    "sales": ("매출내역", [
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("order_date", "수주일"),
+        ExportColumn("delivery_date", "납품일"),
+        ExportColumn("product_name", "품명"),
+        ExportColumn("specification", "규격"),
+        *_AMOUNT_COLUMNS,
+    ]),
+    "purchases": ("매입내역", [
+        ExportColumn("category", "구분"),
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("order_date", "발주일"),
+        ExportColumn("delivery_date", "입고일"),
+        ExportColumn("product_name", "품명"),
+        ExportColumn("specification", "규격"),
+        *_AMOUNT_COLUMNS,
+        ExportColumn("dept", "기안부서"),
+    ]),
+    "production": ("생산내역", [
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("order_date", "수주일"),
+        ExportColumn("end_date", "완료일"),
+        ExportColumn("product_name", "품명"),
+        ExportColumn("specification", "규격"),
+        ExportColumn("quantity", "수량"),
+        ExportColumn("order_amount", "수주금액"),
+        ExportColumn("process_cost", "공정비용"),
+    ]),
+    "defects": ("불량발생내역", [
+        ExportColumn("defect_date", "발생일"),
+        ExportColumn("process_name", "공정"),
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("product_name", "품명"),
+        ExportColumn("specification", "규격"),
+        ExportColumn("quantity", "수량"),
+        ExportColumn("amount", "금액"),
+        ExportColumn("resolution_date", "조치일"),
+    ]),
+    "complaints": ("고객불만접수내역", [
+        ExportColumn("receipt_date", "접수일"),
+        ExportColumn("partner_name", "거래처"),
+        ExportColumn("content", "내용"),
+        ExportColumn("status", "상태"),
+        ExportColumn("action_note", "조치내용"),
+    ]),
+}
+
+
+@router.get("/export")
+async def export_settlement_tab(
+    tab: str = Query(..., description="orders / sales / purchases / production / defects / complaints"),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    major_group_id: Optional[int] = Query(None),
+    dept: Optional[str] = Query(None),
+    format: str = Query("xlsx", description="xlsx / csv"),
+    db: AsyncSession = Depends(get_db)
+):
+    """정산 탭 내역을 기간(여러 해 가능) 단위로 내보내기 — 서버 측 커서로 청크 단위 전송"""
+    if tab not in EXPORT_TABS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 탭입니다: {tab}")
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="종료일이 시작일보다 빠릅니다.")
+
+    await sync_settlement_facts(db)
+    start, end = start_date, end_date + timedelta(days=1)
+    if tab == "orders":
+        sources = [ExportSource(orders_query(start, end, major_group_id).order_by(SalesOrder.order_date, SalesOrderItem.id))]
+    elif tab == "sales":
+        sources = [ExportSource(sales_query(start, end, major_group_id))]
+    elif tab == "purchases":
+        sources = await purchase_sources(db, start, end, major_group_id, dept)
+    elif tab == "production":
+        sources = [ExportSource(production_query(start, end, major_group_id).order_by(ProductionPlan.id, Product.id))]
+    elif tab == "defects":
+        sources = [ExportSource(defects_query(start, end, major_group_id).order_by(QualityDefect.defect_date, QualityDefect.id))]
+    else:
+        sources = [ExportSource(complaints_query(start, end, major_group_id).order_by(CustomerComplaint.receipt_date, CustomerComplaint.id))]
+
+    title, columns = EXPORT_TABS[tab]
+    return stream_export(
+        sources,
+        columns,
+        filename=f"settlement_{tab}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}",
+        fmt=format,
+        sheet_name=title,
     )
 
-    query = select(
-        Partner.name.label("partner_name"),
-        Product.id.label("product_id"),
-        Product.name.label("product_name"),
-        Product.specification.label("specification"),
-        extract('month', DeliveryHistory.delivery_date).label("month"),
-        func.sum(DeliveryHistoryItem.quantity).label("total_qty"),
-        func.sum(krw_amount).label("total_amount")
-    ).select_from(DeliveryHistoryItem)\
-     .join(DeliveryHistory, DeliveryHistoryItem.delivery_id == DeliveryHistory.id)\
-     .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)\
-     .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)\
-     .join(Partner, SalesOrder.partner_id == Partner.id)\
-     .join(Product, SalesOrderItem.product_id == Product.id)\
-     .where(
-         extract('year', DeliveryHistory.delivery_date) == year
-     )\
-     .group_by(
-         Partner.name,
-         Product.id,
-         Product.name,
-         Product.specification,
-         extract('month', DeliveryHistory.delivery_date)
-     )
-
-    if major_group_id:
-        subq = select(ProductGroup.id).where(and_(ProductGroup.parent_id == major_group_id))
-        query = query.where(and_(Product.group_id.in_(subq) | (Product.group_id == major_group_id)))
 
+# ─────────────────────────────────────────────────────────────────────────────
+# 월 마감 (스냅샷 고정 / 재개 / 마감 후 변경 이력)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _require_admin(current_user: Staff) -> None:
+    if current_user.user_type != "ADMIN":
+        raise HTTPException(status_code=403, detail="시스템 관리자만 마감/재개할 수 있습니다.")
+
+
+@router.get("/closings", response_model=List[SettlementClosingResponse])
+async def list_settlement_closings(
+    year: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """월 마감 목록 (최근 월부터)"""
+    query = select(SettlementClosing).order_by(SettlementClosing.period.desc())
+    if year:
+        query = query.where(SettlementClosing.period.like(f"{year:04d}-%"))
     result = await db.execute(query)
-    rows = [dict(r._mapping) for r in result]
-
-    # Post-process into the nested structure requested by frontend
-    # customers -> products -> monthly_data[12]
-    structured = {}
-    for r in rows:
-        p_name = r["partner_name"]
-        pid = r["product_id"]
-        month = int(r["month"]) # 1-12
-        
-        if p_name not in structured:
-            structured[p_name] = {"partner_name": p_name, "products": {}}
-        
-        if pid not in structured[p_name]["products"]:
-            structured[p_name]["products"][pid] = {
-                "product_id": pid,
-                "product_name": r["product_name"],
-                "specification": r["specification"],
-                "monthly_qty": [0] * 12,
-                "monthly_amount": [0] * 12,
-                "annual_qty": 0,
-                "annual_amount": 0
-            }
-        
-        target = structured[p_name]["products"][pid]
-        idx = month - 1
-        qty = r["total_qty"] or 0
-        amt = r["total_amount"] or 0
-        
-        target["monthly_qty"][idx] = qty
-        target["monthly_amount"][idx] = amt
-        target["annual_qty"] += qty
-        target["annual_amount"] += amt
-
-    # Convert maps to sorted lists
-    final_list = []
-    overall_total_qty = 0
-    overall_total_amount = 0
-
-    for p_name in sorted(structured.keys()):
-        cust_data = structured[p_name]
-        cust_products = []
-        cust_total_qty = 0
-        cust_total_amount = 0
-        
-        for pid in sorted(cust_data["products"].keys()):
-            prod = cust_data["products"][pid]
-            cust_products.append(prod)
-            cust_total_qty += prod["annual_qty"]
-            cust_total_amount += prod["annual_amount"]
-        
-        cust_data["products"] = cust_products
-        cust_data["customer_total_qty"] = cust_total_qty
-        cust_data["customer_total_amount"] = cust_total_amount
-        
-        overall_total_qty += cust_total_qty
-        overall_total_amount += cust_total_amount
-        final_list.append(cust_data)
-
-    return {
-        "overall_total_qty": overall_total_qty,
-        "overall_total_amount": overall_total_amount,
-        "data": final_list
-    }
+    return result.scalars().all()
+
+
+@router.post("/closings", response_model=SettlementClosingResponse)
+async def close_settlement_month(
+    body: SettlementCloseRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """월 마감: 해당 월 정산 탭/차트/연간 실적을 현재 값으로 고정"""
+    _require_admin(current_user)
+    if not 1 <= body.month <= 12:
+        raise HTTPException(status_code=400, detail="월은 1~12 사이여야 합니다.")
+    return await close_month(db, body.year, body.month, staff_id=current_user.id, note=body.note)
+
+
+@router.post("/closings/{year}/{month}/reopen", response_model=SettlementClosingResponse)
+async def reopen_settlement_month(
+    year: int,
+    month: int,
+    body: Optional[SettlementReopenRequest] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: Staff = Depends(deps.get_current_user)
+):
+    """마감 재개: 스냅샷을 지우고 실시간 집계로 복귀 (이력은 유지)"""
+    _require_admin(current_user)
+    return await reopen_month(db, year, month, staff_id=current_user.id, note=body.note if body else None)
+
+
+@router.get("/closings/{year}/{month}/audit", response_model=List[SettlementClosingAuditResponse])
+async def get_settlement_closing_audit(
+    year: int,
+    month: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """마감 이력: 마감/재개 및 마감 후 원본 변경으로 달라진 구분·일자별 수량/금액"""
+    closing = (await db.execute(
+        select(SettlementClosing).where(SettlementClosing.period == f"{year:04d}-{month:02d}")
+    )).scalar_one_or_none()
+    if not closing:
+        raise HTTPException(status_code=404, detail="마감 기록이 없습니다.")
+    result = await db.execute(
+        select(SettlementClosingAudit)
+        .where(SettlementClosingAudit.closing_id == closing.id)
+        .order_by(SettlementClosingAudit.created_at.desc(), SettlementClosingAudit.id.desc())
+    )
+    return result.scalars().all()
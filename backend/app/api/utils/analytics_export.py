@@ -0,0 +1,487 @@
+"""
+분석용 Parquet 내보내기 (월별 파티션 + 증분 워터마크)
+
+- 데이터셋: 납품 품목, 구매발주 품목, 외주발주 품목, 작업일지 항목, 재고 수불 이력
+- 저장: {ANALYTICS_EXPORT_DIR}/{데이터셋}/month=YYYY-MM/part-0.parquet (hive 파티션 구조)
+  → pandas.read_parquet("<경로>/delivery_lines") 로 파티션 전체를 한 번에 읽을 수 있습니다.
+- 조회: 월마다 별도 세션의 서버 측 커서(AsyncSession.stream)로 EXPORT_CHUNK_ROWS 행씩 읽어
+  RecordBatch 단위로 기록하므로 메모리는 청크 크기만큼만 사용합니다.
+- 증분: 월별 지문(행 수, id 합, 수량·금액 합)을 analytics_export_partitions 에 워터마크로 남기고,
+  다음 실행에서는 지문이 달라진 월과 최근 2개월(상태/입고일 등 비수치 변경이 잦은 기간)만 다시 씁니다.
+  지문은 기록 전에 계산하므로 기록 중 바뀐 행은 다음 실행에서 다시 감지됩니다.
+  full=True 는 모든 월을 다시 씁니다 (주 1회 스케줄러).
+
+pyarrow 는 이 모듈에서만 지연 import 합니다 (설치되지 않은 환경에서는 실행 요청이 503, 스케줄러는 건너뜀).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import importlib.util
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+
+from sqlalchemy import select, delete, func, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import AsyncSessionLocal
+from app.core.config import settings
+from app.core.timezone import KST, now_kst
+from app.models.analytics import AnalyticsExportPartition
+from app.models.inventory import Stock, StockTransaction
+from app.models.production import ProductionPlanItem, WorkLog, WorkLogItem
+from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem
+from app.models.sales import SalesOrder, SalesOrderItem, DeliveryHistory, DeliveryHistoryItem
+from app.api.utils.date_ranges import period_bounds, in_range
+
+logger = logging.getLogger(__name__)
+
+PARTITION_FILE = "part-0.parquet"
+RECENT_MONTHS = 2
+MAX_FINISHED_JOBS = 50
+
+
+@dataclass
+class AnalyticsDataset:
+    """
+    name: 파일/워터마크 키, columns: (label, arrow 타입) — build() 의 select label 과 같은 순서
+    date_column: 월 파티션 기준 컬럼, value_columns: 지문에 합산할 수량/금액 컬럼
+    """
+    name: str
+    build: Callable[[], Any]
+    date_column: Any
+    id_column: Any
+    columns: List[Tuple[str, str]]
+    value_columns: List[Any]
+    is_datetime: bool = False
+
+
+def _delivery_lines():
+    return select(
+        DeliveryHistoryItem.id.label("id"),
+        DeliveryHistory.id.label("delivery_id"),
+        DeliveryHistory.delivery_no,
+        DeliveryHistory.delivery_date,
+        DeliveryHistory.is_export,
+        SalesOrder.id.label("order_id"),
+        SalesOrder.order_no,
+        SalesOrder.partner_id,
+        SalesOrderItem.id.label("order_item_id"),
+        SalesOrderItem.product_id,
+        DeliveryHistoryItem.quantity,
+        SalesOrderItem.unit_price,
+        SalesOrderItem.currency,
+        DeliveryHistoryItem.exchange_rate,
+        DeliveryHistoryItem.amount_krw,
+    ).select_from(DeliveryHistoryItem)\
+     .join(DeliveryHistory, DeliveryHistoryItem.delivery_id == DeliveryHistory.id)\
+     .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)\
+     .join(SalesOrder, DeliveryHistory.order_id == SalesOrder.id)
+
+
+def _purchase_lines():
+    return select(
+        PurchaseOrderItem.id.label("id"),
+        PurchaseOrder.id.label("purchase_order_id"),
+        PurchaseOrder.order_no,
+        PurchaseOrder.order_date,
+        PurchaseOrder.delivery_date,
+        PurchaseOrder.actual_delivery_date,
+        PurchaseOrder.status,
+        PurchaseOrder.purchase_type,
+        PurchaseOrder.is_import,
+        PurchaseOrder.partner_id,
+        PurchaseOrderItem.product_id,
+        PurchaseOrderItem.quantity,
+        PurchaseOrderItem.received_quantity,
+        PurchaseOrderItem.unit_price,
+        PurchaseOrderItem.currency,
+        PurchaseOrderItem.exchange_rate,
+        PurchaseOrderItem.amount_krw,
+        PurchaseOrderItem.pricing_type,
+        PurchaseOrderItem.total_weight,
+        PurchaseOrderItem.production_plan_item_id,
+    ).select_from(PurchaseOrderItem)\
+     .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+
+
+def _outsourcing_lines():
+    return select(
+        OutsourcingOrderItem.id.label("id"),
+        OutsourcingOrder.id.label("outsourcing_order_id"),
+        OutsourcingOrder.order_no,
+        OutsourcingOrder.order_date,
+        OutsourcingOrder.delivery_date,
+        OutsourcingOrder.actual_delivery_date,
+        OutsourcingOrder.status.label("order_status"),
+        OutsourcingOrder.partner_id,
+        OutsourcingOrderItem.product_id,
+        OutsourcingOrderItem.status.label("item_status"),
+        OutsourcingOrderItem.quantity,
+        OutsourcingOrderItem.unit_price,
+        OutsourcingOrderItem.pricing_type,
+        OutsourcingOrderItem.total_weight,
+        OutsourcingOrderItem.production_plan_item_id,
+    ).select_from(OutsourcingOrderItem)\
+     .join(OutsourcingOrder, OutsourcingOrderItem.outsourcing_order_id == OutsourcingOrder.id)
+
+
+def _work_log_items():
+    return select(
+        WorkLogItem.id.label("id"),
+        WorkLog.id.label("work_log_id"),
+        WorkLog.work_date,
+        WorkLogItem.worker_id,
+        WorkLogItem.plan_item_id,
+        ProductionPlanItem.plan_id,
+        ProductionPlanItem.product_id,
+        ProductionPlanItem.process_name,
+        ProductionPlanItem.course_type,
+        WorkLogItem.start_time,
+        WorkLogItem.end_time,
+        WorkLogItem.good_quantity,
+        WorkLogItem.bad_quantity,
+        WorkLogItem.unit_price,
+    ).select_from(WorkLogItem)\
+     .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)\
+     .join(ProductionPlanItem, WorkLogItem.plan_item_id == ProductionPlanItem.id)
+
+
+def _stock_transactions():
+    return select(
+        StockTransaction.id.label("id"),
+        StockTransaction.stock_id,
+        Stock.product_id,
+        StockTransaction.transaction_type,
+        StockTransaction.quantity,
+        StockTransaction.reference,
+        StockTransaction.created_at,
+    ).select_from(StockTransaction)\
+     .join(Stock, StockTransaction.stock_id == Stock.id)
+
+
+DATASETS: Dict[str, AnalyticsDataset] = {ds.name: ds for ds in [
+    AnalyticsDataset(
+        "delivery_lines", _delivery_lines, DeliveryHistory.delivery_date, DeliveryHistoryItem.id,
+        [
+            ("id", "int64"), ("delivery_id", "int64"), ("delivery_no", "string"), ("delivery_date", "date"),
+            ("is_export", "bool"), ("order_id", "int64"), ("order_no", "string"), ("partner_id", "int64"),
+            ("order_item_id", "int64"), ("product_id", "int64"), ("quantity", "float64"), ("unit_price", "float64"),
+            ("currency", "string"), ("exchange_rate", "float64"), ("amount_krw", "float64"),
+        ],
+        [DeliveryHistoryItem.quantity, DeliveryHistoryItem.amount_krw],
+    ),
+    AnalyticsDataset(
+        "purchase_lines", _purchase_lines, PurchaseOrder.order_date, PurchaseOrderItem.id,
+        [
+            ("id", "int64"), ("purchase_order_id", "int64"), ("order_no", "string"), ("order_date", "date"),
+            ("delivery_date", "date"), ("actual_delivery_date", "date"), ("status", "string"),
+            ("purchase_type", "string"), ("is_import", "bool"), ("partner_id", "int64"), ("product_id", "int64"),
+            ("quantity", "float64"), ("received_quantity", "float64"), ("unit_price", "float64"),
+            ("currency", "string"), ("exchange_rate", "float64"), ("amount_krw", "float64"),
+            ("pricing_type", "string"), ("total_weight", "float64"), ("production_plan_item_id", "int64"),
+        ],
+        [PurchaseOrderItem.quantity, PurchaseOrderItem.received_quantity, PurchaseOrderItem.unit_price, PurchaseOrderItem.amount_krw],
+    ),
+    AnalyticsDataset(
+        "outsourcing_lines", _outsourcing_lines, OutsourcingOrder.order_date, OutsourcingOrderItem.id,
+        [
+            ("id", "int64"), ("outsourcing_order_id", "int64"), ("order_no", "string"), ("order_date", "date"),
+            ("delivery_date", "date"), ("actual_delivery_date", "date"), ("order_status", "string"),
+            ("partner_id", "int64"), ("product_id", "int64"), ("item_status", "string"), ("quantity", "float64"),
+            ("unit_price", "float64"), ("pricing_type", "string"), ("total_weight", "float64"),
+            ("production_plan_item_id", "int64"),
+        ],
+        [OutsourcingOrderItem.quantity, OutsourcingOrderItem.unit_price],
+    ),
+    AnalyticsDataset(
+        "work_log_items", _work_log_items, WorkLog.work_date, WorkLogItem.id,
+        [
+            ("id", "int64"), ("work_log_id", "int64"), ("work_date", "date"), ("worker_id", "int64"),
+            ("plan_item_id", "int64"), ("plan_id", "int64"), ("product_id", "int64"), ("process_name", "string"),
+            ("course_type", "string"), ("start_time", "timestamp"), ("end_time", "timestamp"),
+            ("good_quantity", "float64"), ("bad_quantity", "float64"), ("unit_price", "float64"),
+        ],
+        [WorkLogItem.good_quantity, WorkLogItem.bad_quantity, WorkLogItem.unit_price],
+    ),
+    AnalyticsDataset(
+        "stock_transactions", _stock_transactions, StockTransaction.created_at, StockTransaction.id,
+        [
+            ("id", "int64"), ("stock_id", "int64"), ("product_id", "int64"), ("transaction_type", "string"),
+            ("quantity", "float64"), ("reference", "string"), ("created_at", "timestamp"),
+        ],
+        [StockTransaction.quantity],
+        is_datetime=True,
+    ),
+]}
+
+
+# --- Parquet 기록 ---
+
+def pyarrow_available() -> bool:
+    # 상위 패키지가 없으면 find_spec("pyarrow.parquet") 가 예외를 내므로 먼저 확인
+    return importlib.util.find_spec("pyarrow") is not None and importlib.util.find_spec("pyarrow.parquet") is not None
+
+
+def _arrow_schema(ds: AnalyticsDataset):
+    import pyarrow as pa
+
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in ds.columns])
+
+
+def _cell(value, kind: str):
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        value = value.value
+    if kind == "date":
+        # SQLite 는 Date 를 문자열로 돌려줄 수 있음
+        return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+    if kind == "timestamp":
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        # 작업 시간은 timezone-aware 로 저장됨 → KST naive 로 통일
+        return value.astimezone(KST).replace(tzinfo=None) if value.tzinfo else value
+    if kind == "float64":
+        return float(value)
+    if kind == "string":
+        return str(value)
+    return value
+
+
+def partition_dir(dataset: str, period: str) -> str:
+    return os.path.join(settings.ANALYTICS_EXPORT_DIR, dataset, f"month={period}")
+
+
+def _bounds_of(period: str) -> Tuple[date, date]:
+    year, month = period.split("-")
+    return period_bounds(int(year), int(month))
+
+
+async def _write_partition(ds: AnalyticsDataset, period: str) -> Tuple[str, int, int]:
+    """한 달 파티션을 임시 파일에 청크 단위로 기록한 뒤 교체. (상대 경로, 파일 크기, 행 수) 반환"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(ds)
+    names = [name for name, _ in ds.columns]
+    kinds = [kind for _, kind in ds.columns]
+    chunk_rows = max(1, settings.EXPORT_CHUNK_ROWS)
+
+    start, end = _bounds_of(period)
+    statement = ds.build()\
+        .where(in_range(ds.date_column, start, end, is_datetime=ds.is_datetime))\
+        .order_by(ds.id_column)\
+        .execution_options(yield_per=chunk_rows)
+
+    directory = partition_dir(ds.name, period)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".parquet.tmp", dir=directory)
+    os.close(fd)
+    rows = 0
+    writer = pq.ParquetWriter(tmp_path, schema, compression="snappy")
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(statement)
+            async for partition in result.partitions(chunk_rows):
+                columns = [[_cell(row[i], kind) for row in partition] for i, kind in enumerate(kinds)]
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=schema.field(i).type) for i, values in enumerate(columns)],
+                    names=names,
+                )
+                # 압축/인코딩은 CPU 작업 → 이벤트 루프를 막지 않도록 스레드에서
+                await asyncio.to_thread(writer.write_batch, batch)
+                rows += len(partition)
+        await asyncio.to_thread(writer.close)
+        final_path = os.path.join(directory, PARTITION_FILE)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        writer.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return os.path.relpath(final_path, settings.ANALYTICS_EXPORT_DIR), os.path.getsize(final_path), rows
+
+
+def _remove_partition(dataset: str, period: str) -> None:
+    path = os.path.join(partition_dir(dataset, period), PARTITION_FILE)
+    try:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
+
+
+# --- 워터마크 (월별 지문) ---
+
+async def _fingerprints(db: AsyncSession, ds: AnalyticsDataset) -> Dict[str, Tuple[int, int, int, float]]:
+    """월 → (행 수, 최대 id, id 합, 수량·금액 합)"""
+    year_col = extract("year", ds.date_column)
+    month_col = extract("month", ds.date_column)
+    first, *rest = ds.value_columns
+    value_expr = sum((func.coalesce(c, 0) for c in rest), func.coalesce(first, 0))
+    query = ds.build().with_only_columns(
+        year_col, month_col,
+        func.count(ds.id_column), func.max(ds.id_column), func.sum(ds.id_column), func.sum(value_expr),
+    ).where(ds.date_column.isnot(None)).group_by(year_col, month_col)
+    prints = {}
+    for year, month, count, max_id, id_sum, value_sum in (await db.execute(query)).all():
+        if year is None or month is None:
+            continue
+        prints[f"{int(year):04d}-{int(month):02d}"] = (int(count or 0), max_id, int(id_sum or 0), float(value_sum or 0))
+    return prints
+
+
+def _same(stored: AnalyticsExportPartition, current: Tuple[int, int, int, float]) -> bool:
+    count, max_id, id_sum, value_sum = current
+    return (
+        stored.row_count == count
+        and stored.max_id == max_id
+        and stored.id_sum == id_sum
+        and abs((stored.value_sum or 0.0) - value_sum) < 1e-6
+    )
+
+
+def _recent_periods(months: int = RECENT_MONTHS) -> List[str]:
+    today = now_kst().date()
+    periods, first = [], today.replace(day=1)
+    for _ in range(months):
+        periods.append(f"{first.year:04d}-{first.month:02d}")
+        first = (first - timedelta(days=1)).replace(day=1)
+    return periods
+
+
+async def export_dataset(db: AsyncSession, ds: AnalyticsDataset, full: bool = False) -> Dict[str, Any]:
+    """데이터셋 하나를 워터마크 기준으로 내보내기 (파티션마다 커밋)"""
+    current = await _fingerprints(db, ds)
+    res = await db.execute(select(AnalyticsExportPartition).where(AnalyticsExportPartition.dataset == ds.name))
+    stored = {p.period: p for p in res.scalars().all()}
+
+    recent = set(_recent_periods())
+    targets = sorted(
+        period for period, fp in current.items()
+        if full or period in recent or period not in stored or not _same(stored[period], fp)
+    )
+    written, rows = [], 0
+    for period in targets:
+        path, size, count = await _write_partition(ds, period)
+        count_fp, max_id, id_sum, value_sum = current[period]
+        part = stored.get(period) or AnalyticsExportPartition(dataset=ds.name, period=period)
+        part.row_count, part.max_id, part.id_sum, part.value_sum = count_fp, max_id, id_sum, value_sum
+        part.file_path, part.file_size, part.exported_at = path, size, now_kst()
+        db.add(part)
+        await db.commit()
+        written.append(period)
+        rows += count
+
+    # 원본 행이 모두 사라진 월은 파일/워터마크 삭제
+    removed = sorted(set(stored) - set(current))
+    for period in removed:
+        _remove_partition(ds.name, period)
+    if removed:
+        await db.execute(delete(AnalyticsExportPartition).where(
+            AnalyticsExportPartition.dataset == ds.name, AnalyticsExportPartition.period.in_(removed)
+        ))
+        await db.commit()
+    return {"dataset": ds.name, "written": written, "removed": removed, "rows": rows}
+
+
+_run_lock = asyncio.Lock()
+
+
+async def run_analytics_export(full: bool = False, datasets: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """전체(또는 지정) 데이터셋 내보내기. 동시에 한 번만 실행됩니다."""
+    if not pyarrow_available():
+        raise RuntimeError("pyarrow 가 설치되어 있지 않아 Parquet 내보내기를 할 수 없습니다.")
+    names = list(datasets) if datasets else list(DATASETS)
+    unknown = [n for n in names if n not in DATASETS]
+    if unknown:
+        raise ValueError(f"알 수 없는 데이터셋: {', '.join(unknown)}")
+    async with _run_lock:
+        summary = []
+        async with AsyncSessionLocal() as db:
+            for name in names:
+                summary.append(await export_dataset(db, DATASETS[name], full=full))
+        return summary
+
+
+# --- 백그라운드 작업 (production_sheet 와 같은 방식의 프로세스 내 작업 목록) ---
+
+# job_id -> {"job_id", "status", "full", "datasets", "summary", "error", "created_at", "finished_at"}
+_jobs: Dict[str, Dict[str, Any]] = {}
+_tasks: set = set()
+
+
+def _prune_jobs() -> None:
+    finished = [j for j in _jobs.values() if j["status"] in ("COMPLETED", "FAILED")]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda j: j["finished_at"] or j["created_at"])
+    for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+        _jobs.pop(job["job_id"], None)
+
+
+async def _run_job(job_id: str) -> None:
+    job = _jobs[job_id]
+    job["status"] = "RUNNING"
+    try:
+        job["summary"] = await run_analytics_export(full=job["full"], datasets=job["datasets"])
+        job["status"] = "COMPLETED"
+    except Exception as e:
+        logger.warning(f"[analytics_export] job {job_id} failed: {e}")
+        job["status"] = "FAILED"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = datetime.now()
+        _prune_jobs()
+
+
+def submit_export_job(full: bool = False, datasets: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """내보내기 작업 등록. 진행 중인 작업이 있으면 그 작업을 반환합니다."""
+    for job in _jobs.values():
+        if job["status"] in ("PENDING", "RUNNING"):
+            return job
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = {
+        "job_id": job_id, "status": "PENDING", "full": full, "datasets": list(datasets) if datasets else None,
+        "summary": None, "error": None, "created_at": datetime.now(), "finished_at": None,
+    }
+    task = asyncio.create_task(_run_job(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return _jobs[job_id]
+
+
+def get_export_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return _jobs.get(job_id)
+
+
+# --- 다운로드 ---
+
+def build_dataset_zip(dataset: str, periods: Sequence[str]) -> str:
+    """
+    파티션 파일들을 hive 구조 그대로 zip 으로 묶어 임시 파일 경로를 반환 (호출자가 삭제).
+    Parquet 은 이미 압축되어 있으므로 저장(STORED) 방식으로 묶습니다.
+    """
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for period in periods:
+            file_path = os.path.join(partition_dir(dataset, period), PARTITION_FILE)
+            if os.path.exists(file_path):
+                zf.write(file_path, arcname=f"{dataset}/month={period}/{PARTITION_FILE}")
+    return path
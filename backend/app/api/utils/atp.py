@@ -0,0 +1,528 @@
+"""
+납기 회답 (ATP / CTP)
+
+품목별 수급 타임라인을 메모리에 보관하고 수주 입력 중 호출되는 납기 조회에 사용합니다.
+
+- 공급: 현재고(Stock.current_quantity), 미입고 발주 잔량(납기일), 진행 중 생산계획의 최종 공정 수량(종료일),
+        계획이 아직 없는 재고생산 요청(목표일)
+- 수요: 미납 수주 잔량(납기일)
+- ATP(d): d 이후 모든 시점의 예상 재고 중 최소값 → 이미 약속된 수요를 깨지 않고 d 에 약속 가능한 수량
+- CTP: ATP 로 부족한 수량을 라우팅(ProductProcess) 기준으로 생산할 때의 완료일.
+       내부 공정은 (공정별 대기 부하 + 필요 작업분) / 일 가용 분, 외주/구매 공정은 고정 리드타임(영업일)
+
+타임라인은 ORM flush 이벤트로 변경된 품목/헤더를 수집해 커밋 시점에 해당 품목만 무효화하고,
+다음 조회 때 그 품목만 다시 적재합니다. 벌크 UPDATE/DELETE, 다른 워커 프로세스의 변경 등
+이벤트로 잡히지 않는 경우는 ATP_CACHE_TTL_SECONDS 로 재적재 주기를 제한합니다.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import math
+import time
+import logging
+
+import holidays
+from sqlalchemy import event, select, and_, or_, func, exists, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.timezone import now_kst
+from app.models.inventory import Stock, StockProduction, StockProductionStatus
+from app.models.product import ProductProcess, Process
+from app.models.production import ProductionPlan, ProductionPlanItem, ProductionStatus
+from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, PurchaseStatus
+from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus
+from app.api.utils.cycle_time import get_cycle_time_estimates
+
+logger = logging.getLogger(__name__)
+
+kr_holidays = holidays.KR()
+
+OPEN_ORDER_STATUSES = [
+    OrderStatus.PENDING, OrderStatus.CONFIRMED,
+    OrderStatus.PRODUCTION_COMPLETED, OrderStatus.PARTIALLY_DELIVERED,
+]
+OPEN_PURCHASE_STATUSES = [PurchaseStatus.PENDING, PurchaseStatus.ORDERED, PurchaseStatus.PARTIAL]
+ACTIVE_PLAN_STATUSES = [
+    ProductionStatus.PENDING, ProductionStatus.PLANNED,
+    ProductionStatus.CONFIRMED, ProductionStatus.IN_PROGRESS,
+]
+OPEN_ITEM_STATUSES = ACTIVE_PLAN_STATUSES
+OPEN_STOCK_PRODUCTION_STATUSES = [StockProductionStatus.PENDING, StockProductionStatus.IN_PROGRESS]
+
+
+class ProductTimeline:
+    """
+    품목 1개의 예상 재고 곡선.
+    dates[i] 시점 이벤트 반영 후 잔량이 balance[i], suffix_min[i] = min(balance[i:]).
+    """
+    __slots__ = ("product_id", "on_hand", "events", "loaded_at", "dates", "balance", "suffix_min")
+
+    def __init__(self, product_id: int, on_hand: int, events: List[Tuple[date, int]], loaded_at: float = 0.0):
+        self.product_id = product_id
+        self.on_hand = on_hand
+        self.events = events
+        self.loaded_at = loaded_at
+        self._build()
+
+    def _build(self) -> None:
+        by_date: Dict[date, int] = {}
+        for d, delta in self.events:
+            by_date[d] = by_date.get(d, 0) + delta
+        self.dates = sorted(by_date)
+        self.balance = []
+        running = self.on_hand
+        for d in self.dates:
+            running += by_date[d]
+            self.balance.append(running)
+        self.suffix_min = list(self.balance)
+        for i in range(len(self.suffix_min) - 2, -1, -1):
+            self.suffix_min[i] = min(self.suffix_min[i], self.suffix_min[i + 1])
+
+    def copy_with(self, extra_events: List[Tuple[date, int]]) -> "ProductTimeline":
+        return ProductTimeline(self.product_id, self.on_hand, self.events + extra_events, self.loaded_at)
+
+    def available_on(self, d: date) -> int:
+        """d 에 추가로 약속 가능한 수량 (이후 약속을 깨지 않는 범위)"""
+        idx = -1
+        for i, event_date in enumerate(self.dates):
+            if event_date > d:
+                break
+            idx = i
+        if idx < 0:
+            later = self.suffix_min[0] if self.suffix_min else self.on_hand
+            return max(0, min(self.on_hand, later))
+        return max(0, self.suffix_min[idx])
+
+    def earliest_date_for(self, quantity: int, today: date) -> Optional[date]:
+        """quantity 를 약속할 수 있는 가장 이른 날짜 (불가능하면 None)"""
+        if self.available_on(today) >= quantity:
+            return today
+        for i, event_date in enumerate(self.dates):
+            if event_date > today and self.suffix_min[i] >= quantity:
+                return event_date
+        return None
+
+    def projection(self) -> List[Dict[str, Any]]:
+        return [
+            {"date": d, "balance": b, "available": max(0, m)}
+            for d, b, m in zip(self.dates, self.balance, self.suffix_min)
+        ]
+
+
+# --- In-memory state ---
+_timelines: Dict[int, ProductTimeline] = {}
+_timeline_day: Optional[date] = None
+_dirty_products: Set[int] = set()
+_dirty_headers: Dict[str, Set[int]] = {"sales_order": set(), "purchase_order": set(), "production_plan": set()}
+_routing_cache: Dict[int, List[Dict[str, Any]]] = {}
+_backlog_cache: Optional[Dict[str, float]] = None
+_backlog_loaded_at = 0.0
+_listeners_installed = False
+
+_PRODUCT_MODELS = (Stock, SalesOrderItem, PurchaseOrderItem, ProductionPlanItem, StockProduction)
+_HEADER_MODELS = {SalesOrder: "sales_order", PurchaseOrder: "purchase_order", ProductionPlan: "production_plan"}
+_TRACKED_MODELS = _PRODUCT_MODELS + tuple(_HEADER_MODELS) + (ProductProcess,)
+
+
+def _pending(session: Session) -> Dict[str, Any]:
+    return session.info.setdefault("atp_pending", {
+        "products": set(), "headers": {k: set() for k in _dirty_headers},
+        "routing": set(), "backlog": False, "reset": False,
+    })
+
+
+def _product_ids_of(obj) -> Set[int]:
+    ids = set()
+    if getattr(obj, "product_id", None):
+        ids.add(obj.product_id)
+    try:
+        hist = inspect(obj).attrs.product_id.history
+        ids.update(v for v in hist.deleted if v)
+    except Exception:
+        pass
+    return ids
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    pending = None
+    for bucket, objs in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for obj in objs:
+            if not isinstance(obj, _TRACKED_MODELS):
+                continue
+            pending = pending or _pending(session)
+            if isinstance(obj, ProductProcess):
+                pending["routing"].update(_product_ids_of(obj))
+                continue
+            if isinstance(obj, _PRODUCT_MODELS):
+                pending["products"].update(_product_ids_of(obj))
+                if isinstance(obj, ProductionPlanItem):
+                    pending["backlog"] = True
+                continue
+            if bucket == "deleted":
+                # 헤더 삭제 시 DB cascade 로 지워진 품목 행은 추적할 수 없으므로 전체 무효화
+                pending["reset"] = True
+            elif obj.id is not None:
+                pending["headers"][_HEADER_MODELS[type(obj)]].add(obj.id)
+                if isinstance(obj, ProductionPlan):
+                    pending["backlog"] = True
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _TRACKED_MODELS):
+        _pending(orm_execute_state.session)["reset"] = True
+
+
+def _after_commit(session: Session) -> None:
+    global _backlog_cache
+    pending = session.info.pop("atp_pending", None)
+    if not pending:
+        return
+    if pending["reset"]:
+        invalidate_all()
+        return
+    _dirty_products.update(pending["products"])
+    for key, ids in pending["headers"].items():
+        _dirty_headers[key].update(ids)
+    for pid in pending["routing"]:
+        _routing_cache.pop(pid, None)
+    if pending["backlog"]:
+        _backlog_cache = None
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop("atp_pending", None)
+
+
+def install_atp_listeners() -> None:
+    """앱 시작 시 1회: 세션 flush/commit 이벤트로 타임라인 무효화 대상을 수집합니다."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _listeners_installed = True
+
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """이벤트로 잡히지 않는 경로(원시 SQL 등)에서 명시적으로 무효화할 때 사용"""
+    _dirty_products.update(pid for pid in product_ids if pid)
+
+
+def invalidate_all() -> None:
+    global _backlog_cache
+    _timelines.clear()
+    _routing_cache.clear()
+    _dirty_products.clear()
+    for ids in _dirty_headers.values():
+        ids.clear()
+    _backlog_cache = None
+
+
+async def _drain_dirty(db: AsyncSession) -> None:
+    """커밋된 헤더 변경을 품목 id 로 풀어 해당 품목 타임라인만 버립니다."""
+    product_ids = set(_dirty_products)
+    _dirty_products.clear()
+
+    header_queries = {
+        "sales_order": (SalesOrderItem.product_id, SalesOrderItem.order_id),
+        "purchase_order": (PurchaseOrderItem.product_id, PurchaseOrderItem.purchase_order_id),
+        "production_plan": (ProductionPlanItem.product_id, ProductionPlanItem.plan_id),
+    }
+    for key, (product_col, header_col) in header_queries.items():
+        ids = list(_dirty_headers[key])
+        _dirty_headers[key].clear()
+        if not ids:
+            continue
+        res = await db.execute(select(product_col).where(header_col.in_(ids)).distinct())
+        product_ids.update(pid for pid in res.scalars().all() if pid)
+
+    for pid in product_ids:
+        _timelines.pop(pid, None)
+
+
+async def _load_timelines(db: AsyncSession, product_ids: List[int], today: date) -> Dict[int, ProductTimeline]:
+    on_hand = {pid: 0 for pid in product_ids}
+    events: Dict[int, List[Tuple[date, int]]] = {pid: [] for pid in product_ids}
+
+    def at(d: Optional[date]) -> date:
+        # 지연된 입고/납기는 오늘 시점으로 당겨 반영
+        return d if d and d > today else today
+
+    stock_res = await db.execute(
+        select(Stock.product_id, Stock.current_quantity).where(Stock.product_id.in_(product_ids))
+    )
+    for pid, qty in stock_res.all():
+        on_hand[pid] = qty or 0
+
+    # 수요: 미납 수주 잔량
+    so_res = await db.execute(
+        select(SalesOrderItem.product_id, SalesOrderItem.quantity, SalesOrderItem.delivered_quantity, SalesOrder.delivery_date)
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+        .where(SalesOrderItem.product_id.in_(product_ids), SalesOrder.status.in_(OPEN_ORDER_STATUSES))
+    )
+    for pid, qty, delivered, due in so_res.all():
+        remaining = (qty or 0) - (delivered or 0)
+        if remaining > 0:
+            events[pid].append((at(due), -remaining))
+
+    # 공급: 미입고 발주 잔량
+    po_res = await db.execute(
+        select(PurchaseOrderItem.product_id, PurchaseOrderItem.quantity, PurchaseOrderItem.received_quantity, PurchaseOrder.delivery_date)
+        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .where(PurchaseOrderItem.product_id.in_(product_ids), PurchaseOrder.status.in_(OPEN_PURCHASE_STATUSES))
+    )
+    for pid, qty, received, due in po_res.all():
+        remaining = (qty or 0) - (received or 0)
+        if remaining > 0:
+            events[pid].append((at(due), remaining))
+
+    # 공급: 진행 중 생산계획의 품목별 최종 공정 (완료 시 입고되는 수량)
+    last_seq = (
+        select(ProductionPlanItem.plan_id, ProductionPlanItem.product_id, func.max(ProductionPlanItem.sequence).label("seq"))
+        .where(ProductionPlanItem.product_id.in_(product_ids))
+        .group_by(ProductionPlanItem.plan_id, ProductionPlanItem.product_id)
+        .subquery()
+    )
+    plan_end = (
+        select(ProductionPlanItem.plan_id, ProductionPlanItem.product_id, func.max(ProductionPlanItem.end_date).label("end_date"))
+        .where(ProductionPlanItem.product_id.in_(product_ids))
+        .group_by(ProductionPlanItem.plan_id, ProductionPlanItem.product_id)
+        .subquery()
+    )
+    plan_res = await db.execute(
+        select(ProductionPlanItem.product_id, ProductionPlanItem.quantity, plan_end.c.end_date, ProductionPlan.plan_date)
+        .join(last_seq, and_(
+            last_seq.c.plan_id == ProductionPlanItem.plan_id,
+            last_seq.c.product_id == ProductionPlanItem.product_id,
+            last_seq.c.seq == ProductionPlanItem.sequence,
+        ))
+        .join(plan_end, and_(
+            plan_end.c.plan_id == ProductionPlanItem.plan_id,
+            plan_end.c.product_id == ProductionPlanItem.product_id,
+        ))
+        .join(ProductionPlan, ProductionPlanItem.plan_id == ProductionPlan.id)
+        .where(
+            ProductionPlan.status.in_(ACTIVE_PLAN_STATUSES),
+            ProductionPlanItem.status.in_(OPEN_ITEM_STATUSES),
+        )
+    )
+    for pid, qty, end_date, plan_date in plan_res.all():
+        if qty and qty > 0:
+            events[pid].append((at(end_date or plan_date), qty))
+
+    # 공급: 아직 생산계획이 수립되지 않은 재고생산 요청
+    sp_res = await db.execute(
+        select(StockProduction.product_id, StockProduction.quantity, StockProduction.target_date)
+        .where(
+            StockProduction.product_id.in_(product_ids),
+            StockProduction.status.in_(OPEN_STOCK_PRODUCTION_STATUSES),
+            ~exists().where(or_(
+                ProductionPlan.stock_production_id == StockProduction.id,
+                and_(
+                    StockProduction.order_id.isnot(None),
+                    ProductionPlan.stock_production_order_id == StockProduction.order_id,
+                ),
+            )),
+        )
+    )
+    for pid, qty, target in sp_res.all():
+        if qty and qty > 0:
+            events[pid].append((at(target), qty))
+
+    loaded_at = time.monotonic()
+    return {pid: ProductTimeline(pid, on_hand[pid], events[pid], loaded_at) for pid in product_ids}
+
+
+async def get_timelines(db: AsyncSession, product_ids: Iterable[int]) -> Dict[int, ProductTimeline]:
+    """캐시된 타임라인 반환 (무효화/만료된 품목만 일괄 재적재)"""
+    global _timeline_day
+    today = now_kst().date()
+    if _timeline_day != today:
+        # 날짜가 바뀌면 지연분 당김 기준이 달라지므로 전체 재적재
+        _timelines.clear()
+        _timeline_day = today
+
+    await _drain_dirty(db)
+
+    product_ids = sorted({pid for pid in product_ids if pid})
+    ttl = settings.ATP_CACHE_TTL_SECONDS
+    now = time.monotonic()
+    missing = [
+        pid for pid in product_ids
+        if pid not in _timelines or now - _timelines[pid].loaded_at > ttl
+    ]
+    if missing:
+        _timelines.update(await _load_timelines(db, missing, today))
+    return {pid: _timelines[pid] for pid in product_ids}
+
+
+async def _get_routings(db: AsyncSession, product_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """품목별 공정 라우팅 (개당 분은 실적 중앙값 우선, 없으면 표준 시간)"""
+    missing = [pid for pid in product_ids if pid not in _routing_cache]
+    if missing:
+        res = await db.execute(
+            select(ProductProcess.product_id, Process.name, ProductProcess.course_type, Process.course_type,
+                   ProductProcess.estimated_time, ProductProcess.sequence)
+            .join(Process, ProductProcess.process_id == Process.id)
+            .where(ProductProcess.product_id.in_(missing))
+            .order_by(ProductProcess.product_id, ProductProcess.sequence)
+        )
+        rows = res.all()
+        stats = await get_cycle_time_estimates(db, [(pid, pname) for pid, pname, *_ in rows])
+        routings: Dict[int, List[Dict[str, Any]]] = {pid: [] for pid in missing}
+        for pid, pname, override_type, default_type, est, seq in rows:
+            routings[pid].append({
+                "process_name": pname,
+                "course_type": override_type or default_type or "INTERNAL",
+                "minutes_per_unit": stats.get((pid, pname), est or 0.0),
+            })
+        _routing_cache.update(routings)
+    return {pid: _routing_cache[pid] for pid in product_ids}
+
+
+async def _get_backlog(db: AsyncSession) -> Dict[str, float]:
+    """공정명별 대기 작업 부하(분): 진행 중 계획의 미완료 내부 공정 (개당 예상 시간 × 수량)"""
+    global _backlog_cache, _backlog_loaded_at
+    now = time.monotonic()
+    if _backlog_cache is not None and now - _backlog_loaded_at <= settings.ATP_CACHE_TTL_SECONDS:
+        return _backlog_cache
+    res = await db.execute(
+        select(ProductionPlanItem.process_name, func.sum(ProductionPlanItem.estimated_time * ProductionPlanItem.quantity))
+        .join(ProductionPlan, ProductionPlanItem.plan_id == ProductionPlan.id)
+        .where(
+            ProductionPlan.status.in_(ACTIVE_PLAN_STATUSES),
+            ProductionPlanItem.status.in_(OPEN_ITEM_STATUSES),
+            or_(ProductionPlanItem.course_type == "INTERNAL", ProductionPlanItem.course_type.is_(None)),
+        )
+        .group_by(ProductionPlanItem.process_name)
+    )
+    _backlog_cache = {name: float(minutes or 0) for name, minutes in res.all()}
+    _backlog_loaded_at = now
+    return _backlog_cache
+
+
+def add_working_days(start: date, days: int) -> date:
+    """주말/공휴일을 제외한 영업일 기준 날짜 계산"""
+    d = start
+    while days > 0:
+        d += timedelta(days=1)
+        if d.weekday() < 5 and d not in kr_holidays:
+            days -= 1
+    return d
+
+
+def _production_lead(routing: List[Dict[str, Any]], quantity: int, backlog: Dict[str, float]) -> Tuple[int, float]:
+    """(영업일 리드타임, 필요 내부 작업분)"""
+    capacity = max(1, settings.ATP_DAILY_CAPACITY_MINUTES)
+    work_minutes = 0.0
+    queue_minutes = 0.0
+    external_days = 0
+    for step in routing:
+        if step["course_type"] == "INTERNAL":
+            work_minutes += (step["minutes_per_unit"] or 0.0) * quantity
+            queue_minutes = max(queue_minutes, backlog.get(step["process_name"], 0.0))
+        else:
+            external_days += settings.ATP_EXTERNAL_LEAD_DAYS
+    internal_days = math.ceil((queue_minutes + work_minutes) / capacity) if work_minutes else 0
+    return internal_days + external_days, work_minutes
+
+
+async def check_atp(
+    db: AsyncSession,
+    lines: List[Dict[str, Any]],
+    exclude_order_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    lines: [{"product_id", "quantity", "requested_date"(선택)}]
+    라인별 가장 이른 납기 가능일과 요청일 기준 약속 가능 수량을 반환합니다.
+    같은 품목의 여러 라인은 앞 라인의 약속을 반영해 순서대로 판정합니다.
+    exclude_order_id: 수정 중인 수주의 기존 잔량은 수요에서 제외
+    """
+    today = now_kst().date()
+    product_ids = sorted({l["product_id"] for l in lines if l.get("product_id")})
+    timelines = await get_timelines(db, product_ids)
+    routings = await _get_routings(db, product_ids)
+    backlog = dict(await _get_backlog(db))
+
+    working: Dict[int, ProductTimeline] = dict(timelines)
+    if exclude_order_id:
+        own_res = await db.execute(
+            select(SalesOrderItem.product_id, SalesOrderItem.quantity, SalesOrderItem.delivered_quantity, SalesOrder.delivery_date)
+            .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+            .where(SalesOrder.id == exclude_order_id, SalesOrder.status.in_(OPEN_ORDER_STATUSES))
+        )
+        add_back: Dict[int, List[Tuple[date, int]]] = {}
+        for pid, qty, delivered, due in own_res.all():
+            remaining = (qty or 0) - (delivered or 0)
+            if pid in working and remaining > 0:
+                add_back.setdefault(pid, []).append((due if due and due > today else today, remaining))
+        for pid, extra in add_back.items():
+            working[pid] = working[pid].copy_with(extra)
+
+    results = []
+    for line in lines:
+        pid = line.get("product_id")
+        qty = int(line.get("quantity") or 0)
+        requested = line.get("requested_date")
+        timeline = working.get(pid)
+        if timeline is None or qty <= 0:
+            results.append({
+                "product_id": pid, "quantity": qty, "requested_date": requested,
+                "on_hand": 0, "available_on_requested": 0, "atp_date": None, "ctp_date": None,
+                "ctp_quantity": 0, "earliest_date": None, "source": None, "shortage": qty, "feasible": False,
+            })
+            continue
+
+        atp_date = timeline.earliest_date_for(qty, today)
+
+        # CTP: 오늘 약속 가능분을 제외한 부족분을 생산 (완료일 기준 한 번 더 보정)
+        ctp_date = None
+        ctp_quantity = 0
+        routing = routings.get(pid) or []
+        if routing:
+            shortage = max(0, qty - timeline.available_on(today))
+            lead, _ = _production_lead(routing, shortage, backlog)
+            ctp_date = add_working_days(today, lead)
+            refined = max(0, qty - timeline.available_on(ctp_date))
+            if refined < shortage:
+                lead2, _ = _production_lead(routing, refined, backlog)
+                date2 = add_working_days(today, lead2)
+                if timeline.available_on(date2) + refined >= qty:
+                    ctp_date, shortage = date2, refined
+            ctp_quantity = shortage
+
+        if atp_date and (ctp_date is None or atp_date <= ctp_date):
+            earliest, source = atp_date, "ATP"
+            working[pid] = timeline.copy_with([(atp_date, -qty)])
+        elif ctp_date:
+            earliest, source = ctp_date, "CTP"
+            working[pid] = timeline.copy_with([(ctp_date, ctp_quantity - qty)])
+            for step in routing:
+                if step["course_type"] == "INTERNAL":
+                    backlog[step["process_name"]] = backlog.get(step["process_name"], 0.0) + (step["minutes_per_unit"] or 0.0) * ctp_quantity
+        else:
+            earliest, source = None, None
+
+        check_date = requested or today
+        available = timeline.available_on(check_date)
+        results.append({
+            "product_id": pid,
+            "quantity": qty,
+            "requested_date": requested,
+            "on_hand": timeline.on_hand,
+            "available_on_requested": available,
+            "atp_date": atp_date,
+            "ctp_date": ctp_date,
+            "ctp_quantity": ctp_quantity,
+            "earliest_date": earliest,
+            "source": source,
+            "shortage": max(0, qty - available),
+            "feasible": earliest is not None and (requested is None or earliest <= requested),
+        })
+    return results
@@ -0,0 +1,25 @@
+"""
+독립 조회문 동시 실행
+
+하나의 AsyncSession 은 한 번에 한 쿼리만 실행하므로, 서로 의존하지 않는 집계 조회는
+풀에서 세션을 따로 꺼내 asyncio.gather 로 동시에 실행합니다. (소요 시간 ≈ 가장 느린 조회)
+요청당 동시 연결 수는 REPORT_QUERY_CONCURRENCY 로 제한해 커넥션 풀을 한 요청이 독차지하지 않게 합니다.
+읽기 전용 조회에만 사용하세요 (세션마다 별도 트랜잭션).
+"""
+import asyncio
+from typing import List, Optional
+
+from app.api.deps import AsyncSessionLocal
+from app.core.config import settings
+
+
+async def fetch_all_concurrently(*statements, limit: Optional[int] = None) -> List[list]:
+    """조회문별 result.all() 목록을 입력 순서대로 반환"""
+    semaphore = asyncio.Semaphore(max(1, limit or settings.REPORT_QUERY_CONCURRENCY))
+
+    async def run(stmt):
+        async with semaphore:
+            async with AsyncSessionLocal() as session:
+                return (await session.execute(stmt)).all()
+
+    return list(await asyncio.gather(*(run(stmt) for stmt in statements)))
@@ -0,0 +1,163 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, or_
+from app.models.production import ProductionPlanItem, WorkLog, WorkLogItem, ProcessCycleTimeStat
+from app.core.timezone import now_kst
+from typing import Dict, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 추세 계산에 필요한 최소 실적 건수
+MIN_TREND_SAMPLES = 3
+# 이상치(입력 실수) 컷: 개당 24시간 초과 실적은 제외
+MAX_MINUTES_PER_UNIT = 24 * 60
+
+
+async def recompute_cycle_time_stats(db: AsyncSession) -> int:
+    """
+    작업일지(WorkLogItem)의 시작/종료 시각과 양품 수량으로
+    품목/공정별 개당 소요 시간 분포(중앙값, P90, 추세)를 전체 이력 기준으로 재계산합니다.
+    반환값: 저장된 통계 행 수
+    """
+    result = await db.execute(
+        select(
+            ProductionPlanItem.product_id,
+            ProductionPlanItem.process_name,
+            WorkLog.work_date,
+            WorkLogItem.start_time,
+            WorkLogItem.end_time,
+            WorkLogItem.good_quantity,
+        )
+        .join(ProductionPlanItem, WorkLogItem.plan_item_id == ProductionPlanItem.id)
+        .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)
+        .where(
+            WorkLogItem.start_time.isnot(None),
+            WorkLogItem.end_time.isnot(None),
+            WorkLogItem.good_quantity > 0,
+        )
+    )
+    rows = result.all()
+
+    await db.execute(delete(ProcessCycleTimeStat))
+
+    if not rows:
+        await db.commit()
+        return 0
+
+    # 1. 컬럼 배열 구성
+    key_index: Dict[Tuple[int, str], int] = {}
+    keys: List[Tuple[int, str]] = []
+    group_ids = np.empty(len(rows), dtype=np.int64)
+    for i, r in enumerate(rows):
+        key = (r.product_id, r.process_name)
+        gid = key_index.get(key)
+        if gid is None:
+            gid = len(keys)
+            key_index[key] = gid
+            keys.append(key)
+        group_ids[i] = gid
+
+    starts = np.array([r.start_time.timestamp() for r in rows], dtype=np.float64)
+    ends = np.array([r.end_time.timestamp() for r in rows], dtype=np.float64)
+    qtys = np.array([r.good_quantity for r in rows], dtype=np.float64)
+    work_days = np.array([r.work_date for r in rows], dtype="datetime64[D]")
+
+    # 2. 개당 소요 분 (벡터 연산) + 비정상 실적 제거
+    per_unit = (ends - starts) / 60.0 / qtys
+    valid = (per_unit > 0) & (per_unit <= MAX_MINUTES_PER_UNIT)
+    group_ids, per_unit, qtys, work_days = group_ids[valid], per_unit[valid], qtys[valid], work_days[valid]
+    if per_unit.size == 0:
+        await db.commit()
+        return 0
+
+    day_nums = work_days.astype(np.int64).astype(np.float64)
+
+    # 3. 그룹 단위 정렬 후 경계 인덱스로 슬라이스
+    order = np.argsort(group_ids, kind="stable")
+    group_ids, per_unit, qtys, day_nums, work_days = (
+        group_ids[order], per_unit[order], qtys[order], day_nums[order], work_days[order]
+    )
+    boundaries = np.flatnonzero(np.diff(group_ids)) + 1
+    starts_idx = np.concatenate(([0], boundaries))
+    ends_idx = np.concatenate((boundaries, [group_ids.size]))
+
+    computed_at = now_kst()
+    saved = 0
+    for s, e in zip(starts_idx, ends_idx):
+        values = per_unit[s:e]
+        days = day_nums[s:e]
+        median, p90 = np.percentile(values, [50, 90])
+
+        trend = None
+        if values.size >= MIN_TREND_SAMPLES and np.ptp(days) > 0:
+            slope = np.polyfit(days, values, 1)[0]
+            trend = float(slope * 30.0)
+
+        product_id, process_name = keys[int(group_ids[s])]
+        db.add(ProcessCycleTimeStat(
+            product_id=product_id,
+            process_name=process_name,
+            sample_count=int(values.size),
+            total_quantity=int(qtys[s:e].sum()),
+            mean_minutes=round(float(values.mean()), 3),
+            median_minutes=round(float(median), 3),
+            p90_minutes=round(float(p90), 3),
+            trend_per_30d=round(trend, 4) if trend is not None else None,
+            first_work_date=work_days[s:e].min().astype(object),
+            last_work_date=work_days[s:e].max().astype(object),
+            computed_at=computed_at,
+        ))
+        saved += 1
+
+    await db.commit()
+    logger.info(f"Cycle-time stats recomputed: {saved} product/process pairs from {per_unit.size} work log items.")
+    return saved
+
+
+async def get_cycle_time_estimates(
+    db: AsyncSession,
+    keys: List[Tuple[int, str]]
+) -> Dict[Tuple[int, str], float]:
+    """
+    (product_id, process_name) 목록에 대한 중앙값 기준 개당 소요 분을 반환합니다.
+    """
+    if not keys:
+        return {}
+    product_ids = {k[0] for k in keys}
+    result = await db.execute(
+        select(ProcessCycleTimeStat.product_id, ProcessCycleTimeStat.process_name, ProcessCycleTimeStat.median_minutes)
+        .where(ProcessCycleTimeStat.product_id.in_(product_ids))
+    )
+    wanted = set(keys)
+    return {
+        (pid, pname): median
+        for pid, pname, median in result.all()
+        if (pid, pname) in wanted and median is not None
+    }
+
+
+async def prefill_plan_item_estimates(db: AsyncSession, plan_id: int) -> int:
+    """
+    예상 시간이 비어 있는(None/0) 생산계획 공정에 실적 중앙값을 채웁니다.
+    반환값: 채워진 공정 수
+    """
+    await db.flush()
+    result = await db.execute(
+        select(ProductionPlanItem).where(
+            ProductionPlanItem.plan_id == plan_id,
+            or_(ProductionPlanItem.estimated_time.is_(None), ProductionPlanItem.estimated_time == 0)
+        )
+    )
+    items = result.scalars().all()
+    if not items:
+        return 0
+
+    estimates = await get_cycle_time_estimates(db, [(i.product_id, i.process_name) for i in items])
+    filled = 0
+    for item in items:
+        est = estimates.get((item.product_id, item.process_name))
+        if est:
+            item.estimated_time = est
+            filled += 1
+    return filled
@@ -0,0 +1,64 @@
+"""
+기간 필터 공통 헬퍼 (인덱스를 타는 범위 조건)
+
+extract('year'/'month', col) 이나 func.date(col) 처럼 컬럼을 함수로 감싼 조건은
+(status, 일자) 복합 인덱스를 쓰지 못하고 전체 스캔이 됩니다.
+여기 헬퍼는 모두 "col >= 시작 AND col < 다음 기간 시작" 형태의 반열림 범위로 바꿔 줍니다.
+Date 컬럼은 date 경계, DateTime 컬럼은 자정(datetime) 경계를 사용합니다.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, or_, false
+
+
+def period_bounds(year: int, month: Optional[int] = None) -> Tuple[date, date]:
+    """연/월 → [시작일, 다음 기간 시작일)"""
+    if month:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    else:
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    return start, end
+
+
+def quarter_bounds(year: int, quarter: int) -> Tuple[date, date]:
+    """연/분기(1~4) → [시작일, 다음 분기 시작일)"""
+    start = date(year, (quarter - 1) * 3 + 1, 1)
+    end = date(year + 1, 1, 1) if quarter == 4 else date(year, quarter * 3 + 1, 1)
+    return start, end
+
+
+def _midnight(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day)
+
+
+def in_range(col, start: date, end: date, is_datetime: bool = False):
+    """start <= col < end (end 는 다음 기간 시작일)"""
+    if is_datetime:
+        return and_(col >= _midnight(start), col < _midnight(end))
+    return and_(col >= start, col < end)
+
+
+def in_period(col, year: int, month: Optional[int] = None, is_datetime: bool = False):
+    """col 이 해당 연(월)에 속하는 조건 (extract 대체)"""
+    start, end = period_bounds(year, month)
+    return in_range(col, start, end, is_datetime=is_datetime)
+
+
+def on_or_after_day(col, d: date):
+    """DateTime 컬럼: func.date(col) >= d 대체"""
+    return col >= _midnight(d)
+
+
+def on_or_before_day(col, d: date):
+    """DateTime 컬럼: func.date(col) <= d 대체 (다음날 자정 미만)"""
+    return col < _midnight(d + timedelta(days=1))
+
+
+def in_any_month(col, month: int, years):
+    """연도 미지정 월 필터: 후보 연도별 월 범위의 OR (extract('month') 대체)"""
+    ranges = [and_(col >= s, col < e) for s, e in (period_bounds(y, month) for y in years)]
+    if not ranges:
+        return false()
+    return or_(*ranges)
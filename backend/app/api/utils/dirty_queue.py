@@ -0,0 +1,148 @@
+"""
+세션 이벤트 기반 변경 대기열 (정산 사실 / 품질 분석 집계 공용)
+
+원본 모델 변경을 세션 flush 이벤트로 잡아 갱신 대상 키를 대기열 테이블에 같은 트랜잭션으로 기록합니다.
+각 모듈은 DirtyQueue 로 추적 모델, 변경 객체 → 키 변환, 키 → 대기열 행 생성, 벌크 UPDATE 감시 컬럼을 설정해
+register_dirty_queue() 로 등록하고, 세션 이벤트는 install_dirty_queue_listeners() 가 1회만 등록해 모든 대기열에 나눠 줍니다.
+벌크 UPDATE/DELETE 는 객체 단위로 추적할 수 없으므로 전체 재구축 키(all_key)로 기록합니다.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+CHUNK_SIZE = 500
+
+
+def as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def chunks(values: List, size: int = CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def history_values(obj, attr: str) -> list:
+    """속성의 현재 값 + 이번 flush 에서 바뀌기 전 값 (None 제외)"""
+    values = [getattr(obj, attr, None)]
+    try:
+        values.extend(inspect(obj).attrs[attr].history.deleted)
+    except Exception:
+        pass
+    return [v for v in values if v is not None]
+
+
+def attrs_changed(obj, attrs) -> bool:
+    try:
+        state = inspect(obj).attrs
+        return any(state[a].history.has_changes() for a in attrs)
+    except Exception:
+        return False
+
+
+@dataclass(eq=False)
+class DirtyQueue:
+    """변경 대기열 설정"""
+    name: str  # session.info 키
+    tracked_models: Tuple[type, ...]
+    keys_of: Callable[[Any, str], Set[tuple]]  # (변경 객체, "new"/"dirty"/"deleted") → 대기열 키
+    make_row: Callable[[tuple], Any]  # 대기열 키 → 기록할 ORM 객체
+    all_key: tuple  # 전체 재구축 키
+    watched_columns: Dict[type, Set[str]] = field(default_factory=dict)  # 벌크 UPDATE 가 이 컬럼을 건드리지 않으면 무시
+    bulk_ignored: Tuple[type, ...] = ()  # 벌크 UPDATE/DELETE 를 무시하는 모델
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # 조회 직전 동기화 직렬화
+
+
+_queues: List[DirtyQueue] = []
+_listeners_installed = False
+
+
+def _pending(session: Session, queue: DirtyQueue) -> Dict[str, Set]:
+    return session.info.setdefault(queue.name, {"keys": set(), "recorded": set()})
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    for bucket, objs in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for obj in objs:
+            for queue in _queues:
+                if isinstance(obj, queue.tracked_models):
+                    keys = queue.keys_of(obj, bucket)
+                    if keys:
+                        _pending(session, queue)["keys"].update(keys)
+
+
+def _after_flush_postexec(session: Session, flush_context) -> None:
+    for queue in _queues:
+        pending = session.info.get(queue.name)
+        if not pending:
+            continue
+        new_keys = pending["keys"] - pending["recorded"]
+        if not new_keys:
+            continue
+        # 같은 트랜잭션으로 기록 (commit 중이면 다음 flush 로 함께 저장됨)
+        for key in new_keys:
+            session.add(queue.make_row(key))
+        pending["recorded"].update(new_keys)
+
+
+def _updated_columns(statement) -> Optional[Set[str]]:
+    values = getattr(statement, "_values", None)
+    if not values:
+        return None
+    return {getattr(k, "key", None) or getattr(k, "name", None) or str(k) for k in values}
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    model = mapper.class_
+    columns = _updated_columns(orm_execute_state.statement) if orm_execute_state.is_update else None
+    for queue in _queues:
+        if not issubclass(model, queue.tracked_models) or issubclass(model, queue.bulk_ignored):
+            continue
+        watched = queue.watched_columns.get(model)
+        if columns is not None and watched is not None and not (columns & watched):
+            continue
+        pending = _pending(orm_execute_state.session, queue)
+        if queue.all_key not in pending["recorded"]:
+            orm_execute_state.session.add(queue.make_row(queue.all_key))
+            pending["recorded"].add(queue.all_key)
+
+
+def _clear_pending(session: Session, *args) -> None:
+    for queue in _queues:
+        session.info.pop(queue.name, None)
+
+
+def register_dirty_queue(queue: DirtyQueue) -> None:
+    if queue not in _queues:
+        _queues.append(queue)
+
+
+def install_dirty_queue_listeners() -> None:
+    """앱 시작 시 1회: 등록된 모든 대기열이 함께 쓰는 세션 이벤트 등록"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_flush_postexec", _after_flush_postexec)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _clear_pending)
+    event.listen(Session, "after_rollback", _clear_pending)
+    _listeners_installed = True
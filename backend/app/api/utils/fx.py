@@ -0,0 +1,226 @@
+"""
+환율 및 원화 환산 금액
+
+- exchange_rates: 일자/통화별 KRW 환율 (1 단위 외화 = rate 원)
+- 수주 품목/납품 품목/구매발주 품목에 적용 환율(exchange_rate)과 원화 금액(amount_krw)을 저장 시점에 기록합니다.
+  기준일: 수주 품목 = 수주일, 납품 품목 = 납품일, 발주 품목 = 발주일
+- 해당 기준일 이전 최근 환율을 사용하며, 등록된 환율이 없으면 DEFAULT_USD_KRW_RATE(USD) 로 대체합니다.
+- 환율을 등록/수정/삭제하면 그 환율이 적용되는 기간의 행만 다시 환산합니다.
+정산 집계는 CASE 환산 대신 amount_krw 컬럼을 그대로 합산합니다.
+"""
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.timezone import now_kst
+from app.models.basics import ExchangeRate
+from app.models.sales import SalesOrder, SalesOrderItem, DeliveryHistory, DeliveryHistoryItem
+from app.models.purchasing import PurchaseOrder, PurchaseOrderItem
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "KRW"
+
+
+class RateBook:
+    """통화별 (일자, 환율) 정렬 목록 — 기준일 이전 최근 환율 조회"""
+
+    def __init__(self, rows: Iterable[Tuple[str, date, float]]):
+        self._dates: Dict[str, List[date]] = {}
+        self._rates: Dict[str, List[float]] = {}
+        for currency, rate_date, rate in sorted(rows, key=lambda r: (r[0], r[1])):
+            self._dates.setdefault(currency, []).append(rate_date)
+            self._rates.setdefault(currency, []).append(rate)
+
+    def rate_on(self, currency: Optional[str], on_date: Optional[date]) -> float:
+        currency = (currency or BASE_CURRENCY).upper()
+        if currency == BASE_CURRENCY:
+            return 1.0
+        dates = self._dates.get(currency)
+        if not dates:
+            return settings.DEFAULT_USD_KRW_RATE if currency == "USD" else 1.0
+        on_date = _as_date(on_date) or now_kst().date()
+        idx = bisect_right(dates, on_date) - 1
+        # 첫 환율 등록일 이전 거래는 가장 오래된 환율 적용
+        return self._rates[currency][max(idx, 0)]
+
+    def has_currency(self, currency: str) -> bool:
+        return bool(self._dates.get(currency))
+
+    def effective_range(self, currency: str, rate_date: date) -> Tuple[Optional[date], Optional[date]]:
+        """
+        rate_date 환율(등록 직후) 또는 그 자리(삭제 직후)가 영향을 주는 기준일 구간 [start, end).
+        가장 이른 환율이면 그 이전 거래에도 적용되므로 start=None.
+        """
+        dates = self._dates.get(currency, [])
+        idx = bisect_right(dates, rate_date)
+        present = idx > 0 and dates[idx - 1] == rate_date
+        earliest = (idx - 1 == 0) if present else (idx == 0)
+        start = None if earliest else rate_date
+        end = dates[idx] if idx < len(dates) else None
+        return start, end
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+async def load_rate_book(db: AsyncSession) -> RateBook:
+    res = await db.execute(select(ExchangeRate.currency, ExchangeRate.rate_date, ExchangeRate.rate))
+    return RateBook(res.all())
+
+
+def _in_range(col, start: Optional[date], end: Optional[date]):
+    conds = []
+    if start:
+        conds.append(col >= start)
+    if end:
+        conds.append(col < end)
+    return conds
+
+
+async def stamp_sales_orders_krw(
+    db: AsyncSession,
+    order_ids: Optional[Iterable[int]] = None,
+    book: Optional[RateBook] = None,
+    currency: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    only_missing: bool = False,
+) -> int:
+    """수주 품목 환산 (단가 변경 시 납품 품목 금액도 함께 갱신) — 커밋은 호출자"""
+    book = book or await load_rate_book(db)
+    query = (
+        select(SalesOrderItem, SalesOrder.order_date)
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+    )
+    if order_ids is not None:
+        order_ids = sorted({oid for oid in order_ids if oid})
+        if not order_ids:
+            return 0
+        query = query.where(SalesOrderItem.order_id.in_(order_ids))
+    if currency:
+        query = query.where(SalesOrderItem.currency == currency)
+    query = query.where(*_in_range(SalesOrder.order_date, start, end))
+    if only_missing:
+        query = query.where(SalesOrderItem.amount_krw.is_(None))
+
+    count = 0
+    for item, order_date in (await db.execute(query)).all():
+        rate = book.rate_on(item.currency, order_date)
+        item.exchange_rate = rate
+        item.amount_krw = (item.quantity or 0) * (item.unit_price or 0.0) * rate
+        count += 1
+    if order_ids is not None:
+        count += await stamp_deliveries_krw(db, order_ids=order_ids, book=book)
+    await db.flush()
+    return count
+
+
+async def stamp_deliveries_krw(
+    db: AsyncSession,
+    delivery_ids: Optional[Iterable[int]] = None,
+    order_ids: Optional[Iterable[int]] = None,
+    book: Optional[RateBook] = None,
+    currency: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    only_missing: bool = False,
+) -> int:
+    """납품 품목 환산 (납품 수량 × 수주 단가 × 납품일 환율) — 커밋은 호출자"""
+    book = book or await load_rate_book(db)
+    query = (
+        select(DeliveryHistoryItem, DeliveryHistory.delivery_date, SalesOrderItem.unit_price, SalesOrderItem.currency)
+        .join(DeliveryHistory, DeliveryHistoryItem.delivery_id == DeliveryHistory.id)
+        .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)
+    )
+    if delivery_ids is not None:
+        delivery_ids = sorted({did for did in delivery_ids if did})
+        if not delivery_ids:
+            return 0
+        query = query.where(DeliveryHistoryItem.delivery_id.in_(delivery_ids))
+    if order_ids is not None:
+        query = query.where(DeliveryHistory.order_id.in_(list(order_ids)))
+    if currency:
+        query = query.where(SalesOrderItem.currency == currency)
+    query = query.where(*_in_range(DeliveryHistory.delivery_date, start, end))
+    if only_missing:
+        query = query.where(DeliveryHistoryItem.amount_krw.is_(None))
+
+    count = 0
+    for item, delivery_date, unit_price, item_currency in (await db.execute(query)).all():
+        rate = book.rate_on(item_currency, delivery_date)
+        item.exchange_rate = rate
+        item.amount_krw = (item.quantity or 0) * (unit_price or 0.0) * rate
+        count += 1
+    await db.flush()
+    return count
+
+
+async def stamp_purchase_orders_krw(
+    db: AsyncSession,
+    po_ids: Optional[Iterable[int]] = None,
+    book: Optional[RateBook] = None,
+    currency: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    only_missing: bool = False,
+) -> int:
+    """구매발주 품목 환산 (발주일 환율) — 커밋은 호출자"""
+    book = book or await load_rate_book(db)
+    query = (
+        select(PurchaseOrderItem, PurchaseOrder.order_date)
+        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+    )
+    if po_ids is not None:
+        po_ids = sorted({pid for pid in po_ids if pid})
+        if not po_ids:
+            return 0
+        query = query.where(PurchaseOrderItem.purchase_order_id.in_(po_ids))
+    if currency:
+        query = query.where(PurchaseOrderItem.currency == currency)
+    query = query.where(*_in_range(PurchaseOrder.order_date, start, end))
+    if only_missing:
+        query = query.where(PurchaseOrderItem.amount_krw.is_(None))
+
+    count = 0
+    for item, order_date in (await db.execute(query)).all():
+        rate = book.rate_on(item.currency, order_date)
+        item.exchange_rate = rate
+        item.amount_krw = (item.quantity or 0) * (item.unit_price or 0.0) * rate
+        count += 1
+    await db.flush()
+    return count
+
+
+async def restamp_for_rate(db: AsyncSession, currency: str, rate_date: date) -> int:
+    """환율 등록/수정/삭제 후 그 환율이 적용되는 기간의 외화 행만 재환산 (커밋은 호출자)"""
+    book = await load_rate_book(db)
+    start, end = book.effective_range(currency, rate_date)
+    if not book.has_currency(currency):
+        # 마지막 환율이 삭제된 경우 해당 통화 전체가 기본 환율로 돌아감
+        start, end = None, None
+    kwargs = dict(book=book, currency=currency, start=start, end=end)
+    count = await stamp_sales_orders_krw(db, **kwargs)
+    count += await stamp_deliveries_krw(db, **kwargs)
+    count += await stamp_purchase_orders_krw(db, **kwargs)
+    return count
+
+
+async def backfill_krw_amounts(db: AsyncSession) -> int:
+    """amount_krw 가 비어 있는 행 일괄 환산 (초기 적재 및 야간 보정용, 커밋 포함)"""
+    book = await load_rate_book(db)
+    count = await stamp_sales_orders_krw(db, book=book, only_missing=True)
+    count += await stamp_deliveries_krw(db, book=book, only_missing=True)
+    count += await stamp_purchase_orders_krw(db, book=book, only_missing=True)
+    await db.commit()
+    if count:
+        logger.info(f"KRW amounts stamped: {count} rows.")
+    return count
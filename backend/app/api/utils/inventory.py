@@ -3,6 +3,7 @@ from sqlalchemy import select
 from app.models.inventory import Stock, StockTransaction, TransactionType
 from app.models.product import BOM, Product
 from sqlalchemy.orm import selectinload
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -53,6 +54,57 @@ async def handle_stock_movement(
     logger.info(f"Stock movement: Product {product_id}, Qty {quantity}, Type {transaction_type}, Ref {reference}")
     return stock
 
+async def handle_stock_movements_bulk(
+    db: AsyncSession,
+    movements: List[Tuple[int, int, TransactionType, Optional[str]]]
+) -> int:
+    """
+    여러 품목의 재고 증감을 한 번에 처리합니다 (handle_stock_movement 의 일괄 버전).
+    movements: (product_id, quantity, transaction_type, reference) 목록 — 입력 순서대로 이력 기록
+    품목/재고 조회는 각각 1회, 이력은 add_all 로 한 번에 기록합니다.
+    반환값: 기록된 이력 건수
+    """
+    movements = [m for m in movements if m[1]]
+    if not movements:
+        return 0
+
+    product_ids = {m[0] for m in movements}
+    p_res = await db.execute(select(Product.id, Product.item_type).where(Product.id.in_(product_ids)))
+    # 소모품/없는 품목은 재고 관리 제외
+    managed = {pid for pid, item_type in p_res.all() if item_type != 'CONSUMABLE'}
+    if not managed:
+        return 0
+
+    s_res = await db.execute(select(Stock).where(Stock.product_id.in_(managed)))
+    stocks = {}
+    for stock in s_res.scalars().all():
+        stocks.setdefault(stock.product_id, stock)
+
+    missing = [pid for pid in managed if pid not in stocks]
+    for pid in missing:
+        stock = Stock(product_id=pid, current_quantity=0)
+        db.add(stock)
+        stocks[pid] = stock
+    if missing:
+        await db.flush()  # 신규 재고 레코드 ID 확보
+
+    transactions = []
+    for product_id, quantity, transaction_type, reference in movements:
+        if product_id not in managed:
+            continue
+        stock = stocks[product_id]
+        stock.current_quantity = (stock.current_quantity or 0) + quantity
+        transactions.append(StockTransaction(
+            stock_id=stock.id,
+            quantity=quantity,
+            transaction_type=transaction_type,
+            reference=reference
+        ))
+    db.add_all(transactions)
+
+    logger.info(f"Bulk stock movement: {len(transactions)} transactions for {len(managed)} products")
+    return len(transactions)
+
 async def handle_backflush(
     db: AsyncSession,
     parent_product_id: int,
@@ -0,0 +1,73 @@
+"""
+목록 API 공통 헬퍼
+
+- 키셋 페이지네이션: (일자 DESC, id DESC) 정렬 목록의 커서 "YYYY-MM-DD:id" 생성/해석
+  일자가 NULL 인 행은 NULL_SORT_DATE 로 취급해 맨 뒤에 오며, 정렬/커서 비교/커서 생성이 같은 키를 씁니다.
+  정렬 키는 모델의 식 인덱스 (coalesce(일자, '1900-01-01'), id) 와 같은 SQL 로 렌더링되어 인덱스를 탑니다.
+- 문자열 집계: Postgres string_agg / SQLite group_concat (SQLAlchemy aggregate_strings)
+"""
+from datetime import date
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Date, and_, or_, func, literal_column, select, desc
+
+NULL_SORT_DATE = date(1900, 1, 1)
+# 바인드 파라미터가 아닌 리터럴이어야 모델의 식 인덱스 (ix_*_keyset) 와 일치
+_NULL_SORT_SQL = f"'{NULL_SORT_DATE.isoformat()}'"
+
+
+def parse_keyset_cursor(cursor: Optional[str]) -> Optional[Tuple[date, int]]:
+    if not cursor:
+        return None
+    try:
+        cursor_date_str, cursor_id_str = cursor.rsplit(":", 1)
+        return date.fromisoformat(cursor_date_str), int(cursor_id_str)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_date_key(date_col):
+    """NULL 일자를 NULL_SORT_DATE 로 바꾼 정렬 키 (DB 별 NULL 정렬 순서 차이 제거)"""
+    return func.coalesce(date_col, literal_column(_NULL_SORT_SQL, Date))
+
+
+def apply_keyset_cursor(query, date_col, id_col, cursor: Optional[str]):
+    """(date_col, id_col) 역순 목록에서 커서 다음 행부터 조회"""
+    parsed = parse_keyset_cursor(cursor)
+    if parsed is None:
+        return query
+    cursor_date, cursor_id = parsed
+    date_key = keyset_date_key(date_col)
+    # 앞의 key <= 조건으로 (키, id) 식 인덱스를 커서 위치부터 범위 탐색
+    return query.where(and_(
+        date_key <= cursor_date,
+        or_(date_key < cursor_date, id_col < cursor_id),
+    ))
+
+
+def keyset_order_by(query, date_col, id_col):
+    """apply_keyset_cursor 와 같은 키로 (일자 DESC, id DESC) 정렬"""
+    return query.order_by(desc(keyset_date_key(date_col)), desc(id_col))
+
+
+def make_keyset_cursor(row_date: Optional[date], row_id: int) -> str:
+    return f"{(row_date or NULL_SORT_DATE).isoformat()}:{row_id}"
+
+
+def distinct_string_agg(key_col, value_col, separator: str = ", "):
+    """
+    key 별 중복 제거·정렬된 value 를 separator 로 이어 붙인 (key, text) 조회문.
+    DISTINCT + ORDER BY 를 안쪽 서브쿼리에서 처리하므로 두 DB 모두 같은 결과를 냅니다.
+    """
+    inner = (
+        select(key_col.label("key"), value_col.label("value"))
+        .where(value_col.isnot(None))
+        .distinct()
+        .order_by(key_col, value_col)
+        .subquery()
+    )
+    return (
+        select(inner.c.key, func.aggregate_strings(inner.c.value, separator).label("joined"))
+        .group_by(inner.c.key)
+    )
@@ -48,13 +48,21 @@ async def explode_bom(db: AsyncSession, product_id: int, quantity: float, requir
             # If bi has a substitute, we only apply it to this specific child_product_id requirement.
             pass
 
+async def _finish(db: AsyncSession, commit: bool) -> None:
+    if commit:
+        await db.commit()
+    else:
+        await db.flush()
+
 async def calculate_and_record_mrp(
     db: AsyncSession, 
     order_id: Optional[int] = None, 
-    plan_id: Optional[int] = None
+    plan_id: Optional[int] = None,
+    commit: bool = True,
 ):
     """
     BOM 전개 및 재고 확인을 통한 부족분 산출 및 MaterialRequirement 기록
+    commit=False 이면 flush 까지만 수행합니다 (아웃박스 핸들러처럼 호출자가 커밋하는 경우).
     """
     # 1. 대상 선택 (SalesOrder 또는 ProductionPlan)
     items = []
@@ -76,7 +84,7 @@ async def calculate_and_record_mrp(
             existing_res = await db.execute(existing_stmt)
             for mr in existing_res.scalars().all():
                 await db.delete(mr)
-            await db.commit()
+            await _finish(db, commit)
             return
         
         # 1.1 Clear existing records strictly for idempotency
@@ -119,7 +127,7 @@ async def calculate_and_record_mrp(
             existing_res = await db.execute(existing_stmt)
             for mr in existing_res.scalars().all():
                 await db.delete(mr)
-            await db.commit()
+            await _finish(db, commit)
             return
             
         existing_stmt = select(MaterialRequirement).where(MaterialRequirement.order_id == order_id, MaterialRequirement.plan_id == None)
@@ -236,9 +244,123 @@ async def calculate_and_record_mrp(
             
             db.add(req_record)
     
-    await db.commit()
+    await _finish(db, commit)
     print(f"[MRP] Completed MRP calculation with substitution support.")
 
 async def get_bom_qty(db: AsyncSession, parent_id: int, child_id: int) -> float:
     res = await db.execute(select(BOM.required_quantity).where(BOM.parent_product_id == parent_id, BOM.child_product_id == child_id))
     return res.scalar() or 0.0
+
+async def calculate_and_record_mrp_batch(db: AsyncSession, plan_ids: List[int]):
+    """
+    여러 생산계획에 대한 통합 MRP (일괄 계획 생성용)
+    - 계획/BOM/재고/미입고 발주를 각각 한 번의 쿼리로 적재하고
+    - 부족분은 단건 MRP 와 같이 계획마다 현재 재고(주 품목 + 대체품) 기준으로 산정합니다.
+    기록 형식과 결과는 계획마다 calculate_and_record_mrp 를 호출한 것과 동일합니다.
+    """
+    if not plan_ids:
+        return
+
+    result = await db.execute(
+        select(ProductionPlan)
+        .where(ProductionPlan.id.in_(plan_ids))
+        .where(ProductionPlan.status != ProductionStatus.CANCELED)
+        .options(selectinload(ProductionPlan.items))
+        .order_by(ProductionPlan.id)
+    )
+    plans = result.scalars().all()
+    if not plans:
+        return
+
+    # 1. Clear existing records (plan-level + parent order-level)
+    conditions = [MaterialRequirement.plan_id.in_([p.id for p in plans])]
+    order_ids = [p.order_id for p in plans if p.order_id]
+    if order_ids:
+        conditions.append(MaterialRequirement.order_id.in_(order_ids) & (MaterialRequirement.plan_id == None))
+    existing_res = await db.execute(select(MaterialRequirement).where(or_(*conditions)))
+    for mr in existing_res.scalars().all():
+        await db.delete(mr)
+    await db.flush()
+
+    # 2. Plan별 생산 품목 수량 (단건 MRP와 동일하게 품목별 최대 순생산량)
+    plan_targets: Dict[int, Dict[int, float]] = {}
+    for plan in plans:
+        product_qtys = {}
+        for pi in plan.items:
+            net_qty = max(0, pi.quantity or 0)
+            product_qtys[pi.product_id] = max(product_qtys.get(pi.product_id, 0), net_qty)
+        plan_targets[plan.id] = product_qtys
+
+    parent_ids = {pid for targets in plan_targets.values() for pid in targets}
+    if not parent_ids:
+        await db.commit()
+        return
+
+    # 3. BOM (1-level) 일괄 조회
+    bom_res = await db.execute(select(BOM).where(BOM.parent_product_id.in_(parent_ids)))
+    boms_by_parent: Dict[int, List[BOM]] = {}
+    for b in bom_res.scalars().all():
+        boms_by_parent.setdefault(b.parent_product_id, []).append(b)
+
+    child_ids = {b.child_product_id for bl in boms_by_parent.values() for b in bl}
+    sub_ids = {b.substitute_product_id for bl in boms_by_parent.values() for b in bl if b.substitute_product_id}
+    if not child_ids:
+        await db.commit()
+        return
+
+    prod_res = await db.execute(select(Product).where(Product.id.in_(child_ids | sub_ids)))
+    products = {p.id: p for p in prod_res.scalars().all()}
+
+    stock_res = await db.execute(select(Stock.product_id, Stock.current_quantity).where(Stock.product_id.in_(child_ids | sub_ids)))
+    stock_map = {pid: (qty or 0) for pid, qty in stock_res.all()}
+
+    po_res = await db.execute(
+        select(PurchaseOrderItem.product_id, func.sum(PurchaseOrderItem.quantity - PurchaseOrderItem.received_quantity))
+        .join(PurchaseOrder)
+        .where(
+            PurchaseOrderItem.product_id.in_(child_ids),
+            PurchaseOrder.status.in_([PurchaseStatus.PENDING, PurchaseStatus.ORDERED, PurchaseStatus.PARTIAL])
+        )
+        .group_by(PurchaseOrderItem.product_id)
+    )
+    open_po_map = {pid: (qty or 0) for pid, qty in po_res.all()}
+
+    # 4. 계획별 기록 (단건 MRP 와 동일한 재고 기준)
+    for plan in plans:
+        requirements = {}
+        for parent_id, parent_qty in plan_targets[plan.id].items():
+            for b in boms_by_parent.get(parent_id, []):
+                qty = b.required_quantity * parent_qty
+                if b.child_product_id not in requirements:
+                    requirements[b.child_product_id] = {"required": 0, "substitute_id": b.substitute_product_id}
+                requirements[b.child_product_id]["required"] += qty
+
+        for product_id, data in requirements.items():
+            total_required = data["required"]
+            sub_id = data["substitute_id"]
+            product = products.get(product_id)
+            if not product or product.item_type == "PRODUCED" or total_required <= 0:
+                continue
+
+            primary_stock = stock_map.get(product_id, 0)
+            substitute_stock = stock_map.get(sub_id, 0) if sub_id else 0
+            shortage = max(0, total_required - (primary_stock + substitute_stock))
+
+            req_record = MaterialRequirement(
+                product_id=product_id,
+                order_id=plan.order_id,
+                plan_id=plan.id,
+                required_quantity=int(total_required),
+                current_stock=int(primary_stock),
+                open_purchase_qty=int(open_po_map.get(product_id, 0)),
+                shortage_quantity=int(shortage),
+                status="PENDING"
+            )
+            if sub_id and substitute_stock > 0:
+                sub_prod = products.get(sub_id)
+                sub_name = sub_prod.name if sub_prod else sub_id
+                req_record.status = f"SUB_AVAIL ({sub_name}: {substitute_stock})" if shortage > 0 else "SATISFIED_BY_SUB"
+            db.add(req_record)
+
+    await db.commit()
+    print(f"[MRP] Completed batch MRP calculation for {len(plans)} plans.")
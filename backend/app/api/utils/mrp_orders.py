@@ -0,0 +1,267 @@
+"""
+MRP 부족분 → 공급사별 구매발주 일괄 생성
+
+- 제안: 미발주(PENDING) 소요량을 품목별로 합산하고 실시간 재고/발주 잔량을 차감한 부족분을
+  공급사별 초안 발주로 묶습니다. (미발주 소요량 목록과 동일한 계산)
+  공급사 = 품목 거래처(Product.partner_id) → 없으면 최근 구매 이력의 거래처
+  단가 = 해당 공급사 최근 구매 단가 → 품목 최근 구매/수동 단가 → 품목 등록 단가(recent_price)
+- 생성: 선택된 초안들을 한 트랜잭션에서 발주/품목/소요량 연결까지 일괄 처리 (커밋은 호출자)
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, desc, func, or_, cast, String, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import now_kst
+from app.models.basics import Partner
+from app.models.inventory import Stock
+from app.models.product import Product, ProductLatestPrice
+from app.models.production import ProductionPlan, ProductionStatus
+from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, PurchaseStatus, MaterialRequirement
+from app.api.utils.pricing import (
+    refresh_latest_prices, _pick_latest, SOURCE_PURCHASE, PURCHASE_PRICE_SOURCES,
+)
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.fx import stamp_purchase_orders_krw
+
+OPEN_PO_STATUSES = [PurchaseStatus.PENDING, PurchaseStatus.ORDERED, PurchaseStatus.PARTIAL]
+
+
+async def _pending_requirements(
+    db: AsyncSession,
+    requirement_ids: Optional[List[int]] = None,
+    major_group_id: Optional[int] = None,
+):
+    completed_plan_subq = select(ProductionPlan.id).where(
+        cast(ProductionPlan.status, String) == ProductionStatus.COMPLETED.value
+    )
+    query = select(MaterialRequirement.id, MaterialRequirement.product_id, MaterialRequirement.required_quantity)\
+        .where(MaterialRequirement.status == "PENDING")\
+        .where(or_(MaterialRequirement.plan_id.is_(None), MaterialRequirement.plan_id.notin_(completed_plan_subq)))
+    if requirement_ids is not None:
+        query = query.where(MaterialRequirement.id.in_(requirement_ids))
+    if major_group_id:
+        group_products = select(Product.id).where(product_group_filter(major_group_id))
+        query = query.where(MaterialRequirement.product_id.in_(group_products))
+    return (await db.execute(query.order_by(MaterialRequirement.id))).all()
+
+
+async def _live_quantities(db: AsyncSession, product_ids: List[int]):
+    stock_res = await db.execute(
+        select(Stock.product_id, func.sum(Stock.current_quantity))
+        .where(Stock.product_id.in_(product_ids))
+        .group_by(Stock.product_id)
+    )
+    open_res = await db.execute(
+        select(PurchaseOrderItem.product_id, func.sum(PurchaseOrderItem.quantity - PurchaseOrderItem.received_quantity))
+        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .where(PurchaseOrder.status.in_(OPEN_PO_STATUSES), PurchaseOrderItem.product_id.in_(product_ids))
+        .group_by(PurchaseOrderItem.product_id)
+    )
+    stock = {pid: int(qty or 0) for pid, qty in stock_res.all()}
+    open_qty = {pid: int(qty or 0) for pid, qty in open_res.all()}
+    return stock, open_qty
+
+
+def _choose_supplier(product: Product, price_rows: List[ProductLatestPrice]) -> Optional[int]:
+    if product.partner_id:
+        return product.partner_id
+    purchases = [r for r in price_rows if r.source == SOURCE_PURCHASE and r.partner_id]
+    if not purchases:
+        return None
+    return max(purchases, key=lambda r: (r.price_date or date.min, r.id)).partner_id
+
+
+def _choose_price(product: Product, supplier_id: Optional[int], price_rows: List[ProductLatestPrice]):
+    """(단가, 통화, 출처) — 출처: SUPPLIER / LATEST / PRODUCT / None"""
+    for r in price_rows:
+        if r.source == SOURCE_PURCHASE and supplier_id and r.partner_id == supplier_id:
+            return r.unit_price or 0.0, r.currency or "KRW", "SUPPLIER"
+    best = _pick_latest(price_rows, PURCHASE_PRICE_SOURCES)
+    if best:
+        return best.unit_price or 0.0, best.currency or "KRW", "LATEST"
+    if product.recent_price:
+        return product.recent_price, product.price_currency or "KRW", "PRODUCT"
+    return 0.0, product.price_currency or "KRW", None
+
+
+async def build_po_proposals(
+    db: AsyncSession,
+    requirement_ids: Optional[List[int]] = None,
+    major_group_id: Optional[int] = None,
+) -> dict:
+    """
+    공급사별 초안 발주 제안.
+    반환: proposals(공급사별), unassigned(공급사 미정), covered(재고/발주 잔량으로 충당되는 품목)
+    """
+    rows = await _pending_requirements(db, requirement_ids, major_group_id)
+    req_ids_by_product: Dict[int, List[int]] = defaultdict(list)
+    required_by_product: Dict[int, int] = defaultdict(int)
+    for req_id, product_id, required in rows:
+        req_ids_by_product[product_id].append(req_id)
+        required_by_product[product_id] += int(required or 0)
+
+    product_ids = sorted(req_ids_by_product)
+    if not product_ids:
+        return {"proposals": [], "unassigned": [], "covered": []}
+
+    stock, open_qty = await _live_quantities(db, product_ids)
+    products = {
+        p.id: p for p in (await db.execute(select(Product).where(Product.id.in_(product_ids)))).scalars().all()
+    }
+    price_rows: Dict[int, List[ProductLatestPrice]] = defaultdict(list)
+    price_res = await db.execute(
+        select(ProductLatestPrice).where(
+            ProductLatestPrice.product_id.in_(product_ids),
+            ProductLatestPrice.source.in_(PURCHASE_PRICE_SOURCES),
+        )
+    )
+    for r in price_res.scalars().all():
+        price_rows[r.product_id].append(r)
+
+    by_supplier: Dict[int, List[dict]] = defaultdict(list)
+    unassigned, covered = [], []
+    for pid in product_ids:
+        product = products.get(pid)
+        if not product:
+            continue
+        required = required_by_product[pid]
+        shortage = max(0, required - stock.get(pid, 0) - open_qty.get(pid, 0))
+        supplier_id = _choose_supplier(product, price_rows[pid])
+        unit_price, currency, price_source = _choose_price(product, supplier_id, price_rows[pid])
+        line = {
+            "product_id": pid,
+            "product_name": product.name,
+            "specification": product.specification,
+            "requirement_ids": req_ids_by_product[pid],
+            "required_quantity": required,
+            "current_stock": stock.get(pid, 0),
+            "open_purchase_qty": open_qty.get(pid, 0),
+            "quantity": shortage,
+            "unit_price": unit_price,
+            "currency": currency,
+            "price_source": price_source,
+        }
+        if shortage <= 0:
+            covered.append(line)
+        elif supplier_id:
+            by_supplier[supplier_id].append(line)
+        else:
+            unassigned.append(line)
+
+    names = {}
+    if by_supplier:
+        name_res = await db.execute(select(Partner.id, Partner.name).where(Partner.id.in_(list(by_supplier))))
+        names = dict(name_res.all())
+
+    proposals = [
+        {
+            "partner_id": supplier_id,
+            "partner_name": names.get(supplier_id),
+            "lines": lines,
+            "total_amount": sum(l["quantity"] * l["unit_price"] for l in lines),
+        }
+        for supplier_id, lines in by_supplier.items()
+    ]
+    proposals.sort(key=lambda p: (p["partner_name"] or "", p["partner_id"]))
+    return {"proposals": proposals, "unassigned": unassigned, "covered": covered}
+
+
+async def _next_po_seq(db: AsyncSession, prefix: str) -> int:
+    last_no = (await db.execute(
+        select(PurchaseOrder.order_no).where(PurchaseOrder.order_no.like(f"{prefix}%"))
+        .order_by(desc(PurchaseOrder.order_no)).limit(1)
+    )).scalar()
+    if last_no:
+        try:
+            return int(last_no.split("-")[-1]) + 1
+        except (ValueError, IndexError):
+            pass
+    return 1
+
+
+async def create_pos_from_proposals(
+    db: AsyncSession,
+    orders: Iterable,
+    order_date: Optional[date] = None,
+) -> tuple:
+    """
+    선택된 초안 발주 일괄 생성 (발주 → 품목 → 소요량 ORDERED 처리, 커밋은 호출자).
+    품목 행은 대표 소요량(가장 작은 id)에 연결하고, 합산에 포함된 소요량은 모두 ORDERED 로 바꿉니다.
+    반환: (생성된 발주 목록, 발주 처리된 소요량 id 목록)
+    """
+    orders = [o for o in orders if o.lines]
+    if not orders:
+        raise HTTPException(status_code=400, detail="생성할 발주가 없습니다.")
+
+    all_req_ids = sorted({rid for o in orders for l in o.lines for rid in l.requirement_ids})
+    req_products = {}
+    if all_req_ids:
+        res = await db.execute(
+            select(MaterialRequirement.id, MaterialRequirement.product_id, MaterialRequirement.status)
+            .where(MaterialRequirement.id.in_(all_req_ids))
+        )
+        found = res.all()
+        req_products = {rid: pid for rid, pid, _ in found}
+        missing = sorted(set(all_req_ids) - set(req_products))
+        not_pending = sorted(rid for rid, _, status in found if status != "PENDING")
+        if missing or not_pending:
+            raise HTTPException(
+                status_code=409,
+                detail=f"이미 발주되었거나 존재하지 않는 소요량이 포함되어 있습니다: {missing + not_pending}",
+            )
+    for o in orders:
+        for l in o.lines:
+            if (l.quantity or 0) <= 0:
+                raise HTTPException(status_code=400, detail=f"발주 수량은 0보다 커야 합니다 (품목 {l.product_id}).")
+            wrong = [rid for rid in l.requirement_ids if req_products.get(rid) != l.product_id]
+            if wrong:
+                raise HTTPException(status_code=400, detail=f"소요량 {wrong} 의 품목이 발주 품목({l.product_id})과 다릅니다.")
+
+    order_date = order_date or now_kst().date()
+    prefix = f"PO-{now_kst().strftime('%Y%m%d')}-"
+    seq = await _next_po_seq(db, prefix)
+
+    created = []
+    for o in orders:
+        items = [
+            PurchaseOrderItem(
+                product_id=l.product_id,
+                quantity=l.quantity,
+                unit_price=l.unit_price,
+                currency=l.currency or "KRW",
+                note=l.note,
+                material_requirement_id=min(l.requirement_ids) if l.requirement_ids else None,
+            )
+            for l in o.lines
+        ]
+        po = PurchaseOrder(
+            order_no=f"{prefix}{seq:03d}",
+            partner_id=o.partner_id,
+            order_date=order_date,
+            delivery_date=o.delivery_date,
+            note=o.note,
+            status=PurchaseStatus.PENDING,
+            purchase_type="PART",
+            total_amount=sum((l.quantity or 0) * (l.unit_price or 0.0) for l in o.lines),
+            items=items,
+        )
+        seq += 1
+        created.append(po)
+    db.add_all(created)
+    await db.flush()
+
+    if all_req_ids:
+        await db.execute(
+            update(MaterialRequirement)
+            .where(MaterialRequirement.id.in_(all_req_ids))
+            .values(status="ORDERED")
+            .execution_options(synchronize_session=False)
+        )
+
+    await refresh_latest_prices(db, [l.product_id for o in orders for l in o.lines], [SOURCE_PURCHASE])
+    await stamp_purchase_orders_krw(db, [po.id for po in created])
+    return created, all_req_ids
@@ -0,0 +1,272 @@
+"""
+트랜잭셔널 아웃박스 (Transactional Outbox)
+
+상태 변경 요청은 부수효과(재고 입출고, 백플러시, 발주/외주 자동 처리, MRP, 푸시 알림)를
+직접 실행하지 않고 enqueue_event() 로 같은 트랜잭션에 이벤트만 기록합니다.
+백그라운드 소비자(run_outbox_consumer)가 이벤트를 집계(aggregate) 단위 순서대로 처리하며,
+핸들러의 DB 변경과 DONE 표시는 한 트랜잭션으로 커밋되므로 같은 이벤트가 두 번 반영되지 않습니다.
+실패한 이벤트는 지수 백오프로 재시도되고, max_attempts 초과 시 FAILED 로 남아 같은 집계의
+후속 이벤트 처리를 막습니다(관리 API 로 재시도/폐기).
+"""
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import now_kst
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+EVENT_HANDLERS: Dict[str, EventHandler] = {}
+
+BATCH_SIZE = 20
+POLL_INTERVAL_SECONDS = 15
+STALE_LOCK_MINUTES = 5
+MAX_BACKOFF_SECONDS = 30 * 60
+
+_wakeup: Optional[asyncio.Event] = None
+_consumer_task: Optional[asyncio.Task] = None
+
+
+def outbox_handler(event_type: str):
+    """
+    이벤트 핸들러 등록 데코레이터.
+    핸들러는 commit 하지 않고 flush 까지만 수행해야 합니다(소비자가 DONE 표시와 함께 커밋).
+    """
+    def decorator(func: EventHandler) -> EventHandler:
+        EVENT_HANDLERS[event_type] = func
+        return func
+    return decorator
+
+
+async def enqueue_event(
+    db: AsyncSession,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: Optional[int],
+    payload: Optional[Dict[str, Any]] = None,
+    idempotency_key: Optional[str] = None,
+) -> OutboxEvent:
+    """
+    현재 트랜잭션에 이벤트를 기록합니다 (커밋은 호출자).
+    idempotency_key 를 생략하면 상태 전이(집계, 이벤트 유형, payload)와 그 전이의 순번으로 만듭니다.
+    같은 전이를 동시에 요청하면 같은 키가 되어 unique 제약에서 한 건만 기록되고, 나중 요청은 기존 이벤트를 돌려받습니다.
+    집계 id 가 없는 이벤트(알림 등)는 순서 보장 대상이 아니며 임의 키를 사용합니다.
+    """
+    payload = payload or {}
+    if idempotency_key is None and aggregate_id is None:
+        idempotency_key = f"{aggregate_type}:{uuid.uuid4().hex}"
+    elif idempotency_key is None:
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        prefix = f"{aggregate_type}:{aggregate_id}:{event_type}:{digest}:"
+        seq_res = await db.execute(
+            select(func.count(OutboxEvent.id)).where(
+                OutboxEvent.aggregate_type == aggregate_type,
+                OutboxEvent.aggregate_id == aggregate_id,
+                OutboxEvent.idempotency_key.startswith(prefix, autoescape=True),
+            )
+        )
+        idempotency_key = f"{prefix}{seq_res.scalar() or 0}"
+
+    values = dict(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        status="PENDING",
+        next_attempt_at=now_kst(),
+    )
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # 동시 중복 요청: IntegrityError 대신 아무것도 하지 않고 기존 행을 조회
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        await db.execute(
+            insert_fn(OutboxEvent).values(**values).on_conflict_do_nothing(index_elements=["idempotency_key"])
+        )
+    else:
+        existing = await db.execute(select(OutboxEvent).where(OutboxEvent.idempotency_key == idempotency_key))
+        if existing.scalars().first() is None:
+            db.add(OutboxEvent(**values))
+            await db.flush()
+
+    result = await db.execute(select(OutboxEvent).where(OutboxEvent.idempotency_key == idempotency_key))
+    return result.scalars().one()
+
+
+def wake_outbox_consumer() -> None:
+    """커밋 직후 호출하면 소비자가 폴링 주기를 기다리지 않고 바로 처리합니다."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(MAX_BACKOFF_SECONDS, 10 * (2 ** max(0, attempts - 1)))
+
+
+async def _claim(db: AsyncSession, event_id: int) -> bool:
+    now = now_kst()
+    stale = now - timedelta(minutes=STALE_LOCK_MINUTES)
+    result = await db.execute(
+        update(OutboxEvent)
+        .where(
+            OutboxEvent.id == event_id,
+            or_(
+                OutboxEvent.status == "PENDING",
+                and_(OutboxEvent.status == "PROCESSING", OutboxEvent.locked_at < stale),
+            )
+        )
+        .values(status="PROCESSING", locked_at=now)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _process_event(event_id: int) -> bool:
+    from app.api.deps import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if not await _claim(db, event_id):
+            return False
+
+        event = await db.get(OutboxEvent, event_id)
+        handler = EVENT_HANDLERS.get(event.event_type)
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for {event.event_type}")
+            await handler(db, dict(event.payload or {}))
+            event.status = "DONE"
+            event.attempts = (event.attempts or 0) + 1
+            event.processed_at = now_kst()
+            event.locked_at = None
+            event.last_error = None
+            await db.commit()
+            return True
+        except Exception as e:
+            await db.rollback()
+            event = await db.get(OutboxEvent, event_id)
+            attempts = (event.attempts or 0) + 1
+            event.attempts = attempts
+            event.last_error = str(e)[:2000]
+            event.locked_at = None
+            if attempts >= (event.max_attempts or 1):
+                event.status = "FAILED"
+                logger.error(f"[outbox] event {event_id} ({event.event_type}) failed permanently: {e}")
+            else:
+                event.status = "PENDING"
+                event.next_attempt_at = now_kst() + timedelta(seconds=_backoff_seconds(attempts))
+                logger.warning(f"[outbox] event {event_id} ({event.event_type}) failed, retry #{attempts}: {e}")
+            await db.commit()
+            return False
+
+
+async def process_outbox_batch(limit: int = BATCH_SIZE) -> int:
+    """
+    처리 가능한 이벤트를 id 순으로 처리합니다.
+    같은 집계에 먼저 기록된 미완료 이벤트가 있으면 뒤 이벤트는 건너뜁니다(순서 보장).
+    """
+    from app.api.deps import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        now = now_kst()
+        stale = now - timedelta(minutes=STALE_LOCK_MINUTES)
+        due_res = await db.execute(
+            select(OutboxEvent.id, OutboxEvent.aggregate_type, OutboxEvent.aggregate_id)
+            .where(
+                or_(
+                    and_(OutboxEvent.status == "PENDING", OutboxEvent.next_attempt_at <= now),
+                    and_(OutboxEvent.status == "PROCESSING", OutboxEvent.locked_at < stale),
+                )
+            )
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        due = due_res.all()
+        if not due:
+            return 0
+
+        aggregates = {(a_type, a_id) for _, a_type, a_id in due}
+        blocking_res = await db.execute(
+            select(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id, func.min(OutboxEvent.id))
+            .where(
+                OutboxEvent.status.in_(["PENDING", "PROCESSING", "FAILED"]),
+                OutboxEvent.aggregate_type.in_({a[0] for a in aggregates}),
+            )
+            .group_by(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id)
+        )
+        head_of_aggregate = {(a_type, a_id): min_id for a_type, a_id, min_id in blocking_res.all()}
+
+    processed = 0
+    blocked = set()
+    for event_id, a_type, a_id in due:
+        key = (a_type, a_id)
+        if a_id is not None and (key in blocked or head_of_aggregate.get(key, event_id) < event_id):
+            continue
+        ok = await _process_event(event_id)
+        if ok:
+            processed += 1
+        else:
+            blocked.add(key)
+    return processed
+
+
+async def run_outbox_consumer() -> None:
+    """앱 수명 동안 동작하는 소비자 루프."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    print("Backend: Outbox consumer started.")
+    while True:
+        try:
+            while await process_outbox_batch() > 0:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[outbox] consumer loop error: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_outbox_consumer() -> None:
+    global _consumer_task
+    if _consumer_task is None or _consumer_task.done():
+        _consumer_task = asyncio.create_task(run_outbox_consumer())
+
+
+def stop_outbox_consumer() -> None:
+    global _consumer_task
+    if _consumer_task is not None:
+        _consumer_task.cancel()
+        _consumer_task = None
+
+
+# --- Built-in handlers ---
+
+@outbox_handler("notification.production_manager")
+async def _notify_production_manager(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    from app.utils.push import notify_production_manager
+    await notify_production_manager(
+        title=payload.get("title", ""),
+        body=payload.get("body", ""),
+        url=payload.get("url", "/"),
+    )
+
+
+async def enqueue_production_manager_notice(db: AsyncSession, title: str, body: str, url: str = "/") -> OutboxEvent:
+    return await enqueue_event(
+        db, "notification.production_manager", "notification", None,
+        {"title": title, "body": body, "url": url},
+    )
@@ -0,0 +1,137 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, case, and_, or_
+from app.models.production import ProductionPlanItem, WorkLog, WorkLogItem, WorkerDailyPerformance
+from app.models.product import Product
+from app.core.timezone import now_kst
+from datetime import date
+from typing import Iterable, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PerformanceKey = Tuple[int, date]  # (worker_id, work_date)
+
+
+def _calc_unit_price():
+    # 실적 단가가 없으면 공정 총비용 / 수량으로 대체 (기존 실적 조회와 동일한 규칙)
+    return case(
+        (WorkLogItem.unit_price > 0, WorkLogItem.unit_price),
+        (ProductionPlanItem.quantity > 0, ProductionPlanItem.cost / ProductionPlanItem.quantity),
+        else_=0
+    )
+
+
+def _rollup_select():
+    return (
+        select(
+            WorkLogItem.worker_id,
+            WorkLog.work_date,
+            Product.group_id,
+            func.coalesce(func.sum(WorkLogItem.good_quantity), 0),
+            func.coalesce(func.sum(WorkLogItem.bad_quantity), 0),
+            func.coalesce(func.sum(WorkLogItem.good_quantity * _calc_unit_price()), 0),
+            func.count(WorkLogItem.id),
+        )
+        .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)
+        .join(ProductionPlanItem, WorkLogItem.plan_item_id == ProductionPlanItem.id)
+        .join(Product, ProductionPlanItem.product_id == Product.id)
+        .where(WorkLogItem.worker_id.isnot(None))
+        .group_by(WorkLogItem.worker_id, WorkLog.work_date, Product.group_id)
+    )
+
+
+def _add_rollup_rows(db: AsyncSession, rows, keys: Optional[Set[PerformanceKey]] = None) -> int:
+    computed_at = now_kst()
+    count = 0
+    for worker_id, work_date, group_id, good, bad, cost, item_count in rows:
+        if keys is not None and (worker_id, work_date) not in keys:
+            continue
+        db.add(WorkerDailyPerformance(
+            worker_id=worker_id,
+            work_date=work_date,
+            product_group_id=group_id,
+            good_quantity=int(good or 0),
+            bad_quantity=int(bad or 0),
+            total_cost=float(cost or 0),
+            item_count=int(item_count or 0),
+            updated_at=computed_at,
+        ))
+        count += 1
+    return count
+
+
+async def get_performance_keys(
+    db: AsyncSession,
+    work_log_ids: Optional[Iterable[int]] = None,
+    plan_item_ids: Optional[Iterable[int]] = None,
+    item_ids: Optional[Iterable[int]] = None,
+) -> Set[PerformanceKey]:
+    """
+    주어진 작업일지/공정/실적 항목이 걸쳐 있는 (작업자, 작업일) 키 목록을 조회합니다.
+    변경 전/후에 각각 호출해 합집합을 refresh_worker_daily_performance 에 넘기면 됩니다.
+    """
+    conditions = []
+    if work_log_ids:
+        conditions.append(WorkLogItem.work_log_id.in_(list(work_log_ids)))
+    if plan_item_ids:
+        conditions.append(WorkLogItem.plan_item_id.in_(list(plan_item_ids)))
+    if item_ids:
+        conditions.append(WorkLogItem.id.in_(list(item_ids)))
+    if not conditions:
+        return set()
+
+    result = await db.execute(
+        select(WorkLogItem.worker_id, WorkLog.work_date)
+        .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)
+        .where(WorkLogItem.worker_id.isnot(None), or_(*conditions))
+        .distinct()
+    )
+    return {(w, d) for w, d in result.all()}
+
+
+async def refresh_worker_daily_performance(db: AsyncSession, keys: Set[PerformanceKey]) -> int:
+    """
+    (작업자, 작업일) 키에 해당하는 일별 실적 집계를 원본 작업일지로부터 다시 계산합니다.
+    커밋은 호출자가 수행합니다.
+    """
+    keys = {k for k in keys if k[0] is not None and k[1] is not None}
+    if not keys:
+        return 0
+
+    await db.flush()
+    worker_ids = {k[0] for k in keys}
+    work_dates = {k[1] for k in keys}
+
+    key_filter = or_(*[
+        and_(WorkerDailyPerformance.worker_id == w, WorkerDailyPerformance.work_date == d)
+        for w, d in keys
+    ])
+    await db.execute(delete(WorkerDailyPerformance).where(key_filter))
+
+    result = await db.execute(
+        _rollup_select().where(
+            WorkLogItem.worker_id.in_(worker_ids),
+            WorkLog.work_date.in_(work_dates),
+        )
+    )
+    return _add_rollup_rows(db, result.all(), keys)
+
+
+async def rebuild_worker_daily_performance(db: AsyncSession) -> int:
+    """
+    일별 작업자 실적 집계 전체 재구축 (초기 적재 및 야간 정합성 보정용)
+    """
+    await db.execute(delete(WorkerDailyPerformance))
+    result = await db.execute(_rollup_select())
+    count = _add_rollup_rows(db, result.all())
+    await db.commit()
+    logger.info(f"Worker daily performance rebuilt: {count} rows.")
+    return count
+
+
+def group_filter_ids(major_group_id: int):
+    """
+    대분류 ID 기준 그룹 필터용 하위 그룹 ID 서브쿼리 (깊이 제한 없음)
+    """
+    from app.api.utils.product_groups import group_descendant_ids
+    return group_descendant_ids(major_group_id)
@@ -0,0 +1,216 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, literal
+from app.models.product import Product, ProductPriceHistory, ProductLatestPrice
+from app.models.sales import Estimate, EstimateItem, SalesOrder, SalesOrderItem
+from app.models.purchasing import PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem
+from app.core.timezone import now_kst
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SALES = "SALES"
+SOURCE_ESTIMATE = "ESTIMATE"
+SOURCE_PURCHASE = "PURCHASE"
+SOURCE_OUTSOURCING = "OUTSOURCING"
+SOURCE_MANUAL = "MANUAL"
+ALL_SOURCES = [SOURCE_SALES, SOURCE_ESTIMATE, SOURCE_PURCHASE, SOURCE_OUTSOURCING, SOURCE_MANUAL]
+
+# 품목 목록의 latest_price 규칙 (기존 이력 API 와 동일)
+# 자재류: 발주 + 수동 이력 / 그 외: 견적 + 수주. 같은 날짜면 앞 순서 출처 우선
+PURCHASED_ITEM_TYPES = ["PART", "CONSUMABLE", "RAW_MATERIAL"]
+PURCHASE_PRICE_SOURCES = [SOURCE_PURCHASE, SOURCE_MANUAL]
+SALES_PRICE_SOURCES = [SOURCE_ESTIMATE, SOURCE_SALES]
+
+
+def _source_queries(product_ids: Optional[List[int]], sources: List[str]):
+    """
+    출처별 (product_id, partner_id, unit_price, currency, price_date, reference_no, row_id) 조회문
+    거래처가 없는 주문 행은 기존 이력 조회(Partner inner join)와 동일하게 제외합니다.
+    """
+    queries = []
+    if SOURCE_SALES in sources:
+        q = select(
+            SalesOrderItem.product_id, SalesOrder.partner_id, SalesOrderItem.unit_price, SalesOrderItem.currency,
+            SalesOrder.order_date, SalesOrder.order_no, SalesOrderItem.id,
+        ).join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)\
+         .where(SalesOrderItem.product_id.isnot(None), SalesOrder.partner_id.isnot(None))
+        if product_ids is not None:
+            q = q.where(SalesOrderItem.product_id.in_(product_ids))
+        queries.append((SOURCE_SALES, q))
+    if SOURCE_ESTIMATE in sources:
+        q = select(
+            EstimateItem.product_id, Estimate.partner_id, EstimateItem.unit_price, EstimateItem.currency,
+            Estimate.estimate_date, literal(None), EstimateItem.id,
+        ).join(Estimate, EstimateItem.estimate_id == Estimate.id)\
+         .where(EstimateItem.product_id.isnot(None), Estimate.partner_id.isnot(None))
+        if product_ids is not None:
+            q = q.where(EstimateItem.product_id.in_(product_ids))
+        queries.append((SOURCE_ESTIMATE, q))
+    if SOURCE_PURCHASE in sources:
+        q = select(
+            PurchaseOrderItem.product_id, PurchaseOrder.partner_id, PurchaseOrderItem.unit_price, PurchaseOrderItem.currency,
+            PurchaseOrder.order_date, PurchaseOrder.order_no, PurchaseOrderItem.id,
+        ).join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)\
+         .where(PurchaseOrderItem.product_id.isnot(None), PurchaseOrder.partner_id.isnot(None))
+        if product_ids is not None:
+            q = q.where(PurchaseOrderItem.product_id.in_(product_ids))
+        queries.append((SOURCE_PURCHASE, q))
+    if SOURCE_OUTSOURCING in sources:
+        q = select(
+            OutsourcingOrderItem.product_id, OutsourcingOrder.partner_id, OutsourcingOrderItem.unit_price, literal("KRW"),
+            OutsourcingOrder.order_date, OutsourcingOrder.order_no, OutsourcingOrderItem.id,
+        ).join(OutsourcingOrder, OutsourcingOrderItem.outsourcing_order_id == OutsourcingOrder.id)\
+         .where(OutsourcingOrderItem.product_id.isnot(None), OutsourcingOrder.partner_id.isnot(None))
+        if product_ids is not None:
+            q = q.where(OutsourcingOrderItem.product_id.in_(product_ids))
+        queries.append((SOURCE_OUTSOURCING, q))
+    if SOURCE_MANUAL in sources:
+        q = select(
+            ProductPriceHistory.product_id, literal(None), ProductPriceHistory.price, ProductPriceHistory.currency,
+            ProductPriceHistory.date, ProductPriceHistory.note, ProductPriceHistory.id,
+        )
+        if product_ids is not None:
+            q = q.where(ProductPriceHistory.product_id.in_(product_ids))
+        queries.append((SOURCE_MANUAL, q))
+    return queries
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+async def refresh_latest_prices(
+    db: AsyncSession,
+    product_ids: Optional[Iterable[int]] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    주어진 품목(생략 시 전체)의 최근 단가 행을 원본 거래로부터 다시 계산합니다.
+    견적/수주/발주/외주 저장 시 커밋 전에 호출합니다 (커밋은 호출자).
+    """
+    sources = [s for s in (sources or ALL_SOURCES) if s in ALL_SOURCES]
+    if product_ids is not None:
+        product_ids = sorted({pid for pid in product_ids if pid})
+        if not product_ids:
+            return 0
+    if not sources:
+        return 0
+
+    await db.flush()
+
+    stmt = delete(ProductLatestPrice).where(ProductLatestPrice.source.in_(sources))
+    if product_ids is not None:
+        stmt = stmt.where(ProductLatestPrice.product_id.in_(product_ids))
+    await db.execute(stmt)
+
+    updated_at = now_kst()
+    count = 0
+    for source, query in _source_queries(product_ids, sources):
+        latest: Dict[Tuple[int, Optional[int]], tuple] = {}
+        for product_id, partner_id, unit_price, currency, price_date, reference_no, row_id in (await db.execute(query)).all():
+            key = (product_id, partner_id)
+            sort_key = (_as_date(price_date) or date.min, row_id)
+            current = latest.get(key)
+            if current is None or sort_key > current[0]:
+                latest[key] = (sort_key, unit_price, currency, _as_date(price_date), reference_no)
+
+        for (product_id, partner_id), (_, unit_price, currency, price_date, reference_no) in latest.items():
+            db.add(ProductLatestPrice(
+                product_id=product_id,
+                partner_id=partner_id,
+                source=source,
+                unit_price=unit_price or 0.0,
+                currency=currency or "KRW",
+                price_date=price_date,
+                reference_no=reference_no,
+                updated_at=updated_at,
+            ))
+            count += 1
+    await db.flush()
+    return count
+
+
+async def rebuild_latest_prices(db: AsyncSession) -> int:
+    """최근 단가 테이블 전체 재구축 (초기 적재 및 야간 정합성 보정용)"""
+    count = await refresh_latest_prices(db)
+    await db.commit()
+    logger.info(f"Product latest prices rebuilt: {count} rows.")
+    return count
+
+
+def _pick_latest(rows: List[ProductLatestPrice], source_order: List[str]) -> Optional[ProductLatestPrice]:
+    best = None
+    best_key = None
+    for row in rows:
+        if row.source not in source_order:
+            continue
+        key = (row.price_date or date.min, -source_order.index(row.source))
+        if best is None or key > best_key:
+            best, best_key = row, key
+    return best
+
+
+async def get_latest_prices_for_products(db: AsyncSession, products: List[Product]) -> Dict[int, float]:
+    """
+    품목 목록 응답용 latest_price (품목 유형별 출처 규칙 적용) 를 한 번의 조회로 계산합니다.
+    """
+    if not products:
+        return {}
+    result = await db.execute(
+        select(ProductLatestPrice).where(ProductLatestPrice.product_id.in_([p.id for p in products]))
+    )
+    by_product: Dict[int, List[ProductLatestPrice]] = {}
+    for row in result.scalars().all():
+        by_product.setdefault(row.product_id, []).append(row)
+
+    prices = {}
+    for p in products:
+        source_order = PURCHASE_PRICE_SOURCES if p.item_type in PURCHASED_ITEM_TYPES else SALES_PRICE_SOURCES
+        best = _pick_latest(by_product.get(p.id, []), source_order)
+        prices[p.id] = best.unit_price if best else 0.0
+    return prices
+
+
+async def get_recent_prices(db: AsyncSession, partner_id: int, product_ids: List[int]) -> Dict[int, dict]:
+    """
+    거래처 기준 품목별 최근 판매 단가 일괄 조회.
+    우선순위: 최근 수주 → 최근 견적 → 품목 등록 단가(recent_price)
+    """
+    product_ids = sorted({pid for pid in product_ids if pid})
+    if not product_ids:
+        return {}
+    result = await db.execute(
+        select(ProductLatestPrice).where(
+            ProductLatestPrice.partner_id == partner_id,
+            ProductLatestPrice.product_id.in_(product_ids),
+            ProductLatestPrice.source.in_([SOURCE_SALES, SOURCE_ESTIMATE]),
+        )
+    )
+    found: Dict[int, Dict[str, ProductLatestPrice]] = {}
+    for row in result.scalars().all():
+        found.setdefault(row.product_id, {})[row.source] = row
+
+    missing = [pid for pid in product_ids if pid not in found]
+    defaults = {}
+    if missing:
+        d_res = await db.execute(select(Product.id, Product.recent_price).where(Product.id.in_(missing)))
+        defaults = {pid: price for pid, price in d_res.all()}
+
+    prices = {}
+    for pid in product_ids:
+        rows = found.get(pid, {})
+        if SOURCE_SALES in rows:
+            r = rows[SOURCE_SALES]
+            prices[pid] = {"price": r.unit_price, "source": "order", "date": r.price_date}
+        elif SOURCE_ESTIMATE in rows:
+            r = rows[SOURCE_ESTIMATE]
+            prices[pid] = {"price": r.unit_price, "source": "estimate", "date": r.price_date}
+        elif defaults.get(pid) and defaults[pid] > 0:
+            prices[pid] = {"price": defaults[pid], "source": "product_default", "date": None}
+        else:
+            prices[pid] = {"price": 0, "source": None}
+    return prices
@@ -0,0 +1,156 @@
+"""
+품목 그룹 계층 (closure 테이블 + 품목 최상위 그룹)
+
+- product_group_closure: 모든 (조상, 자손, 깊이) 쌍 — 깊이 제한 없이 "그룹 x 와 그 하위 전체" 를
+  ancestor_id = x 한 번의 인덱스 조회로 구합니다. (기존 ProductGroup.id == x OR parent_id == x 는 2단계까지만 지원)
+- products.major_group_id: group_id 의 루트 그룹. 정산 사실/집계처럼 대그룹 단위로 묶는 경로는
+  ProductGroup 조인 없이 이 컬럼을 씁니다.
+
+그룹 생성/수정/삭제(app/api/endpoints/product.py)는 refresh_group_hierarchy() 로 closure 와
+영향받은 품목의 major_group_id 를 다시 계산하고, 품목 생성/그룹 변경은 flush 이벤트에서 major_group_id 를 채웁니다.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import event, select, delete, insert, update, or_, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product, ProductGroup, ProductGroupClosure
+
+CHUNK_SIZE = 500
+
+_listeners_installed = False
+
+
+# --- 필터 헬퍼 ---
+
+def group_descendant_ids(group_id: int):
+    """그룹 자신 + 모든 하위 그룹 id 서브쿼리"""
+    return select(ProductGroupClosure.descendant_id).where(ProductGroupClosure.ancestor_id == group_id)
+
+
+def product_group_filter(group_id: int, group_column=None):
+    """
+    그룹 필터 조건: group_column(기본 Product.group_id) 이 그룹 자신 또는 하위 그룹
+    예) query.join(Product, ...).where(product_group_filter(major_group_id))
+    """
+    column = Product.group_id if group_column is None else group_column
+    return column.in_(group_descendant_ids(group_id))
+
+
+def product_ids_in_group(group_id: int):
+    """그룹(하위 포함)에 속한 품목 id 서브쿼리"""
+    return select(Product.id).where(product_group_filter(group_id))
+
+
+# --- 계층 재구성 ---
+
+def _ancestors(group_id: int, parents: Dict[int, Optional[int]]) -> List[int]:
+    """자기 자신부터 루트까지 (순환 참조는 끊음)"""
+    chain, seen = [], set()
+    current = group_id
+    while current is not None and current in parents and current not in seen:
+        chain.append(current)
+        seen.add(current)
+        current = parents[current]
+    return chain
+
+
+async def _parent_map(db: AsyncSession) -> Dict[int, Optional[int]]:
+    res = await db.execute(select(ProductGroup.id, ProductGroup.parent_id))
+    return dict(res.all())
+
+
+async def validate_group_parent(db: AsyncSession, group_id: int, parent_id: Optional[int]) -> None:
+    """parent_id 가 자기 자신이나 하위 그룹이면 400"""
+    if parent_id is None:
+        return
+    parents = await _parent_map(db)
+    if parent_id not in parents:
+        raise HTTPException(status_code=400, detail="상위 그룹을 찾을 수 없습니다.")
+    if group_id in _ancestors(parent_id, parents):
+        raise HTTPException(status_code=400, detail="자기 자신이나 하위 그룹을 상위 그룹으로 지정할 수 없습니다.")
+
+
+async def refresh_group_hierarchy(db: AsyncSession) -> int:
+    """
+    closure 테이블 전체 재구성 + 루트가 바뀐 품목의 major_group_id 갱신 (커밋은 호출자).
+    그룹 수는 적으므로 전체를 다시 만들고, 품목은 값이 달라진 행만 UPDATE 합니다.
+    """
+    parents = await _parent_map(db)
+    rows = []
+    roots_by_group: Dict[int, int] = {}
+    for group_id in parents:
+        chain = _ancestors(group_id, parents)
+        roots_by_group[group_id] = chain[-1]
+        rows.extend({"ancestor_id": a, "descendant_id": group_id, "depth": depth} for depth, a in enumerate(chain))
+
+    await db.execute(delete(ProductGroupClosure))
+    for i in range(0, len(rows), CHUNK_SIZE):
+        await db.execute(insert(ProductGroupClosure), rows[i:i + CHUNK_SIZE])
+
+    groups_by_root: Dict[int, List[int]] = defaultdict(list)
+    for group_id, root_id in roots_by_group.items():
+        groups_by_root[root_id].append(group_id)
+    for root_id, group_ids in groups_by_root.items():
+        await db.execute(
+            update(Product)
+            .where(
+                Product.group_id.in_(group_ids),
+                or_(Product.major_group_id.is_(None), Product.major_group_id != root_id),
+            )
+            .values(major_group_id=root_id)
+            .execution_options(synchronize_session=False)
+        )
+    # 그룹 미지정/삭제된 그룹을 가리키는 품목
+    await db.execute(
+        update(Product)
+        .where(
+            Product.major_group_id.isnot(None),
+            or_(Product.group_id.is_(None), Product.group_id.notin_(list(parents) or [0])),
+        )
+        .values(major_group_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    return len(rows)
+
+
+# --- Session events: 품목 생성/그룹 변경 시 major_group_id ---
+
+def _group_changed(obj) -> bool:
+    try:
+        return bool(inspect(obj).attrs.group_id.history.has_changes())
+    except Exception:
+        return False
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    targets = [obj for obj in session.new if isinstance(obj, Product)]
+    targets += [obj for obj in session.dirty if isinstance(obj, Product) and _group_changed(obj)]
+    if not targets:
+        return
+    group_ids: Set[int] = {obj.group_id for obj in targets if obj.group_id}
+    roots: Dict[int, int] = {}
+    if group_ids:
+        with session.no_autoflush:
+            res = session.execute(
+                select(ProductGroupClosure.descendant_id, ProductGroupClosure.ancestor_id)
+                .where(ProductGroupClosure.descendant_id.in_(group_ids))
+                .order_by(ProductGroupClosure.depth)
+            )
+            # 깊이 순으로 덮어쓰므로 마지막 값이 가장 먼 조상(루트)
+            roots = dict(res.all())
+    for obj in targets:
+        # closure 에 아직 없는 새 그룹은 해당 그룹 저장 시 refresh_group_hierarchy 가 채움
+        obj.major_group_id = roots.get(obj.group_id) if obj.group_id else None
+
+
+def install_product_group_listeners() -> None:
+    """앱 시작 시 1회: 품목 flush 시 major_group_id 를 채우는 세션 이벤트 등록"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    _listeners_installed = True
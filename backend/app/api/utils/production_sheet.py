@@ -0,0 +1,432 @@
+"""
+생산관리시트 엑셀 생성 (백그라운드 프로세스 풀)
+
+openpyxl 셀 단위 작성은 CPU 바운드라 이벤트 루프에서 돌리면 다른 요청이 모두 멈춥니다.
+- ORM 객체는 요청 세션에서 순수 dict(payload)로 변환하고,
+- 실제 워크북 작성은 ProcessPoolExecutor 에서 수행하며,
+- 결과는 plan id + updated_at + 내용 지문(cache_key)으로 첨부 목록에 기록해
+  변경 없는 재출력은 즉시 기존 파일을 반환합니다.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import urllib.parse
+import uuid
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.timezone import now_kst
+from app.models.production import ProductionPlan, ProductionPlanItem
+from app.models.sales import SalesOrder
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = "uploads/production"
+
+_executor: Optional[ProcessPoolExecutor] = None
+# job_id -> {"job_id", "plan_id", "status", "attachment", "error", "created_at", "finished_at"}
+_jobs: Dict[str, Dict[str, Any]] = {}
+# cache_key -> job_id (동일 내용 중복 생성 방지)
+_running_keys: Dict[str, str] = {}
+_tasks: set = set()
+
+MAX_FINISHED_JOBS = 200
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, settings.EXPORT_WORKERS))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# --- 1. Payload (ORM -> dict) ---
+
+async def load_plan_for_sheet(db, plan_id: int) -> Optional[ProductionPlan]:
+    result = await db.execute(
+        select(ProductionPlan)
+        .options(
+            selectinload(ProductionPlan.items).selectinload(ProductionPlanItem.product),
+            selectinload(ProductionPlan.order).selectinload(SalesOrder.partner)
+        )
+        .where(ProductionPlan.id == plan_id)
+    )
+    return result.scalars().first()
+
+
+def build_sheet_payload(plan: ProductionPlan) -> Dict[str, Any]:
+    """
+    워크북 작성에 필요한 값만 추려 프로세스 간 전달 가능한 dict 로 변환합니다.
+    """
+    metadata = {}
+    if plan.sheet_metadata:
+        try:
+            metadata = json.loads(plan.sheet_metadata) if isinstance(plan.sheet_metadata, str) else plan.sheet_metadata
+        except Exception:
+            pass
+
+    order = plan.order
+    unique_products = []
+    seen = set()
+    for item in plan.items:
+        if item.product and item.product.id not in seen:
+            seen.add(item.product.id)
+            unique_products.append({
+                "name": item.product.name,
+                "specification": item.product.specification,
+                "material": item.product.material,
+                "quantity": item.quantity,
+            })
+
+    return {
+        "plan_id": plan.id,
+        "partner_name": order.partner.name if order and order.partner else "-",
+        "order_date": str(order.order_date) if order and order.order_date else "-",
+        "delivery_date": str(order.delivery_date) if order and order.delivery_date else "-",
+        "order_amount": metadata.get('order_amount', str(order.total_amount) if order else "-"),
+        "manager": metadata.get('manager', "-"),
+        "memo": metadata.get('memo', ""),
+        "products": unique_products,
+        "items": [
+            {
+                "course_type": item.course_type,
+                "sequence": item.sequence,
+                "process_name": item.process_name,
+                "note": item.note,
+                "partner_name": item.partner_name,
+                "quantity": item.quantity,
+                "start_date": str(item.start_date) if item.start_date else None,
+                "end_date": str(item.end_date) if item.end_date else None,
+            }
+            for item in plan.items
+        ],
+    }
+
+
+def sheet_cache_key(plan: ProductionPlan, payload: Dict[str, Any]) -> str:
+    """
+    plan id + updated_at + 내용 지문.
+    공정/품목 변경은 계획 헤더 updated_at 을 갱신하지 않는 경우가 있어 내용 해시를 함께 씁니다.
+    """
+    digest = hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+    updated = plan.updated_at.strftime('%Y%m%d%H%M%S') if plan.updated_at else "0"
+    return f"{plan.id}:{updated}:{digest}"
+
+
+def _normalize_attachments(raw) -> List[Any]:
+    if not raw:
+        return []
+    try:
+        attachments = json.loads(raw) if isinstance(raw, str) else raw
+    except Exception:
+        return []
+    if not isinstance(attachments, list):
+        attachments = [attachments]
+    return list(attachments)
+
+
+def find_cached_attachment(plan: ProductionPlan, cache_key: str) -> Optional[Dict[str, Any]]:
+    for att in _normalize_attachments(plan.attachment_file):
+        if isinstance(att, dict) and att.get("cache_key") == cache_key:
+            path = os.path.join(UPLOAD_DIR, urllib.parse.unquote(att.get("url", "").rsplit("/", 1)[-1]))
+            if os.path.exists(path):
+                return att
+    return None
+
+
+# --- 2. Workbook rendering (runs in worker process) ---
+
+def render_production_sheet(payload: Dict[str, Any], file_path: str) -> str:
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "생산관리시트"
+
+    # Define Styles
+    header_font = Font(name='Malgun Gothic', size=14, bold=True)
+    bold_font = Font(name='Malgun Gothic', size=10, bold=True)
+    normal_font = Font(name='Malgun Gothic', size=10)
+
+    center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    left_align = Alignment(horizontal='left', vertical='center', wrap_text=True)
+
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    gray_fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
+
+    def style_range(ws, cell_range, border=thin_border, font=normal_font, alignment=center_align, fill=None):
+        for row in ws[cell_range]:
+            for cell in row:
+                cell.border = border
+                cell.font = font
+                cell.alignment = alignment
+                if fill:
+                    cell.fill = fill
+
+    col_widths = {'A': 10, 'B': 10, 'C': 15, 'D': 25, 'E': 15, 'F': 12, 'G': 12, 'H': 10, 'I': 10, 'J': 10}
+    for col, width in col_widths.items():
+        ws.column_dimensions[col].width = width
+
+    ws.merge_cells('A1:J2')
+    title_cell = ws['A1']
+    title_cell.value = "생산관리시트"
+    title_cell.font = header_font
+    title_cell.alignment = center_align
+
+    ws.merge_cells('B4:E4')
+    ws.merge_cells('G4:J4')
+    ws['A4'] = "고객"
+    ws['B4'] = payload["partner_name"]
+    ws['F4'] = "수주일"
+    ws['G4'] = payload["order_date"]
+
+    ws.merge_cells('B5:E5')
+    ws.merge_cells('G5:J5')
+    ws['A5'] = "품명"
+    unique_products = payload["products"]
+
+    summary_prod_name = "-"
+    if unique_products:
+        summary_prod_name = unique_products[0]["name"]
+        if len(unique_products) > 1:
+            summary_prod_name += f" 외 {len(unique_products) - 1}건"
+
+    ws['B5'] = summary_prod_name
+    ws['F5'] = "요구납기일"
+    ws['G5'] = payload["delivery_date"]
+
+    ws.merge_cells('B6:E6')
+    ws.merge_cells('G6:J6')
+    ws['A6'] = "수주금액"
+    ws['B6'] = payload["order_amount"]
+    ws['F6'] = "수주담당자"
+    ws['G6'] = payload["manager"]
+
+    style_range(ws, 'A4:A6', font=bold_font, fill=gray_fill)
+    style_range(ws, 'F4:F6', font=bold_font, fill=gray_fill)
+    style_range(ws, 'A4:J6')
+
+    start_row = 8
+    ws.merge_cells(f'A{start_row}:C{start_row}')
+    ws.merge_cells(f'D{start_row}:F{start_row}')
+    ws.merge_cells(f'G{start_row}:H{start_row}')
+    ws.merge_cells(f'I{start_row}:J{start_row}')
+
+    ws[f'A{start_row}'] = "품명"
+    ws[f'D{start_row}'] = "규격"
+    ws[f'G{start_row}'] = "재질"
+    ws[f'I{start_row}'] = "수량"
+    style_range(ws, f'A{start_row}:J{start_row}', font=bold_font, fill=gray_fill)
+
+    curr_row = start_row + 1
+    for prod_info in unique_products:
+        ws.merge_cells(f'A{curr_row}:C{curr_row}')
+        ws.merge_cells(f'D{curr_row}:F{curr_row}')
+        ws.merge_cells(f'G{curr_row}:H{curr_row}')
+        ws.merge_cells(f'I{curr_row}:J{curr_row}')
+
+        ws[f'A{curr_row}'] = prod_info["name"]
+        ws[f'D{curr_row}'] = prod_info["specification"] or "-"
+        ws[f'G{curr_row}'] = prod_info["material"] or "-"
+        ws[f'I{curr_row}'] = prod_info["quantity"]
+
+        style_range(ws, f'A{curr_row}:J{curr_row}', alignment=center_align)
+        ws[f'A{curr_row}'].alignment = left_align
+        curr_row += 1
+
+    while curr_row < start_row + 4:
+        ws.merge_cells(f'A{curr_row}:C{curr_row}')
+        ws.merge_cells(f'D{curr_row}:F{curr_row}')
+        ws.merge_cells(f'G{curr_row}:H{curr_row}')
+        ws.merge_cells(f'I{curr_row}:J{curr_row}')
+        style_range(ws, f'A{curr_row}:J{curr_row}')
+        curr_row += 1
+
+    memo_row = curr_row + 1
+    ws.merge_cells(f'A{memo_row}:A{memo_row+1}')
+    ws.merge_cells(f'B{memo_row}:J{memo_row+1}')
+    ws[f'A{memo_row}'] = "Memo"
+    ws[f'B{memo_row}'] = payload["memo"]
+    style_range(ws, f'A{memo_row}:A{memo_row+1}', font=bold_font, fill=gray_fill)
+    style_range(ws, f'B{memo_row}:J{memo_row+1}', alignment=left_align)
+
+    proc_start_row = memo_row + 3
+    headers = ["구분", "순번", "공정", "공정내용", "업체", "품명", "규격", "수량", "시작", "종료"]
+    for i, h in enumerate(headers):
+        cell = ws.cell(row=proc_start_row, column=i+1, value=h)
+        cell.font = bold_font
+        cell.fill = gray_fill
+        cell.border = thin_border
+        cell.alignment = center_align
+
+    proc_row = proc_start_row + 1
+    def get_type_label(ctype):
+        if not ctype: return "-"
+        if "INTERNAL" in ctype or "자가" in ctype: return "자가"
+        if "OUTSOURCING" in ctype or "외주" in ctype: return "외주"
+        if "PURCHASE" in ctype or "구매" in ctype: return "구매"
+        return ctype
+
+    for idx, item in enumerate(payload["items"]):
+        ws.cell(row=proc_row, column=1, value=get_type_label(item["course_type"]))
+        ws.cell(row=proc_row, column=2, value=item["sequence"] or (idx + 1))
+        ws.cell(row=proc_row, column=3, value=item["process_name"] or "-")
+
+        note_cell = ws.cell(row=proc_row, column=4, value=item["note"] or "-")
+        note_cell.alignment = left_align
+
+        partner_cell = ws.cell(row=proc_row, column=5, value=item["partner_name"] or "-")
+        partner_cell.alignment = left_align
+
+        ws.cell(row=proc_row, column=6, value="-")
+        ws.cell(row=proc_row, column=7, value="-")
+        ws.cell(row=proc_row, column=8, value=item["quantity"])
+        ws.cell(row=proc_row, column=9, value=item["start_date"] or "-")
+        ws.cell(row=proc_row, column=10, value=item["end_date"] or "-")
+
+        style_range(ws, f'A{proc_row}:J{proc_row}')
+        proc_row += 1
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = file_path + ".tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+# --- 3. Job orchestration ---
+
+async def _attach_to_plan(db, plan_id: int, attachment: Dict[str, Any]) -> None:
+    """
+    첨부 목록에 결과 파일을 추가합니다.
+    updated_at 을 그대로 유지해야 다음 재출력에서 캐시 키가 일치합니다.
+    """
+    plan = await db.get(ProductionPlan, plan_id)
+    if not plan:
+        return
+    current = _normalize_attachments(plan.attachment_file)
+    current = [a for a in current if not (isinstance(a, dict) and a.get("url") == attachment["url"])]
+    current.append(attachment)
+    await db.execute(
+        update(ProductionPlan)
+        .where(ProductionPlan.id == plan_id)
+        .values(attachment_file=current, updated_at=ProductionPlan.updated_at)
+    )
+    await db.commit()
+    await db.refresh(plan)
+
+
+async def generate_sheet(db, plan: ProductionPlan) -> Dict[str, Any]:
+    """
+    캐시 확인 후 없으면 프로세스 풀에서 생성하고 첨부까지 마친 뒤 attachment dict 를 반환합니다.
+    이벤트 루프는 블로킹되지 않습니다.
+    """
+    payload = build_sheet_payload(plan)
+    cache_key = sheet_cache_key(plan, payload)
+    cached = find_cached_attachment(plan, cache_key)
+    if cached:
+        return cached
+
+    filename = f"ProductionSheet_{plan.id}_{now_kst().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    file_path = os.path.join(UPLOAD_DIR, filename)
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_get_executor(), render_production_sheet, payload, file_path)
+
+    attachment = {
+        "url": f"/uploads/production/{urllib.parse.quote(filename)}",
+        "name": filename,
+        "cache_key": cache_key,
+    }
+    await _attach_to_plan(db, plan.id, attachment)
+    return attachment
+
+
+def _prune_jobs() -> None:
+    finished = [j for j in _jobs.values() if j["status"] in ("COMPLETED", "FAILED")]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda j: j["finished_at"] or j["created_at"])
+    for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+        _jobs.pop(job["job_id"], None)
+
+
+async def _run_job(job_id: str, plan_id: int, cache_key: str) -> None:
+    from app.api.deps import AsyncSessionLocal
+
+    job = _jobs[job_id]
+    job["status"] = "RUNNING"
+    try:
+        async with AsyncSessionLocal() as db:
+            plan = await load_plan_for_sheet(db, plan_id)
+            if not plan:
+                raise ValueError("Production Plan not found")
+            job["attachment"] = await generate_sheet(db, plan)
+        job["status"] = "COMPLETED"
+    except Exception as e:
+        logger.warning(f"[production_sheet] job {job_id} for plan {plan_id} failed: {e}")
+        job["status"] = "FAILED"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = datetime.now()
+        _running_keys.pop(cache_key, None)
+        _prune_jobs()
+
+
+async def submit_sheet_job(db, plan: ProductionPlan) -> Dict[str, Any]:
+    """
+    백그라운드 생성 작업을 등록하고 작업 상태를 반환합니다.
+    캐시 적중 시 즉시 COMPLETED 상태로 반환하고, 동일 내용 작업이 진행 중이면 그 작업을 재사용합니다.
+    """
+    payload = build_sheet_payload(plan)
+    cache_key = sheet_cache_key(plan, payload)
+
+    now = datetime.now()
+    cached = find_cached_attachment(plan, cache_key)
+    if cached:
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            "job_id": job_id, "plan_id": plan.id, "status": "COMPLETED", "cached": True,
+            "attachment": cached, "error": None, "created_at": now, "finished_at": now,
+        }
+        _prune_jobs()
+        return _jobs[job_id]
+
+    running_id = _running_keys.get(cache_key)
+    if running_id and running_id in _jobs:
+        return _jobs[running_id]
+
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = {
+        "job_id": job_id, "plan_id": plan.id, "status": "PENDING", "cached": False,
+        "attachment": None, "error": None, "created_at": now, "finished_at": None,
+    }
+    _running_keys[cache_key] = job_id
+    task = asyncio.create_task(_run_job(job_id, plan.id, cache_key))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return _jobs[job_id]
+
+
+def get_sheet_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return _jobs.get(job_id)
@@ -0,0 +1,433 @@
+"""
+품질 분석 집계 (불량 파레토 / 공정별 불량률 / 고객불만 추이)
+
+- quality_defect_daily: 발생일 × 품목 × 공정 × 작업자 × 불량 사유 불량 수량/금액/건수
+- quality_process_output_daily: 작업일 × 품목 × 공정 × 작업자 작업일지 양품/불량 수량 (불량률 분모)
+- quality_complaint_daily: 접수일 × 거래처 × 처리상태 고객불만 건수
+
+QualityDefect / CustomerComplaint / WorkLog / WorkLogItem 변경은 세션 flush 이벤트로 영향받은 일자(또는 작업일지/공정 id)를
+quality_rollup_dirty 에 같은 트랜잭션으로 기록하고, 품질 분석 API 가 조회 직전에 sync_quality_rollups() 로
+해당 일자만 다시 집계합니다. 벌크 UPDATE/DELETE 와 공정 삭제는 전체 재구축(ALL)으로 처리하며,
+매일 새벽 rebuild_quality_rollups() 가 원본 기준으로 전체를 재구축해 누락을 보정합니다.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import select, delete, insert, func, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.basics import Partner, Staff
+from app.models.product import Product
+from app.models.production import ProductionPlanItem, WorkLog, WorkLogItem
+from app.models.quality import (
+    QualityDefect, CustomerComplaint,
+    QualityDefectDaily, QualityProcessOutputDaily, QualityComplaintDaily, QualityRollupDirty,
+)
+from app.core.timezone import now_kst
+from app.api.utils.date_ranges import in_range
+from app.api.utils.dirty_queue import (
+    DirtyQueue, register_dirty_queue, install_dirty_queue_listeners, as_date, chunks, history_values, attrs_changed,
+)
+from app.api.utils.product_groups import product_group_filter
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DEFECT = "DEFECT"
+ROLLUP_OUTPUT = "OUTPUT"
+ROLLUP_COMPLAINT = "COMPLAINT"
+
+
+# --- Session events: 영향받은 일자 기록 ---
+
+def _marks_of(obj, bucket: str) -> Set[Tuple[str, Optional[date], Optional[int]]]:
+    if isinstance(obj, QualityDefect):
+        dates = {as_date(v) for v in history_values(obj, "defect_date")} or {now_kst().date()}
+        return {(ROLLUP_DEFECT, d, None) for d in dates if d}
+    if isinstance(obj, CustomerComplaint):
+        dates = {as_date(v) for v in history_values(obj, "receipt_date")} or {now_kst().date()}
+        return {(ROLLUP_COMPLAINT, d, None) for d in dates if d}
+    if isinstance(obj, WorkLog):
+        return {(ROLLUP_OUTPUT, as_date(v), None) for v in history_values(obj, "work_date") if as_date(v)}
+    if isinstance(obj, WorkLogItem):
+        return {("WORKLOG", None, wid) for wid in history_values(obj, "work_log_id")}
+    if isinstance(obj, ProductionPlanItem):
+        if bucket == "deleted":
+            return {("ALL", None, None)}  # 불량/작업일지 행은 DB 의 ON DELETE CASCADE 로 함께 지워짐
+        if bucket == "dirty" and obj.id and attrs_changed(obj, _PLAN_ITEM_COLUMNS):
+            return {("PLAN_ITEM", None, obj.id)}
+    return set()
+
+
+_TRACKED_MODELS = (QualityDefect, CustomerComplaint, WorkLog, WorkLogItem, ProductionPlanItem)
+
+# 공정의 이 컬럼이 바뀌면 해당 공정의 불량/실적 집계 차원이 바뀜
+_PLAN_ITEM_COLUMNS = ("product_id", "process_name", "worker_id")
+
+_QUEUE = DirtyQueue(
+    name="quality_rollup_pending",
+    tracked_models=_TRACKED_MODELS,
+    keys_of=_marks_of,
+    make_row=lambda key: QualityRollupDirty(rollup=key[0], key_date=key[1], ref_id=key[2]),
+    all_key=("ALL", None, None),
+    # 공정 상태/비용 일괄 변경은 품질 집계에 영향 없음
+    watched_columns={ProductionPlanItem: set(_PLAN_ITEM_COLUMNS)},
+)
+
+
+def install_quality_rollup_listeners() -> None:
+    """앱 시작 시 1회: 품질 원본 변경 일자를 quality_rollup_dirty 에 기록하는 세션 이벤트 등록"""
+    register_dirty_queue(_QUEUE)
+    install_dirty_queue_listeners()
+
+
+# --- 집계 ---
+
+async def _refresh_defects(db: AsyncSession, dates: Optional[Set[date]]) -> int:
+    """발생일별 불량 집계 재계산 (dates=None 이면 전체). 발생일이 DateTime 이라 행 단위로 읽어 일자별로 묶습니다."""
+    query = select(
+        QualityDefect.defect_date, ProductionPlanItem.product_id, ProductionPlanItem.process_name,
+        ProductionPlanItem.worker_id, QualityDefect.defect_reason, QualityDefect.quantity, QualityDefect.amount,
+    ).outerjoin(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)
+    batches = [None] if dates is None else list(chunks(sorted(dates)))
+
+    count = 0
+    for chunk in batches:
+        if chunk is None:
+            await db.execute(delete(QualityDefectDaily))
+            rows = (await db.execute(query)).all()
+        else:
+            await db.execute(delete(QualityDefectDaily).where(QualityDefectDaily.defect_date.in_(chunk)))
+            wanted = set(chunk)
+            res = await db.execute(query.where(
+                in_range(QualityDefect.defect_date, chunk[0], chunk[-1] + timedelta(days=1), is_datetime=True)
+            ))
+            rows = [r for r in res.all() if as_date(r[0]) in wanted]
+
+        totals: Dict[tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+        for defect_date, product_id, process_name, worker_id, reason, quantity, amount in rows:
+            d = as_date(defect_date)
+            if not d:
+                continue
+            key = (d, product_id, process_name, worker_id, (reason or "").strip() or None)
+            totals[key][0] += 1
+            totals[key][1] += int(quantity or 0)
+            totals[key][2] += float(amount or 0)
+        values = [
+            {
+                "defect_date": d, "product_id": product_id, "process_name": process_name, "worker_id": worker_id,
+                "defect_reason": reason, "defect_count": n, "quantity": qty, "amount": amt,
+            }
+            for (d, product_id, process_name, worker_id, reason), (n, qty, amt) in totals.items()
+        ]
+        for part in chunks(values):
+            await db.execute(insert(QualityDefectDaily), part)
+        count += len(values)
+    return count
+
+
+_OUTPUT_DIMENSIONS = (
+    WorkLog.work_date, ProductionPlanItem.product_id, ProductionPlanItem.process_name, WorkLogItem.worker_id,
+)
+
+
+def _output_select():
+    return (
+        select(
+            *_OUTPUT_DIMENSIONS,
+            func.coalesce(func.sum(WorkLogItem.good_quantity), 0),
+            func.coalesce(func.sum(WorkLogItem.bad_quantity), 0),
+            func.count(WorkLogItem.id),
+        )
+        .join(WorkLog, WorkLogItem.work_log_id == WorkLog.id)
+        .join(ProductionPlanItem, WorkLogItem.plan_item_id == ProductionPlanItem.id)
+        .group_by(*_OUTPUT_DIMENSIONS)
+    )
+
+
+_OUTPUT_COLUMNS = ["work_date", "product_id", "process_name", "worker_id", "good_quantity", "bad_quantity", "item_count"]
+
+
+async def _refresh_output(db: AsyncSession, dates: Optional[Set[date]]) -> None:
+    O = QualityProcessOutputDaily
+    if dates is None:
+        await db.execute(delete(O))
+        await db.execute(insert(O).from_select(_OUTPUT_COLUMNS, _output_select()))
+        return
+    for chunk in chunks(sorted(dates)):
+        await db.execute(delete(O).where(O.work_date.in_(chunk)))
+        await db.execute(insert(O).from_select(_OUTPUT_COLUMNS, _output_select().where(WorkLog.work_date.in_(chunk))))
+
+
+def _complaint_select():
+    C = CustomerComplaint
+    return select(
+        C.receipt_date, C.partner_id, C.status, func.count(C.id),
+    ).where(C.receipt_date.isnot(None)).group_by(C.receipt_date, C.partner_id, C.status)
+
+
+_COMPLAINT_COLUMNS = ["receipt_date", "partner_id", "status", "complaint_count"]
+
+
+async def _refresh_complaints(db: AsyncSession, dates: Optional[Set[date]]) -> None:
+    R = QualityComplaintDaily
+    if dates is None:
+        await db.execute(delete(R))
+        await db.execute(insert(R).from_select(_COMPLAINT_COLUMNS, _complaint_select()))
+        return
+    for chunk in chunks(sorted(dates)):
+        await db.execute(delete(R).where(R.receipt_date.in_(chunk)))
+        await db.execute(insert(R).from_select(
+            _COMPLAINT_COLUMNS, _complaint_select().where(CustomerComplaint.receipt_date.in_(chunk)),
+        ))
+
+
+async def rebuild_quality_rollups(db: AsyncSession) -> int:
+    """품질 분석 집계 전체 재구축 (초기 적재 및 야간 정합성 보정용, 커밋 포함)"""
+    max_dirty = (await db.execute(select(func.max(QualityRollupDirty.id)))).scalar()
+    count = await _refresh_defects(db, None)
+    await _refresh_output(db, None)
+    await _refresh_complaints(db, None)
+    if max_dirty:
+        await db.execute(delete(QualityRollupDirty).where(QualityRollupDirty.id <= max_dirty))
+    await db.commit()
+    logger.info(f"Quality rollups rebuilt: {count} defect rows.")
+    return count
+
+
+async def _plan_item_dates(db: AsyncSession, plan_item_ids: List[int]) -> Tuple[Set[date], Set[date]]:
+    """공정 id → (불량 발생일, 작업일) 목록"""
+    defect_dates, work_dates = set(), set()
+    for chunk in chunks(plan_item_ids):
+        res = await db.execute(
+            select(QualityDefect.defect_date).where(QualityDefect.plan_item_id.in_(chunk)).distinct()
+        )
+        defect_dates.update(d for d in (as_date(v) for v in res.scalars().all()) if d)
+        res = await db.execute(
+            select(WorkLog.work_date).join(WorkLogItem, WorkLogItem.work_log_id == WorkLog.id)
+            .where(WorkLogItem.plan_item_id.in_(chunk)).distinct()
+        )
+        work_dates.update(d for d in (as_date(v) for v in res.scalars().all()) if d)
+    return defect_dates, work_dates
+
+
+async def sync_quality_rollups(db: AsyncSession) -> int:
+    """
+    품질 분석 조회 직전 호출: 기록된 일자의 집계만 다시 만들고 커밋합니다.
+    변경이 없으면 대기열 조회 1회로 끝납니다.
+    """
+    if not (await db.execute(select(QualityRollupDirty.id).limit(1))).first():
+        return 0
+    async with _QUEUE.lock:
+        marks = (await db.execute(
+            select(QualityRollupDirty.id, QualityRollupDirty.rollup, QualityRollupDirty.key_date, QualityRollupDirty.ref_id)
+        )).all()
+        if not marks:
+            return 0
+        if any(rollup == "ALL" for _, rollup, _, _ in marks):
+            return await rebuild_quality_rollups(db)
+
+        dates: Dict[str, Set[date]] = defaultdict(set)
+        work_log_ids, plan_item_ids = set(), set()
+        for _, rollup, key_date, ref_id in marks:
+            if rollup == "WORKLOG" and ref_id:
+                work_log_ids.add(ref_id)
+            elif rollup == "PLAN_ITEM" and ref_id:
+                plan_item_ids.add(ref_id)
+            elif key_date:
+                dates[rollup].add(as_date(key_date))
+
+        # 작업일지 항목 변경 → 작업일지의 작업일 (삭제된 작업일지는 WorkLog 삭제 시 작업일이 기록됨)
+        for chunk in chunks(sorted(work_log_ids)):
+            res = await db.execute(select(WorkLog.work_date).where(WorkLog.id.in_(chunk)))
+            dates[ROLLUP_OUTPUT].update(d for d in (as_date(v) for v in res.scalars().all()) if d)
+        if plan_item_ids:
+            defect_dates, work_dates = await _plan_item_dates(db, sorted(plan_item_ids))
+            dates[ROLLUP_DEFECT].update(defect_dates)
+            dates[ROLLUP_OUTPUT].update(work_dates)
+
+        if dates.get(ROLLUP_DEFECT):
+            await _refresh_defects(db, dates[ROLLUP_DEFECT])
+        if dates.get(ROLLUP_OUTPUT):
+            await _refresh_output(db, dates[ROLLUP_OUTPUT])
+        if dates.get(ROLLUP_COMPLAINT):
+            await _refresh_complaints(db, dates[ROLLUP_COMPLAINT])
+
+        for chunk in chunks([mark_id for mark_id, _, _, _ in marks]):
+            await db.execute(delete(QualityRollupDirty).where(QualityRollupDirty.id.in_(chunk)))
+        await db.commit()
+        return sum(len(v) for v in dates.values())
+
+
+# --- 조회 ---
+
+PARETO_DIMENSIONS = ("reason", "product", "process", "worker")
+PARETO_METRICS = {"quantity": "quantity", "amount": "amount", "count": "defect_count"}
+VITAL_FEW_SHARE = 80.0
+
+
+def _with_product_group(query, product_column, major_group_id: Optional[int]):
+    if not major_group_id:
+        return query
+    return query.where(product_column.in_(select(Product.id).where(product_group_filter(major_group_id))))
+
+
+async def defect_pareto(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    by: str = "reason",
+    metric: str = "quantity",
+    major_group_id: Optional[int] = None,
+    limit: int = 20,
+) -> dict:
+    """
+    불량 파레토: 기준(by)별 합계 내림차순 + 비율/누적비율.
+    누적 80% 에 도달하기까지의 항목을 vital=True 로 표시하고, limit 을 넘는 항목은 '기타' 한 줄로 합칩니다.
+    """
+    F = QualityDefectDaily
+    sums = (
+        func.coalesce(func.sum(F.quantity), 0).label("quantity"),
+        func.coalesce(func.sum(F.amount), 0).label("amount"),
+        func.coalesce(func.sum(F.defect_count), 0).label("defect_count"),
+    )
+    if by == "product":
+        query = select(F.product_id.label("key"), Product.name.label("label"), Product.specification.label("sub_label"), *sums)\
+            .outerjoin(Product, F.product_id == Product.id)\
+            .group_by(F.product_id, Product.name, Product.specification)
+    elif by == "worker":
+        query = select(F.worker_id.label("key"), Staff.name.label("label"), *sums)\
+            .outerjoin(Staff, F.worker_id == Staff.id)\
+            .group_by(F.worker_id, Staff.name)
+    elif by == "process":
+        query = select(F.process_name.label("key"), F.process_name.label("label"), *sums).group_by(F.process_name)
+    else:
+        query = select(F.defect_reason.label("key"), F.defect_reason.label("label"), *sums).group_by(F.defect_reason)
+    query = _with_product_group(query.where(in_range(F.defect_date, start, end)), F.product_id, major_group_id)
+    query = query.order_by(func.sum(getattr(F, PARETO_METRICS[metric])).desc())
+
+    rows = [dict(r._mapping) for r in await db.execute(query)]
+    total = sum(r[PARETO_METRICS[metric]] or 0 for r in rows)
+    if limit and len(rows) > limit:
+        rest = rows[limit:]
+        rows = rows[:limit] + [{
+            "key": None,
+            "label": "기타",
+            "quantity": sum(r["quantity"] or 0 for r in rest),
+            "amount": sum(r["amount"] or 0 for r in rest),
+            "defect_count": sum(r["defect_count"] or 0 for r in rest),
+            "others": len(rest),
+        }]
+
+    cumulative = 0.0
+    items = []
+    for r in rows:
+        value = r[PARETO_METRICS[metric]] or 0
+        share = value / total * 100 if total else 0.0
+        r["label"] = r.get("label") or "미지정"
+        r["value"] = value
+        r["share"] = round(share, 1)
+        r["vital"] = bool(total) and cumulative < VITAL_FEW_SHARE and not r.get("others")
+        cumulative += share
+        r["cumulative_share"] = round(min(cumulative, 100.0), 1)
+        items.append(r)
+    return {"by": by, "metric": metric, "total": total, "items": items}
+
+
+async def process_defect_rates(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    major_group_id: Optional[int] = None,
+) -> list:
+    """
+    공정별 불량률: 불량 등록 수량 ÷ 작업일지 (양품 + 불량) 수량.
+    작업일지 자체의 불량 수량 비율(bad_rate)도 함께 돌려줍니다.
+    """
+    F, O = QualityDefectDaily, QualityProcessOutputDaily
+    defect_q = _with_product_group(
+        select(F.process_name, func.sum(F.quantity), func.sum(F.defect_count), func.sum(F.amount))
+        .where(in_range(F.defect_date, start, end)).group_by(F.process_name),
+        F.product_id, major_group_id,
+    )
+    output_q = _with_product_group(
+        select(O.process_name, func.sum(O.good_quantity), func.sum(O.bad_quantity))
+        .where(in_range(O.work_date, start, end)).group_by(O.process_name),
+        O.product_id, major_group_id,
+    )
+    stats: Dict[Optional[str], dict] = defaultdict(lambda: {
+        "good_quantity": 0, "bad_quantity": 0, "defect_quantity": 0, "defect_count": 0, "defect_amount": 0.0,
+    })
+    for process_name, qty, cnt, amt in (await db.execute(defect_q)).all():
+        s = stats[process_name]
+        s["defect_quantity"], s["defect_count"], s["defect_amount"] = int(qty or 0), int(cnt or 0), float(amt or 0)
+    for process_name, good, bad in (await db.execute(output_q)).all():
+        s = stats[process_name]
+        s["good_quantity"], s["bad_quantity"] = int(good or 0), int(bad or 0)
+
+    result = []
+    for process_name, s in stats.items():
+        produced = s["good_quantity"] + s["bad_quantity"]
+        result.append({
+            "process_name": process_name or "미지정",
+            **s,
+            "produced_quantity": produced,
+            "defect_rate": round(s["defect_quantity"] / produced * 100, 2) if produced else None,
+            "bad_rate": round(s["bad_quantity"] / produced * 100, 2) if produced else None,
+        })
+    result.sort(key=lambda r: (r["defect_rate"] is None, -(r["defect_rate"] or 0), r["process_name"]))
+    return result
+
+
+def _month_keys(start: date, end: date) -> List[str]:
+    keys, current = [], date(start.year, start.month, 1)
+    while current < end:
+        keys.append(f"{current.year:04d}-{current.month:02d}")
+        current = date(current.year + 1, 1, 1) if current.month == 12 else date(current.year, current.month + 1, 1)
+    return keys
+
+
+async def complaint_trends(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    partner_id: Optional[int] = None,
+    top_partners: int = 10,
+) -> dict:
+    """고객불만 월별 접수 건수(상태별) 추이 + 기간 내 거래처별 상위 건수"""
+    R = QualityComplaintDaily
+    in_period = in_range(R.receipt_date, start, end)
+    year_expr, month_expr = extract('year', R.receipt_date), extract('month', R.receipt_date)
+    monthly_q = select(year_expr, month_expr, R.status, func.sum(R.complaint_count))\
+        .where(in_period).group_by(year_expr, month_expr, R.status)
+    if partner_id:
+        monthly_q = monthly_q.where(R.partner_id == partner_id)
+
+    months = {key: {"period": key, "total": 0, "by_status": {}} for key in _month_keys(start, end)}
+    status_totals: Dict[str, int] = defaultdict(int)
+    for year, month, status, count in (await db.execute(monthly_q)).all():
+        key = f"{int(year):04d}-{int(month):02d}"
+        status = getattr(status, "value", status) or "UNKNOWN"
+        if key not in months:
+            continue
+        months[key]["by_status"][status] = months[key]["by_status"].get(status, 0) + int(count or 0)
+        months[key]["total"] += int(count or 0)
+        status_totals[status] += int(count or 0)
+
+    partner_q = select(R.partner_id, Partner.name, func.sum(R.complaint_count).label("count"))\
+        .outerjoin(Partner, R.partner_id == Partner.id)\
+        .where(in_period).group_by(R.partner_id, Partner.name)\
+        .order_by(func.sum(R.complaint_count).desc()).limit(top_partners)
+    if partner_id:
+        partner_q = partner_q.where(R.partner_id == partner_id)
+    partners = [
+        {"partner_id": pid, "partner_name": name, "count": int(count or 0)}
+        for pid, name, count in (await db.execute(partner_q)).all()
+    ]
+    return {
+        "total": sum(status_totals.values()),
+        "by_status": dict(status_totals),
+        "monthly": list(months.values()),
+        "partners": partners,
+    }
@@ -0,0 +1,162 @@
+"""
+정산/리포트 응답 캐시 (이벤트 무효화 + ETag/304)
+
+- 무효화 기준: settlement_period_versions 의 (구분, 월) 버전.
+  정산 사실 갱신(settlement_facts._refresh_daily)이 바뀐 (구분, 일자) 의 월·구분 전체("*") 버전을 올리고,
+  전체 재구축이나 거래처/품목명 변경은 ("ALL", "*") 버전을 올립니다.
+  납품/입고 완료/생산 완료/불량 등록 등 원본 변경은 모두 settlement_dirty_docs → sync_settlement_facts 를 거치므로
+  캐시된 기간에 닿는 변경만 해당 응답을 무효화합니다.
+- ETag = 엔드포인트·파라미터 + 의존 버전의 해시. If-None-Match 가 같으면 본문 없이 304.
+- 응답 본문은 프로세스별 LRU 에 보관 (버전이 DB 에 있으므로 여러 워커에서도 일관됩니다).
+
+사용:
+    cache = await lookup_report(request, db, "sales", kind_periods([KIND_SALES], year, month), year=year, month=month)
+    if cache.response:
+        return cache.response
+    ...
+    return cache.respond(data)
+"""
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import hashlib
+import json
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update, insert, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.settlement import SettlementPeriodVersion
+
+ALL_PERIODS = "*"
+GLOBAL_KEY = ("ALL", ALL_PERIODS)
+
+# cache key -> (etag, JSON 본문)
+_entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+
+
+def month_key(value: date) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def kind_periods(kinds: Iterable[str], year: Optional[int] = None, month: Optional[int] = None) -> List[Tuple[str, str]]:
+    """조회 기간 → 의존 (구분, 월) 목록. 연도가 없으면 구분 전체("*")"""
+    if year and month:
+        periods = [f"{year:04d}-{month:02d}"]
+    elif year:
+        periods = [f"{year:04d}-{m:02d}" for m in range(1, 13)]
+    else:
+        periods = [ALL_PERIODS]
+    return [(kind, period) for kind in kinds for period in periods]
+
+
+async def _bump(db: AsyncSession, keys: Set[Tuple[str, str]]) -> None:
+    for kind, period in sorted(keys):
+        res = await db.execute(
+            update(SettlementPeriodVersion)
+            .where(SettlementPeriodVersion.kind == kind, SettlementPeriodVersion.period == period)
+            .values(version=SettlementPeriodVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if not res.rowcount:
+            await db.execute(insert(SettlementPeriodVersion).values(kind=kind, period=period, version=1))
+
+
+async def bump_period_versions(db: AsyncSession, pairs: Iterable[Tuple[str, date]]) -> None:
+    """사실 행이 바뀐 (구분, 일자) → 해당 월과 구분 전체 버전 증가 (커밋은 호출자)"""
+    keys: Set[Tuple[str, str]] = set()
+    for kind, fact_date in pairs:
+        if fact_date is None:
+            continue
+        if isinstance(fact_date, str):
+            fact_date = date.fromisoformat(fact_date[:10])
+        keys.add((kind, month_key(fact_date)))
+        keys.add((kind, ALL_PERIODS))
+    if keys:
+        await _bump(db, keys)
+
+
+async def bump_global_version(db: AsyncSession) -> None:
+    """전체 재구축/거래처·품목명 변경: 모든 캐시 응답 무효화 (커밋은 호출자)"""
+    await _bump(db, {GLOBAL_KEY})
+
+
+async def _current_versions(db: AsyncSession, deps: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    keys = sorted(set(deps) | {GLOBAL_KEY})
+    by_kind: Dict[str, List[str]] = {}
+    for kind, period in keys:
+        by_kind.setdefault(kind, []).append(period)
+    res = await db.execute(
+        select(SettlementPeriodVersion.kind, SettlementPeriodVersion.period, SettlementPeriodVersion.version)
+        .where(or_(*[
+            and_(SettlementPeriodVersion.kind == kind, SettlementPeriodVersion.period.in_(periods))
+            for kind, periods in by_kind.items()
+        ]))
+    )
+    found = {(k, p): v for k, p, v in res.all()}
+    return {key: found.get(key, 0) or 0 for key in keys}
+
+
+class ReportCacheHit:
+    """lookup_report 결과: response 가 있으면 그대로 반환, 없으면 계산 후 respond(data)"""
+
+    def __init__(self, key: str, etag: str, response: Optional[Response] = None):
+        self.key = key
+        self.etag = etag
+        self.response = response
+
+    def respond(self, data: Any) -> Response:
+        body = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if settings.REPORT_CACHE_MAX_ENTRIES > 0:
+            _entries[self.key] = (self.etag, body)
+            _entries.move_to_end(self.key)
+            while len(_entries) > settings.REPORT_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+        return _json_response(body, self.etag)
+
+
+def _headers(etag: str) -> Dict[str, str]:
+    # 브라우저는 보관하되 매번 ETag 로 재검증
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers=_headers(etag))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+async def lookup_report(
+    request: Request,
+    db: AsyncSession,
+    name: str,
+    deps: List[Tuple[str, str]],
+    **params,
+) -> ReportCacheHit:
+    """
+    정산 사실 동기화 후 의존 버전으로 ETag 를 만들고,
+    브라우저 캐시가 최신이면 304, 서버 캐시가 최신이면 저장된 본문 응답을 돌려줍니다.
+    """
+    from app.api.utils.settlement_facts import sync_settlement_facts
+
+    await sync_settlement_facts(db)
+    key = name + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+    versions = await _current_versions(db, deps)
+    stamp = ";".join(f"{k}:{p}={v}" for (k, p), v in sorted(versions.items()))
+    etag = '"' + hashlib.sha1(f"{key}|{stamp}".encode("utf-8")).hexdigest()[:32] + '"'
+
+    if _etag_matches(request, etag):
+        return ReportCacheHit(key, etag, Response(status_code=304, headers=_headers(etag)))
+    entry = _entries.get(key)
+    if entry and entry[0] == etag:
+        _entries.move_to_end(key)
+        return ReportCacheHit(key, etag, _json_response(entry[1], etag))
+    return ReportCacheHit(key, etag)
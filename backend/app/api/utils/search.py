@@ -0,0 +1,257 @@
+"""
+검색 인덱스 (품목명/규격, 거래처명, 수주/발주/외주/납품 번호)
+
+- PostgreSQL: pg_trgm 확장 + GIN 트라이그램 인덱스 → 기존 ILIKE '%어%' 조건이 인덱스를 탑니다.
+- SQLite: FTS5(trigram tokenizer) 섀도 테이블 search_fts 를 트리거로 동기화하고 MATCH 로 조회합니다.
+  (3글자 미만 검색어는 트라이그램으로 찾을 수 없으므로 원본 테이블 LIKE 로 대체)
+
+필터에서는 product_search_ids()/partner_search_ids() 가 반환하는 id 서브쿼리를 IN 조건으로 사용하고,
+타입어헤드는 typeahead() 로 유사도/순위 정렬된 결과를 얻습니다.
+"""
+from typing import Any, Dict, List, Optional
+import logging
+
+from sqlalchemy import select, or_, func, literal, literal_column, text, table, column, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.models.basics import Partner
+from app.models.sales import SalesOrder, DeliveryHistory
+from app.models.purchasing import PurchaseOrder, OutsourcingOrder
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "search_fts"
+TRIGRAM_MIN_LENGTH = 3
+
+# 엔티티 → (테이블, 라벨 컬럼, 보조 컬럼)
+SEARCH_SOURCES = {
+    "product": ("products", "name", "specification"),
+    "partner": ("partners", "name", None),
+    "sales_order": ("sales_orders", "order_no", None),
+    "purchase_order": ("purchase_orders", "order_no", None),
+    "outsourcing_order": ("outsourcing_orders", "order_no", None),
+    "delivery": ("delivery_histories", "delivery_no", None),
+}
+
+# Postgres 트라이그램 인덱스 대상 (테이블, 컬럼)
+TRIGRAM_COLUMNS = [
+    ("products", "name"),
+    ("products", "specification"),
+    ("partners", "name"),
+    ("sales_orders", "order_no"),
+    ("purchase_orders", "order_no"),
+    ("outsourcing_orders", "order_no"),
+    ("delivery_histories", "delivery_no"),
+]
+
+_dialect: Optional[str] = None
+_fts_ready = False
+
+_fts = table(FTS_TABLE, column("entity_type"), column("entity_id"), column("label"), column("detail"))
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _fts_phrase(term: str) -> str:
+    # 트라이그램 토크나이저에서 따옴표 구문은 부분 문자열 일치로 동작
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _use_fts(term: str) -> bool:
+    return _fts_ready and len(term) >= TRIGRAM_MIN_LENGTH
+
+
+def _fts_ids(entity_type: str, term: str):
+    return (
+        select(_fts.c.entity_id)
+        .where(_fts.c.entity_type == entity_type)
+        .where(text(f"{FTS_TABLE} MATCH :fts_q").bindparams(fts_q=_fts_phrase(term)))
+    )
+
+
+def product_search_ids(term: str):
+    """품목명/규격 검색 → products.id 서브쿼리"""
+    term = (term or "").strip()
+    if _use_fts(term):
+        return _fts_ids("product", term)
+    pattern = _like_pattern(term)
+    return select(Product.id).where(
+        or_(Product.name.ilike(pattern, escape="\\"), Product.specification.ilike(pattern, escape="\\"))
+    )
+
+
+def product_name_search_ids(term: str):
+    """품목명만 검색 (규격 제외) → products.id 서브쿼리"""
+    term = (term or "").strip()
+    if _use_fts(term):
+        # FTS 는 이름/규격을 별도 컬럼으로 보관하므로 label 컬럼으로 한정
+        return (
+            select(_fts.c.entity_id)
+            .where(_fts.c.entity_type == "product")
+            .where(text(f"{FTS_TABLE} MATCH :fts_q").bindparams(fts_q="label : " + _fts_phrase(term)))
+        )
+    return select(Product.id).where(Product.name.ilike(_like_pattern(term), escape="\\"))
+
+
+def partner_search_ids(term: str):
+    """거래처명 검색 → partners.id 서브쿼리"""
+    term = (term or "").strip()
+    if _use_fts(term):
+        return _fts_ids("partner", term)
+    return select(Partner.id).where(Partner.name.ilike(_like_pattern(term), escape="\\"))
+
+
+async def init_search_index(db: AsyncSession) -> None:
+    """
+    앱 시작 시 1회 호출: DB 종류에 맞는 검색 인덱스를 준비합니다.
+    실패해도 필터는 ILIKE 로 동작하므로 치명적이지 않습니다.
+    """
+    global _dialect, _fts_ready
+    _dialect = db.get_bind().dialect.name
+
+    if _dialect == "postgresql":
+        try:
+            await db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for tbl, col in TRIGRAM_COLUMNS:
+                await db.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{tbl}_{col}_trgm ON {tbl} USING gin ({col} gin_trgm_ops)"
+                ))
+            await db.commit()
+            print("Startup: pg_trgm search indexes ready")
+        except Exception as e:
+            await db.rollback()
+            print(f"Startup: pg_trgm search index setup failed (ILIKE fallback): {e}")
+        return
+
+    if _dialect == "sqlite":
+        try:
+            await db.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "entity_type UNINDEXED, entity_id UNINDEXED, label, detail, tokenize='trigram')"
+            ))
+            for entity_type, (tbl, label_col, detail_col) in SEARCH_SOURCES.items():
+                detail_new = f"COALESCE(NEW.{detail_col}, '')" if detail_col else "''"
+                await db.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{FTS_TABLE}_{tbl}_ai AFTER INSERT ON {tbl} BEGIN "
+                    f"INSERT INTO {FTS_TABLE}(entity_type, entity_id, label, detail) "
+                    f"VALUES ('{entity_type}', NEW.id, COALESCE(NEW.{label_col}, ''), {detail_new}); END"
+                ))
+                await db.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{FTS_TABLE}_{tbl}_au AFTER UPDATE ON {tbl} BEGIN "
+                    f"DELETE FROM {FTS_TABLE} WHERE entity_type = '{entity_type}' AND entity_id = OLD.id; "
+                    f"INSERT INTO {FTS_TABLE}(entity_type, entity_id, label, detail) "
+                    f"VALUES ('{entity_type}', NEW.id, COALESCE(NEW.{label_col}, ''), {detail_new}); END"
+                ))
+                await db.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{FTS_TABLE}_{tbl}_ad AFTER DELETE ON {tbl} BEGIN "
+                    f"DELETE FROM {FTS_TABLE} WHERE entity_type = '{entity_type}' AND entity_id = OLD.id; END"
+                ))
+            await db.commit()
+
+            # 섀도 테이블이 비어 있으면(최초 도입 시) 원본으로부터 적재
+            indexed = (await db.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}"))).scalar()
+            if not indexed:
+                await rebuild_search_index(db)
+            _fts_ready = True
+            print("Startup: SQLite FTS5 search index ready")
+        except Exception as e:
+            await db.rollback()
+            _fts_ready = False
+            print(f"Startup: SQLite FTS5 search index setup failed (LIKE fallback): {e}")
+
+
+async def rebuild_search_index(db: AsyncSession) -> int:
+    """SQLite FTS 섀도 테이블 전체 재적재 (Postgres 는 인덱스가 자동 유지되므로 no-op)"""
+    if _dialect != "sqlite":
+        return 0
+    await db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    for entity_type, (tbl, label_col, detail_col) in SEARCH_SOURCES.items():
+        detail_expr = f"COALESCE({detail_col}, '')" if detail_col else "''"
+        await db.execute(text(
+            f"INSERT INTO {FTS_TABLE}(entity_type, entity_id, label, detail) "
+            f"SELECT '{entity_type}', id, COALESCE({label_col}, ''), {detail_expr} FROM {tbl}"
+        ))
+    await db.commit()
+    count = (await db.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}"))).scalar() or 0
+    logger.info(f"Search index rebuilt: {count} rows.")
+    return count
+
+
+def _typeahead_sources():
+    return {
+        "product": (Product.id, Product.name, Product.specification),
+        "partner": (Partner.id, Partner.name, None),
+        "sales_order": (SalesOrder.id, SalesOrder.order_no, None),
+        "purchase_order": (PurchaseOrder.id, PurchaseOrder.order_no, None),
+        "outsourcing_order": (OutsourcingOrder.id, OutsourcingOrder.order_no, None),
+        "delivery": (DeliveryHistory.id, DeliveryHistory.delivery_no, None),
+    }
+
+
+async def typeahead(
+    db: AsyncSession,
+    term: str,
+    types: Optional[List[str]] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    순위가 매겨진 자동완성 결과.
+    점수: 완전 일치 > 접두 일치 > (Postgres: 트라이그램 유사도 / SQLite: FTS bm25) 순.
+    """
+    term = (term or "").strip()
+    if not term:
+        return []
+    sources = _typeahead_sources()
+    types = [t for t in (types or list(sources.keys())) if t in sources]
+    lowered = term.lower()
+
+    results: List[Dict[str, Any]] = []
+    for entity_type in types:
+        id_col, label_col, detail_col = sources[entity_type]
+        prefix_bonus = case(
+            (func.lower(label_col) == lowered, 2.0),
+            (func.lower(label_col).like(_like_pattern(lowered)[1:], escape="\\"), 1.0),
+            else_=0.0,
+        )
+        detail_expr = detail_col if detail_col is not None else literal(None)
+
+        if _dialect == "postgresql":
+            similarity = func.similarity(label_col, term)
+            if detail_col is not None:
+                similarity = func.greatest(similarity, func.coalesce(func.similarity(detail_col, term), 0))
+            score = (prefix_bonus + similarity).label("score")
+            match = label_col.ilike(_like_pattern(term), escape="\\")
+            if detail_col is not None:
+                match = or_(match, detail_col.ilike(_like_pattern(term), escape="\\"))
+            stmt = select(id_col, label_col, detail_expr, score).where(match)
+        elif _use_fts(term):
+            # bm25 는 작을수록 관련도가 높음 → 부호 반전
+            rank = func.bm25(literal_column(FTS_TABLE))
+            stmt = (
+                select(id_col, label_col, detail_expr, (prefix_bonus - rank).label("score"))
+                .join(_fts, (_fts.c.entity_id == id_col) & (_fts.c.entity_type == entity_type))
+                .where(text(f"{FTS_TABLE} MATCH :fts_q").bindparams(fts_q=_fts_phrase(term)))
+            )
+        else:
+            match = label_col.ilike(_like_pattern(term), escape="\\")
+            if detail_col is not None:
+                match = or_(match, detail_col.ilike(_like_pattern(term), escape="\\"))
+            stmt = select(id_col, label_col, detail_expr, prefix_bonus.label("score")).where(match)
+
+        stmt = stmt.order_by(text("score DESC"), func.length(label_col)).limit(limit)
+        rows = (await db.execute(stmt)).all()
+        for entity_id, label, detail, score in rows:
+            results.append({
+                "type": entity_type,
+                "id": entity_id,
+                "label": label,
+                "detail": detail,
+                "score": round(float(score or 0), 4),
+            })
+
+    results.sort(key=lambda r: (-r["score"], len(r["label"] or "")))
+    return results[:limit]
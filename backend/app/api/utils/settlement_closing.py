@@ -0,0 +1,314 @@
+"""
+정산 월 마감 (스냅샷 + 마감 후 변경 이력)
+
+- 마감(close_month): 정산 사실을 최신화한 뒤 해당 월의
+  · 탭별 응답 행(수주/매출/매입/생산/불량/고객불만)을 조회 범위(전체/대그룹별/소모품)마다 settlement_snapshot_rows 에,
+  · 일별 집계(거래처·품목·대그룹별)를 settlement_snapshot_daily 에 복사하고 CLOSED 로 표시합니다.
+- 조회: 마감된 월의 탭 조회는 snapshot_rows(), 차트/연간 실적은 daily_fact_source() 로 스냅샷을 읽고
+  마감되지 않은 월만 실시간 집계합니다.
+- 마감 후 원본(납품/발주 등)이 바뀌면 정산 사실 갱신 시 구분·일자별 변경 전후 수량/원화금액을
+  settlement_closing_audits 에 CHANGE 로 기록합니다. (스냅샷은 그대로, 재개 후 다시 마감하면 반영)
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, delete, insert, func, or_, not_, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import now_kst
+from app.models.product import ProductGroup
+from app.models.settlement import (
+    SettlementDailyFact, SettlementClosing, SettlementSnapshotRow, SettlementSnapshotDaily, SettlementClosingAudit,
+)
+from app.api.utils.date_ranges import period_bounds, in_range
+from app.api.utils.report_cache import month_key, bump_period_versions
+from app.api.utils.settlement_facts import ALL_KINDS, _DAILY_COLUMNS, sync_settlement_facts
+from app.api.utils.streaming_export import ExportSource
+from app.api.utils import settlement_queries as q
+
+STATUS_CLOSED = "CLOSED"
+STATUS_OPEN = "OPEN"
+
+CLOSING_TABS = ["orders", "sales", "purchases", "production", "defects", "complaints"]
+CONSUMABLE_DEPT = "소모품"
+
+CHUNK_SIZE = 500
+
+
+def _period_of(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def _bounds_of(period: str) -> Tuple[date, date]:
+    year, month = period.split("-")
+    return period_bounds(int(year), int(month))
+
+
+def _merged_ranges(periods: Iterable[str]) -> List[Tuple[date, date]]:
+    """연속된 마감 월은 하나의 [시작, 끝) 범위로 합칩니다"""
+    ranges: List[Tuple[date, date]] = []
+    for start, end in sorted(_bounds_of(p) for p in periods):
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+async def closed_periods(db: AsyncSession) -> Dict[str, int]:
+    """마감된 월 → closing id"""
+    res = await db.execute(
+        select(SettlementClosing.period, SettlementClosing.id).where(SettlementClosing.status == STATUS_CLOSED)
+    )
+    return dict(res.all())
+
+
+# --- 조회: 스냅샷 우선 ---
+
+def snapshot_scope(tab: str, major_group_id: Optional[int] = None, dept: Optional[str] = None) -> str:
+    if tab == "complaints":
+        return ""  # 고객불만은 대그룹 필터를 적용하지 않음
+    if tab == "purchases" and dept:
+        return f"dept:{dept}"
+    if major_group_id:
+        return f"g:{major_group_id}"
+    return ""
+
+
+async def snapshot_rows(
+    db: AsyncSession,
+    tab: str,
+    year: int,
+    month: int,
+    major_group_id: Optional[int] = None,
+    dept: Optional[str] = None,
+) -> Optional[list]:
+    """마감된 월이면 스냅샷 행, 아니면(또는 스냅샷에 없는 조회 범위면) None"""
+    closing = (await db.execute(
+        select(SettlementClosing.id, SettlementClosing.scopes).where(
+            SettlementClosing.period == _period_of(year, month),
+            SettlementClosing.status == STATUS_CLOSED,
+        )
+    )).first()
+    if not closing:
+        return None
+    scope = snapshot_scope(tab, major_group_id, dept)
+    if scope not in ((closing.scopes or {}).get(tab) or []):
+        return None
+    res = await db.execute(
+        select(SettlementSnapshotRow.data).where(
+            SettlementSnapshotRow.closing_id == closing.id,
+            SettlementSnapshotRow.tab == tab,
+            SettlementSnapshotRow.scope == scope,
+        ).order_by(SettlementSnapshotRow.seq)
+    )
+    return list(res.scalars().all())
+
+
+async def daily_fact_source(db: AsyncSession):
+    """
+    차트/연간 실적용 일별 집계 원천: 마감 월은 스냅샷, 나머지는 실시간 일별 집계.
+    SettlementDailyFact 와 같은 컬럼을 가진 FROM 절을 반환합니다 (.c 로 컬럼 접근).
+    """
+    closed = await closed_periods(db)
+    D, S = SettlementDailyFact, SettlementSnapshotDaily
+    if not closed:
+        return D.__table__
+    closed_range = or_(*[in_range(D.fact_date, start, end) for start, end in _merged_ranges(closed)])
+    live = select(*[getattr(D, c) for c in _DAILY_COLUMNS]).where(not_(closed_range))
+    snap = select(*[getattr(S, c) for c in _DAILY_COLUMNS]).where(S.closing_id.in_(list(closed.values())))
+    return union_all(live, snap).subquery("settlement_daily")
+
+
+# --- 마감 / 재개 ---
+
+async def _major_group_ids(db: AsyncSession) -> List[int]:
+    res = await db.execute(select(ProductGroup.id).where(ProductGroup.parent_id.is_(None)).order_by(ProductGroup.id))
+    return list(res.scalars().all())
+
+
+def _tab_scopes(tab: str, major_ids: List[int]) -> List[Tuple[str, Optional[int], Optional[str]]]:
+    """(scope, major_group_id, dept) — 화면에서 쓰는 조회 범위"""
+    if tab == "complaints":
+        return [("", None, None)]
+    scopes = [("", None, None)] + [(f"g:{gid}", gid, None) for gid in major_ids]
+    if tab == "purchases":
+        scopes.append((f"dept:{CONSUMABLE_DEPT}", None, CONSUMABLE_DEPT))
+    return scopes
+
+
+async def _tab_sources(db, tab, start, end, major_group_id, dept) -> List[ExportSource]:
+    if tab == "purchases":
+        return await q.purchase_sources(db, start, end, major_group_id, dept)
+    builders = {
+        "orders": q.orders_query,
+        "sales": q.sales_query,
+        "production": q.production_query,
+        "defects": q.defects_query,
+        "complaints": q.complaints_query,
+    }
+    return [ExportSource(builders[tab](start, end, major_group_id))]
+
+
+async def _tab_rows(db, tab, start, end, major_group_id, dept) -> list:
+    rows = []
+    for source in await _tab_sources(db, tab, start, end, major_group_id, dept):
+        mapper = source.row_mapper or q.row_dict
+        rows.extend(mapper(r) for r in (await db.execute(source.statement)).all())
+    return jsonable_encoder(rows)
+
+
+async def _bump_month(db: AsyncSession, year: int, month: int) -> None:
+    await bump_period_versions(db, [(kind, date(year, month, 1)) for kind in ALL_KINDS])
+
+
+async def close_month(
+    db: AsyncSession, year: int, month: int, staff_id: Optional[int] = None, note: Optional[str] = None,
+) -> SettlementClosing:
+    """월 마감: 탭별/일별 스냅샷 생성 후 CLOSED, 월별 큐브는 스냅샷 기준으로 재집계 (커밋 포함)"""
+    from app.api.utils.settlement_cube import refresh_cube_month
+
+    start, end = period_bounds(year, month)
+    if end > now_kst().date():
+        raise HTTPException(status_code=400, detail="아직 끝나지 않은 월은 마감할 수 없습니다.")
+    period = _period_of(year, month)
+
+    await sync_settlement_facts(db)
+    closing = (await db.execute(select(SettlementClosing).where(SettlementClosing.period == period))).scalar_one_or_none()
+    if closing and closing.status == STATUS_CLOSED:
+        raise HTTPException(status_code=409, detail=f"{period} 은(는) 이미 마감되었습니다.")
+    if not closing:
+        closing = SettlementClosing(period=period)
+        db.add(closing)
+        await db.flush()
+    await _clear_snapshot(db, closing.id)
+
+    major_ids = await _major_group_ids(db)
+    scopes: Dict[str, List[str]] = {}
+    for tab in CLOSING_TABS:
+        scopes[tab] = []
+        for scope, major_group_id, dept in _tab_scopes(tab, major_ids):
+            rows = await _tab_rows(db, tab, start, end, major_group_id, dept)
+            values = [
+                {"closing_id": closing.id, "tab": tab, "scope": scope, "seq": i, "data": row}
+                for i, row in enumerate(rows)
+            ]
+            for i in range(0, len(values), CHUNK_SIZE):
+                await db.execute(insert(SettlementSnapshotRow), values[i:i + CHUNK_SIZE])
+            scopes[tab].append(scope)
+
+    D = SettlementDailyFact
+    await db.execute(insert(SettlementSnapshotDaily).from_select(
+        ["closing_id"] + _DAILY_COLUMNS,
+        select(literal(closing.id), *[getattr(D, c) for c in _DAILY_COLUMNS]).where(in_range(D.fact_date, start, end)),
+    ))
+
+    closing.status = STATUS_CLOSED
+    closing.closed_at = now_kst()
+    closing.closed_by = staff_id
+    closing.note = note
+    closing.scopes = scopes
+    db.add(SettlementClosingAudit(closing_id=closing.id, action="CLOSE", staff_id=staff_id, note=note))
+    await db.flush()
+    await refresh_cube_month(db, year, month)
+    await _bump_month(db, year, month)
+    await db.commit()
+    await db.refresh(closing)
+    return closing
+
+
+async def _clear_snapshot(db: AsyncSession, closing_id: int) -> None:
+    await db.execute(delete(SettlementSnapshotRow).where(SettlementSnapshotRow.closing_id == closing_id))
+    await db.execute(delete(SettlementSnapshotDaily).where(SettlementSnapshotDaily.closing_id == closing_id))
+
+
+async def reopen_month(
+    db: AsyncSession, year: int, month: int, staff_id: Optional[int] = None, note: Optional[str] = None,
+) -> SettlementClosing:
+    """마감 재개: 스냅샷 삭제 후 OPEN, 월별 큐브는 실시간 집계로 재집계 (이력은 유지, 커밋 포함)"""
+    from app.api.utils.settlement_cube import refresh_cube_month
+
+    period = _period_of(year, month)
+    closing = (await db.execute(select(SettlementClosing).where(SettlementClosing.period == period))).scalar_one_or_none()
+    if not closing or closing.status != STATUS_CLOSED:
+        raise HTTPException(status_code=409, detail=f"{period} 은(는) 마감 상태가 아닙니다.")
+
+    await _clear_snapshot(db, closing.id)
+    closing.status = STATUS_OPEN
+    closing.reopened_at = now_kst()
+    closing.reopened_by = staff_id
+    closing.scopes = None
+    db.add(SettlementClosingAudit(closing_id=closing.id, action="REOPEN", staff_id=staff_id, note=note))
+    await db.flush()
+    await refresh_cube_month(db, year, month)
+    await _bump_month(db, year, month)
+    await db.commit()
+    await db.refresh(closing)
+    return closing
+
+
+# --- 마감 후 변경 이력 (settlement_facts 갱신 시 호출) ---
+
+async def _daily_totals(db: AsyncSession, closed: Dict[str, int], pairs: Optional[Set[Tuple[str, date]]]):
+    D = SettlementDailyFact
+    query = select(D.kind, D.fact_date, func.sum(D.quantity), func.sum(D.amount_krw)).group_by(D.kind, D.fact_date)
+    if pairs is None:
+        query = query.where(or_(*[in_range(D.fact_date, s, e) for s, e in _merged_ranges(closed)]))
+        return {(k, d): (qty or 0.0, amt or 0.0) for k, d, qty, amt in (await db.execute(query)).all()}
+
+    totals = {}
+    dates_by_kind: Dict[str, Set[date]] = defaultdict(set)
+    for kind, fact_date in pairs:
+        dates_by_kind[kind].add(fact_date)
+    for kind, dates in dates_by_kind.items():
+        res = await db.execute(query.where(D.kind == kind, D.fact_date.in_(sorted(dates))))
+        totals.update({(k, d): (qty or 0.0, amt or 0.0) for k, d, qty, amt in res.all()})
+    return totals
+
+
+async def begin_post_close_audit(db: AsyncSession, pairs: Optional[Set[Tuple[str, date]]] = None):
+    """
+    일별 집계 갱신 직전: 마감 월에 해당하는 (구분, 일자) 의 현재 합계를 기억합니다.
+    pairs=None 은 전체 재구축 (마감 월 전체). 마감 월과 무관하면 None 반환.
+    """
+    closed = await closed_periods(db)
+    if not closed:
+        return None
+    if pairs is not None:
+        pairs = {(k, d) for k, d in pairs if d and month_key(d) in closed}
+        if not pairs:
+            return None
+    return closed, pairs, await _daily_totals(db, closed, pairs)
+
+
+async def finish_post_close_audit(db: AsyncSession, state, source: Optional[str] = None) -> int:
+    """일별 집계 갱신 직후: 합계가 달라진 (구분, 일자) 를 CHANGE 이력으로 기록 (커밋은 호출자)"""
+    if not state:
+        return 0
+    closed, pairs, before = state
+    after = await _daily_totals(db, closed, pairs)
+    values = []
+    for key in sorted(set(before) | set(after)):
+        qty_before, amt_before = before.get(key, (0.0, 0.0))
+        qty_after, amt_after = after.get(key, (0.0, 0.0))
+        if abs(qty_before - qty_after) < 1e-9 and abs(amt_before - amt_after) < 1e-6:
+            continue
+        kind, fact_date = key
+        values.append({
+            "closing_id": closed[month_key(fact_date)],
+            "action": "CHANGE",
+            "kind": kind,
+            "fact_date": fact_date,
+            "quantity_before": qty_before,
+            "quantity_after": qty_after,
+            "amount_before": amt_before,
+            "amount_after": amt_after,
+            "source": (source or "")[:255] or None,
+            "created_at": now_kst(),
+        })
+    for i in range(0, len(values), CHUNK_SIZE):
+        await db.execute(insert(SettlementClosingAudit), values[i:i + CHUNK_SIZE])
+    return len(values)
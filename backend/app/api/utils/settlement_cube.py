@@ -0,0 +1,120 @@
+"""
+정산 월별 큐브 (연 × 월 × 구분 × 대그룹 × 거래처 × 품목)
+
+- settlement_monthly_cube: 일별 집계(마감 월은 마감 스냅샷)를 월 단위로 한 번 더 묶은 테이블.
+  품목별 연간 실적은 매 요청마다 일별 집계를 월별로 다시 묶지 않고 이 테이블을 SQL 에서 바로 피벗(1~12월 컬럼)합니다.
+- 갱신: settlement_facts 의 일별 집계 갱신(_refresh_daily) 시 바뀐 (구분, 월) 만, 전체 재구축 시 전체,
+  월 마감/재개 시 해당 월을 다시 집계합니다. (커밋은 모두 호출자)
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, insert, func, case, and_, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.basics import Partner
+from app.models.product import Product
+from app.models.settlement import SettlementMonthlyCube
+from app.api.utils.date_ranges import period_bounds, in_range
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.settlement_closing import daily_fact_source
+from app.api.utils.settlement_facts import KIND_DELIVERY
+
+CUBE_KINDS = [KIND_DELIVERY]
+
+_CUBE_COLUMNS = ["kind", "year", "month", "major_group_id", "partner_id", "product_id", "quantity", "amount_krw", "row_count"]
+
+
+def _cube_select(src):
+    D = src.c
+    year_expr = extract('year', D.fact_date)
+    month_expr = extract('month', D.fact_date)
+    return select(
+        D.kind, year_expr, month_expr, D.major_group_id, D.partner_id, D.product_id,
+        func.coalesce(func.sum(D.quantity), 0),
+        func.coalesce(func.sum(D.amount_krw), 0),
+        func.coalesce(func.sum(D.row_count), 0),
+    ).group_by(D.kind, year_expr, month_expr, D.major_group_id, D.partner_id, D.product_id)
+
+
+async def refresh_monthly_cube(db: AsyncSession, pairs: Iterable[Tuple[str, date]]) -> None:
+    """일별 집계가 바뀐 (구분, 일자) → 해당 (구분, 월) 큐브 행 재집계"""
+    months: Set[Tuple[str, int, int]] = set()
+    for kind, fact_date in pairs:
+        if kind not in CUBE_KINDS or not fact_date:
+            continue
+        if isinstance(fact_date, str):
+            fact_date = date.fromisoformat(fact_date[:10])
+        months.add((kind, fact_date.year, fact_date.month))
+    if not months:
+        return
+    src = await daily_fact_source(db)
+    C = SettlementMonthlyCube
+    for kind, year, month in sorted(months):
+        start, end = period_bounds(year, month)
+        await db.execute(delete(C).where(C.kind == kind, C.year == year, C.month == month))
+        await db.execute(insert(C).from_select(
+            _CUBE_COLUMNS,
+            _cube_select(src).where(src.c.kind == kind, in_range(src.c.fact_date, start, end)),
+        ))
+
+
+async def refresh_cube_month(db: AsyncSession, year: int, month: int) -> None:
+    """월 마감/재개: 원천(스냅샷 ↔ 실시간)이 바뀐 월 재집계"""
+    await refresh_monthly_cube(db, [(kind, date(year, month, 1)) for kind in CUBE_KINDS])
+
+
+async def rebuild_monthly_cube(db: AsyncSession) -> None:
+    """큐브 전체 재구축 (정산 사실 전체 재구축 및 최초 적재용)"""
+    src = await daily_fact_source(db)
+    await db.execute(delete(SettlementMonthlyCube))
+    await db.execute(insert(SettlementMonthlyCube).from_select(
+        _CUBE_COLUMNS, _cube_select(src).where(src.c.kind.in_(CUBE_KINDS)),
+    ))
+
+
+# --- 조회: SQL 피벗 ---
+
+def _month_columns(year: int, prefix: str) -> List:
+    C = SettlementMonthlyCube
+    columns = []
+    for month in range(1, 13):
+        in_month = and_(C.year == year, C.month == month)
+        columns.append(func.sum(case((in_month, C.quantity), else_=0)).label(f"{prefix}qty_{month}"))
+        columns.append(func.sum(case((in_month, C.amount_krw), else_=0)).label(f"{prefix}amount_{month}"))
+    columns.append(func.sum(case((C.year == year, C.quantity), else_=0)).label(f"{prefix}annual_qty"))
+    columns.append(func.sum(case((C.year == year, C.amount_krw), else_=0)).label(f"{prefix}annual_amount"))
+    return columns
+
+
+def annual_pivot_query(
+    year: int,
+    major_group_id: Optional[int] = None,
+    compare_year: Optional[int] = None,
+    kind: str = KIND_DELIVERY,
+):
+    """
+    거래처(이름) × 품목 1행, 1~12월 수량/금액 + 연간 합계 컬럼 (qty_1..12, amount_1..12, annual_qty, annual_amount).
+    compare_year 를 주면 같은 행에 prev_ 접두어 컬럼을 함께 계산합니다.
+    """
+    C = SettlementMonthlyCube
+    years = [year] + ([compare_year] if compare_year else [])
+    columns = _month_columns(year, "")
+    if compare_year:
+        columns += _month_columns(compare_year, "prev_")
+    query = select(
+        Partner.name.label("partner_name"),
+        Product.id.label("product_id"),
+        Product.name.label("product_name"),
+        Product.specification.label("specification"),
+        *columns,
+    ).select_from(C)\
+     .join(Partner, C.partner_id == Partner.id)\
+     .join(Product, C.product_id == Product.id)\
+     .where(C.kind == kind, C.year.in_(years))\
+     .group_by(Partner.name, Product.id, Product.name, Product.specification)\
+     .order_by(Partner.name, Product.id)
+    if major_group_id:
+        # 큐브의 major_group_id 는 루트 그룹뿐 → 하위 그룹 id 도 맞도록 품목 그룹 closure 로 필터
+        query = query.where(product_group_filter(major_group_id))
+    return query
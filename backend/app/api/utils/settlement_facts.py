@@ -0,0 +1,575 @@
+"""
+정산 사실(fact) 테이블 증분 갱신
+
+- settlement_fact_lines: 정산 대상 원본 행 1건 = 1행 (수주/납품/매출/구매/외주/대금지급/생산/불량/고객불만)
+- settlement_daily_facts: (일자, 구분, 대그룹, 거래처, 품목) 일별 집계 — 대시보드/차트 조회용
+- settlement_monthly_cube: 일별 집계의 월 단위 묶음 — 품목별 연간 실적 조회용 (app/api/utils/settlement_cube.py)
+
+원본 테이블 변경은 세션 flush 이벤트로 (문서 유형, id) 를 settlement_dirty_docs 에 같은 트랜잭션으로 기록하고,
+정산 API 가 조회 직전에 sync_settlement_facts() 로 해당 문서의 사실 행과 영향받은 (구분, 일자) 집계만 다시 만듭니다.
+벌크 UPDATE/DELETE 나 품목 그룹 구조 변경처럼 문서 단위로 추적할 수 없는 변경은 전체 재구축(ALL)으로 처리하며,
+매일 새벽 rebuild_settlement_facts() 가 원본 기준으로 전체를 재구축해 누락을 보정합니다.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import re
+
+from sqlalchemy import select, delete, update, insert, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.approval import ApprovalDocument, ApprovalStatus, DocumentType
+from app.models.basics import ExchangeRate, Partner
+from app.models.product import Product, ProductGroup
+from app.models.production import ProductionPlan, ProductionPlanItem, ProductionStatus
+from app.models.purchasing import (
+    PurchaseOrder, PurchaseOrderItem, PurchaseStatus, OutsourcingOrder, OutsourcingOrderItem, OutsourcingStatus,
+)
+from app.models.quality import QualityDefect, CustomerComplaint
+from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus, DeliveryHistory, DeliveryHistoryItem
+from app.models.settlement import SettlementFactLine, SettlementDailyFact, SettlementDirtyDoc
+from app.api.utils.dirty_queue import (
+    DirtyQueue, register_dirty_queue, install_dirty_queue_listeners, as_date, chunks, history_values, attrs_changed,
+)
+from app.api.utils.fx import load_rate_book
+from app.api.utils.report_cache import bump_period_versions, bump_global_version
+
+logger = logging.getLogger(__name__)
+
+KIND_ORDER = "ORDER"
+KIND_DELIVERY = "DELIVERY"
+KIND_SALES = "SALES"
+KIND_PURCHASE = "PURCHASE"
+KIND_OUTSOURCING = "OUTSOURCING"
+KIND_PAYMENT = "PAYMENT"
+KIND_PRODUCTION = "PRODUCTION"
+KIND_DEFECT = "DEFECT"
+KIND_COMPLAINT = "COMPLAINT"
+
+ALL_KINDS = [
+    KIND_ORDER, KIND_DELIVERY, KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT,
+    KIND_PRODUCTION, KIND_DEFECT, KIND_COMPLAINT,
+]
+
+# 문서 유형 → 그 문서로 갱신되는 사실 구분
+DOC_KINDS = {
+    "SO": [KIND_ORDER, KIND_DELIVERY, KIND_SALES],
+    "PO": [KIND_PURCHASE],
+    "OO": [KIND_OUTSOURCING],
+    "PLAN": [KIND_PRODUCTION],
+    "DEFECT": [KIND_DEFECT],
+    "COMPLAINT": [KIND_COMPLAINT],
+    "APPROVAL": [KIND_PAYMENT],
+}
+
+SALES_RECOGNIZED_STATUSES = [OrderStatus.DELIVERY_COMPLETED, OrderStatus.DELIVERED]
+
+
+def _major_group_expr():
+    # 품목 그룹의 루트(대그룹) — products.major_group_id 에 미리 계산되어 있음 (app.api.utils.product_groups)
+    return Product.major_group_id
+
+
+# --- Session events: 변경 문서 기록 ---
+
+def _values(obj, attr: str) -> Set[int]:
+    return {v for v in history_values(obj, attr) if v}
+
+
+def _doc_keys_of(obj, bucket: str) -> Set[Tuple[str, Optional[int]]]:
+    if isinstance(obj, SalesOrder):
+        return {("SO", obj.id)}
+    if isinstance(obj, SalesOrderItem):
+        return {("SO", oid) for oid in _values(obj, "order_id")}
+    if isinstance(obj, DeliveryHistory):
+        return {("SO", oid) for oid in _values(obj, "order_id")}
+    if isinstance(obj, DeliveryHistoryItem):
+        return {("DELIVERY", did) for did in _values(obj, "delivery_id")}
+    if isinstance(obj, PurchaseOrder):
+        return {("PO", obj.id)}
+    if isinstance(obj, PurchaseOrderItem):
+        return {("PO", pid) for pid in _values(obj, "purchase_order_id")}
+    if isinstance(obj, OutsourcingOrder):
+        return {("OO", obj.id)}
+    if isinstance(obj, OutsourcingOrderItem):
+        return {("OO", oid) for oid in _values(obj, "outsourcing_order_id")}
+    if isinstance(obj, ProductionPlan):
+        return {("PLAN", obj.id)}
+    if isinstance(obj, ProductionPlanItem):
+        return {("PLAN", pid) for pid in _values(obj, "plan_id")}
+    if isinstance(obj, QualityDefect):
+        return {("DEFECT", obj.id)}
+    if isinstance(obj, CustomerComplaint):
+        return {("COMPLAINT", obj.id)}
+    if isinstance(obj, ApprovalDocument):
+        return {("APPROVAL", obj.id)}
+    if isinstance(obj, Product):
+        if bucket != "dirty":
+            return set()
+        keys = {("PRODUCT", obj.id)} if attrs_changed(obj, ("group_id",)) else set()
+        if attrs_changed(obj, ("name", "specification")):
+            keys.add(("NAMES", None))  # 사실 행은 그대로, 정산 응답 캐시만 무효화
+        return keys
+    if isinstance(obj, Partner):
+        return {("NAMES", None)} if bucket == "dirty" and attrs_changed(obj, ("name",)) else set()
+    if isinstance(obj, ProductGroup):
+        return {("ALL", None)} if bucket != "new" else set()
+    if isinstance(obj, ExchangeRate):
+        return {("PAYMENTS", None)}
+    return set()
+
+
+_TRACKED_MODELS = (
+    SalesOrder, SalesOrderItem, DeliveryHistory, DeliveryHistoryItem,
+    PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem,
+    ProductionPlan, ProductionPlanItem, QualityDefect, CustomerComplaint, ApprovalDocument,
+    Product, ProductGroup, ExchangeRate, Partner,
+)
+
+
+def _queue_keys(obj, bucket: str) -> Set[Tuple[str, Optional[int]]]:
+    return {k for k in _doc_keys_of(obj, bucket) if k[0] in ("ALL", "PAYMENTS", "NAMES") or k[1]}
+
+
+# 벌크 UPDATE 가 모델별로 이 컬럼들을 건드리지 않으면(입고수량, 품목 상태, 첨부 등) 정산 사실에 영향 없음
+# (사실 행 생성기가 읽는 컬럼 + 문서 연결 FK)
+_FACT_COLUMNS = {
+    SalesOrder: {"status", "order_date", "partner_id"},
+    SalesOrderItem: {"order_id", "product_id", "quantity", "unit_price", "currency", "amount_krw"},
+    DeliveryHistory: {"order_id", "delivery_date", "statement_json"},
+    DeliveryHistoryItem: {"delivery_id", "order_item_id", "quantity", "amount_krw"},
+    PurchaseOrder: {"status", "partner_id", "order_date", "actual_delivery_date", "purchase_type"},
+    PurchaseOrderItem: {"purchase_order_id", "product_id", "quantity", "unit_price", "currency", "amount_krw"},
+    OutsourcingOrder: {"status", "partner_id", "order_date", "actual_delivery_date"},
+    OutsourcingOrderItem: {"outsourcing_order_id", "product_id", "quantity", "unit_price"},
+    ProductionPlan: {"status", "plan_date", "actual_completion_date", "updated_at"},
+    ProductionPlanItem: {"plan_id", "product_id", "quantity", "cost"},
+    QualityDefect: {"plan_item_id", "defect_date", "quantity", "amount"},
+    CustomerComplaint: {"partner_id", "receipt_date"},
+    ApprovalDocument: {"doc_type", "status", "deleted_at", "content", "title", "created_at"},
+    ProductGroup: {"parent_id"},
+}
+
+
+_QUEUE = DirtyQueue(
+    name="settlement_pending",
+    tracked_models=_TRACKED_MODELS,
+    keys_of=_queue_keys,
+    make_row=lambda key: SettlementDirtyDoc(doc_type=key[0], doc_id=key[1]),
+    all_key=("ALL", None),
+    watched_columns=_FACT_COLUMNS,
+    # 품목 단가/환율 일괄 보정은 정산 사실에 영향 없음 (환율 재환산은 품목 행 flush 로 잡힘)
+    bulk_ignored=(Product, ExchangeRate, Partner),
+)
+
+
+def install_settlement_listeners() -> None:
+    """앱 시작 시 1회: 원본 변경 문서를 settlement_dirty_docs 에 기록하는 세션 이벤트 등록"""
+    register_dirty_queue(_QUEUE)
+    install_dirty_queue_listeners()
+
+
+# --- 사실 행 생성 ---
+
+_OPTIONAL_LINE_COLUMNS = (
+    "order_date", "category", "partner_id", "product_id", "major_group_id",
+    "partner_label", "product_label", "spec_label", "dept",
+)
+
+def _line(kind, doc_id, line_id, fact_date, **values) -> Optional[dict]:
+    fact_date = as_date(fact_date)
+    if not fact_date:
+        return None
+    row = dict(kind=kind, doc_id=doc_id, line_id=line_id, fact_date=fact_date)
+    row.update({key: None for key in _OPTIONAL_LINE_COLUMNS})  # 일괄 INSERT 키 구성을 통일
+    row.update(values)
+    for key in ("quantity", "unit_price", "amount", "amount_krw"):
+        row[key] = float(row.get(key) or 0)
+    row["currency"] = row.get("currency") or "KRW"
+    return row
+
+
+async def _build_sales_order_lines(db: AsyncSession, order_ids: Optional[List[int]]) -> List[dict]:
+    major = _major_group_expr()
+    lines = []
+
+    q = (
+        select(
+            SalesOrderItem.id, SalesOrder.id, SalesOrder.order_date, SalesOrder.partner_id,
+            SalesOrderItem.product_id, major, SalesOrderItem.quantity, SalesOrderItem.unit_price,
+            SalesOrderItem.currency, SalesOrderItem.amount_krw,
+        )
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+        .join(Product, SalesOrderItem.product_id == Product.id)
+        .where(SalesOrder.status != OrderStatus.CANCELLED)
+    )
+    if order_ids is not None:
+        q = q.where(SalesOrder.id.in_(order_ids))
+    for item_id, so_id, order_date, partner_id, product_id, major_id, qty, price, currency, amount_krw in (await db.execute(q)).all():
+        lines.append(_line(
+            KIND_ORDER, so_id, item_id, order_date, order_date=order_date, partner_id=partner_id,
+            product_id=product_id, major_group_id=major_id, quantity=qty, unit_price=price,
+            currency=currency, amount=(qty or 0) * (price or 0), amount_krw=amount_krw,
+        ))
+
+    q = (
+        select(
+            DeliveryHistoryItem.id, SalesOrder.id, DeliveryHistory.delivery_date, SalesOrder.order_date,
+            SalesOrder.partner_id, SalesOrder.status, DeliveryHistory.statement_json.isnot(None),
+            SalesOrderItem.product_id, major, DeliveryHistoryItem.quantity, SalesOrderItem.unit_price,
+            SalesOrderItem.currency, DeliveryHistoryItem.amount_krw,
+        )
+        .select_from(DeliveryHistory)
+        .join(DeliveryHistoryItem, DeliveryHistory.id == DeliveryHistoryItem.delivery_id)
+        .join(SalesOrderItem, DeliveryHistoryItem.order_item_id == SalesOrderItem.id)
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+        .join(Product, SalesOrderItem.product_id == Product.id)
+    )
+    if order_ids is not None:
+        q = q.where(SalesOrder.id.in_(order_ids))
+    for row in (await db.execute(q)).all():
+        dhi_id, so_id, delivery_date, order_date, partner_id, status, has_statement, product_id, major_id, qty, price, currency, amount_krw = row
+        values = dict(
+            order_date=order_date, partner_id=partner_id, product_id=product_id, major_group_id=major_id,
+            quantity=qty, unit_price=price, currency=currency, amount=(qty or 0) * (price or 0), amount_krw=amount_krw,
+        )
+        lines.append(_line(KIND_DELIVERY, so_id, dhi_id, delivery_date, **values))
+        # 매출 인식: 납품완료/완납 수주 + 거래명세서가 발행된 부분납품 (매출내역 탭 기준)
+        if status in SALES_RECOGNIZED_STATUSES or (status == OrderStatus.PARTIALLY_DELIVERED and has_statement):
+            lines.append(_line(KIND_SALES, so_id, dhi_id, delivery_date, **values))
+    return lines
+
+
+async def _build_purchase_lines(db: AsyncSession, po_ids: Optional[List[int]]) -> List[dict]:
+    q = (
+        select(
+            PurchaseOrderItem.id, PurchaseOrder.id, PurchaseOrder.actual_delivery_date, PurchaseOrder.order_date,
+            PurchaseOrder.purchase_type, PurchaseOrder.partner_id, PurchaseOrderItem.product_id, _major_group_expr(),
+            PurchaseOrderItem.quantity, PurchaseOrderItem.unit_price, PurchaseOrderItem.currency, PurchaseOrderItem.amount_krw,
+        )
+        .join(PurchaseOrder, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .join(Product, PurchaseOrderItem.product_id == Product.id)
+        .where(PurchaseOrder.status == PurchaseStatus.COMPLETED, PurchaseOrder.actual_delivery_date.isnot(None))
+    )
+    if po_ids is not None:
+        q = q.where(PurchaseOrder.id.in_(po_ids))
+    return [
+        _line(
+            KIND_PURCHASE, po_id, item_id, actual_date, order_date=order_date, category=purchase_type,
+            partner_id=partner_id, product_id=product_id, major_group_id=major_id, quantity=qty,
+            unit_price=price, currency=currency, amount=(qty or 0) * (price or 0), amount_krw=amount_krw,
+        )
+        for item_id, po_id, actual_date, order_date, purchase_type, partner_id, product_id, major_id, qty, price, currency, amount_krw
+        in (await db.execute(q)).all()
+    ]
+
+
+async def _build_outsourcing_lines(db: AsyncSession, oo_ids: Optional[List[int]]) -> List[dict]:
+    q = (
+        select(
+            OutsourcingOrderItem.id, OutsourcingOrder.id, OutsourcingOrder.actual_delivery_date, OutsourcingOrder.order_date,
+            OutsourcingOrder.partner_id, OutsourcingOrderItem.product_id, _major_group_expr(),
+            OutsourcingOrderItem.quantity, OutsourcingOrderItem.unit_price,
+        )
+        .join(OutsourcingOrder, OutsourcingOrderItem.outsourcing_order_id == OutsourcingOrder.id)
+        .outerjoin(Product, OutsourcingOrderItem.product_id == Product.id)
+        .where(OutsourcingOrder.status == OutsourcingStatus.COMPLETED, OutsourcingOrder.actual_delivery_date.isnot(None))
+    )
+    if oo_ids is not None:
+        q = q.where(OutsourcingOrder.id.in_(oo_ids))
+    lines = []
+    for item_id, oo_id, actual_date, order_date, partner_id, product_id, major_id, qty, price in (await db.execute(q)).all():
+        amount = (qty or 0) * (price or 0)  # 외주는 통화 컬럼 없음 → KRW
+        lines.append(_line(
+            KIND_OUTSOURCING, oo_id, item_id, actual_date, order_date=order_date, category="OUTSOURCING",
+            partner_id=partner_id, product_id=product_id, major_group_id=major_id if product_id else None,
+            quantity=qty, unit_price=price, currency="KRW", amount=amount, amount_krw=amount,
+        ))
+    return lines
+
+
+async def _build_production_lines(db: AsyncSession, plan_ids: Optional[List[int]]) -> List[dict]:
+    q = (
+        select(
+            ProductionPlanItem.id, ProductionPlan.id, ProductionPlan.actual_completion_date, ProductionPlan.updated_at,
+            ProductionPlan.plan_date, ProductionPlanItem.product_id, _major_group_expr(),
+            ProductionPlanItem.quantity, ProductionPlanItem.cost,
+        )
+        .join(ProductionPlan, ProductionPlanItem.plan_id == ProductionPlan.id)
+        .join(Product, ProductionPlanItem.product_id == Product.id)
+        .where(ProductionPlan.status == ProductionStatus.COMPLETED)
+    )
+    if plan_ids is not None:
+        q = q.where(ProductionPlan.id.in_(plan_ids))
+    return [
+        # 완료일이 없으면 마지막 수정일로 폴백 (기존 생산 집계 기준)
+        _line(
+            KIND_PRODUCTION, plan_id, item_id, completion_date or as_date(updated_at), order_date=plan_date,
+            product_id=product_id, major_group_id=major_id, quantity=qty, amount=cost, amount_krw=cost,
+        )
+        for item_id, plan_id, completion_date, updated_at, plan_date, product_id, major_id, qty, cost
+        in (await db.execute(q)).all()
+    ]
+
+
+async def _build_defect_lines(db: AsyncSession, defect_ids: Optional[List[int]]) -> List[dict]:
+    q = (
+        select(
+            QualityDefect.id, QualityDefect.defect_date, ProductionPlanItem.product_id, _major_group_expr(),
+            QualityDefect.quantity, QualityDefect.amount,
+        )
+        .join(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)
+        .join(Product, ProductionPlanItem.product_id == Product.id)
+    )
+    if defect_ids is not None:
+        q = q.where(QualityDefect.id.in_(defect_ids))
+    return [
+        _line(
+            KIND_DEFECT, defect_id, defect_id, defect_date, product_id=product_id, major_group_id=major_id,
+            quantity=qty, amount=amount, amount_krw=amount,
+        )
+        for defect_id, defect_date, product_id, major_id, qty, amount in (await db.execute(q)).all()
+    ]
+
+
+async def _build_complaint_lines(db: AsyncSession, complaint_ids: Optional[List[int]]) -> List[dict]:
+    q = select(CustomerComplaint.id, CustomerComplaint.receipt_date, CustomerComplaint.partner_id)
+    if complaint_ids is not None:
+        q = q.where(CustomerComplaint.id.in_(complaint_ids))
+    return [
+        _line(KIND_COMPLAINT, complaint_id, complaint_id, receipt_date, partner_id=partner_id, quantity=1)
+        for complaint_id, receipt_date, partner_id in (await db.execute(q)).all()
+    ]
+
+
+async def _build_payment_lines(db: AsyncSession, doc_ids: Optional[List[int]]) -> List[dict]:
+    """내부기안 대금지급(PAYMENT) 항목 — 항목별 거래명세서 날짜 우선, 없으면 기안일자/작성일"""
+    q = select(ApprovalDocument).where(
+        ApprovalDocument.doc_type == DocumentType.INTERNAL_DRAFT,
+        ApprovalDocument.status == ApprovalStatus.COMPLETED,
+        ApprovalDocument.deleted_at == None,
+    )
+    if doc_ids is not None:
+        q = q.where(ApprovalDocument.id.in_(doc_ids))
+    docs = (await db.execute(q)).scalars().all()
+    if not docs:
+        return []
+    book = await load_rate_book(db)
+
+    lines = []
+    for doc in docs:
+        content = doc.content or {}
+        if content.get('draft_type') != 'PAYMENT':
+            continue
+        request_date_str = content.get('request_date')
+        try:
+            fallback_date = date.fromisoformat(request_date_str) if request_date_str else None
+        except Exception:
+            fallback_date = None
+        if not fallback_date and doc.created_at:
+            fallback_date = doc.created_at.date()
+
+        partner_name = (content.get('partner_for_title') or '').strip()
+        if not partner_name:
+            title = doc.title or ''
+            m = re.match(r'^\[(.+?)\]-', title)
+            partner_name = m.group(1).strip() if m else title.strip()
+        dept = (content.get('dept') or '').strip() or None
+        currency = content.get('currency', 'KRW')
+
+        for idx, item in enumerate(content.get('items') or []):
+            amount = float(item.get('amount', 0) or 0)
+            quantity = float(item.get('quantity', 0) or 0)
+            if amount == 0 and quantity == 0:
+                continue
+            trade_date_str = item.get('trade_date', '')
+            try:
+                item_date = date.fromisoformat(trade_date_str) if trade_date_str else None
+            except Exception:
+                item_date = None
+            effective_date = item_date or fallback_date
+            if not effective_date:
+                continue
+            lines.append(_line(
+                KIND_PAYMENT, doc.id, idx, effective_date, order_date=effective_date, category="PAYMENT",
+                partner_label=partner_name, product_label=item.get('name', ''), spec_label=item.get('spec', ''),
+                dept=dept, quantity=quantity, unit_price=float(item.get('unit_price', 0) or 0),
+                currency=currency, amount=amount, amount_krw=amount * book.rate_on(currency, effective_date),
+            ))
+    return lines
+
+
+_BUILDERS = {
+    "SO": _build_sales_order_lines,
+    "PO": _build_purchase_lines,
+    "OO": _build_outsourcing_lines,
+    "PLAN": _build_production_lines,
+    "DEFECT": _build_defect_lines,
+    "COMPLAINT": _build_complaint_lines,
+    "APPROVAL": _build_payment_lines,
+}
+
+
+# --- 일별 집계 ---
+
+_DAILY_DIMENSIONS = (
+    SettlementFactLine.fact_date, SettlementFactLine.kind, SettlementFactLine.category,
+    SettlementFactLine.major_group_id, SettlementFactLine.partner_id, SettlementFactLine.product_id,
+    SettlementFactLine.partner_label, SettlementFactLine.dept,
+)
+
+
+def _daily_select():
+    return select(
+        *_DAILY_DIMENSIONS,
+        func.coalesce(func.sum(SettlementFactLine.quantity), 0),
+        func.coalesce(func.sum(SettlementFactLine.amount_krw), 0),
+        func.count(SettlementFactLine.id),
+    ).group_by(*_DAILY_DIMENSIONS)
+
+
+_DAILY_COLUMNS = [
+    "fact_date", "kind", "category", "major_group_id", "partner_id", "product_id", "partner_label", "dept",
+    "quantity", "amount_krw", "row_count",
+]
+
+
+async def _refresh_daily(db: AsyncSession, pairs: Set[Tuple[str, date]], source: Optional[str] = None) -> None:
+    """(구분, 일자) 일별 집계·월별 큐브 재계산 + 응답 캐시 버전 증가. 마감 월이 바뀌면 마감 이력(CHANGE)에 기록"""
+    from app.api.utils.settlement_closing import begin_post_close_audit, finish_post_close_audit
+    from app.api.utils.settlement_cube import refresh_monthly_cube
+
+    audit = await begin_post_close_audit(db, pairs)
+    dates_by_kind: Dict[str, Set[date]] = defaultdict(set)
+    for kind, fact_date in pairs:
+        dates_by_kind[kind].add(fact_date)
+    for kind, dates in dates_by_kind.items():
+        for chunk in chunks(sorted(dates)):
+            await db.execute(delete(SettlementDailyFact).where(
+                SettlementDailyFact.kind == kind, SettlementDailyFact.fact_date.in_(chunk)
+            ))
+            await db.execute(insert(SettlementDailyFact).from_select(
+                _DAILY_COLUMNS,
+                _daily_select().where(SettlementFactLine.kind == kind, SettlementFactLine.fact_date.in_(chunk)),
+            ))
+    await finish_post_close_audit(db, audit, source)
+    await refresh_monthly_cube(db, pairs)
+    await bump_period_versions(db, pairs)
+
+
+async def _replace_lines(db: AsyncSession, kinds: List[str], doc_ids: List[int], lines: List[dict]) -> Set[Tuple[str, date]]:
+    """문서들의 기존 사실 행을 지우고 새로 넣은 뒤, 영향받은 (구분, 일자) 목록을 반환"""
+    pairs: Set[Tuple[str, date]] = set()
+    for chunk in chunks(doc_ids):
+        cond = and_(SettlementFactLine.kind.in_(kinds), SettlementFactLine.doc_id.in_(chunk))
+        old = await db.execute(select(SettlementFactLine.kind, SettlementFactLine.fact_date).where(cond).distinct())
+        pairs.update((k, d) for k, d in old.all())
+        await db.execute(delete(SettlementFactLine).where(cond))
+    lines = [l for l in lines if l]
+    if lines:
+        for chunk in chunks(lines):
+            await db.execute(insert(SettlementFactLine), chunk)
+        pairs.update((l["kind"], l["fact_date"]) for l in lines)
+    return pairs
+
+
+async def refresh_settlement_docs(db: AsyncSession, doc_type: str, doc_ids: Iterable[int]) -> int:
+    """문서 단위 사실 행 + 일별 집계 갱신 (커밋은 호출자)"""
+    doc_ids = sorted({i for i in doc_ids if i})
+    if not doc_ids or doc_type not in _BUILDERS:
+        return 0
+    lines = []
+    for chunk in chunks(doc_ids):
+        lines.extend(await _BUILDERS[doc_type](db, chunk))
+    pairs = await _replace_lines(db, DOC_KINDS[doc_type], doc_ids, lines)
+    await _refresh_daily(db, pairs, source=f"{doc_type}:" + ",".join(str(i) for i in doc_ids))
+    return len(lines)
+
+
+async def _refresh_product_groups(db: AsyncSession, product_ids: List[int]) -> None:
+    """품목 그룹 변경 → 해당 품목 사실 행의 대그룹 갱신"""
+    pairs: Set[Tuple[str, date]] = set()
+    major_res = await db.execute(
+        select(Product.id, _major_group_expr())
+        .where(Product.id.in_(product_ids))
+    )
+    for product_id, major_id in major_res.all():
+        cond = SettlementFactLine.product_id == product_id
+        old = await db.execute(select(SettlementFactLine.kind, SettlementFactLine.fact_date).where(cond).distinct())
+        pairs.update((k, d) for k, d in old.all())
+        await db.execute(update(SettlementFactLine).where(cond).values(major_group_id=major_id))
+    await _refresh_daily(db, pairs, source="PRODUCT:" + ",".join(str(i) for i in product_ids))
+
+
+async def rebuild_settlement_facts(db: AsyncSession) -> int:
+    """정산 사실/일별 집계/월별 큐브 전체 재구축 (초기 적재 및 야간 정합성 보정용, 커밋 포함)"""
+    from app.api.utils.settlement_closing import begin_post_close_audit, finish_post_close_audit
+    from app.api.utils.settlement_cube import rebuild_monthly_cube
+
+    audit = await begin_post_close_audit(db)
+    max_dirty = (await db.execute(select(func.max(SettlementDirtyDoc.id)))).scalar()
+    await db.execute(delete(SettlementFactLine))
+    await db.execute(delete(SettlementDailyFact))
+    count = 0
+    for builder in _BUILDERS.values():
+        lines = [l for l in await builder(db, None) if l]
+        for chunk in chunks(lines):
+            await db.execute(insert(SettlementFactLine), chunk)
+        count += len(lines)
+    await db.execute(insert(SettlementDailyFact).from_select(_DAILY_COLUMNS, _daily_select()))
+    await finish_post_close_audit(db, audit, "REBUILD")
+    await rebuild_monthly_cube(db)
+    await bump_global_version(db)
+    if max_dirty:
+        await db.execute(delete(SettlementDirtyDoc).where(SettlementDirtyDoc.id <= max_dirty))
+    await db.commit()
+    logger.info(f"Settlement facts rebuilt: {count} lines.")
+    return count
+
+
+async def sync_settlement_facts(db: AsyncSession) -> int:
+    """
+    정산 조회 직전 호출: 기록된 변경 문서의 사실 행만 갱신하고 커밋합니다.
+    변경이 없으면 대기열 조회 1회로 끝납니다.
+    """
+    if not (await db.execute(select(SettlementDirtyDoc.id).limit(1))).first():
+        return 0
+    async with _QUEUE.lock:
+        marks = (await db.execute(select(SettlementDirtyDoc.id, SettlementDirtyDoc.doc_type, SettlementDirtyDoc.doc_id))).all()
+        if not marks:
+            return 0
+        if any(doc_type == "ALL" for _, doc_type, _ in marks):
+            return await rebuild_settlement_facts(db)
+
+        ids_by_type: Dict[str, Set[int]] = defaultdict(set)
+        for _, doc_type, doc_id in marks:
+            if doc_id:
+                ids_by_type[doc_type].add(doc_id)
+
+        # 납품 품목 변경 → 수주 단위로 갱신
+        if ids_by_type.get("DELIVERY"):
+            res = await db.execute(
+                select(DeliveryHistory.order_id).where(DeliveryHistory.id.in_(list(ids_by_type.pop("DELIVERY"))))
+            )
+            ids_by_type["SO"].update(oid for oid in res.scalars().all() if oid)
+        # 환율 변경 → 외화 대금지급 기안 전체 재환산
+        if any(doc_type == "PAYMENTS" for _, doc_type, _ in marks):
+            res = await db.execute(select(SettlementFactLine.doc_id).where(SettlementFactLine.kind == KIND_PAYMENT).distinct())
+            ids_by_type["APPROVAL"].update(res.scalars().all())
+
+        count = 0
+        for doc_type, doc_ids in ids_by_type.items():
+            if doc_type == "PRODUCT":
+                continue
+            count += await refresh_settlement_docs(db, doc_type, doc_ids)
+        if ids_by_type.get("PRODUCT"):
+            await _refresh_product_groups(db, sorted(ids_by_type["PRODUCT"]))
+        # 거래처/품목명 변경 → 사실 행은 id 만 가지므로 응답 캐시만 무효화
+        if any(doc_type == "NAMES" for _, doc_type, _ in marks):
+            await bump_global_version(db)
+
+        for chunk in chunks([mark_id for mark_id, _, _ in marks]):
+            await db.execute(delete(SettlementDirtyDoc).where(SettlementDirtyDoc.id.in_(chunk)))
+        await db.commit()
+        return count
@@ -0,0 +1,290 @@
+"""
+정산 탭별 조회문 ([start, end) 기간)
+
+월 탭 조회(/settlement/orders 등), 기간 내보내기(/settlement/export), 월 마감 스냅샷이 같은 조회문을 씁니다.
+"""
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import func, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.sales import SalesOrder, SalesOrderItem, OrderStatus
+from app.models.production import ProductionPlan, ProductionPlanItem, ProductionStatus
+from app.models.quality import QualityDefect, CustomerComplaint
+from app.models.product import Product, ProductGroup
+from app.models.basics import Partner
+from app.models.inventory import StockProduction
+from app.models.settlement import SettlementFactLine
+from app.api.utils.date_ranges import in_range
+from app.api.utils.product_groups import product_group_filter
+from app.api.utils.settlement_facts import (
+    KIND_SALES, KIND_PURCHASE, KIND_OUTSOURCING, KIND_PAYMENT,
+)
+from app.api.utils.streaming_export import ExportSource
+
+
+def row_dict(r) -> dict:
+    return dict(r._mapping)
+
+
+def orders_query(start: date, end: date, major_group_id: Optional[int] = None):
+    query = select(
+        Partner.name.label("partner_name"),
+        SalesOrder.order_date,
+        Product.name.label("product_name"),
+        Product.specification,
+        SalesOrderItem.quantity,
+        SalesOrderItem.unit_price,
+        SalesOrderItem.currency,
+        (SalesOrderItem.quantity * SalesOrderItem.unit_price).label("total_price"),
+        SalesOrderItem.amount_krw.label("total_price_krw")
+    ).select_from(SalesOrder)\
+     .join(SalesOrderItem, SalesOrder.id == SalesOrderItem.order_id)\
+     .join(Partner, SalesOrder.partner_id == Partner.id)\
+     .join(Product, SalesOrderItem.product_id == Product.id)\
+     .where(
+         SalesOrder.status != OrderStatus.CANCELLED,
+         # extract() 대신 범위 조건: (status, 일자) 인덱스 사용
+         in_range(SalesOrder.order_date, start, end)
+     )
+
+    if major_group_id:
+        # Filter by major group (Product -> Group -> Parent Group)
+        query = query.where(product_group_filter(major_group_id))
+    return query
+
+
+def sales_query(start: date, end: date, major_group_id: Optional[int] = None):
+    F = SettlementFactLine
+    query = select(
+        Partner.name.label("partner_name"),
+        F.order_date,
+        F.fact_date.label("delivery_date"),
+        Product.name.label("product_name"),
+        Product.specification,
+        F.quantity,
+        F.unit_price,
+        F.currency,
+        F.amount.label("total_price"),
+        F.amount_krw.label("total_price_krw")
+    ).select_from(F)\
+     .join(Partner, F.partner_id == Partner.id)\
+     .join(Product, F.product_id == Product.id)\
+     .where(F.kind == KIND_SALES, in_range(F.fact_date, start, end))\
+     .order_by(F.fact_date, F.id)
+
+    if major_group_id:
+        # 사실 행의 major_group_id 는 루트 그룹뿐 → 하위 그룹 id 도 맞도록 품목 그룹 closure 로 필터
+        query = query.where(product_group_filter(major_group_id))
+    return query
+
+
+def payment_row(line) -> dict:
+    return {
+        'category': 'PAYMENT',
+        'partner_name': line.partner_label,
+        'order_date': line.fact_date,
+        'delivery_date': line.fact_date,
+        'product_name': line.product_label or '',
+        'specification': line.spec_label or '',
+        'quantity': line.quantity,
+        'unit_price': line.unit_price,
+        'total_price': line.amount,
+        'currency': line.currency,
+        'total_price_krw': line.amount_krw,
+        'dept': line.dept or '',
+    }
+
+
+async def purchase_sources(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    major_group_id: Optional[int] = None,
+    dept: Optional[str] = None,
+) -> List[ExportSource]:
+    """매입내역 조회문: 구매 → 외주 → 대금지급 순 (소모품 필터면 구매만)"""
+    F = SettlementFactLine
+    period = in_range(F.fact_date, start, end)
+
+    # Material/Consumable Purchases - 실제 입고일(actual_delivery_date) 기준
+    p_query = select(
+        F.category,
+        Partner.name.label("partner_name"),
+        F.order_date,
+        F.fact_date.label("delivery_date"),
+        Product.name.label("product_name"),
+        Product.specification,
+        F.quantity,
+        F.unit_price,
+        F.amount.label("total_price"),
+        F.currency,
+        F.amount_krw.label("total_price_krw")
+    ).select_from(F)\
+     .join(Partner, F.partner_id == Partner.id)\
+     .join(Product, F.product_id == Product.id)\
+     .where(F.kind == KIND_PURCHASE, period)\
+     .order_by(F.fact_date, F.id)
+
+    # 소모품 필터: dept='소모품' 이거나 major_group_id 없이 소모품 전용 조회인 경우
+    if dept == '소모품':
+        # 소모품만 조회: p_query는 purchase_type=CONSUMABLE만, o_query·대금지급은 제외
+        return [ExportSource(p_query.where(F.category == 'CONSUMABLE'))]
+
+    # Outsourcing Purchases - 실제 납품일(actual_delivery_date) 기준
+    o_query = select(
+        F.category,
+        Partner.name.label("partner_name"),
+        F.order_date,
+        F.fact_date.label("delivery_date"),
+        Product.name.label("product_name"),
+        Product.specification,
+        F.quantity,
+        F.unit_price,
+        F.amount.label("total_price"),
+        F.currency,
+        F.amount_krw.label("total_price_krw")
+    ).select_from(F)\
+     .join(Partner, F.partner_id == Partner.id)\
+     .outerjoin(Product, F.product_id == Product.id)\
+     .where(F.kind == KIND_OUTSOURCING, period)\
+     .order_by(F.fact_date, F.id)
+
+    if major_group_id:
+        # 소모품(CONSUMABLE) 발주는 product group 대신 별도 분류이므로 제품그룹 필터에서 제외
+        # 하위 그룹 id 도 맞도록 사실 행의 루트 그룹(major_group_id) 대신 품목 그룹 closure 로 필터
+        p_query = p_query.where(F.category != 'CONSUMABLE', product_group_filter(major_group_id))
+        o_query = o_query.where(product_group_filter(major_group_id))
+
+    # --- 내부기안 대금지급 건 추가 집계 ---
+    # major_group_id가 선택된 경우 해당 그룹의 이름을 조회하여 기안부서 필터로 사용
+    dept_filter_name: Optional[str] = None
+    if dept:
+        dept_filter_name = dept
+    elif major_group_id:
+        grp_res = await db.execute(
+            select(ProductGroup.name).where(ProductGroup.id == major_group_id)
+        )
+        grp_row = grp_res.first()
+        if grp_row:
+            dept_filter_name = grp_row[0]
+
+    pay_query = select(
+        F.fact_date, F.partner_label, F.product_label, F.spec_label, F.quantity,
+        F.unit_price, F.amount, F.currency, F.amount_krw, F.dept,
+    ).where(F.kind == KIND_PAYMENT, period).order_by(F.fact_date, F.id)
+    # [FIX] 사업부 필터: 기안부서(dept)가 선택된 그룹명과 일치하는 건만 포함
+    if dept_filter_name:
+        pay_query = pay_query.where(F.dept == dept_filter_name)
+
+    return [ExportSource(p_query), ExportSource(o_query), ExportSource(pay_query, payment_row)]
+
+
+def production_query(start: date, end: date, major_group_id: Optional[int] = None):
+    # StockProduction 전용 Partner alias
+    StockPartner = Partner.__table__.alias("stock_partner")
+
+    # 생산완료일 폴백: actual_completion_date 없으면 updated_at의 날짜 부분 사용
+    effective_end_col = func.coalesce(
+        ProductionPlan.actual_completion_date,
+        func.date(ProductionPlan.updated_at)
+    )
+
+    query = select(
+        ProductionPlan.id.label("plan_id"),
+        Product.id.label("product_id"),
+        func.coalesce(Partner.name, StockPartner.c.name).label("partner_name"),
+        func.coalesce(SalesOrder.order_date, StockProduction.request_date).label("order_date"),
+        effective_end_col.label("end_date"),
+        Product.name.label("product_name"),
+        Product.specification,
+        func.max(ProductionPlanItem.quantity).label("quantity"),
+        # 수주합계금액: 수주품목의 수량 × 단가 (재고생산은 NULL)
+        func.max(SalesOrderItem.quantity * SalesOrderItem.unit_price).label("order_amount"),
+        func.sum(ProductionPlanItem.cost).label("process_cost")
+    ).select_from(ProductionPlan)\
+     .join(ProductionPlanItem, ProductionPlanItem.plan_id == ProductionPlan.id)\
+     .outerjoin(SalesOrder, ProductionPlan.order_id == SalesOrder.id)\
+     .outerjoin(Partner, SalesOrder.partner_id == Partner.id)\
+     .outerjoin(SalesOrderItem, and_(
+         SalesOrderItem.order_id == SalesOrder.id,
+         SalesOrderItem.product_id == ProductionPlanItem.product_id
+     ))\
+     .outerjoin(StockProduction, ProductionPlan.stock_production_id == StockProduction.id)\
+     .outerjoin(StockPartner, StockProduction.partner_id == StockPartner.c.id)\
+     .join(Product, ProductionPlanItem.product_id == Product.id)\
+     .where(
+         ProductionPlan.status == ProductionStatus.COMPLETED,
+         # coalesce() 를 직접 비교하면 인덱스를 못 타므로 완료일/수정일 범위로 나눠 비교
+         or_(
+             in_range(ProductionPlan.actual_completion_date, start, end),
+             and_(
+                 ProductionPlan.actual_completion_date.is_(None),
+                 in_range(ProductionPlan.updated_at, start, end, is_datetime=True),
+             ),
+         )
+     )\
+     .group_by(
+         ProductionPlan.id,
+         Product.id,
+         Partner.name,
+         StockPartner.c.name,
+         SalesOrder.order_date,
+         StockProduction.request_date,
+         ProductionPlan.actual_completion_date,
+         ProductionPlan.updated_at,
+         Product.name,
+         Product.specification
+     )
+
+    if major_group_id:
+        query = query.where(product_group_filter(major_group_id))
+    return query
+
+
+def defects_query(start: date, end: date, major_group_id: Optional[int] = None):
+    query = select(
+        QualityDefect.defect_date,
+        ProductionPlanItem.process_name,
+        Partner.name.label("partner_name"),
+        Product.name.label("product_name"),
+        Product.specification,
+        QualityDefect.quantity,
+        QualityDefect.amount,
+        QualityDefect.resolution_date
+    ).select_from(QualityDefect)\
+     .join(SalesOrder, QualityDefect.order_id == SalesOrder.id)\
+     .join(Partner, SalesOrder.partner_id == Partner.id)\
+     .join(ProductionPlanItem, QualityDefect.plan_item_id == ProductionPlanItem.id)\
+     .join(Product, ProductionPlanItem.product_id == Product.id)\
+     .where(
+         in_range(QualityDefect.defect_date, start, end, is_datetime=True)
+     )
+
+    if major_group_id:
+        query = query.where(product_group_filter(major_group_id))
+    return query
+
+
+def complaints_query(start: date, end: date, major_group_id: Optional[int] = None):
+    query = select(
+        CustomerComplaint.receipt_date,
+        Partner.name.label("partner_name"),
+        CustomerComplaint.content,
+        CustomerComplaint.status,
+        CustomerComplaint.action_note
+    ).select_from(CustomerComplaint)\
+     .join(Partner, CustomerComplaint.partner_id == Partner.id)\
+     .where(
+         in_range(CustomerComplaint.receipt_date, start, end)
+     )
+
+    # Note: Complaints link to Partner, but not necessarily to a Product Group directly 
+    # unless we join via SalesOrder linked to the complaint.
+    # For now, we'll keep it simple or follow the major_group_id IF present in linked order.
+    
+    if major_group_id:
+        # If complaint has an order, filter by order's items' product group
+        pass # Optional: Implementation depends on how strict the filter should be for complaints
+    return query
@@ -0,0 +1,137 @@
+"""
+대용량 엑셀/CSV 내보내기 (스트리밍)
+
+- 조회: 요청 세션과 별도 세션에서 서버 측 커서(AsyncSession.stream)로 EXPORT_CHUNK_ROWS 행씩 읽습니다.
+  (StreamingResponse 본문은 엔드포인트 반환 이후에 만들어지므로 요청 세션을 쓰지 않습니다)
+- CSV: 청크마다 바로 전송 (UTF-8 BOM 포함 — 엑셀에서 한글이 깨지지 않도록)
+- XLSX: openpyxl write-only 시트에 청크 단위로 기록 → 임시 파일 저장 → 파일을 청크 단위로 전송
+  (xlsx 는 zip 이라 완성 전에 보낼 수 없지만 메모리는 청크 크기만큼만 사용)
+여러 조회문을 한 시트에 이어 쓸 수 있습니다 (예: 매입내역 = 구매 + 외주 + 대금지급).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+from urllib.parse import quote
+import asyncio
+import csv
+import io
+import os
+import tempfile
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import AsyncSessionLocal
+from app.core.config import settings
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+EXPORT_FORMATS = ("xlsx", "csv")
+
+_FILE_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class ExportColumn:
+    key: str
+    header: str
+
+
+@dataclass
+class ExportSource:
+    """조회문 + 행 변환 (기본: 컬럼 label → 값 dict)"""
+    statement: Any
+    row_mapper: Optional[Callable[[Any], dict]] = None
+
+
+def _cell(value):
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _csv_cell(value):
+    value = _cell(value)
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def _iter_row_chunks(sources: Sequence[ExportSource], columns: List[ExportColumn]) -> AsyncIterator[List[list]]:
+    chunk_rows = max(1, settings.EXPORT_CHUNK_ROWS)
+    async with AsyncSessionLocal() as session:
+        for source in sources:
+            mapper = source.row_mapper or (lambda r: dict(r._mapping))
+            result = await session.stream(source.statement.execution_options(yield_per=chunk_rows))
+            async for partition in result.partitions(chunk_rows):
+                yield [[_cell(row.get(c.key)) for c in columns] for row in map(mapper, partition)]
+
+
+async def _csv_body(sources, columns) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.header for c in columns])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for rows in _iter_row_chunks(sources, columns):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_csv_cell(v) for v in row] for row in rows])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _append_rows(ws, rows: List[list]) -> None:
+    for row in rows:
+        ws.append(row)
+
+
+async def _xlsx_body(sources, columns, sheet_name: str) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+    ws.append([c.header for c in columns])
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        async for rows in _iter_row_chunks(sources, columns):
+            # 셀 기록은 CPU 작업 → 이벤트 루프를 막지 않도록 스레드에서
+            await asyncio.to_thread(_append_rows, ws, rows)
+        await asyncio.to_thread(wb.save, path)
+        with open(path, "rb") as f:
+            while True:
+                data = await asyncio.to_thread(f.read, _FILE_CHUNK_BYTES)
+                if not data:
+                    break
+                yield data
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def stream_export(
+    sources: Sequence[ExportSource],
+    columns: List[ExportColumn],
+    filename: str,
+    fmt: str = "xlsx",
+    sheet_name: str = "Sheet1",
+) -> StreamingResponse:
+    """filename 은 확장자 제외. fmt: xlsx / csv"""
+    fmt = (fmt or "xlsx").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {fmt}")
+    if fmt == "csv":
+        body, media_type = _csv_body(sources, columns), CSV_MEDIA_TYPE
+    else:
+        body, media_type = _xlsx_body(sources, columns, sheet_name), XLSX_MEDIA_TYPE
+    full_name = f"{filename}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(full_name)}"},
+    )
@@ -35,6 +35,26 @@ class Settings(BaseSettings):
         key = self.VAPID_PRIVATE_KEY or ""
         return key.replace('"', '').replace("'", "").strip()
     
+    # Background export workers (생산관리시트 엑셀 생성 프로세스 수)
+    EXPORT_WORKERS: int = 2
+    # 스트리밍 엑셀/CSV 내보내기: 서버 측 커서에서 한 번에 읽는 행 수
+    EXPORT_CHUNK_ROWS: int = 1000
+    # 분석용 Parquet 내보내기 저장 위치 (정적 파일로 공개되지 않는 경로, 월별 파티션)
+    ANALYTICS_EXPORT_DIR: str = "exports/analytics"
+
+    # 납기 회답(ATP/CTP): 공정별 일 가용 작업분, 외주/구매 공정 리드타임(영업일), 타임라인 캐시 최대 수명(초)
+    ATP_DAILY_CAPACITY_MINUTES: int = 480
+    ATP_EXTERNAL_LEAD_DAYS: int = 3
+    ATP_CACHE_TTL_SECONDS: int = 300
+
+    # 정산/리포트 응답 캐시: 프로세스당 보관할 최대 응답 수 (0 이면 ETag/304 만 사용)
+    REPORT_CACHE_MAX_ENTRIES: int = 256
+    # 정산/리포트 독립 집계 조회를 동시에 실행할 때 요청당 최대 연결 수
+    REPORT_QUERY_CONCURRENCY: int = 3
+
+    # 환율 미등록 시 USD→KRW 기본 환율
+    DEFAULT_USD_KRW_RATE: float = 1350.0
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
@@ -9,6 +9,13 @@ from app.models.basics import Company, Staff, EmployeeTimeRecord
 from app.models.approval import ApprovalDocument, ApprovalStep
 from app.utils.push import send_push_notification
 from app.core.timezone import now_kst
+from app.api.utils.cycle_time import recompute_cycle_time_stats
+from app.api.utils.performance import rebuild_worker_daily_performance
+from app.api.utils.pricing import rebuild_latest_prices
+from app.api.utils.fx import backfill_krw_amounts
+from app.api.utils.settlement_facts import rebuild_settlement_facts
+from app.api.utils.quality_rollups import rebuild_quality_rollups
+from app.api.utils.analytics_export import run_analytics_export, pyarrow_available
 
 kr_holidays = holidays.KR()
 
@@ -140,11 +147,112 @@ async def check_attendance_and_notify():
                     url="/attendance"
                 ))
 
+async def refresh_cycle_time_stats():
+    """
+    매일 새벽 작업일지 전체 이력으로 품목/공정별 사이클타임 통계를 재계산.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await recompute_cycle_time_stats(db)
+            print(f"[Scheduler] Cycle-time stats refreshed ({count} product/process pairs).")
+        except Exception as e:
+            print(f"[Scheduler] Cycle-time stats refresh failed: {e}")
+            await db.rollback()
+
+async def reconcile_worker_daily_performance():
+    """
+    매일 새벽 작업자 일별 실적 집계를 원본 작업일지 기준으로 전체 재구축 (증분 갱신 누락 보정).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await rebuild_worker_daily_performance(db)
+            print(f"[Scheduler] Worker daily performance reconciled ({count} rows).")
+        except Exception as e:
+            print(f"[Scheduler] Worker daily performance reconcile failed: {e}")
+            await db.rollback()
+
+async def reconcile_latest_prices():
+    """
+    매일 새벽 품목 최근 단가 테이블 전체 재구축 (MRP/생산계획 등 자동 발주 경로 반영 및 누락 보정).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await rebuild_latest_prices(db)
+            print(f"[Scheduler] Product latest prices reconciled ({count} rows).")
+        except Exception as e:
+            print(f"[Scheduler] Product latest prices reconcile failed: {e}")
+            await db.rollback()
+
+async def stamp_missing_krw_amounts():
+    """
+    매일 새벽 원화 환산 금액이 비어 있는 수주/납품/발주 품목 보정 (자동 생성 경로 등 저장 훅 누락분).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await backfill_krw_amounts(db)
+            print(f"[Scheduler] KRW amounts stamped ({count} rows).")
+        except Exception as e:
+            print(f"[Scheduler] KRW amount stamping failed: {e}")
+            await db.rollback()
+
+async def reconcile_settlement_facts():
+    """
+    매일 새벽 정산 사실/일별 집계 전체 재구축 (원화 환산 보정 반영 및 증분 갱신 누락 보정).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await rebuild_settlement_facts(db)
+            print(f"[Scheduler] Settlement facts reconciled ({count} lines).")
+        except Exception as e:
+            print(f"[Scheduler] Settlement facts reconcile failed: {e}")
+            await db.rollback()
+
+async def reconcile_quality_rollups():
+    """
+    매일 새벽 품질 분석 집계(불량/작업 실적/고객불만 일별) 전체 재구축 (증분 갱신 누락 보정).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            count = await rebuild_quality_rollups(db)
+            print(f"[Scheduler] Quality rollups reconciled ({count} defect rows).")
+        except Exception as e:
+            print(f"[Scheduler] Quality rollups reconcile failed: {e}")
+            await db.rollback()
+
+async def export_analytics_parquet(full: bool = False):
+    """
+    분석용 Parquet 내보내기: 매일 새벽 변경된 월만 증분, 주 1회 전체 재작성.
+    """
+    if not pyarrow_available():
+        return
+    try:
+        summary = await run_analytics_export(full=full)
+        written = sum(len(s["written"]) for s in summary)
+        rows = sum(s["rows"] for s in summary)
+        print(f"[Scheduler] Analytics parquet exported ({'full' if full else 'incremental'}: {written} partitions, {rows} rows).")
+    except Exception as e:
+        print(f"[Scheduler] Analytics parquet export failed: {e}")
+
 def start_scheduler():
     if not scheduler.running:
         # 매 1분마다 실행 (0초에 실행)
         scheduler.add_job(check_attendance_and_notify, 'cron', minute='*')
         # 미결재 알림: 매 정각(0분) 마다 실행
         scheduler.add_job(check_pending_approvals_and_notify, 'cron', minute='0')
+        # 사이클타임 통계: 매일 02:30 재계산
+        scheduler.add_job(refresh_cycle_time_stats, 'cron', hour='2', minute='30')
+        # 작업자 일별 실적 집계 정합성 보정: 매일 02:40
+        scheduler.add_job(reconcile_worker_daily_performance, 'cron', hour='2', minute='40')
+        # 품목 최근 단가 테이블 정합성 보정: 매일 02:50
+        scheduler.add_job(reconcile_latest_prices, 'cron', hour='2', minute='50')
+        # 원화 환산 금액 누락분 보정: 매일 02:55
+        scheduler.add_job(stamp_missing_krw_amounts, 'cron', hour='2', minute='55')
+        # 정산 사실 테이블 정합성 보정: 매일 03:05 (원화 환산 보정 이후)
+        scheduler.add_job(reconcile_settlement_facts, 'cron', hour='3', minute='5')
+        # 품질 분석 집계 정합성 보정: 매일 03:15
+        scheduler.add_job(reconcile_quality_rollups, 'cron', hour='3', minute='15')
+        # 분석용 Parquet 내보내기: 매일 03:30 증분, 일요일 04:00 전체
+        scheduler.add_job(export_analytics_parquet, 'cron', hour='3', minute='30')
+        scheduler.add_job(export_analytics_parquet, 'cron', day_of_week='sun', hour='4', minute='0', kwargs={"full": True})
         scheduler.start()
         print("Backend: Scheduler started (Attendance Check & Approval Reminder).")
@@ -292,6 +292,13 @@ async def fix_orphaned_mrp():
             
     return {"message": f"성공적으로 {count}건의 미결 데이터를 종결 처리했습니다."}
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.api.utils.production_sheet import shutdown_executor
+    from app.api.utils.outbox import stop_outbox_consumer
+    stop_outbox_consumer()
+    shutdown_executor()
+
 @app.on_event("startup")
 async def startup_event():
     """Database migrations and initialization tasks on startup"""
@@ -1880,6 +1887,149 @@ async def startup_event():
                 except Exception as e:
                     await db.rollback()
                     print(f"Startup: employee_annual_leaves prior_used_hours migration failed (may already exist): {e}")
+
+                # [NEW] 수주 목록 키셋 페이지네이션용 복합 인덱스 (order_date, id)
+                try:
+                    await db.execute(text("CREATE INDEX IF NOT EXISTS ix_sales_orders_order_date_id ON sales_orders (order_date, id)"))
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: sales_orders keyset index creation failed: {e}")
+
+                # [NEW] 정산/목록 기간 조회용 복합·FK·키셋 식 인덱스 (모델 __table_args__ 와 동일, alembic b7e3c91d4a28 / 0c4e9a7d2f61)
+                try:
+                    from sqlalchemy.schema import CreateIndex
+                    from app.db.base import Base
+                    index_tables = [
+                        "sales_orders", "sales_order_items", "delivery_histories", "delivery_history_items",
+                        "purchase_orders", "purchase_order_items", "outsourcing_orders", "outsourcing_order_items",
+                        "material_requirements", "production_plans", "production_plan_items",
+                        "quality_defects", "customer_complaints", "approval_documents", "employee_time_records",
+                    ]
+                    for tbl in index_tables:
+                        for idx in Base.metadata.tables[tbl].indexes:
+                            if idx.unique:
+                                continue
+                            await db.execute(CreateIndex(idx, if_not_exists=True))
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: settlement/list query index creation failed: {e}")
+
+                # [NEW] 검색 인덱스 (Postgres: pg_trgm GIN / SQLite: FTS5 섀도 테이블 + 트리거)
+                from app.api.utils.search import init_search_index
+                await init_search_index(db)
+
+                # [NEW] 원화 환산 금액 컬럼 (수주/납품/구매발주 품목)
+                try:
+                    krw_tables = ["sales_order_items", "delivery_history_items", "purchase_order_items"]
+                    for tbl in krw_tables:
+                        if is_sqlite:
+                            tbl_cols = await db.execute(text(f"PRAGMA table_info('{tbl}')"))
+                            tbl_cols_list = [row[1] for row in tbl_cols.fetchall()]
+                            for col in ("exchange_rate", "amount_krw"):
+                                if col not in tbl_cols_list:
+                                    await db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN {col} FLOAT"))
+                                    print(f"Startup: Added {col} to {tbl} (SQLite)")
+                        else:
+                            await db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN IF NOT EXISTS exchange_rate FLOAT"))
+                            await db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN IF NOT EXISTS amount_krw FLOAT"))
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: KRW amount columns migration failed: {e}")
+
+                # [NEW] 품목 최상위 그룹 컬럼 + 품목 그룹 closure 테이블 재구성 (깊이 제한 없는 그룹 필터)
+                try:
+                    if is_sqlite:
+                        prod_cols = await db.execute(text("PRAGMA table_info('products')"))
+                        if "major_group_id" not in [row[1] for row in prod_cols.fetchall()]:
+                            await db.execute(text("ALTER TABLE products ADD COLUMN major_group_id INTEGER"))
+                            print("Startup: Added major_group_id to products (SQLite)")
+                    else:
+                        await db.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS major_group_id INTEGER"))
+                    await db.execute(text("CREATE INDEX IF NOT EXISTS ix_products_major_group_id ON products (major_group_id)"))
+                    from app.api.utils.product_groups import refresh_group_hierarchy
+                    closure_rows = await refresh_group_hierarchy(db)
+                    await db.commit()
+                    print(f"Startup: product group hierarchy refreshed ({closure_rows} closure rows)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: product group hierarchy refresh failed: {e}")
+
+                # [NEW] Initial backfill of worker_daily_performance rollup
+                try:
+                    from app.api.utils.performance import rebuild_worker_daily_performance
+                    perf_count = (await db.execute(text("SELECT COUNT(*) FROM worker_daily_performance"))).scalar()
+                    if not perf_count:
+                        rebuilt = await rebuild_worker_daily_performance(db)
+                        print(f"Startup: worker_daily_performance backfilled ({rebuilt} rows)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: worker_daily_performance backfill failed: {e}")
+
+                # [NEW] Initial backfill of product_latest_prices
+                try:
+                    from app.api.utils.pricing import rebuild_latest_prices
+                    price_count = (await db.execute(text("SELECT COUNT(*) FROM product_latest_prices"))).scalar()
+                    if not price_count:
+                        rebuilt = await rebuild_latest_prices(db)
+                        print(f"Startup: product_latest_prices backfilled ({rebuilt} rows)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: product_latest_prices backfill failed: {e}")
+
+                # [NEW] 원화 환산 금액 미기록 행 환산 (최초 도입 시 전체)
+                try:
+                    from app.api.utils.fx import backfill_krw_amounts
+                    stamped = await backfill_krw_amounts(db)
+                    if stamped:
+                        print(f"Startup: KRW amounts backfilled ({stamped} rows)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: KRW amounts backfill failed: {e}")
+
+                # [NEW] Initial backfill of settlement fact tables (원화 환산 금액 보정 이후)
+                try:
+                    from app.api.utils.settlement_facts import rebuild_settlement_facts
+                    fact_count = (await db.execute(text("SELECT COUNT(*) FROM settlement_fact_lines"))).scalar()
+                    if not fact_count:
+                        rebuilt = await rebuild_settlement_facts(db)
+                        print(f"Startup: settlement facts backfilled ({rebuilt} lines)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: settlement facts backfill failed: {e}")
+
+                # [NEW] 품질 분석 집계(불량/작업 실적/고객불만 일별) 최초 적재
+                try:
+                    rollup_count = (await db.execute(text(
+                        "SELECT (SELECT COUNT(*) FROM quality_defect_daily) + (SELECT COUNT(*) FROM quality_process_output_daily)"
+                        " + (SELECT COUNT(*) FROM quality_complaint_daily)"
+                    ))).scalar()
+                    source_count = (await db.execute(text(
+                        "SELECT (SELECT COUNT(*) FROM quality_defects) + (SELECT COUNT(*) FROM work_log_items)"
+                        " + (SELECT COUNT(*) FROM customer_complaints)"
+                    ))).scalar()
+                    if not rollup_count and source_count:
+                        from app.api.utils.quality_rollups import rebuild_quality_rollups
+                        rebuilt = await rebuild_quality_rollups(db)
+                        print(f"Startup: quality rollups backfilled ({rebuilt} defect rows)")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: quality rollups backfill failed: {e}")
+
+                # [NEW] 정산 월별 큐브 최초 적재 (사실 테이블은 있는데 큐브가 비어 있는 기존 DB)
+                try:
+                    cube_count = (await db.execute(text("SELECT COUNT(*) FROM settlement_monthly_cube"))).scalar()
+                    daily_count = (await db.execute(text("SELECT COUNT(*) FROM settlement_daily_facts"))).scalar()
+                    if not cube_count and daily_count:
+                        from app.api.utils.settlement_cube import rebuild_monthly_cube
+                        await rebuild_monthly_cube(db)
+                        await db.commit()
+                        print("Startup: settlement monthly cube backfilled")
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Startup: settlement monthly cube backfill failed: {e}")
             except Exception as e:
                 print(f"Startup: MRP auto-patch failed: {e}")
                 await db.rollback()
@@ -1888,6 +2038,22 @@ async def startup_event():
     except Exception as e:
         print(f"Startup: DB initialization crashed: {e}")
 
+    # 생산 상태 부수효과 아웃박스 소비자 시작 (테이블 생성 이후)
+    from app.api.utils.outbox import start_outbox_consumer
+    start_outbox_consumer()
+
+    # 납기 회답(ATP) 타임라인 무효화용 세션 이벤트 등록
+    from app.api.utils.atp import install_atp_listeners
+    install_atp_listeners()
 
+    # 불량/고객불만/작업일지 변경 일자를 품질 분석 집계 갱신 대기열에 기록하는 세션 이벤트 등록
+    from app.api.utils.quality_rollups import install_quality_rollup_listeners
+    install_quality_rollup_listeners()
 
+    # 품목 생성/그룹 변경 시 최상위 그룹(major_group_id) 계산 세션 이벤트 등록
+    from app.api.utils.product_groups import install_product_group_listeners
+    install_product_group_listeners()
 
+    # 정산 사실 테이블 증분 갱신용 변경 문서 기록 세션 이벤트 등록
+    from app.api.utils.settlement_facts import install_settlement_listeners
+    install_settlement_listeners()
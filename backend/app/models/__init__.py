@@ -1,7 +1,16 @@
-from .basics import Partner, Contact, Company, Staff, EmployeeTimeRecord, AttendanceStatus
+from .basics import Partner, Contact, Company, Staff, EmployeeTimeRecord, AttendanceStatus, ExchangeRate
 from .hr import AttendanceLog, AttendanceLogType
-from .product import Product, Process, ProductProcess, Inventory, BOM
+from .product import Product, Process, ProductProcess, Inventory, BOM, ProductLatestPrice
 from .sales import Estimate, EstimateItem, SalesOrder, SalesOrderItem
-from .production import ProductionPlan, ProductionPlanItem
-from .quality import InspectionResult, Attachment, QualityDefect
+from .production import ProductionPlan, ProductionPlanItem, ProcessCycleTimeStat, WorkerDailyPerformance
+from .quality import (
+    InspectionResult, Attachment, QualityDefect,
+    QualityDefectDaily, QualityProcessOutputDaily, QualityComplaintDaily, QualityRollupDirty,
+)
 from .purchasing import PurchaseOrder, PurchaseOrderItem, OutsourcingOrder, OutsourcingOrderItem
+from .outbox import OutboxEvent
+from .settlement import (
+    SettlementFactLine, SettlementDailyFact, SettlementMonthlyCube, SettlementDirtyDoc, SettlementPeriodVersion,
+    SettlementClosing, SettlementSnapshotRow, SettlementSnapshotDaily, SettlementClosingAudit,
+)
+from .analytics import AnalyticsExportPartition
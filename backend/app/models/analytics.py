@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from app.db.base import Base
+from app.core.timezone import now_kst
+
+
+class AnalyticsExportPartition(Base):
+    """
+    분석용 Parquet 내보내기 워터마크: 데이터셋 × 월 파티션별 마지막 내보내기 시점의 지문
+    증분 내보내기는 현재 지문(row_count, id_sum, value_sum)이 저장값과 다른 월만 다시 씁니다.
+    """
+    __tablename__ = "analytics_export_partitions"
+    __table_args__ = (
+        UniqueConstraint("dataset", "period", name="uq_analytics_export_partition"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset = Column(String, nullable=False) # delivery_lines, purchase_lines, outsourcing_lines, work_log_items, stock_transactions
+    period = Column(String, nullable=False) # YYYY-MM
+    row_count = Column(Integer, default=0)
+    max_id = Column(Integer, nullable=True)
+    id_sum = Column(Integer, default=0)
+    value_sum = Column(Float, default=0.0) # 수량/금액 컬럼 합 (값 수정 감지용)
+    file_path = Column(String, nullable=True) # ANALYTICS_EXPORT_DIR 기준 상대 경로
+    file_size = Column(Integer, default=0)
+    exported_at = Column(DateTime, default=now_kst)
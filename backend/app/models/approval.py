@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, Date, DateTime, Text, Float, func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, Date, DateTime, Text, Float, func, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.core.timezone import now_kst
@@ -38,6 +38,10 @@ class ApprovalLine(Base):
 class ApprovalDocument(Base):
     """결재 문서"""
     __tablename__ = "approval_documents"
+    __table_args__ = (
+        Index("ix_approval_documents_type_status_created", "doc_type", "status", "created_at"),
+        Index("ix_approval_documents_author_created", "author_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     author_id = Column(Integer, ForeignKey("staff.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, Date, DateTime, Text, Float, Time, Enum, func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, Date, DateTime, Text, Float, Time, Enum, func, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.core.timezone import now_kst
@@ -124,6 +124,9 @@ class Staff(Base):
 class EmployeeTimeRecord(Base):
     """사원 근태/HR 기록 (전자결재 승인 시 자동 생성 및 수동 관리)"""
     __tablename__ = "employee_time_records"
+    __table_args__ = (
+        Index("ix_employee_time_records_staff_date", "staff_id", "record_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     staff_id = Column(Integer, ForeignKey("staff.id", ondelete="CASCADE"), nullable=False)
@@ -246,3 +249,15 @@ class MeasurementHistory(Base):
     instrument = relationship("MeasuringInstrument", back_populates="history")
 
 
+class ExchangeRate(Base):
+    """일자/통화별 원화 환율 (1 단위 외화 = rate 원)"""
+    __tablename__ = "exchange_rates"
+    __table_args__ = (UniqueConstraint("rate_date", "currency", name="uq_exchange_rate_date_currency"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    rate_date = Column(Date, nullable=False, index=True) # 적용 시작일
+    currency = Column(String(3), nullable=False) # USD 등
+    rate = Column(Float, nullable=False)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime, default=now_kst)
+    updated_at = Column(DateTime, default=now_kst, onupdate=now_kst)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from app.db.base import Base
+from app.core.timezone import now_kst
+
+class OutboxEvent(Base):
+    """
+    트랜잭셔널 아웃박스: 상태 변경과 같은 트랜잭션에 부수효과 이벤트를 기록하고
+    백그라운드 소비자가 순서대로(집계 단위) 처리/재시도합니다.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_next", "status", "next_attempt_at"),
+        Index("ix_outbox_events_aggregate", "aggregate_type", "aggregate_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False) # e.g. production.plan_completed
+    aggregate_type = Column(String, nullable=False) # e.g. production_plan
+    aggregate_id = Column(Integer, nullable=True)
+    payload = Column(JSON, nullable=True)
+    idempotency_key = Column(String, nullable=False, unique=True)
+
+    status = Column(String, default="PENDING") # PENDING, PROCESSING, DONE, FAILED, DISCARDED
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=8)
+    next_attempt_at = Column(DateTime, default=now_kst)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=now_kst)
+    processed_at = Column(DateTime, nullable=True)
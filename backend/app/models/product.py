@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, UniqueConstraint, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, UniqueConstraint, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -18,11 +18,26 @@ class ProductGroup(Base):
     products = relationship("Product", back_populates="group")
     processes = relationship("Process", back_populates="group")
 
+class ProductGroupClosure(Base):
+    """
+    품목 그룹 계층 closure 테이블: (조상, 자손, 깊이) — 자기 자신(depth 0) 포함
+    그룹 생성/수정/삭제 시 app.api.utils.product_groups.refresh_group_hierarchy() 로 재구성합니다.
+    """
+    __tablename__ = "product_group_closure"
+    __table_args__ = (
+        Index("ix_product_group_closure_descendant", "descendant_id"),
+    )
+
+    ancestor_id = Column(Integer, primary_key=True)
+    descendant_id = Column(Integer, primary_key=True)
+    depth = Column(Integer, nullable=False, default=0)
+
 class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("product_groups.id"), nullable=True) # 대/소그룹
+    major_group_id = Column(Integer, nullable=True, index=True) # 최상위 그룹 (group_id 의 루트, 자동 계산)
     partner_id = Column(Integer, ForeignKey("partners.id"), nullable=True) # 거래처 (고객사/공급사)
     name = Column(String, index=True, nullable=False) # 품명
     specification = Column(String, nullable=True) # 규격
@@ -125,3 +140,25 @@ class ProductPriceHistory(Base):
     type = Column(String, default="MANUAL") # MANUAL, PURCHASE, SALES 등
 
     product = relationship("Product", back_populates="price_history")
+
+
+class ProductLatestPrice(Base):
+    """
+    품목/거래처/출처별 최근 거래 단가 (견적·수주·발주·외주·수동 이력에서 유지되는 파생 테이블)
+    source: SALES, ESTIMATE, PURCHASE, OUTSOURCING, MANUAL (MANUAL 은 partner_id 없음)
+    """
+    __tablename__ = "product_latest_prices"
+    __table_args__ = (
+        UniqueConstraint("product_id", "partner_id", "source", name="uq_product_latest_price"),
+        Index("ix_product_latest_prices_partner", "partner_id", "product_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    partner_id = Column(Integer, ForeignKey("partners.id", ondelete="CASCADE"), nullable=True)
+    source = Column(String, nullable=False)
+    unit_price = Column(Float, default=0.0)
+    currency = Column(String(3), default='KRW')
+    price_date = Column(Date, nullable=True)
+    reference_no = Column(String, nullable=True) # 주문/견적 번호 또는 수동 입력 비고
+    updated_at = Column(DateTime, default=now_kst)
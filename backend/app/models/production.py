@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Date, DateTime, Boolean, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Date, DateTime, Boolean, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -20,6 +20,9 @@ class ProductionPlan(Base):
     수주 기반 생산 계획 헤더
     """
     __tablename__ = "production_plans"
+    __table_args__ = (
+        Index("ix_production_plans_status_actual_completion_date", "status", "actual_completion_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("sales_orders.id"), nullable=True) # 수주 참조 (재고생산의 경우 null)
@@ -49,6 +52,9 @@ class ProductionPlanItem(Base):
     생산 계획 상세 (공정별 작업 지시)
     """
     __tablename__ = "production_plan_items"
+    __table_args__ = (
+        Index("ix_production_plan_items_plan_id", "plan_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey("production_plans.id"), nullable=False)
@@ -163,3 +169,50 @@ class WorkLogItem(Base):
     work_log = relationship("WorkLog", back_populates="items")
     plan_item = relationship("ProductionPlanItem", back_populates="work_log_items")
     worker = relationship("Staff", foreign_keys=[worker_id])
+
+
+class ProcessCycleTimeStat(Base):
+    """
+    품목/공정별 실적 사이클타임 통계 (작업일지 기반 배치 집계)
+    단위: 개당 소요 분(min/ea)
+    """
+    __tablename__ = "process_cycle_time_stats"
+    __table_args__ = (UniqueConstraint('product_id', 'process_name', name='uq_cycle_time_product_process'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    process_name = Column(String, nullable=False)
+
+    sample_count = Column(Integer, default=0) # 유효 실적 건수
+    total_quantity = Column(Integer, default=0) # 누적 양품 수량
+    mean_minutes = Column(Float, nullable=True)
+    median_minutes = Column(Float, nullable=True)
+    p90_minutes = Column(Float, nullable=True)
+    trend_per_30d = Column(Float, nullable=True) # 30일당 개당 소요 분 변화량 (음수 = 개선)
+
+    first_work_date = Column(Date, nullable=True)
+    last_work_date = Column(Date, nullable=True)
+    computed_at = Column(DateTime, default=now_kst)
+
+    product = relationship("Product")
+
+
+class WorkerDailyPerformance(Base):
+    """
+    작업자 × 작업일 × 제품군 실적 집계 (작업일지 변경 시 증분 갱신)
+    """
+    __tablename__ = "worker_daily_performance"
+    __table_args__ = (UniqueConstraint('worker_id', 'work_date', 'product_group_id', name='uq_worker_daily_perf'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    worker_id = Column(Integer, ForeignKey("staff.id", ondelete="CASCADE"), nullable=False, index=True)
+    work_date = Column(Date, nullable=False, index=True)
+    product_group_id = Column(Integer, ForeignKey("product_groups.id", ondelete="SET NULL"), nullable=True)
+
+    good_quantity = Column(Integer, default=0)
+    bad_quantity = Column(Integer, default=0)
+    total_cost = Column(Float, default=0.0) # 양품수량 × 실적단가(없으면 공정비용/수량)
+    item_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=now_kst, onupdate=now_kst)
+
+    worker = relationship("Staff")
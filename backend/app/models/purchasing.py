@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float, DateTime, Enum as SqlEnum, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float, DateTime, Enum as SqlEnum, Text, JSON, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -26,6 +26,11 @@ class PricingType(str, enum.Enum):
 
 class PurchaseOrder(Base):
     __tablename__ = "purchase_orders"
+    __table_args__ = (
+        Index("ix_purchase_orders_status_actual_delivery_date", "status", "actual_delivery_date"),
+        Index("ix_purchase_orders_order_date_id", "order_date", "id"),
+        Index("ix_purchase_orders_order_date_keyset", text("coalesce(order_date, '1900-01-01')"), "id"),  # 목록 키셋 페이지네이션
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_no = Column(String, unique=True, index=True) # PO-YYYYMMDD-XXX
@@ -94,6 +99,10 @@ class PurchaseOrder(Base):
 
 class PurchaseOrderItem(Base):
     __tablename__ = "purchase_order_items"
+    __table_args__ = (
+        Index("ix_purchase_order_items_purchase_order_id", "purchase_order_id"),
+        Index("ix_purchase_order_items_product_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     purchase_order_id = Column(Integer, ForeignKey("purchase_orders.id"), nullable=False)
@@ -101,6 +110,8 @@ class PurchaseOrderItem(Base):
     quantity = Column(Integer, default=0)
     unit_price = Column(Float, default=0.0)
     currency = Column(String(3), default='KRW') # 통화 (KRW/USD)
+    exchange_rate = Column(Float, nullable=True) # 발주일 적용 환율
+    amount_krw = Column(Float, nullable=True) # 원화 환산 금액 (수량 × 단가 × 환율)
     received_quantity = Column(Integer, default=0) # 입고 수량
     note = Column(String, nullable=True)
     order_size = Column(String, nullable=True)
@@ -121,6 +132,11 @@ class PurchaseOrderItem(Base):
 
 class OutsourcingOrder(Base):
     __tablename__ = "outsourcing_orders"
+    __table_args__ = (
+        Index("ix_outsourcing_orders_status_actual_delivery_date", "status", "actual_delivery_date"),
+        Index("ix_outsourcing_orders_order_date_id", "order_date", "id"),
+        Index("ix_outsourcing_orders_order_date_keyset", text("coalesce(order_date, '1900-01-01')"), "id"),  # 목록 키셋 페이지네이션
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_no = Column(String, unique=True, index=True) # OS-YYYYMMDD-XXX
@@ -165,6 +181,9 @@ class OutsourcingOrder(Base):
 
 class OutsourcingOrderItem(Base):
     __tablename__ = "outsourcing_order_items"
+    __table_args__ = (
+        Index("ix_outsourcing_order_items_outsourcing_order_id", "outsourcing_order_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     outsourcing_order_id = Column(Integer, ForeignKey("outsourcing_orders.id"), nullable=False)
@@ -190,6 +209,9 @@ class OutsourcingOrderItem(Base):
 class MaterialRequirement(Base):
     """자재 소요량/부족분 (MRP 결과 기록)"""
     __tablename__ = "material_requirements"
+    __table_args__ = (
+        Index("ix_material_requirements_status_product_id", "status", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
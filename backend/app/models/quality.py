@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, JSON, Date, Enum as SqEnum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, JSON, Date, Enum as SqEnum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -51,6 +51,9 @@ class DefectStatus(str, enum.Enum):
 class QualityDefect(Base):
     """불량 발생 및 처리 내역"""
     __tablename__ = "quality_defects"
+    __table_args__ = (
+        Index("ix_quality_defects_defect_date", "defect_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -86,6 +89,9 @@ class ComplaintStatus(str, enum.Enum):
 class CustomerComplaint(Base):
     """고객 불만 관리"""
     __tablename__ = "customer_complaints"
+    __table_args__ = (
+        Index("ix_customer_complaints_receipt_date", "receipt_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     partner_id = Column(Integer, ForeignKey("partners.id"), nullable=False)
@@ -105,3 +111,72 @@ class CustomerComplaint(Base):
     partner = relationship("Partner")
     order = relationship("SalesOrder")
     delivery_history = relationship("DeliveryHistory")
+
+
+class QualityDefectDaily(Base):
+    """
+    불량 일별 집계: 발생일 × 품목 × 공정 × 작업자 × 불량 사유 (파레토 분석용)
+    작업자는 불량이 발생한 공정(ProductionPlanItem)의 배정 작업자입니다.
+    """
+    __tablename__ = "quality_defect_daily"
+    __table_args__ = (
+        Index("ix_quality_defect_daily_date", "defect_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    defect_date = Column(Date, nullable=False)
+    product_id = Column(Integer, nullable=True)
+    process_name = Column(String, nullable=True)
+    worker_id = Column(Integer, nullable=True)
+    defect_reason = Column(String, nullable=True)
+
+    defect_count = Column(Integer, default=0)
+    quantity = Column(Integer, default=0)
+    amount = Column(Float, default=0.0)
+
+
+class QualityProcessOutputDaily(Base):
+    """작업일지 실적 일별 집계: 작업일 × 품목 × 공정 × 작업자 (공정별 불량률 분모)"""
+    __tablename__ = "quality_process_output_daily"
+    __table_args__ = (
+        Index("ix_quality_process_output_daily_date", "work_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    work_date = Column(Date, nullable=False)
+    product_id = Column(Integer, nullable=True)
+    process_name = Column(String, nullable=True)
+    worker_id = Column(Integer, nullable=True)
+
+    good_quantity = Column(Integer, default=0)
+    bad_quantity = Column(Integer, default=0)
+    item_count = Column(Integer, default=0)
+
+
+class QualityComplaintDaily(Base):
+    """고객불만 일별 집계: 접수일 × 거래처 × 처리상태 (추이 분석용)"""
+    __tablename__ = "quality_complaint_daily"
+    __table_args__ = (
+        Index("ix_quality_complaint_daily_date", "receipt_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    receipt_date = Column(Date, nullable=False)
+    partner_id = Column(Integer, nullable=True)
+    status = Column(String, nullable=True)
+    complaint_count = Column(Integer, default=0)
+
+
+class QualityRollupDirty(Base):
+    """
+    품질 집계 갱신 대기열: 원본 변경과 같은 트랜잭션에 (집계, 일자 또는 참조 id) 를 기록하고
+    품질 분석 조회 시점(또는 야간 보정)에 해당 일자만 다시 집계합니다.
+    rollup: DEFECT / OUTPUT / COMPLAINT (key_date) · WORKLOG / PLAN_ITEM (ref_id) · ALL
+    """
+    __tablename__ = "quality_rollup_dirty"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rollup = Column(String, nullable=False)
+    key_date = Column(Date, nullable=True)
+    ref_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=now_kst)
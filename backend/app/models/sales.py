@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum as SqEnum, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum as SqEnum, Text, JSON, Boolean, Index, text
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -63,6 +63,14 @@ class EstimateItem(Base):
 class SalesOrder(Base):
     """수주 (Header)"""
     __tablename__ = "sales_orders"
+    __table_args__ = (
+        Index("ix_sales_orders_order_date_id", "order_date", "id"),
+        # 목록 키셋 페이지네이션 (app.api.utils.listing.keyset_date_key 와 같은 식)
+        Index("ix_sales_orders_order_date_keyset", text("coalesce(order_date, '1900-01-01')"), "id"),
+        Index("ix_sales_orders_delivery_date_keyset", text("coalesce(delivery_date, '1900-01-01')"), "id"),
+        Index("ix_sales_orders_actual_delivery_date_keyset", text("coalesce(actual_delivery_date, '1900-01-01')"), "id"),
+        Index("ix_sales_orders_status_order_date", "status", "order_date"),  # 정산/상태별 기간 조회
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_no = Column(String, unique=True, index=True)
@@ -89,6 +97,10 @@ class SalesOrder(Base):
 class SalesOrderItem(Base):
     """수주 품목 (Detail)"""
     __tablename__ = "sales_order_items"
+    __table_args__ = (
+        Index("ix_sales_order_items_order_id", "order_id"),
+        Index("ix_sales_order_items_product_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("sales_orders.id"), nullable=False)
@@ -97,6 +109,8 @@ class SalesOrderItem(Base):
     unit_price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False)
     currency = Column(String(3), default='KRW') # 통화 (KRW/USD)
+    exchange_rate = Column(Float, nullable=True) # 수주일 적용 환율
+    amount_krw = Column(Float, nullable=True) # 원화 환산 금액 (수량 × 단가 × 환율)
     delivered_quantity = Column(Integer, default=0)
     status = Column(SqEnum(OrderItemStatus), default=OrderItemStatus.PENDING)
     note = Column(Text, nullable=True)
@@ -107,6 +121,10 @@ class SalesOrderItem(Base):
 class DeliveryHistory(Base):
     """납품 이력 (Header)"""
     __tablename__ = "delivery_histories"
+    __table_args__ = (
+        Index("ix_delivery_histories_delivery_date", "delivery_date"),
+        Index("ix_delivery_histories_order_id", "order_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("sales_orders.id"), nullable=False)
@@ -130,11 +148,17 @@ class DeliveryHistory(Base):
 class DeliveryHistoryItem(Base):
     """납품 내역 상세"""
     __tablename__ = "delivery_history_items"
+    __table_args__ = (
+        Index("ix_delivery_history_items_delivery_id", "delivery_id"),
+        Index("ix_delivery_history_items_order_item_id", "order_item_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     delivery_id = Column(Integer, ForeignKey("delivery_histories.id"), nullable=False)
     order_item_id = Column(Integer, ForeignKey("sales_order_items.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
+    exchange_rate = Column(Float, nullable=True) # 납품일 적용 환율
+    amount_krw = Column(Float, nullable=True) # 원화 환산 매출액 (납품 수량 × 수주 단가 × 환율)
 
     delivery_history = relationship("DeliveryHistory", back_populates="items")
     order_item = relationship("SalesOrderItem")
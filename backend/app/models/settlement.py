@@ -0,0 +1,206 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index, UniqueConstraint, ForeignKey, JSON, Text
+from app.db.base import Base
+from app.core.timezone import now_kst
+
+
+class SettlementFactLine(Base):
+    """
+    정산 사실(fact) 원장: 정산 집계 대상이 되는 원본 행 1건 = 1행
+    kind: ORDER(수주) / DELIVERY(전체 납품) / SALES(매출 인식 납품) / PURCHASE(구매 입고) /
+          OUTSOURCING(외주 입고) / PAYMENT(대금지급 기안 항목) / PRODUCTION(생산 완료) /
+          DEFECT(불량) / COMPLAINT(고객불만)
+    doc_id 는 갱신 단위(수주/발주/외주/생산계획/불량/불만/결재문서 id), line_id 는 원본 행 id
+    (대금지급은 결재문서 내 항목 순번) 입니다.
+    """
+    __tablename__ = "settlement_fact_lines"
+    __table_args__ = (
+        UniqueConstraint("kind", "doc_id", "line_id", name="uq_settlement_fact_line"),
+        Index("ix_settlement_fact_lines_kind_date", "kind", "fact_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    doc_id = Column(Integer, nullable=False)
+    line_id = Column(Integer, nullable=False)
+    fact_date = Column(Date, nullable=False) # 집계 기준일 (수주일/납품일/입고일/완료일/발생일/접수일)
+    order_date = Column(Date, nullable=True) # 목록 표시용 수주/발주일
+    category = Column(String, nullable=True) # 매입 구분 (PART/CONSUMABLE/OUTSOURCING/PAYMENT)
+
+    partner_id = Column(Integer, nullable=True)
+    product_id = Column(Integer, nullable=True)
+    major_group_id = Column(Integer, nullable=True) # 품목 대그룹 (소그룹이면 상위 그룹)
+
+    # 대금지급 기안처럼 마스터 id 가 없는 항목의 표시값
+    partner_label = Column(String, nullable=True)
+    product_label = Column(String, nullable=True)
+    spec_label = Column(String, nullable=True)
+    dept = Column(String, nullable=True)
+
+    quantity = Column(Float, default=0.0)
+    unit_price = Column(Float, default=0.0)
+    currency = Column(String(3), default="KRW")
+    amount = Column(Float, default=0.0) # 거래 통화 금액
+    amount_krw = Column(Float, default=0.0) # 원화 환산 금액
+
+
+class SettlementDailyFact(Base):
+    """
+    일자 × 구분 × 대그룹 × 거래처 × 품목 일별 집계 (대시보드/연간 실적 조회용)
+    SettlementFactLine 이 바뀐 (구분, 일자) 단위로만 다시 집계합니다.
+    """
+    __tablename__ = "settlement_daily_facts"
+    __table_args__ = (
+        Index("ix_settlement_daily_facts_kind_date", "kind", "fact_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    fact_date = Column(Date, nullable=False)
+    kind = Column(String, nullable=False)
+    category = Column(String, nullable=True)
+    major_group_id = Column(Integer, nullable=True)
+    partner_id = Column(Integer, nullable=True)
+    product_id = Column(Integer, nullable=True)
+    partner_label = Column(String, nullable=True)
+    dept = Column(String, nullable=True)
+
+    quantity = Column(Float, default=0.0)
+    amount_krw = Column(Float, default=0.0)
+    row_count = Column(Integer, default=0)
+
+
+class SettlementMonthlyCube(Base):
+    """
+    연 × 월 × 구분 × 대그룹 × 거래처 × 품목 월별 집계 (품목별 연간 실적/전년 대비 조회용, 현재 DELIVERY 만)
+    일별 집계가 바뀐 (구분, 월) 단위로만 다시 집계하며, 마감 월은 마감 스냅샷 기준입니다.
+    """
+    __tablename__ = "settlement_monthly_cube"
+    __table_args__ = (
+        Index("ix_settlement_monthly_cube_kind_period", "kind", "year", "month"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    major_group_id = Column(Integer, nullable=True)
+    partner_id = Column(Integer, nullable=True)
+    product_id = Column(Integer, nullable=True)
+
+    quantity = Column(Float, default=0.0)
+    amount_krw = Column(Float, default=0.0)
+    row_count = Column(Integer, default=0)
+
+
+class SettlementDirtyDoc(Base):
+    """
+    정산 사실 갱신 대기열: 원본 변경과 같은 트랜잭션에 (문서 유형, id) 를 기록하고
+    정산 조회 시점(또는 야간 보정)에 해당 문서의 사실 행만 다시 만듭니다.
+    """
+    __tablename__ = "settlement_dirty_docs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doc_type = Column(String, nullable=False) # SO, DELIVERY, PO, OO, PLAN, DEFECT, COMPLAINT, APPROVAL, PRODUCT, PAYMENTS, NAMES, ALL
+    doc_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=now_kst)
+
+
+class SettlementPeriodVersion(Base):
+    """
+    정산/리포트 응답 캐시 무효화용 버전: (구분, 월) 단위로 사실 행이 바뀔 때마다 증가
+    period 는 "YYYY-MM", 구분 전체는 "*" 이며 kind="ALL" 행은 전체 재구축/거래처·품목명 변경 시 증가합니다.
+    """
+    __tablename__ = "settlement_period_versions"
+    __table_args__ = (
+        UniqueConstraint("kind", "period", name="uq_settlement_period_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    period = Column(String, nullable=False)
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=now_kst, onupdate=now_kst)
+
+
+class SettlementClosing(Base):
+    """
+    월 마감: status CLOSED 인 월은 정산 조회가 마감 시점 스냅샷을 그대로 돌려줍니다.
+    재개(OPEN) 시 스냅샷을 지우고 실시간 집계로 돌아갑니다.
+    """
+    __tablename__ = "settlement_closings"
+    __table_args__ = (
+        UniqueConstraint("period", name="uq_settlement_closing_period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String, nullable=False) # YYYY-MM
+    status = Column(String, default="CLOSED") # CLOSED, OPEN
+    closed_at = Column(DateTime, nullable=True)
+    closed_by = Column(Integer, ForeignKey("staff.id", ondelete="SET NULL"), nullable=True)
+    reopened_at = Column(DateTime, nullable=True)
+    reopened_by = Column(Integer, ForeignKey("staff.id", ondelete="SET NULL"), nullable=True)
+    note = Column(Text, nullable=True)
+    scopes = Column(JSON, nullable=True) # 탭별 스냅샷 조회 범위 목록 {"orders": ["", "g:1", ...], ...}
+    created_at = Column(DateTime, default=now_kst)
+
+
+class SettlementSnapshotRow(Base):
+    """
+    마감 스냅샷: 정산 탭 응답 행 (조회 범위 scope 별)
+    scope: "" (전체) / "g:<대그룹 id>" / "dept:소모품" (매입내역 소모품)
+    """
+    __tablename__ = "settlement_snapshot_rows"
+    __table_args__ = (
+        Index("ix_settlement_snapshot_rows_lookup", "closing_id", "tab", "scope", "seq"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    closing_id = Column(Integer, ForeignKey("settlement_closings.id", ondelete="CASCADE"), nullable=False)
+    tab = Column(String, nullable=False) # orders, sales, purchases, production, defects, complaints
+    scope = Column(String, nullable=False, default="")
+    seq = Column(Integer, nullable=False)
+    data = Column(JSON, nullable=False)
+
+
+class SettlementSnapshotDaily(Base):
+    """마감 스냅샷: 해당 월의 settlement_daily_facts 사본 (거래처·품목·대그룹별, 차트/연간 실적용)"""
+    __tablename__ = "settlement_snapshot_daily"
+    __table_args__ = (
+        Index("ix_settlement_snapshot_daily_kind_date", "kind", "fact_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    closing_id = Column(Integer, ForeignKey("settlement_closings.id", ondelete="CASCADE"), nullable=False, index=True)
+    fact_date = Column(Date, nullable=False)
+    kind = Column(String, nullable=False)
+    category = Column(String, nullable=True)
+    major_group_id = Column(Integer, nullable=True)
+    partner_id = Column(Integer, nullable=True)
+    product_id = Column(Integer, nullable=True)
+    partner_label = Column(String, nullable=True)
+    dept = Column(String, nullable=True)
+
+    quantity = Column(Float, default=0.0)
+    amount_krw = Column(Float, default=0.0)
+    row_count = Column(Integer, default=0)
+
+
+class SettlementClosingAudit(Base):
+    """
+    마감 이력: 마감/재개 이벤트와 마감 후 원본 변경으로 실시간 집계가 스냅샷과 달라진 내역
+    action: CLOSE / REOPEN / CHANGE (CHANGE 는 구분·일자별 변경 전후 수량/원화금액)
+    """
+    __tablename__ = "settlement_closing_audits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    closing_id = Column(Integer, ForeignKey("settlement_closings.id", ondelete="CASCADE"), nullable=False, index=True)
+    action = Column(String, nullable=False)
+    kind = Column(String, nullable=True)
+    fact_date = Column(Date, nullable=True)
+    quantity_before = Column(Float, nullable=True)
+    quantity_after = Column(Float, nullable=True)
+    amount_before = Column(Float, nullable=True)
+    amount_after = Column(Float, nullable=True)
+    source = Column(String, nullable=True) # 변경 원인 문서 (예: SO:12,15 / PO:3 / REBUILD)
+    staff_id = Column(Integer, nullable=True)
+    note = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=now_kst)
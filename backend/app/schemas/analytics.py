@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+# --- Analytics Parquet Export ---
+
+class AnalyticsExportRunRequest(BaseModel):
+    full: bool = False
+    datasets: Optional[List[str]] = None
+
+class AnalyticsExportPartitionResponse(BaseModel):
+    dataset: str
+    period: str
+    row_count: int
+    file_size: int
+    exported_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -275,3 +275,20 @@ class IgnoredDuplicateResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Exchange Rate Schemas
+class ExchangeRateBase(BaseModel):
+    rate_date: date
+    currency: str = "USD"
+    rate: float
+    note: Optional[str] = None
+
+class ExchangeRateCreate(ExchangeRateBase):
+    pass
+
+class ExchangeRateResponse(ExchangeRateBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
@@ -117,6 +117,26 @@ class ProductionPlanCreate(BaseModel):
     plan_date: date
     items: Optional[List[ProductionPlanItemCreate]] = None
 
+class ProductionPlanBatchCreate(BaseModel):
+    order_ids: List[int] = []
+    stock_production_ids: List[int] = []
+    stock_production_order_ids: List[int] = []
+    plan_date: date
+    run_mrp: bool = True
+    prefill_estimates: bool = True
+
+class ProductionPlanBatchEntry(BaseModel):
+    source: str  # ORDER, STOCK_PRODUCTION, STOCK_PRODUCTION_ORDER
+    source_id: int
+    plan_id: Optional[int] = None
+    item_count: int = 0
+    reason: Optional[str] = None
+
+class ProductionPlanBatchResult(BaseModel):
+    created: List[ProductionPlanBatchEntry] = []
+    skipped: List[ProductionPlanBatchEntry] = []
+    mrp_plan_count: int = 0
+
 class ProductionPlanUpdate(BaseModel):
     order_id: Optional[int] = None
     stock_production_id: Optional[int] = None
@@ -210,6 +230,40 @@ class WorkLog(WorkLogBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# --- Cycle Time Statistics ---
+
+class ProcessCycleTimeStat(BaseModel):
+    id: int
+    product_id: int
+    process_name: str
+    sample_count: int = 0
+    total_quantity: int = 0
+    mean_minutes: Optional[float] = None
+    median_minutes: Optional[float] = None
+    p90_minutes: Optional[float] = None
+    trend_per_30d: Optional[float] = None
+    first_work_date: Optional[date] = None
+    last_work_date: Optional[date] = None
+    computed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class OutboxEvent(BaseModel):
+    id: int
+    event_type: str
+    aggregate_type: str
+    aggregate_id: Optional[int] = None
+    payload: Optional[dict] = None
+    status: str
+    attempts: int = 0
+    max_attempts: int = 8
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 # Rebuild models for forward references (Pydantic v2)
 WorkLog.model_rebuild()
 WorkLogItem.model_rebuild()
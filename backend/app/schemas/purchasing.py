@@ -174,6 +174,61 @@ class OutsourcingOrder(OutsourcingOrderBase):
     class Config:
         from_attributes = True
 
+# --- Slim List (keyset pagination) ---
+class PurchaseOrderListRow(BaseModel):
+    id: int
+    order_no: str
+    partner_id: Optional[int] = None
+    partner_name: Optional[str] = None
+    order_id: Optional[int] = None
+    order_date: date
+    delivery_date: Optional[date] = None
+    actual_delivery_date: Optional[date] = None
+    status: str
+    purchase_type: Optional[str] = None
+    is_import: bool = False
+    total_amount: float = 0.0
+    note: Optional[str] = None
+    attachment_file: Optional[Any] = None
+    item_count: int = 0
+    total_quantity: int = 0
+    received_quantity: int = 0
+    first_item_name: Optional[str] = None  # 대표 품목명 ("외 N건" 표시는 item_count 로)
+    currency: str = "KRW"
+    sales_order_number: Optional[str] = None  # 관련 수주/재고생산 번호 (쉼표 구분)
+    related_customer_names: Optional[str] = None
+    process_names: Optional[str] = None
+
+class PurchaseOrderListPage(BaseModel):
+    items: List[PurchaseOrderListRow] = []
+    next_cursor: Optional[str] = None  # 다음 페이지 요청 시 cursor 로 전달
+    total: Optional[int] = None  # include_total=true 일 때만 계산
+
+class OutsourcingOrderListRow(BaseModel):
+    id: int
+    order_no: str
+    partner_id: Optional[int] = None
+    partner_name: Optional[str] = None
+    order_id: Optional[int] = None
+    order_date: date
+    delivery_date: Optional[date] = None
+    actual_delivery_date: Optional[date] = None
+    status: str
+    total_amount: float = 0.0
+    note: Optional[str] = None
+    attachment_file: Optional[Any] = None
+    item_count: int = 0
+    total_quantity: int = 0
+    first_item_name: Optional[str] = None
+    related_sales_order_info: Optional[str] = None
+    related_customer_names: Optional[str] = None
+    process_names: Optional[str] = None
+
+class OutsourcingOrderListPage(BaseModel):
+    items: List[OutsourcingOrderListRow] = []
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
 # --- Simple Schemas for Production Plan Response ---
 class PurchaseOrderSimple(BaseModel):
     id: int
@@ -245,6 +300,65 @@ class MaterialRequirementResponse(MaterialRequirementBase):
     class Config:
         from_attributes = True
 
+# --- MRP → 공급사별 발주 일괄 생성 ---
+class MrpPoProposalRequest(BaseModel):
+    requirement_ids: Optional[List[int]] = None  # 생략 시 all_pending 필요
+    all_pending: bool = False
+    major_group_id: Optional[int] = None
+
+class MrpPoProposalLine(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    specification: Optional[str] = None
+    requirement_ids: List[int] = []
+    required_quantity: int = 0
+    current_stock: int = 0
+    open_purchase_qty: int = 0
+    quantity: int = 0  # 제안 발주 수량 (실질 부족분)
+    unit_price: float = 0.0
+    currency: str = "KRW"
+    price_source: Optional[str] = None  # SUPPLIER / LATEST / PRODUCT
+
+class MrpPoProposal(BaseModel):
+    partner_id: int
+    partner_name: Optional[str] = None
+    lines: List[MrpPoProposalLine] = []
+    total_amount: float = 0.0
+
+class MrpPoProposalResult(BaseModel):
+    proposals: List[MrpPoProposal] = []
+    unassigned: List[MrpPoProposalLine] = []  # 공급사 미정 (품목 거래처/구매 이력 없음)
+    covered: List[MrpPoProposalLine] = []  # 재고/발주 잔량으로 충당
+
+class MrpPoCreateLine(BaseModel):
+    product_id: int
+    quantity: int
+    unit_price: float = 0.0
+    currency: Optional[str] = "KRW"
+    requirement_ids: List[int] = []
+    note: Optional[str] = None
+
+class MrpPoCreateOrder(BaseModel):
+    partner_id: int
+    delivery_date: Optional[date] = None
+    note: Optional[str] = None
+    lines: List[MrpPoCreateLine]
+
+class MrpPoCreateRequest(BaseModel):
+    orders: List[MrpPoCreateOrder]
+    order_date: Optional[date] = None
+
+class MrpPoCreated(BaseModel):
+    id: int
+    order_no: str
+    partner_id: Optional[int] = None
+    item_count: int = 0
+    total_amount: float = 0.0
+
+class MrpPoCreateResult(BaseModel):
+    created: List[MrpPoCreated] = []
+    ordered_requirement_ids: List[int] = []
+
 # --- Consumable Purchase Wait ---
 class ConsumablePurchaseWaitBase(BaseModel):
     approval_id: int
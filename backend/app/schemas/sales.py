@@ -205,6 +205,32 @@ class DeliveryHistoryCreate(DeliveryHistoryBase):
     # "PRODUCE" : 생산 완료 납품 (생산계획 자동 생성 → 재고 입고+출고 상쇄, 기존 재고 불변)
     no_plan_source: Optional[str] = None  # "STOCK" | "PRODUCE" | None
 
+class BulkDeliveryEntry(DeliveryHistoryCreate):
+    order_id: int
+
+class BulkDeliveryCreate(BaseModel):
+    deliveries: List[BulkDeliveryEntry]
+    delivery_date: Optional[date] = None # 개별 납품에 날짜가 없을 때 적용할 공통 납품일
+    atomic: bool = True # True: 한 줄이라도 오류면 전체 미처리 / False: 오류 납품 건만 제외하고 처리
+
+class BulkDeliveryLineError(BaseModel):
+    entry_index: int
+    order_id: Optional[int] = None
+    order_item_id: Optional[int] = None
+    error: str
+
+class BulkDeliveryCreated(BaseModel):
+    entry_index: int
+    order_id: int
+    delivery_id: int
+    delivery_no: str
+    order_status: Optional[str] = None
+
+class BulkDeliveryResult(BaseModel):
+    success: bool
+    created: List[BulkDeliveryCreated] = []
+    errors: List[BulkDeliveryLineError] = []
+
 class DeliveryHistoryUpdate(BaseModel):
     delivery_date: Optional[date] = None
     note: Optional[str] = None
@@ -262,6 +288,120 @@ class SalesOrderItemForStatus(BaseModel):
         from_attributes = True
 
 
+class SalesOrderListRow(BaseModel):
+    """수주 목록 그리드 전용 슬림 행 (품목/공정/BOM/납품이력 그래프 제외)"""
+    id: int
+    order_no: Optional[str] = None
+    partner_id: Optional[int] = None
+    partner_name: Optional[str] = None
+    order_date: Optional[date] = None
+    delivery_date: Optional[date] = None
+    actual_delivery_date: Optional[date] = None
+    delivery_method: Optional[str] = None
+    transaction_date: Optional[date] = None
+    total_amount: float = 0.0
+    status: Optional[str] = None
+    note: Optional[str] = None
+    created_at: Optional[datetime] = None
+    item_count: int = 0
+    first_item_name: Optional[str] = None
+    currency: Optional[str] = "KRW"
+    attachment_file: Optional[Union[List[Any], str]] = None
+    total_quantity: float = 0
+    delivered_quantity: float = 0
+    total_delivered_amount: float = 0.0
+
+    class Config:
+        from_attributes = True
+
+
+class SalesOrderListPage(BaseModel):
+    items: List[SalesOrderListRow] = []
+    next_cursor: Optional[str] = None # "YYYY-MM-DD:id" (다음 페이지 요청 시 cursor 로 전달)
+    total: Optional[int] = None # include_total=true 인 경우에만 계산
+
+
+class RecentPriceBatchRequest(BaseModel):
+    partner_id: int
+    product_ids: List[int] = []
+
+
+class DeliveryStatusLine(BaseModel):
+    """납품 현황 집계 목록의 수주 라인 (납품 수량은 납품 이력 합계)"""
+    id: int
+    product_id: Optional[int] = None
+    product_name: Optional[str] = None
+    specification: Optional[str] = None
+    unit_price: float = 0.0
+    currency: Optional[str] = "KRW"
+    quantity: float = 0
+    delivered_quantity: float = 0
+    remaining_quantity: float = 0
+    delivered_amount: float = 0.0
+    last_delivery_date: Optional[date] = None
+    status: Optional[str] = None
+
+
+class DeliveryStatusRow(BaseModel):
+    """납품 현황 집계 목록 행 (납품 이력 상세 제외)"""
+    id: int
+    order_no: Optional[str] = None
+    partner_id: Optional[int] = None
+    partner_name: Optional[str] = None
+    order_date: Optional[date] = None
+    delivery_date: Optional[date] = None
+    actual_delivery_date: Optional[date] = None
+    delivery_method: Optional[str] = None
+    total_amount: float = 0.0
+    total_delivered_amount: float = 0.0
+    status: Optional[str] = None
+    note: Optional[str] = None
+    ordered_quantity: float = 0
+    delivered_quantity: float = 0
+    remaining_quantity: float = 0
+    delivery_count: int = 0
+    last_delivery_date: Optional[date] = None
+    lines: List[DeliveryStatusLine] = []
+
+
+class DeliveryStatusPage(BaseModel):
+    items: List[DeliveryStatusRow] = []
+    next_cursor: Optional[str] = None # "YYYY-MM-DD:id"
+    total: Optional[int] = None
+
+
+class AtpLineRequest(BaseModel):
+    product_id: int
+    quantity: int
+    requested_date: Optional[date] = None
+
+
+class AtpCheckRequest(BaseModel):
+    lines: List[AtpLineRequest] = []
+    exclude_order_id: Optional[int] = None # 수정 중인 수주 (기존 잔량을 수요에서 제외)
+
+
+class AtpLineResult(BaseModel):
+    product_id: Optional[int] = None
+    quantity: int
+    requested_date: Optional[date] = None
+    on_hand: int = 0
+    available_on_requested: int = 0 # 요청일(없으면 오늘) 기준 약속 가능 수량
+    shortage: int = 0
+    atp_date: Optional[date] = None # 재고/입고 예정분으로 충족 가능한 최초일
+    ctp_date: Optional[date] = None # 부족분 생산 시 완료 예상일
+    ctp_quantity: int = 0
+    earliest_date: Optional[date] = None
+    source: Optional[str] = None # ATP / CTP
+    feasible: bool = False
+
+
+class AtpProjectionPoint(BaseModel):
+    date: date
+    balance: int
+    available: int
+
+
 class DeliveryStatusResponse(BaseModel):
     """납품 현황 목록 전용 응답 스키마 - 직렬화 오류 방지를 위한 슬림 버전"""
     id: int
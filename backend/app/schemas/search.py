@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+from typing import Optional
+
+class SearchHit(BaseModel):
+    type: str # product, partner, sales_order, purchase_order, outsourcing_order, delivery
+    id: int
+    label: Optional[str] = None
+    detail: Optional[str] = None
+    score: float = 0.0
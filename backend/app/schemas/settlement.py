@@ -0,0 +1,45 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from datetime import date, datetime
+
+# --- Settlement Closing (월 마감) ---
+
+class SettlementCloseRequest(BaseModel):
+    year: int
+    month: int
+    note: Optional[str] = None
+
+class SettlementReopenRequest(BaseModel):
+    note: Optional[str] = None
+
+class SettlementClosingResponse(BaseModel):
+    id: int
+    period: str
+    status: str
+    closed_at: Optional[datetime] = None
+    closed_by: Optional[int] = None
+    reopened_at: Optional[datetime] = None
+    reopened_by: Optional[int] = None
+    note: Optional[str] = None
+    scopes: Optional[Dict[str, List[str]]] = None
+
+    class Config:
+        from_attributes = True
+
+class SettlementClosingAuditResponse(BaseModel):
+    id: int
+    closing_id: int
+    action: str
+    kind: Optional[str] = None
+    fact_date: Optional[date] = None
+    quantity_before: Optional[float] = None
+    quantity_after: Optional[float] = None
+    amount_before: Optional[float] = None
+    amount_after: Optional[float] = None
+    source: Optional[str] = None
+    staff_id: Optional[int] = None
+    note: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,119 @@
+"""
+Benchmark: extract()/func.date() 기간 필터 vs 범위 조건(app.api.utils.date_ranges) 실행 계획 비교
+
+정산/결재 목록에서 쓰던 함수 감싼 조건과 인덱스를 타는 반열림 범위 조건을 같은 기간으로 실행해
+실행 계획(Postgres: EXPLAIN ANALYZE, SQLite: EXPLAIN QUERY PLAN)과 소요 시간을 출력합니다.
+인덱스 마이그레이션(b7e3c91d4a28) 적용 전/후로 각각 실행해 비교하세요.
+
+    python scripts/benchmark_date_filters.py 2026 9
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, extract, and_, text
+from app.api import deps
+from app.api.utils.date_ranges import in_period, on_or_after_day, on_or_before_day, period_bounds
+from app.models.approval import ApprovalDocument
+from app.models.production import ProductionPlan, ProductionStatus
+from app.models.purchasing import PurchaseOrder, PurchaseStatus
+from app.models.quality import QualityDefect
+from app.models.sales import SalesOrder
+
+
+def build_cases(year: int, month: int):
+    start, end = period_bounds(year, month)
+    last_day = date.fromordinal(end.toordinal() - 1)
+    return [
+        (
+            "수주 (sales_orders.order_date)",
+            select(func.count(SalesOrder.id)).where(
+                and_(extract('year', SalesOrder.order_date) == year, extract('month', SalesOrder.order_date) == month)
+            ),
+            select(func.count(SalesOrder.id)).where(in_period(SalesOrder.order_date, year, month)),
+        ),
+        (
+            "구매 입고 (purchase_orders.status + actual_delivery_date)",
+            select(func.count(PurchaseOrder.id)).where(
+                PurchaseOrder.status == PurchaseStatus.COMPLETED,
+                extract('year', PurchaseOrder.actual_delivery_date) == year,
+                extract('month', PurchaseOrder.actual_delivery_date) == month,
+            ),
+            select(func.count(PurchaseOrder.id)).where(
+                PurchaseOrder.status == PurchaseStatus.COMPLETED,
+                in_period(PurchaseOrder.actual_delivery_date, year, month),
+            ),
+        ),
+        (
+            "생산 완료 (production_plans.status + actual_completion_date)",
+            select(func.count(ProductionPlan.id)).where(
+                ProductionPlan.status == ProductionStatus.COMPLETED,
+                extract('year', ProductionPlan.actual_completion_date) == year,
+                extract('month', ProductionPlan.actual_completion_date) == month,
+            ),
+            select(func.count(ProductionPlan.id)).where(
+                ProductionPlan.status == ProductionStatus.COMPLETED,
+                in_period(ProductionPlan.actual_completion_date, year, month),
+            ),
+        ),
+        (
+            "불량 (quality_defects.defect_date)",
+            select(func.count(QualityDefect.id)).where(
+                and_(extract('year', QualityDefect.defect_date) == year, extract('month', QualityDefect.defect_date) == month)
+            ),
+            select(func.count(QualityDefect.id)).where(in_period(QualityDefect.defect_date, year, month, is_datetime=True)),
+        ),
+        (
+            "결재 문서 (approval_documents.created_at)",
+            select(func.count(ApprovalDocument.id)).where(
+                func.date(ApprovalDocument.created_at) >= start,
+                func.date(ApprovalDocument.created_at) <= last_day,
+            ),
+            select(func.count(ApprovalDocument.id)).where(
+                on_or_after_day(ApprovalDocument.created_at, start),
+                on_or_before_day(ApprovalDocument.created_at, last_day),
+            ),
+        ),
+    ]
+
+
+async def explain(db, stmt, is_sqlite: bool):
+    sql = str(stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if is_sqlite else "EXPLAIN ANALYZE "
+    plan = [" | ".join(str(c) for c in row) for row in (await db.execute(text(prefix + sql))).all()]
+
+    started = time.perf_counter()
+    for _ in range(5):
+        await db.execute(stmt)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / 5
+    return plan, elapsed_ms
+
+
+async def run(year: int, month: int):
+    async for db in deps.get_db():
+        is_sqlite = db.bind.dialect.name == "sqlite"
+        print(f"[Benchmark] {db.bind.dialect.name} / {year}-{month:02d}")
+        for label, before, after in build_cases(year, month):
+            print(f"\n=== {label}")
+            for tag, stmt in (("extract/date()", before), ("range", after)):
+                try:
+                    plan, elapsed_ms = await explain(db, stmt, is_sqlite)
+                except Exception as e:
+                    await db.rollback()
+                    print(f"  [{tag}] Error: {e}")
+                    continue
+                print(f"  [{tag}] avg {elapsed_ms:.2f} ms")
+                for line in plan:
+                    print(f"      {line}")
+        break  # only need one session
+
+
+if __name__ == "__main__":
+    today = date.today()
+    arg_year = int(sys.argv[1]) if len(sys.argv) > 1 else today.year
+    arg_month = int(sys.argv[2]) if len(sys.argv) > 2 else today.month
+    asyncio.run(run(arg_year, arg_month))
@@ -0,0 +1,21 @@
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.main  # noqa: F401  모든 모델을 Base.metadata 에 등록
+from app.db.base import Base
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """테스트마다 새 SQLite 파일 DB (여러 세션이 같은 DB 를 보도록 파일 사용)"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
@@ -0,0 +1,74 @@
+from datetime import date
+
+from sqlalchemy import update
+
+from app.api.endpoints.sales import read_orders_list, read_delivery_status_list
+from app.models.sales import SalesOrder, DeliveryHistory
+
+
+async def _seed_orders(db):
+    dates = [date(2026, 3, 1), None, date(2026, 3, 2), None, date(2026, 3, 1)]
+    orders = [SalesOrder(order_no=f"SO-{i}", order_date=d) for i, d in enumerate(dates)]
+    db.add_all(orders)
+    await db.flush()
+    # order_date 는 컬럼 기본값(now)이 있어 None 대입만으로는 NULL 이 저장되지 않음
+    null_ids = [o.id for o, d in zip(orders, dates) if d is None]
+    await db.execute(update(SalesOrder).where(SalesOrder.id.in_(null_ids)).values(order_date=None))
+    await db.commit()
+    for o in orders:
+        await db.refresh(o)
+    return orders
+
+
+async def _collect(fetch):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = await fetch(cursor)
+        ids.extend(row.id for row in page.items)
+        pages += 1
+        if not page.next_cursor:
+            return ids, pages
+        cursor = page.next_cursor
+        assert pages < 10
+
+
+async def test_orders_list_pages_past_null_order_dates(db):
+    orders = await _seed_orders(db)
+
+    ids, pages = await _collect(lambda cursor: read_orders_list(limit=2, cursor=cursor, db=db))
+
+    assert pages == 3
+    assert len(ids) == len(set(ids)) == len(orders)
+    # 일자 역순, 같은 일자는 id 역순, 일자 없는 주문은 맨 뒤
+    by_id = {o.id: o for o in orders}
+    assert [by_id[i].order_date for i in ids] == [date(2026, 3, 2), date(2026, 3, 1), date(2026, 3, 1), None, None]
+    assert ids[3] > ids[4]
+
+
+async def test_orders_list_sorts_on_delivery_date_for_delivery_date_type(db):
+    orders = [
+        SalesOrder(order_no="SO-A", order_date=date(2026, 1, 1), delivery_date=date(2026, 5, 1)),
+        SalesOrder(order_no="SO-B", order_date=date(2026, 2, 1), delivery_date=None),
+        SalesOrder(order_no="SO-C", order_date=date(2026, 3, 1), delivery_date=date(2026, 4, 1)),
+    ]
+    db.add_all(orders)
+    await db.commit()
+
+    ids, _ = await _collect(lambda cursor: read_orders_list(limit=1, cursor=cursor, date_type="delivery", db=db))
+
+    assert ids == [orders[0].id, orders[2].id, orders[1].id]
+
+
+async def test_delivery_status_list_pages_past_null_dates(db):
+    orders = await _seed_orders(db)
+    db.add(DeliveryHistory(order_id=orders[1].id, delivery_no="DH-1", delivery_date=date(2026, 3, 5)))
+    orders[1].actual_delivery_date = date(2026, 3, 5)  # 납품 완료 처리 시 기록됨
+    await db.commit()
+
+    ids, _ = await _collect(lambda cursor: read_delivery_status_list(limit=2, cursor=cursor, db=db))
+    assert sorted(ids) == sorted(o.id for o in orders)
+
+    # 실제납품일 기준: 납품 완료일이 없는 주문(NULL)도 끝까지 조회
+    ids, _ = await _collect(lambda cursor: read_delivery_status_list(limit=2, cursor=cursor, date_type="delivery", db=db))
+    assert ids[0] == orders[1].id
+    assert sorted(ids) == sorted(o.id for o in orders)
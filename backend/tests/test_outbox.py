@@ -0,0 +1,38 @@
+import asyncio
+
+from sqlalchemy import select, func
+
+from app.api.utils.outbox import enqueue_event
+from app.models.outbox import OutboxEvent
+
+
+async def _event_count(db) -> int:
+    return (await db.execute(select(func.count(OutboxEvent.id)))).scalar()
+
+
+async def test_concurrent_enqueue_records_one_event(session_factory):
+    # 같은 상태 전이를 두 요청이 동시에 기록: 같은 기본 키가 되어 한 건만 저장되고 둘 다 그 이벤트를 돌려받음 (IntegrityError 없음)
+    async def record():
+        async with session_factory() as session:
+            event = await enqueue_event(session, "production.plan_confirmed", "production_plan", 1, {"plan_id": 1})
+            await session.commit()
+            return event
+
+    first, second = await asyncio.gather(record(), record())
+
+    assert first.id == second.id
+    async with session_factory() as session:
+        assert await _event_count(session) == 1
+
+
+async def test_default_keys_follow_the_state_transition(db):
+    completed_a = await enqueue_event(db, "production.item_completed", "production_plan", 1, {"item_id": 10})
+    completed_b = await enqueue_event(db, "production.item_completed", "production_plan", 1, {"item_id": 11})
+    repeated_a = await enqueue_event(db, "production.item_completed", "production_plan", 1, {"item_id": 10})
+    await db.commit()
+
+    # 다른 공정의 전이는 서로 다른 키, 같은 전이의 반복은 순번으로 구분
+    assert completed_a.idempotency_key.rsplit(":", 1)[0] != completed_b.idempotency_key.rsplit(":", 1)[0]
+    assert repeated_a.idempotency_key.rsplit(":", 1)[0] == completed_a.idempotency_key.rsplit(":", 1)[0]
+    assert repeated_a.id != completed_a.id
+    assert await _event_count(db) == 3
@@ -0,0 +1,57 @@
+from datetime import date
+
+from sqlalchemy import select, update
+
+from app.api.utils.settlement_facts import (
+    install_settlement_listeners, rebuild_settlement_facts, sync_settlement_facts, KIND_OUTSOURCING,
+)
+from app.models.basics import Partner
+from app.models.product import Product
+from app.models.purchasing import OutsourcingOrder, OutsourcingOrderItem, OutsourcingStatus
+from app.models.settlement import SettlementDirtyDoc, SettlementFactLine
+
+
+async def _dirty_types(db):
+    return {doc_type for doc_type, in (await db.execute(select(SettlementDirtyDoc.doc_type))).all()}
+
+
+async def test_bulk_item_status_update_refreshes_incrementally(db):
+    install_settlement_listeners()
+    partner = Partner(name="외주처")
+    product = Product(name="브라켓")
+    db.add_all([partner, product])
+    await db.flush()
+    order = OutsourcingOrder(order_no="OS-1", partner_id=partner.id, order_date=date(2026, 4, 1))
+    db.add(order)
+    await db.flush()
+    db.add(OutsourcingOrderItem(outsourcing_order_id=order.id, product_id=product.id, quantity=5, unit_price=1000))
+    await db.commit()
+    await rebuild_settlement_facts(db)
+    assert await _dirty_types(db) == set()
+
+    # 품목 상태 일괄 변경(status_cascade)은 정산 사실 컬럼이 아니므로 전체 재구축(ALL)을 만들지 않음
+    await db.execute(
+        update(OutsourcingOrderItem)
+        .where(OutsourcingOrderItem.outsourcing_order_id == order.id)
+        .values(status=OutsourcingStatus.COMPLETED)
+    )
+    order.status = OutsourcingStatus.COMPLETED
+    order.actual_delivery_date = date(2026, 4, 10)
+    await db.commit()
+    assert await _dirty_types(db) == {"OO"}
+
+    assert await sync_settlement_facts(db) == 1
+    lines = (await db.execute(select(SettlementFactLine).where(SettlementFactLine.kind == KIND_OUTSOURCING))).scalars().all()
+    assert [(l.doc_id, l.fact_date, l.amount_krw) for l in lines] == [(order.id, date(2026, 4, 10), 5000)]
+    assert await _dirty_types(db) == set()
+
+
+async def test_bulk_order_status_update_still_marks_full_rebuild(db):
+    install_settlement_listeners()
+    db.add(OutsourcingOrder(order_no="OS-2", order_date=date(2026, 4, 1)))
+    await db.commit()
+    await rebuild_settlement_facts(db)
+
+    await db.execute(update(OutsourcingOrder).values(status=OutsourcingStatus.CANCELED))
+    await db.commit()
+    assert await _dirty_types(db) == {"ALL"}